@@ -0,0 +1,47 @@
+"""
+Benchmarks the anomaly detection stage.
+
+Times batch detection over growing series to show linear scaling (constant
+nanoseconds per bar), and the per-bar cost of the streaming updates used when
+new bars are appended.
+
+Usage:
+    python benchmarks/bench_anomaly.py [--bars 100000 1000000 10000000] [--stream-bars 100000]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from benchmarks.bench_indicators import make_frame
+from src.core.anomaly import AnomalyDetector
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bars', type=int, nargs='*', default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument('--stream-bars', type=int, default=100_000, help='Bars fed through the streaming updates')
+    args = parser.parse_args()
+
+    print(f"{'Bars':>12}{'Seconds':>12}{'ns/bar':>10}{'Anomalies':>12}")
+    for bars in args.bars:
+        frame = make_frame(bars)
+        start = time.perf_counter()
+        anomalies = AnomalyDetector(max_gap='1H').detect(frame)
+        elapsed = time.perf_counter() - start
+        print(f"{bars:>12,}{elapsed:>12.3f}{elapsed / bars * 1e9:>10.1f}{len(anomalies):>12,}")
+
+    frame = make_frame(args.stream_bars + 1_000)
+    detector = AnomalyDetector(max_gap='1H')
+    detector.detect(frame.iloc[:1_000])
+    start = time.perf_counter()
+    detector.update(frame)
+    elapsed = time.perf_counter() - start
+    print(f"\nStreaming updates: {elapsed / args.stream_bars * 1e6:.2f} us/bar over {args.stream_bars:,} bars")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmarks the vectorized parameter sweep against a per-configuration loop.
+
+For each grid, times:
+
+    loop         one pandas backtest per configuration, as the notebooks did;
+                 timed over `--loop-limit` configurations and extrapolated
+    sweep        `sweep` of the whole grid as array dimensions
+    parallel     `sweep_many` of every symbol on a process pool
+
+Usage:
+    python benchmarks/bench_backtest.py [--symbols 8] [--bars 2500] [--workers 2] [--loop-limit 50]
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from src.core.backtest import parse_rule, sweep, sweep_many
+
+# Grids timed, from the rules' defaults to dense sweeps.
+GRIDS = [
+    ('ma_crossover', {'fast': range(5, 55, 5), 'slow': range(20, 220, 20)}),
+    ('ma_crossover', {'fast': range(2, 101), 'slow': range(10, 301, 2)}),
+    ('breakout', {'entry': range(10, 110, 10), 'exit': range(5, 55, 5)}),
+    ('breakout', {'entry': range(5, 205, 5), 'exit': range(2, 102, 2)}),
+]
+
+
+def make_prices(symbols: int, bars: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    return {f"SYM{column:03d}": 100 * np.cumprod(1 + rng.normal(0.0003, 0.012, bars)) for column in range(symbols)}
+
+
+def loop_backtest(close: np.ndarray, rule: str, first: int, second: int) -> float:
+    prices = pd.Series(close)
+    if rule == 'ma_crossover':
+        positions = (prices.rolling(first).mean() > prices.rolling(second).mean()).astype(float)
+    else:
+        entries = prices > prices.shift(1).rolling(first).max()
+        exits = prices < prices.shift(1).rolling(second).min()
+        position, held = 0.0, []
+        for entry, exit in zip(entries, exits):
+            position = 1.0 if entry else 0.0 if exit else position
+            held.append(position)
+        positions = pd.Series(held)
+    strategy = positions.shift(1).fillna(0) * prices.pct_change().fillna(0)
+    equity = (1 + strategy).cumprod()
+    return strategy.mean() / strategy.std() * np.sqrt(252), (equity / equity.cummax() - 1).min()
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, default=8)
+    parser.add_argument('--bars', type=int, default=2500, help='Bars per symbol (2500 ~ 10 years daily)')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--loop-limit', type=int, default=50, help='Configurations timed with the loop')
+    args = parser.parse_args()
+
+    closes = make_prices(args.symbols, args.bars)
+    close = next(iter(closes.values()))
+    print(f"{'Rule':<14}{'Configs':>9}{'Loop s':>10}{'Sweep s':>10}{'Speedup':>9}"
+          f"{'Configs/s':>12}{f'Parallel x{args.symbols} s':>20}")
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        # Start the workers so their start-up is not timed.
+        list(executor.map(abs, range(args.workers)))
+        for rule, grid in GRIDS:
+            results, sweep_seconds = timed(sweep, close, rule, grid)
+            pairs = [(first, second) for first in grid[parse_rule(rule).parameters[0]]
+                     for second in grid[parse_rule(rule).parameters[1]]
+                     if rule != 'ma_crossover' or first < second]
+            sample = pairs[::max(1, len(pairs) // args.loop_limit)][:args.loop_limit]
+            _, loop_seconds = timed(lambda: [loop_backtest(close, rule, *pair) for pair in sample])
+            loop_seconds *= len(pairs) / len(sample)
+            _, parallel_seconds = timed(sweep_many, closes, rule, grid, executor=executor, splits=args.workers)
+
+            print(f"{rule:<14}{len(results):>9}{loop_seconds:>10.2f}{sweep_seconds:>10.2f}"
+                  f"{loop_seconds / sweep_seconds:>8.0f}x{len(results) / sweep_seconds:>12,.0f}{parallel_seconds:>20.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmarks writing the reports of many symbols into one PDF.
+
+Two paths lay out the same synthetic symbols, each with its own price history
+and plots:
+
+    report  `ConsolidatedReport`, with a table of contents, a bookmark per
+            symbol and page numbers
+    plain   the sections alone, built as one story with
+            `SimpleDocTemplate.build`, the cost of a bare concatenation
+
+Each run happens in a freshly spawned process so its peak RSS is measured on
+its own. Pages per second cover rendering the plots and laying out the PDF;
+fetching is left out.
+
+Usage:
+    python benchmarks/bench_consolidated.py [--symbols 10 50] [--bars 500] [--dpi 150] [--modes report plain]
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from src.api.parser import parse_time_series
+from src.core.backends import DEFAULT_DPI
+from src.core.consolidated import render_section
+from src.utils.synthetic import make_overview, make_time_series
+
+MODES = ('report', 'plain')
+
+
+def make_datasets(symbol: str, bars: int, seed: int) -> dict:
+    return {
+        'TIME_SERIES_DAILY': parse_time_series(make_time_series(bars, 'B', seed=seed)),
+        'TIME_SERIES_WEEKLY': parse_time_series(make_time_series(bars // 5, 'W-FRI', end='2024-01-26', seed=seed)),
+        'TIME_SERIES_MONTHLY': parse_time_series(make_time_series(bars // 21, 'M', end='2023-12-31', seed=seed)),
+        'OVERVIEW': make_overview(symbol, seed=seed),
+    }
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak RSS of this process in MB, from VmHWM where available, see
+    bench_ingest.py.
+    """
+    try:
+        with open('/proc/self/status') as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_build(mode: str, count: int, args, results) -> None:
+    from reportlab.platypus import PageBreak, SimpleDocTemplate
+
+    from src.core.report_generator import ConsolidatedReport, report_story
+
+    symbols = [f"S{index:04d}" for index in range(count)]
+    options = dict(dpi=args.dpi, indicators=args.indicators, time_range='all')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'report.pdf')
+        start = time.perf_counter()
+        if mode == 'report':
+            sections = ((symbol, render_section(symbol, make_datasets(symbol, args.bars, seed), **options))
+                        for seed, symbol in enumerate(symbols))
+            pages = ConsolidatedReport(path, symbols).build(sections)
+        else:
+            story = []
+            for seed, symbol in enumerate(symbols):
+                story += report_story(**render_section(symbol, make_datasets(symbol, args.bars, seed), **options))
+                story.append(PageBreak())
+            doc = SimpleDocTemplate(path)
+            doc.build(story[:-1])
+            pages = doc.page
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(path)
+
+    results.put({
+        'pages': pages,
+        'seconds': elapsed,
+        'pages_per_second': pages / elapsed,
+        'size_mb': size / 1e6,
+        'peak_rss_mb': peak_rss_mb(),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, nargs='*', default=[10, 50], help='Symbols in the report')
+    parser.add_argument('--bars', type=int, default=500, help='Daily bars per symbol')
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI)
+    parser.add_argument('--indicators', nargs='*', default=['sma:20', 'rsi:14'])
+    parser.add_argument('--modes', nargs='*', choices=MODES, default=list(MODES))
+    args = parser.parse_args()
+
+    print(f"{'Mode':<8}{'Symbols':>8}{'Pages':>7}{'Seconds':>9}{'Pages/s':>9}{'PDF MB':>8}{'Peak RSS MB':>13}")
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    for count in args.symbols:
+        for mode in args.modes:
+            process = context.Process(target=run_build, args=(mode, count, args, queue))
+            process.start()
+            result = queue.get()
+            process.join()
+            print(f"{mode:<8}{count:>8}{result['pages']:>7}{result['seconds']:>9.2f}{result['pages_per_second']:>9.2f}"
+                  f"{result['size_mb']:>8.1f}{result['peak_rss_mb']:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
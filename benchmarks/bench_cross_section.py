@@ -0,0 +1,98 @@
+"""
+Benchmarks the cross-sectional analytics over growing universes.
+
+For each universe size, times:
+
+    align        `PriceMatrix.align` of the symbols' series, 2% of bars missing
+    corr         `correlation_matrix` against `DataFrame.corr`
+    beta         `rolling_beta` of every symbol against `DataFrame.rolling().cov()`
+    shared       `parallel_rolling_beta` on a process pool, matrix in shared memory
+    pickled      the same tasks with each one's columns pickled to the worker
+
+The pandas references are skipped above `--pandas-limit` symbols.
+
+Usage:
+    python benchmarks/bench_cross_section.py [--symbols 100 1000] [--bars 2500] [--window 60] [--workers 2]
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from src.core.cross_section import (BETA_COLUMNS_PER_TASK, PriceMatrix, correlation_matrix, parallel_rolling_beta,
+                                    rolling_beta)
+
+
+def make_universe(symbols: int, bars: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(end='2024-01-31', periods=bars, freq='B')
+    market = rng.normal(0, 0.01, bars)
+    prices = 100 * np.cumprod(1 + market[:, None] * rng.uniform(0.5, 1.5, symbols)
+                              + rng.normal(0, 0.01, (bars, symbols)), axis=0)
+    keep = rng.random((bars, symbols)) > 0.02
+    return {f"SYM{column:04d}": pd.Series(prices[keep[:, column], column], index=index[keep[:, column]])
+            for column in range(symbols)}
+
+
+def _pickled_task(returns: np.ndarray, benchmark: np.ndarray, window: int) -> np.ndarray:
+    return rolling_beta(returns, benchmark, window)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, nargs='*', default=[100, 1000])
+    parser.add_argument('--bars', type=int, default=2500, help='Bars per symbol (2500 ~ 10 years daily)')
+    parser.add_argument('--window', type=int, default=60)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--pandas-limit', type=int, default=200, help='Largest universe timed with pandas')
+    args = parser.parse_args()
+
+    columns = ['align', 'corr', 'corr pandas', 'beta', 'beta pandas', 'shared', 'pickled']
+    print(f"{'Symbols':>8}" + "".join(f"{name + ' ms':>16}" for name in columns))
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        # Start the workers so their start-up is not timed.
+        list(executor.map(abs, range(args.workers)))
+        for symbols in args.symbols:
+            series = make_universe(symbols, args.bars)
+            timings = dict.fromkeys(columns, float('nan'))
+
+            matrix, timings['align'] = timed(PriceMatrix.align, series)
+            returns = matrix.returns()
+            benchmark = np.r_[np.nan, np.nanmean(returns[1:], axis=1)]
+            _, timings['corr'] = timed(correlation_matrix, returns)
+            _, timings['beta'] = timed(rolling_beta, returns, benchmark, args.window)
+            _, timings['shared'] = timed(parallel_rolling_beta, matrix, benchmark, args.window, executor)
+
+            def pickled():
+                futures = [executor.submit(_pickled_task, returns[:, start:start + BETA_COLUMNS_PER_TASK],
+                                           benchmark, args.window)
+                           for start in range(0, symbols, BETA_COLUMNS_PER_TASK)]
+                return np.hstack([future.result() for future in futures])
+            _, timings['pickled'] = timed(pickled)
+
+            if symbols <= args.pandas_limit:
+                frame = pd.DataFrame(returns)
+                _, timings['corr pandas'] = timed(frame.corr)
+                market = pd.Series(benchmark)
+                _, timings['beta pandas'] = timed(
+                    lambda: frame.rolling(args.window, min_periods=args.window // 2).cov(market)
+                    / market.rolling(args.window, min_periods=args.window // 2).var())
+
+            print(f"{symbols:>8}" + "".join(f"{timings[name]:>16.1f}" for name in columns))
+
+
+if __name__ == '__main__':
+    main()
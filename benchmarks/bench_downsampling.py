@@ -0,0 +1,80 @@
+"""
+Benchmarks plotting long histories with and without downsampling.
+
+For each history length, times:
+
+    full        drawing and saving every point with the Agg template
+    lttb        `lttb` down to the plot's pixel width, then drawing and saving
+    minmax      `minmax` over the plot's pixel columns, then drawing and saving
+
+and the downsampling alone. Full plots are skipped above `--full-limit`
+points.
+
+Usage:
+    python benchmarks/bench_downsampling.py [--points 1000 100000 1000000] [--dpi 150] [--repeat 3]
+"""
+import argparse
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from src.core.downsampling import downsample
+from src.core.plot_renderer import DEFAULT_DPI, PlotRenderer
+
+
+def make_history(points: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end='2024-01-31', periods=points, freq='h')
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, points)))
+    return dates, close
+
+
+def timed(function, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--points', type=int, nargs='*', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--full-limit', type=int, default=100000, help='Longest history plotted in full')
+    args = parser.parse_args()
+
+    renderer = PlotRenderer(args.dpi)
+    width = int(renderer.figure.get_size_inches()[0] * renderer.dpi)
+    columns = ['full', 'lttb', 'lttb only', 'minmax', 'minmax only']
+    print(f"Plot width: {width} px")
+    print(f"{'Points':>10}" + "".join(f"{name + ' ms':>16}" for name in columns))
+    for points in args.points:
+        dates, close = make_history(points)
+        x = dates.to_numpy()
+        timings = dict.fromkeys(columns, float('nan'))
+
+        def render(kept=None):
+            plotted = (dates, close) if kept is None else (dates[kept], close[kept])
+            renderer.draw("Hourly trend of 'TEST' stock", *plotted)
+            renderer.save(io.BytesIO())
+
+        if points <= args.full_limit:
+            timings['full'] = timed(render, args.repeat)
+        for method in ('lttb', 'minmax'):
+            timings[f'{method} only'] = timed(lambda: downsample(x, close, width, method), args.repeat)
+            timings[method] = timed(lambda: render(downsample(x, close, width, method)), args.repeat)
+        print(f"{points:>10}" + "".join(f"{timings[name]:>16.1f}" for name in columns))
+
+
+if __name__ == '__main__':
+    main()
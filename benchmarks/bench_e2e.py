@@ -0,0 +1,221 @@
+"""
+End-to-end benchmark of report generation against a local stub Alpha Vantage server.
+
+Each symbol goes through the stages of a report, timed separately:
+
+    fetch   HTTP round trips of the report's four datasets
+    parse   JSON decoding and `parse_time_series`
+    clean   `DataTransformer.clean_data`
+    plot    `ReportGenerator.plot_line` for the three timeframes
+    pdf     `ReportGenerator.generate_pdf_report`
+
+Payloads are synthetic random walks, or testfiles/sample_data.csv replayed and
+scaled to the requested number of bars (`--payload recorded`); a full response
+holds `--full-bars` intraday bars, and weekly and monthly bars covering as many
+trading days.
+Each symbol count runs in a fresh process so its peak RSS is measured on its own.
+
+Results are compared with the stored baseline of the same configuration in
+benchmarks/baselines/bench_e2e.json; stages slower than the baseline by more
+than `--tolerance` are reported as regressions (exit status 1 with `--check`).
+`--save-baseline` records the current results instead.
+
+Usage:
+    python benchmarks/bench_e2e.py [--symbols 1 100 1000] [--outputsize compact|full] [--full-bars 6300]
+                                   [--payload synthetic|recorded] [--dpi 150] [--save-baseline] [--check]
+                                   [--tolerance 0.25]
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from benchmarks.bench_parser import load_sample_series
+from src.api.parser import parse_time_series, series_key
+from src.core.data_processing import DataTransformer
+from src.core.report_generator import ReportGenerator
+from src.utils.stub_server import StubAlphaVantageServer
+from src.utils.synthetic import FUNCTION_FREQUENCIES, make_overview, make_payload, scale_time_series
+
+STAGES = ('fetch', 'parse', 'clean', 'plot', 'pdf')
+BASELINE_PATH = root_dir / 'benchmarks' / 'baselines' / 'bench_e2e.json'
+# Plot resolution the stored baselines were recorded at; other resolutions
+# are compared with baselines of their own.
+BASELINE_DPI = 150
+REQUESTS = [
+    ('TIME_SERIES_INTRADAY', '60min'),
+    ('TIME_SERIES_WEEKLY', None),
+    ('TIME_SERIES_MONTHLY', None),
+    ('OVERVIEW', None),
+]
+# Bars per period of the weekly and monthly series, so a full response of each
+# timeframe spans the same history as `--full-bars` daily bars.
+BARS_PER_PERIOD = {'TIME_SERIES_WEEKLY': 5, 'TIME_SERIES_MONTHLY': 21}
+
+
+class ReplayedPayloads:
+    """
+    Serves one encoded response per function and outputsize, whatever the symbol.
+
+    Generating and encoding thousands of bars per request would otherwise be
+    timed as part of the fetch stage. Payloads are synthetic random walks or
+    testfiles/sample_data.csv scaled to the bars of each response.
+    """
+
+    def __init__(self, payload: str, compact_bars: int, full_bars: int):
+        self.recording = load_sample_series(root_dir / 'testfiles' / 'sample_data.csv') \
+            if payload == 'recorded' else None
+        self.compact_bars = compact_bars
+        self.full_bars = full_bars
+        self._bodies = {}
+
+    def __call__(self, params) -> bytes:
+        function, outputsize = params['function'], params.get('outputsize', 'compact')
+        key = (function, outputsize)
+        if key not in self._bodies:
+            self._bodies[key] = json.dumps(self.payload(function, outputsize, params.get('interval'))).encode()
+        return self._bodies[key]
+
+    def payload(self, function: str, outputsize: str, interval) -> dict:
+        if function == 'OVERVIEW':
+            return make_overview('BENCH')
+        bars = self.compact_bars
+        if outputsize == 'full':
+            bars = max(self.compact_bars, self.full_bars // BARS_PER_PERIOD.get(function, 1))
+        if self.recording is None:
+            return make_payload(function, 'BENCH', bars, interval=interval)
+        freq = 'H' if function == 'TIME_SERIES_INTRADAY' else FUNCTION_FREQUENCIES[function]
+        return {"Meta Data": {"2. Symbol": 'BENCH'},
+                series_key(function, interval): scale_time_series(self.recording, bars, freq)}
+
+
+def run_symbols(count: int, args, results) -> None:
+    timings = dict.fromkeys(STAGES, 0.0)
+
+    with StubAlphaVantageServer(payload_factory=ReplayedPayloads(args.payload, 100, args.full_bars)) as stub, \
+            requests.Session() as session:
+        start = time.perf_counter()
+        for index in range(count):
+            symbol = f"SYM{index:04d}"
+
+            stage = time.perf_counter()
+            bodies = {}
+            for function, interval in REQUESTS:
+                params = {'function': function, 'symbol': symbol, 'outputsize': args.outputsize, 'apikey': 'demo'}
+                if interval:
+                    params['interval'] = interval
+                bodies[function] = session.get(stub.url, params=params).content
+            timings['fetch'] += time.perf_counter() - stage
+
+            stage = time.perf_counter()
+            datasets = {}
+            for function, interval in REQUESTS:
+                data = json.loads(bodies[function])
+                datasets[function] = data if function == 'OVERVIEW' else parse_time_series(data[series_key(function, interval)])
+            timings['parse'] += time.perf_counter() - stage
+
+            stage = time.perf_counter()
+            daily, weekly, monthly = (DataTransformer(datasets[function]).clean_data()
+                                      for function, _ in REQUESTS[:3])
+            timings['clean'] += time.perf_counter() - stage
+
+            stage = time.perf_counter()
+            generator = ReportGenerator(datasets['OVERVIEW'], monthly, weekly, daily, dpi=args.dpi)
+            for time_period in ('D', 'W', 'M'):
+                generator.plot_line(symbol, time_period)
+            timings['plot'] += time.perf_counter() - stage
+
+            stage = time.perf_counter()
+            generator.generate_pdf_report()
+            timings['pdf'] += time.perf_counter() - stage
+        elapsed = time.perf_counter() - start
+
+    results.put({
+        'symbols_per_second': count / elapsed,
+        'ms_per_symbol': {name: seconds / count * 1e3 for name, seconds in timings.items()},
+        # ru_maxrss is in kilobytes on Linux.
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    })
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Returns the metrics of `current` worse than `baseline` by more than `tolerance`.
+    """
+    regressions = []
+    checks = [(f"{name} ms/symbol", current['ms_per_symbol'][name], baseline['ms_per_symbol'][name])
+              for name in STAGES]
+    checks.append(('peak RSS MB', current['peak_rss_mb'], baseline['peak_rss_mb']))
+    for name, value, reference in checks:
+        if reference > 0 and value > reference * (1 + tolerance):
+            regressions.append(f"{name}: {value:.2f} vs baseline {reference:.2f} (+{value / reference - 1:.0%})")
+    if current['symbols_per_second'] < baseline['symbols_per_second'] / (1 + tolerance):
+        regressions.append(f"throughput: {current['symbols_per_second']:.2f} vs baseline "
+                           f"{baseline['symbols_per_second']:.2f} symbols/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, nargs='*', default=[1, 100, 1000])
+    parser.add_argument('--outputsize', choices=['compact', 'full'], default='compact')
+    parser.add_argument('--full-bars', type=int, default=6300, help='Bars in a full response (6300 ~ 25 years daily)')
+    parser.add_argument('--payload', choices=['synthetic', 'recorded'], default='synthetic')
+    parser.add_argument('--save-baseline', action='store_true', help='Store the results as the new baseline')
+    parser.add_argument('--check', action='store_true', help='Exit with status 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown before flagging a regression')
+    parser.add_argument('--dpi', type=int, default=BASELINE_DPI, help='Resolution of the plots')
+    args = parser.parse_args()
+
+    baselines = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    config = f"{args.payload}/{args.outputsize}" + (f"/{args.full_bars}" if args.outputsize == 'full' else '')
+    config += f"/{args.dpi}dpi" if args.dpi != BASELINE_DPI else ''
+    regressions = []
+
+    print(f"Configuration: {config}")
+    print(f"{'Symbols':>8}{'Symbols/s':>11}" + "".join(f"{name + ' ms':>10}" for name in STAGES) + f"{'Peak RSS MB':>13}")
+    queue = multiprocessing.Queue()
+    for count in args.symbols:
+        process = multiprocessing.Process(target=run_symbols, args=(count, args, queue))
+        process.start()
+        result = queue.get()
+        process.join()
+        print(f"{count:>8}{result['symbols_per_second']:>11.2f}"
+              + "".join(f"{result['ms_per_symbol'][name]:>10.2f}" for name in STAGES)
+              + f"{result['peak_rss_mb']:>13.1f}")
+
+        key = str(count)
+        if args.save_baseline:
+            baselines.setdefault(config, {})[key] = result
+        elif key in baselines.get(config, {}):
+            regressions += [f"{count} symbols, {item}"
+                            for item in compare(result, baselines[config][key], args.tolerance)]
+
+    if args.save_baseline:
+        baselines.setdefault('_machine', {})[config] = {'python': platform.python_version(),
+                                                        'platform': platform.platform(),
+                                                        'recorded': time.strftime('%Y-%m-%d')}
+        BASELINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline saved to {BASELINE_PATH.relative_to(root_dir)}")
+    elif regressions:
+        print("\nRegressions against the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        if args.check:
+            raise SystemExit(1)
+    elif baselines.get(config):
+        print("\nNo regressions against the baseline.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmarks the fundamentals store and screener over growing universes.
+
+For each universe size, times:
+
+    parse        `parse_overview` of every raw overview into a typed table
+    load         reopening the store's table from `table.npz`
+    first        the first screen, building the indexes it needs
+    screen       a screen with warm indexes, per query
+    pandas       the same query as a boolean filter of a DataFrame
+    raw          the same query over the raw string dicts, as reports read them
+
+Usage:
+    python benchmarks/bench_fundamentals.py [--symbols 1000 10000] [--repeat 50]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from src.core.fundamentals import FundamentalsStore, FundamentalsTable, parse_overview
+from src.utils.synthetic import make_overview
+
+QUERY = "PERatio < 15 and DividendYield > 0.03 in TECHNOLOGY"
+
+SECTORS = ['TECHNOLOGY', 'ENERGY', 'FINANCE', 'HEALTH CARE', 'INDUSTRIALS', 'UTILITIES']
+
+
+def raw_screen(overviews: list) -> list:
+    matches = []
+    for overview in overviews:
+        try:
+            if overview['Sector'] == 'TECHNOLOGY' and float(overview['PERatio']) < 15 \
+                    and float(overview['DividendYield']) > 0.03:
+                matches.append(overview['Symbol'])
+        except ValueError:
+            continue
+    return sorted(matches)
+
+
+def timed(function, *args, repeat: int = 1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function(*args)
+    return result, (time.perf_counter() - start) * 1e3 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, nargs='*', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=50, help='Repetitions of each timed query')
+    args = parser.parse_args()
+
+    columns = ['parse', 'load', 'first', 'screen', 'pandas', 'raw']
+    print(f"{'Symbols':>8}" + "".join(f"{name + ' ms':>12}" for name in columns) + f"{'Matches':>9}")
+    for symbols in args.symbols:
+        overviews = [make_overview(f"S{i:05d}", SECTORS[i % len(SECTORS)], seed=i) for i in range(symbols)]
+        timings = {}
+        table, timings['parse'] = timed(lambda: FundamentalsTable.from_records(map(parse_overview, overviews)))
+
+        with tempfile.TemporaryDirectory() as root:
+            np.savez(f"{root}/table.npz", **table.columns)
+            table, timings['load'] = timed(lambda: FundamentalsStore(root).table())
+
+        matches, timings['first'] = timed(table.screen, QUERY)
+        _, timings['screen'] = timed(table.screen, QUERY, repeat=args.repeat)
+        frame = pd.DataFrame(table.columns)
+        expected, timings['pandas'] = timed(
+            lambda: frame[(frame.PERatio < 15) & (frame.DividendYield > 0.03) & (frame.Sector == 'TECHNOLOGY')],
+            repeat=args.repeat)
+        raw, timings['raw'] = timed(raw_screen, overviews, repeat=max(1, args.repeat // 10))
+        assert matches['Symbol'].tolist() == sorted(expected['Symbol']) == raw
+
+        print(f"{symbols:>8}" + "".join(f"{timings[name]:>12.2f}" for name in columns) + f"{len(matches):>9}")
+
+
+if __name__ == '__main__':
+    main()
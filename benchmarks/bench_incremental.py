@@ -0,0 +1,81 @@
+"""
+Benchmarks incremental report regeneration over a batch of symbols.
+
+Builds every symbol's report with `build_report`, then times rebuilding the
+batch when:
+
+    cold         nothing has been built yet
+    unchanged    no input changed: one hash check per symbol
+    weekly       a new weekly bar arrived: the weekly plot and PDF are rebuilt
+    daily        a new hourly bar arrived: the daily plot and PDF are rebuilt
+    forced       `force=True` rebuilds everything
+
+Usage:
+    python benchmarks/bench_incremental.py [--symbols 20] [--outputsize compact|full]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from src.api.parser import parse_time_series
+from src.core.pipeline import build_report
+from src.utils.synthetic import make_overview, make_time_series
+
+# Bars of each series by output size.
+BARS = {'compact': 100, 'full': 1000}
+
+
+def make_datasets(symbol: str, bars: int, seed: int) -> dict:
+    """
+    Datasets of a symbol, each series with one bar more than `bars`.
+    """
+    return {
+        'TIME_SERIES_INTRADAY': parse_time_series(make_time_series(bars + 1, 'H', seed=seed)),
+        'TIME_SERIES_WEEKLY': parse_time_series(make_time_series(bars + 1, 'W', seed=seed + 1)),
+        'TIME_SERIES_MONTHLY': parse_time_series(make_time_series(bars + 1, 'M', seed=seed + 2)),
+        'OVERVIEW': make_overview(symbol, seed=seed),
+    }
+
+
+def without_latest(datasets: dict, functions) -> dict:
+    """
+    Drops the newest bar of the given series, as before it arrived.
+    """
+    return dict(datasets, **{function: datasets[function].drop(datasets[function].index.max())
+                             for function in functions})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, default=20)
+    parser.add_argument('--outputsize', choices=list(BARS), default='compact')
+    args = parser.parse_args()
+
+    bars = BARS[args.outputsize]
+    symbols = [f"SYM{index:04d}" for index in range(args.symbols)]
+    runs = {
+        'cold': (('TIME_SERIES_INTRADAY', 'TIME_SERIES_WEEKLY'), False),
+        'unchanged': (('TIME_SERIES_INTRADAY', 'TIME_SERIES_WEEKLY'), False),
+        'weekly': (('TIME_SERIES_INTRADAY',), False),
+        'daily': ((), False),
+        'forced': ((), True),
+    }
+    batch = {symbol: make_datasets(symbol, bars, seed) for seed, symbol in enumerate(symbols)}
+    with tempfile.TemporaryDirectory() as output_root:
+        print(f"{'Run':<12}{'Total s':>10}{'Per symbol ms':>15}")
+        for name, (pending, force) in runs.items():
+            inputs = {symbol: without_latest(datasets, pending) for symbol, datasets in batch.items()}
+            start = time.perf_counter()
+            for symbol, datasets in inputs.items():
+                build_report(symbol, datasets, f"{output_root}/{symbol}", force=force)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<12}{elapsed:>10.2f}{elapsed / len(symbols) * 1e3:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+Benchmarks ingesting months of intraday bars into the history store.
+
+Two paths load the same synthetic 1min months from a local stub Alpha Vantage
+server into an empty store:
+
+    stream  `ingest_intraday`: each month is streamed as CSV, parsed chunk by
+            chunk and spooled to disk by `HistoryStore.ingest`
+    json    each month is downloaded as JSON and parsed with
+            `parse_time_series`, then the whole history is merged at once
+
+Each run happens in a freshly spawned process so its peak RSS is measured on
+its own, apart from the stub server running in the parent. Peak RSS of the
+stream path should stay flat as the number of months grows.
+
+Results are compared with benchmarks/baselines/bench_ingest.json like
+bench_e2e.py: `--save-baseline` records them, `--check` exits with status 1 on
+regressions.
+
+Usage:
+    python benchmarks/bench_ingest.py [--months 1 6 24] [--interval 1min] [--chunk-size 1048576]
+                                      [--save-baseline] [--check] [--tolerance 0.25]
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from src.api.alpha_vantage import AlphaVantageAPI
+from src.api.parser import parse_time_series, series_key
+from src.core.history_store import HistoryStore
+from src.core.ingest import ingest_intraday, month_range
+from src.utils.stub_server import StubAlphaVantageServer
+from src.utils.synthetic import make_intraday_csv
+
+MODES = ('stream', 'json')
+BASELINE_PATH = root_dir / 'benchmarks' / 'baselines' / 'bench_ingest.json'
+LAST_MONTH = '2024-01'
+
+
+def month_payload(params) -> bytes:
+    """
+    One month of synthetic bars, as CSV or in the Alpha Vantage JSON layout.
+    """
+    body = make_intraday_csv(params['month'], params['interval'])
+    if params.get('datatype') == 'csv':
+        return body
+    frame = pd.read_csv(io.BytesIO(body), index_col='timestamp', dtype=str)
+    frame.columns = ['1. open', '2. high', '3. low', '4. close', '5. volume']
+    return json.dumps({"Meta Data": {"2. Symbol": params['symbol']},
+                       series_key('TIME_SERIES_INTRADAY', params['interval']): frame.to_dict('index')}).encode()
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak RSS of this process in MB.
+
+    Read from VmHWM where available: ru_maxrss survives exec, so a spawned
+    child would report at least the RSS of the parent it was forked from.
+    """
+    try:
+        with open('/proc/self/status') as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_ingest(mode: str, months: list, url: str, args, results) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir, AlphaVantageAPI('demo', base_url=url) as api:
+        history = HistoryStore(tmp_dir)
+        start = time.perf_counter()
+        if mode == 'stream':
+            bars = sum(ingest_intraday(api, history, 'BENCH', args.interval, months, args.chunk_size).values())
+        else:
+            frames = []
+            for month in months:
+                params = {"function": "TIME_SERIES_INTRADAY", "symbol": 'BENCH', "interval": args.interval,
+                          "outputsize": "full", "month": month, "apikey": 'demo'}
+                data = api.session.get(url, params=params).json()
+                frames.append(parse_time_series(data[series_key('TIME_SERIES_INTRADAY', args.interval)]))
+            bars = history.merge('BENCH', args.interval, pd.concat(frames))
+        elapsed = time.perf_counter() - start
+
+    results.put({
+        'bars': bars,
+        'seconds': elapsed,
+        'bars_per_second': bars / elapsed,
+        'peak_rss_mb': peak_rss_mb(),
+    })
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Returns the metrics of `current` worse than `baseline` by more than `tolerance`.
+    """
+    regressions = []
+    if current['peak_rss_mb'] > baseline['peak_rss_mb'] * (1 + tolerance):
+        regressions.append(f"peak RSS MB: {current['peak_rss_mb']:.1f} vs baseline {baseline['peak_rss_mb']:.1f}")
+    if current['bars_per_second'] < baseline['bars_per_second'] / (1 + tolerance):
+        regressions.append(f"throughput: {current['bars_per_second']:,.0f} vs baseline "
+                           f"{baseline['bars_per_second']:,.0f} bars/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--months', type=int, nargs='*', default=[1, 6, 24], help='Months of history to ingest')
+    parser.add_argument('--interval', default='1min')
+    parser.add_argument('--chunk-size', type=int, default=1 << 20, help='Bytes parsed at a time by the stream path')
+    parser.add_argument('--modes', nargs='*', choices=MODES, default=list(MODES))
+    parser.add_argument('--save-baseline', action='store_true', help='Store the results as the new baseline')
+    parser.add_argument('--check', action='store_true', help='Exit with status 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown before flagging a regression')
+    args = parser.parse_args()
+
+    baselines = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    config = f"{args.interval}/{args.chunk_size}"
+    regressions = []
+
+    print(f"Configuration: {config}")
+    print(f"{'Mode':<8}{'Months':>7}{'Bars':>10}{'Seconds':>9}{'Bars/s':>11}{'Peak RSS MB':>13}")
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    with StubAlphaVantageServer(payload_factory=month_payload) as stub:
+        for count in args.months:
+            end = pd.Period(LAST_MONTH, freq='M')
+            months = month_range(str(end - count + 1), str(end))
+            for mode in args.modes:
+                process = context.Process(target=run_ingest, args=(mode, months, stub.url, args, queue))
+                process.start()
+                result = queue.get()
+                process.join()
+                print(f"{mode:<8}{count:>7}{result['bars']:>10,}{result['seconds']:>9.2f}"
+                      f"{result['bars_per_second']:>11,.0f}{result['peak_rss_mb']:>13.1f}")
+
+                key = f"{mode}/{count}"
+                if args.save_baseline:
+                    baselines.setdefault(config, {})[key] = result
+                elif key in baselines.get(config, {}):
+                    regressions += [f"{mode}, {count} months, {item}"
+                                    for item in compare(result, baselines[config][key], args.tolerance)]
+
+    if args.save_baseline:
+        baselines.setdefault('_machine', {})[config] = {'python': platform.python_version(),
+                                                        'platform': platform.platform(),
+                                                        'recorded': time.strftime('%Y-%m-%d')}
+        BASELINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline saved to {BASELINE_PATH.relative_to(root_dir)}")
+    elif regressions:
+        print("\nRegressions against the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        if args.check:
+            raise SystemExit(1)
+    elif baselines.get(config):
+        print("\nNo regressions against the baseline.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmarks the columnar time-series parser against the original DataFrame path.
+
+The legacy path builds `pd.DataFrame(series).T` and converts the close price
+row by row in `DataTransformer.clean_data`; the new path parses straight into
+typed arrays with `parse_time_series`.
+
+Usage:
+    python benchmarks/bench_parser.py [--rows 100000 1000000] [--repeat 3]
+"""
+import argparse
+import csv
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from src.api.parser import parse_time_series
+from src.core.data_processing import DataTransformer
+from src.utils.synthetic import make_time_series
+
+
+def load_sample_series(path: Path) -> dict:
+    """
+    Rebuilds the API's JSON mapping from testfiles/sample_data.csv.
+    """
+    with open(path, newline='') as file:
+        reader = csv.DictReader(file)
+        date_column = reader.fieldnames[0]
+        return {row.pop(date_column): row for row in reader}
+
+
+def legacy_path(series: dict) -> pd.DataFrame:
+    """
+    The original get_*_stock_data + clean_data implementation.
+    """
+    df = pd.DataFrame(series).T
+    df = df.reset_index()
+    df['date'] = df['index']
+    df['stock_price'] = df['4. close']
+    df2 = df[['date', 'stock_price']].copy()
+    df2['stock_price'] = df2['stock_price'].apply(lambda x: round(float(x), 2))
+    df2['date'] = pd.to_datetime(df2['date'])
+    return df2.copy()
+
+
+def columnar_path(series: dict) -> pd.DataFrame:
+    return DataTransformer(parse_time_series(series)).clean_data()
+
+
+def measure(function, series: dict, repeat: int):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(series)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    function(series)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='*', default=[1_000_000], help='Synthetic series sizes')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per case, the best is reported')
+    args = parser.parse_args()
+
+    cases = [('sample_data.csv', load_sample_series(root_dir / 'testfiles' / 'sample_data.csv'))]
+    cases += [(f'synthetic {rows:,}', make_time_series(rows, 'T')) for rows in args.rows]
+
+    print(f"{'Input':<22}{'Rows':>10}{'Legacy (s)':>12}{'Columnar (s)':>14}{'Speedup':>9}"
+          f"{'Legacy peak MiB':>17}{'Columnar peak MiB':>19}")
+    for name, series in cases:
+        legacy_time, legacy_peak = measure(legacy_path, series, args.repeat)
+        columnar_time, columnar_peak = measure(columnar_path, series, args.repeat)
+        print(f"{name:<22}{len(series):>10}{legacy_time:>12.4f}{columnar_time:>14.4f}"
+              f"{legacy_time / columnar_time:>8.1f}x{legacy_peak / 2**20:>17.1f}{columnar_peak / 2**20:>19.1f}")
+
+
+if __name__ == '__main__':
+    main()
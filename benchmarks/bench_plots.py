@@ -0,0 +1,108 @@
+"""
+Benchmarks plot rendering: figures per second and peak memory.
+
+Compares the legacy pyplot path (a new figure per plot, never closed, saved at
+300 dpi) with the reused Agg figure template of PlotRenderer and with
+reportlab vector drawings. Each path runs in a fresh process so its peak RSS
+is measured on its own.
+
+Usage:
+    python benchmarks/bench_plots.py [--figures 200] [--points 11] [--dpi 150]
+"""
+import argparse
+import io
+import multiprocessing
+import resource
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from src.core.plot_renderer import DEFAULT_DPI, PLOT_HEIGHT, PLOT_WIDTH, PlotRenderer
+
+
+def make_plot_data(points: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end='2024-01-31', periods=points, freq='D')
+    close = 100 + np.cumsum(rng.normal(0, 1, points))
+    return dates, close, {'sma_3': pd.Series(close).rolling(3).mean().to_numpy()}
+
+
+def render_legacy(figures: int, points: int, dpi: int) -> None:
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    # The legacy path leaks figures on purpose; silence pyplot's warning about it.
+    warnings.filterwarnings('ignore', message='More than 20 figures')
+    dates, close, overlays = make_plot_data(points)
+    for _ in range(figures):
+        fig = plt.figure(figsize=(PLOT_WIDTH, PLOT_HEIGHT))
+        plt.plot(dates, close, marker='o', label='Close')
+        plt.plot(dates, overlays['sma_3'], linewidth=1, label='sma_3')
+        plt.title("Daily trend of 'TEST' stock", loc='left', fontweight='bold', fontsize=10)
+        plt.ylabel("Stock Price (USD)")
+        plt.xticks(rotation=45)
+        plt.grid(True)
+        plt.legend(fontsize=6, loc='upper left')
+        plt.tight_layout()
+        fig.savefig(io.BytesIO(), dpi=300)
+
+
+def render_agg(figures: int, points: int, dpi: int) -> None:
+    dates, close, overlays = make_plot_data(points)
+    renderer = PlotRenderer(dpi)
+    for _ in range(figures):
+        renderer.draw("Daily trend of 'TEST' stock", dates, close, overlays)
+        renderer.save(io.BytesIO())
+
+
+def render_vector(figures: int, points: int, dpi: int) -> None:
+    from reportlab.graphics import renderPDF
+
+    dates, close, overlays = make_plot_data(points)
+    for _ in range(figures):
+        drawing = PlotRenderer.drawing("Daily trend of 'TEST' stock", dates, close, overlays)
+        renderPDF.drawToString(drawing)
+
+
+PATHS = {
+    'pyplot @300dpi (legacy)': render_legacy,
+    'Agg template': render_agg,
+    'reportlab vector': render_vector,
+}
+
+
+def run(name: str, figures: int, points: int, dpi: int, results) -> None:
+    start = time.perf_counter()
+    PATHS[name](figures, points, dpi)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux.
+    results.put((name, figures / elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--figures', type=int, default=200)
+    parser.add_argument('--points', type=int, default=11, help='Points per plot')
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI, help='Resolution of the Agg template path')
+    args = parser.parse_args()
+
+    print(f"{'Path':<26}{'Figures/s':>12}{'Peak RSS (MB)':>16}")
+    results = multiprocessing.Queue()
+    for name in PATHS:
+        process = multiprocessing.Process(target=run, args=(name, args.figures, args.points, args.dpi, results))
+        process.start()
+        name, rate, peak = results.get()
+        process.join()
+        print(f"{name:<26}{rate:>12.1f}{peak:>16.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmarks CLI start-up: import time and wall time of main.py in each mode.
+
+Every mode runs `main.py` in fresh interpreters against a local stub Alpha
+Vantage server, for one symbol:
+
+    help      --help
+    fetch     --fetch-only
+    export    --export-data csv
+    report    a full report
+
+Import time is the total reported by `python -X importtime`. Import and wall
+times are medians over `--repeat` runs. The heavy packages each mode imported
+are listed, so a regression that pulls matplotlib or reportlab back into the
+data-only modes shows up directly.
+
+Results are compared with benchmarks/baselines/bench_startup.json like
+bench_e2e.py: `--save-baseline` records them, `--check` exits with status 1 on
+regressions.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--save-baseline] [--check] [--tolerance 0.25]
+"""
+import argparse
+import json
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+root_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(root_dir))
+
+from src.core.backends import HEAVY_PACKAGES
+from src.utils.stub_server import StubAlphaVantageServer
+
+BASELINE_PATH = root_dir / 'benchmarks' / 'baselines' / 'bench_startup.json'
+MODES = {
+    'help': ['--help'],
+    'fetch': ['--fetch-only'],
+    'export': ['--export-data', 'csv'],
+    # The baselines were recorded at 150 dpi.
+    'report': ['--dpi', '150'],
+}
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+\d+ \|\s+(\S+)')
+
+
+def run_mode(arguments: list, repeat: int) -> dict:
+    """
+    Runs main.py with `arguments` and measures its import and wall time.
+    """
+    walls, imports, packages = [], [], set()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, str(root_dir / 'main.py')] + arguments, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        walls.append(time.perf_counter() - start)
+
+        # -X importtime slows the run down, so imports are timed in a run of their own.
+        completed = subprocess.run([sys.executable, '-X', 'importtime', str(root_dir / 'main.py')] + arguments,
+                                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        import_us = 0
+        for line in completed.stderr.splitlines():
+            match = IMPORT_LINE.match(line)
+            if match:
+                import_us += int(match.group(1))
+                packages.add(match.group(2).split('.')[0])
+        imports.append(import_us / 1e3)
+    return {'import_ms': statistics.median(imports), 'wall_ms': statistics.median(walls) * 1e3,
+            'heavy_packages': sorted(packages.intersection(HEAVY_PACKAGES))}
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Returns the timings of `current` worse than `baseline` by more than
+    `tolerance`, and heavy packages the baseline did not import.
+    """
+    regressions = []
+    for name in ('import_ms', 'wall_ms'):
+        if baseline[name] > 0 and current[name] > baseline[name] * (1 + tolerance):
+            regressions.append(f"{name}: {current[name]:.1f} vs baseline {baseline[name]:.1f} "
+                               f"(+{current[name] / baseline[name] - 1:.0%})")
+    extra = sorted(set(current['heavy_packages']) - set(baseline['heavy_packages']))
+    if extra:
+        regressions.append(f"now imports {', '.join(extra)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per mode; median times are reported')
+    parser.add_argument('--save-baseline', action='store_true', help='Store the results as the new baseline')
+    parser.add_argument('--check', action='store_true', help='Exit with status 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown before flagging a regression')
+    args = parser.parse_args()
+
+    baselines = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    results, regressions = {}, []
+
+    print(f"{'Mode':<8}{'Import ms':>11}{'Wall ms':>10}  Heavy packages")
+    with StubAlphaVantageServer(compact_bars=100) as stub, tempfile.TemporaryDirectory() as tmp_dir:
+        common = ['--api-key', 'demo', '--symbol', 'IBM', '--base-url', stub.url, '--no-cache',
+                  '--calls-per-minute', '1000', '--output-dir', tmp_dir]
+        for mode, arguments in MODES.items():
+            result = results[mode] = run_mode(common + arguments, args.repeat)
+            print(f"{mode:<8}{result['import_ms']:>11.1f}{result['wall_ms']:>10.1f}  "
+                  f"{', '.join(result['heavy_packages']) or '-'}")
+            if mode in baselines.get('modes', {}):
+                regressions += [f"{mode}: {item}" for item in compare(result, baselines['modes'][mode], args.tolerance)]
+
+    if args.save_baseline:
+        baselines = {'modes': results, '_machine': {'python': platform.python_version(),
+                                                    'platform': platform.platform(),
+                                                    'recorded': time.strftime('%Y-%m-%d')}}
+        BASELINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline saved to {BASELINE_PATH.relative_to(root_dir)}")
+    elif regressions:
+        print("\nRegressions against the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        if args.check:
+            raise SystemExit(1)
+    elif baselines:
+        print("\nNo regressions against the baseline.")
+
+
+if __name__ == '__main__':
+    main()
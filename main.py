@@ -1,52 +1,307 @@
 import argparse
+import os
+import time
 # import matplotlib.pyplot as plt
 # import pandas as pd
 
 from src.api.alpha_vantage import AlphaVantageAPI
-from src.core.data_processing import DataTransformer
-from src.core.report_generator import ReportGenerator
+from src.api.cache import ResponseCache
+from src.api.scheduler import Priority, RequestScheduler
+from src.core.history_store import HistoryStore
+from src.core.indicators import parse_indicator_list
+from src.core.backends import DEFAULT_DPI
+from src.core.backtest import RULES, backtest_batch, parse_grid
+from src.core.batch import format_summary
+from src.core.consolidated import consolidated_batch
+from src.core.downsampling import DOWNSAMPLERS, parse_range
+from src.core.export import EXPORT_FORMATS, fetch_batch
+from src.core.fundamentals import FundamentalsStore, refresh_fundamentals
+from src.core.ingest import ingest_batch, month_range
+from src.core.pipeline import TIMEFRAMES, build_report, fetch_symbol, run_batch
+from src.core.watch import MIN_POLL_INTERVAL, Watcher
+from src.utils import instrumentation
+
+def checked(parse):
+    """
+    Wraps a parser raising ValueError so argparse reports its message.
+    """
+    def parse_checked(value):
+        try:
+            return parse(value)
+        except ValueError as err:
+            raise argparse.ArgumentTypeError(str(err))
+    return parse_checked
+
 
 def parse_arguments():
     parser = argparse.ArgumentParser(description='Financial Market Analysis Tool')
-    parser.add_argument('--api-key', help='Your Alpha Vantage API Key', required=True)
-    parser.add_argument('--symbol', help='Stock symbol to analyze', required=True)
+    parser.add_argument('--api-key', help='Your Alpha Vantage API Key (not needed by --screen)')
+    parser.add_argument('--symbol', help='Stock symbol to analyze, repeat for a batch run', action='append', default=[])
+    parser.add_argument('--symbols-file', help='File with one stock symbol per line for a batch run')
+    parser.add_argument('--output-dir', help='Directory for generated reports', default='output')
+    parser.add_argument('--fetch-workers', help='Symbols fetched concurrently in a batch run', type=int, default=4)
+    parser.add_argument('--render-workers', help='Report worker processes in a batch run (default: core count)', type=int)
+    parser.add_argument('--cache-dir', help='Directory for cached API responses', default='.cache/alpha_vantage')
+    parser.add_argument('--no-cache', help='Always fetch fresh data from the API', action='store_true')
+    parser.add_argument('--history-dir', help='Keep price history in this directory and fetch only new bars')
+    parser.add_argument('--fundamentals-dir', help='Keep company overviews in this directory and refetch them only '
+                        'when a new quarter is due (default for --screen: .cache/fundamentals)')
+    parser.add_argument('--derive-timeframes', help='Fetch only daily bars and compute weekly/monthly bars locally',
+                        action='store_true')
+    parser.add_argument('--indicators', help='Comma-separated indicators to overlay, e.g. sma:20,ema:50,rsi:14,macd,'
+                        'bollinger:20,2,atr:14,vwap', type=checked(parse_indicator_list))
+    parser.add_argument('--anomalies', help='Flag return, volume and gap anomalies on the plots and in the report',
+                        action='store_true')
+    parser.add_argument('--dpi', help='Resolution of the plot images', type=int, default=DEFAULT_DPI)
+    parser.add_argument('--range', help='Dates plotted: a span ending at the latest bar such as 90d, 6m or 5y, '
+                        'START:END dates, or all (default: the last few bars)', type=checked(parse_range),
+                        dest='time_range', metavar='RANGE')
+    parser.add_argument('--max-points', help='Points each plot is downsampled to (default: the plot\'s pixel width)',
+                        type=int)
+    parser.add_argument('--downsampler', help='How long plots are downsampled', choices=DOWNSAMPLERS, default='lttb')
+    parser.add_argument('--force', help='Rebuild every plot and report even if its inputs are unchanged',
+                        action='store_true')
+    parser.add_argument('--vector-plots', help='Embed plots in the report as vector graphics instead of images',
+                        action='store_true')
+    parser.add_argument('--portfolio', help='Also write a portfolio report comparing all symbols on this timeframe '
+                        '(default: weekly)', nargs='?', const='weekly', choices=list(TIMEFRAMES), metavar='TIMEFRAME')
+    parser.add_argument('--benchmark', help='Index symbol the portfolio betas are measured against '
+                        '(default: the equal-weighted universe)')
+    parser.add_argument('--consolidated', help='Write the reports of all symbols into this one PDF, with a table of '
+                        'contents and bookmarks, instead of a report per symbol', metavar='PATH')
+    parser.add_argument('--fetch-only', help='Fetch the data into the cache and history store without rendering reports',
+                        action='store_true')
+    parser.add_argument('--export-data', help='Write the cleaned series and company overview instead of reports',
+                        choices=EXPORT_FORMATS)
+    parser.add_argument('--ingest-intraday', help='Stream intraday bars at this interval into the history store',
+                        choices=['1min', '5min', '15min', '30min', '60min'], metavar='INTERVAL')
+    parser.add_argument('--months', help='Months to ingest, e.g. 2023-01:2023-12 (default: the latest bars)',
+                        metavar='START[:END]')
+    parser.add_argument('--backtest', help='Sweep a trading rule over a parameter grid instead of writing reports',
+                        choices=list(RULES), metavar='RULE')
+    parser.add_argument('--grid', help='Rule parameter values, repeatable, e.g. fast=5:50:5 or slow=50,100,200 '
+                        '(default: the rule\'s grid)', action='append', default=[], metavar='NAME=VALUES')
+    parser.add_argument('--timeframe', help='Bars the backtest runs on (default: daily)', choices=list(TIMEFRAMES),
+                        default='daily')
+    parser.add_argument('--cost', help='Backtest transaction cost as a fraction of the traded value', type=float,
+                        default=0.0)
+    parser.add_argument('--refresh-fundamentals', help='Fetch only the company overviews into the fundamentals store',
+                        action='store_true')
+    parser.add_argument('--screen', help='Screen the stored overviews without network calls, e.g. '
+                        '"PERatio < 15 and DividendYield > 0.03 in TECHNOLOGY"', metavar='QUERY')
+    parser.add_argument('--sort', help='Field the screen results are ordered by', metavar='FIELD')
+    parser.add_argument('--descending', help='Order the screen results from the largest value', action='store_true')
+    parser.add_argument('--limit', help='Maximum number of screen results', type=int)
+    parser.add_argument('--watch', help='Keep running and refresh the reports as new intraday bars arrive, polling '
+                        'faster while the market is open and within the API quota', action='store_true')
+    parser.add_argument('--min-poll-interval', help='Shortest time between two polling rounds of --watch, in seconds',
+                        type=float, default=MIN_POLL_INTERVAL, metavar='SECONDS')
+    parser.add_argument('--serve', help='Serve reports over HTTP on this port instead of writing them', type=int,
+                        metavar='PORT')
+    parser.add_argument('--host', help='Interface the report server listens on', default='127.0.0.1')
+    parser.add_argument('--trace', help='Write a timeline of the pipeline stages to this file: a Chrome trace, '
+                        'or JSON lines if it ends with .jsonl', metavar='PATH')
+    parser.add_argument('--profile', help='Write a cProfile dump of each pipeline stage to this directory '
+                        '(default: profile)', nargs='?', const='profile', metavar='DIR')
+    parser.add_argument('--calls-per-minute', help='Alpha Vantage calls allowed per minute', type=int, default=5)
+    parser.add_argument('--calls-per-day', help='Alpha Vantage calls allowed per day (0 for unlimited)', type=int, default=25)
+    parser.add_argument('--base-url', help='Alpha Vantage query endpoint', default='https://www.alphavantage.co/query')
     # Add more arguments as needed
-    return parser.parse_args()
+    args = parser.parse_args()
+
+    if args.symbols_file:
+        with open(args.symbols_file) as file:
+            args.symbol += [line.split('#')[0].strip() for line in file if line.split('#')[0].strip()]
+    if args.screen is not None:
+        args.fundamentals_dir = args.fundamentals_dir or '.cache/fundamentals'
+        return args
+    if not args.api_key:
+        parser.error('--api-key is required')
+    if not args.symbol and args.serve is None:
+        parser.error('at least one --symbol or a --symbols-file is required')
+    if args.refresh_fundamentals and not args.fundamentals_dir:
+        parser.error('--refresh-fundamentals requires --fundamentals-dir')
+    if args.watch and args.derive_timeframes:
+        parser.error('--watch polls intraday bars and cannot be combined with --derive-timeframes')
+    if args.consolidated and args.portfolio:
+        parser.error('--consolidated cannot be combined with --portfolio')
+    if args.ingest_intraday and not args.history_dir:
+        parser.error('--ingest-intraday requires --history-dir')
+    if args.months:
+        start, _, end = args.months.partition(':')
+        try:
+            args.months = month_range(start, end or None)
+        except ValueError:
+            parser.error(f'invalid --months {args.months!r}, expected YYYY-MM[:YYYY-MM]')
+    if args.backtest:
+        try:
+            args.grid = parse_grid(args.grid)
+        except ValueError as err:
+            parser.error(str(err))
+        parameters = RULES[args.backtest].parameters
+        if args.grid and set(args.grid) != set(parameters):
+            parser.error(f"--grid for {args.backtest} needs exactly the parameters: {', '.join(parameters)}")
+    return args
 
 
 def main():
-    
+
     args = parse_arguments()
+    fundamentals = FundamentalsStore(args.fundamentals_dir) if args.fundamentals_dir else None
 
-    api = AlphaVantageAPI(args.api_key)
+    if args.screen is not None:
+        start = time.perf_counter()
+        table = fundamentals.table()
+        try:
+            matches = table.screen(args.screen, args.sort, args.descending, args.limit)
+        except ValueError as err:
+            raise SystemExit(f"Invalid screen: {err}")
+        if not matches.empty:
+            print(matches.to_string(index=False))
+        print(f"{len(matches)} of {len(table)} symbols matched in {(time.perf_counter() - start) * 1e3:.1f} ms.")
+        return
 
-    # data retrieval
-    daily_stock_data = api.get_daily_stock_data(args.symbol)
-    weekly_stock_data = api.get_weekly_stock_data(args.symbol)
-    monthly_stock_data = api.get_monthly_stock_data(args.symbol)
-    company_info = api.get_company_overview_data(args.symbol)
+    cache = None if args.no_cache else ResponseCache(args.cache_dir)
+    scheduler = RequestScheduler(args.calls_per_minute, args.calls_per_day or None,
+                                 state_path=None if args.no_cache else os.path.join(args.cache_dir, 'scheduler.json'))
+    history = HistoryStore(args.history_dir) if args.history_dir else None
+    batch = len(args.symbol) > 1 or args.symbols_file is not None or args.portfolio is not None or \
+        args.consolidated is not None
 
-    print("Data retrieved successfully.")
-    
-    # data processing
-    daily_stock_data_cleaned = DataTransformer(daily_stock_data).clean_data()
-    weekly_stock_data_cleaned = DataTransformer(weekly_stock_data).clean_data()
-    monthly_stock_data_cleaned = DataTransformer(monthly_stock_data).clean_data()
+    if args.serve is not None:
+        from src.service.report_service import ReportService, run_server
+
+        with AlphaVantageAPI(args.api_key, cache=cache, scheduler=scheduler, base_url=args.base_url) as api:
+            service = ReportService(api, history, args.derive_timeframes, render_workers=args.render_workers,
+                                    dpi=args.dpi)
+            run_server(service, args.host, args.serve)
+        return
+
+    if args.watch:
+        watch(args, cache, scheduler, history, fundamentals)
+        return
+
+    recorder = instrumentation.enable(profile=args.profile is not None)
+    try:
+        if args.ingest_intraday:
+            with AlphaVantageAPI(args.api_key, scheduler=scheduler, default_priority=Priority.BATCH,
+                                 base_url=args.base_url) as api:
+                results = ingest_batch(api, args.symbol, history, args.ingest_intraday, args.months or [None],
+                                       args.fetch_workers)
+
+            print(format_summary(results, "ingested"))
+            if any(result['status'] != 'ok' for result in results):
+                raise SystemExit(1)
+        elif args.refresh_fundamentals:
+            with AlphaVantageAPI(args.api_key, cache=cache, scheduler=scheduler, default_priority=Priority.BATCH,
+                                 base_url=args.base_url) as api:
+                results = refresh_fundamentals(api, args.symbol, fundamentals, args.fetch_workers)
+
+            print(format_summary(results, "refreshed"))
+            if any(result['status'] != 'ok' for result in results):
+                raise SystemExit(1)
+        elif args.backtest:
+            with AlphaVantageAPI(args.api_key, cache=cache, scheduler=scheduler, default_priority=Priority.BATCH,
+                                 base_url=args.base_url) as api:
+                results = backtest_batch(api, args.symbol, args.backtest, args.grid or None, TIMEFRAMES[args.timeframe],
+                                         args.output_dir, args.fetch_workers, args.render_workers, history, args.cost,
+                                         fundamentals)
+
+            print(format_summary(results, "backtested"))
+            if any(result['status'] != 'ok' for result in results):
+                raise SystemExit(1)
+        elif args.fetch_only or args.export_data:
+            # Never imports the plotting and PDF backends.
+            priority = Priority.BATCH if batch else Priority.INTERACTIVE
+            with AlphaVantageAPI(args.api_key, cache=cache, scheduler=scheduler, default_priority=priority,
+                                 base_url=args.base_url) as api:
+                results = fetch_batch(api, args.symbol, args.output_dir, args.fetch_workers, history,
+                                      args.derive_timeframes, args.export_data, fundamentals)
 
-    print("Data processed successfully.")
+            print(format_summary(results, "exported" if args.export_data else "fetched"))
+            if any(result['status'] != 'ok' for result in results):
+                raise SystemExit(1)
+        elif args.consolidated:
+            with AlphaVantageAPI(args.api_key, cache=cache, scheduler=scheduler, default_priority=Priority.BATCH,
+                                 base_url=args.base_url) as api:
+                results = consolidated_batch(api, args.symbol, args.consolidated, args.fetch_workers,
+                                             args.render_workers, history, args.derive_timeframes, fundamentals,
+                                             indicators=args.indicators, anomalies=args.anomalies, dpi=args.dpi,
+                                             vector_plots=args.vector_plots, time_range=args.time_range,
+                                             max_points=args.max_points, downsampler=args.downsampler)
 
-    # Generate report
-    report_generator = ReportGenerator(company_info, monthly_stock_data_cleaned, weekly_stock_data_cleaned, daily_stock_data_cleaned)
-    report_generator.plot_line(args.symbol)
-    report_generator.plot_line(args.symbol, "W")
-    report_generator.plot_line(args.symbol, "M")
+            print(format_summary(results, "sections written"))
+            if any(result['status'] != 'ok' for result in results):
+                raise SystemExit(1)
+        elif batch:
+            with AlphaVantageAPI(args.api_key, cache=cache, scheduler=scheduler, default_priority=Priority.BATCH,
+                                 base_url=args.base_url) as api:
+                results = run_batch(api, args.symbol, args.output_dir, args.fetch_workers, args.render_workers,
+                                    history, args.derive_timeframes, args.indicators, args.anomalies, args.dpi,
+                                    args.vector_plots, args.portfolio, args.benchmark, fundamentals, args.force,
+                                    args.time_range, args.max_points, args.downsampler)
 
-    # dummy_df = pd.DataFrame({'date':[2, 4, 5, 7], 'stock_price':[1000, 2000, 20000, 4000]})
-    # report_generator = ReportGenerator({}, dummy_df, dummy_df, dummy_df)
-    
-    report_generator.generate_pdf_report()
+            print(format_summary(results))
+            if any(result['status'] != 'ok' for result in results):
+                raise SystemExit(1)
+        else:
+            generate_report(args, cache, scheduler, history, fundamentals)
+    finally:
+        instrumentation.disable()
+        report_instrumentation(recorder, args)
+
+
+def watch(args, cache, scheduler, history, fundamentals):
+    """
+    Keeps the reports of the symbols up to date until interrupted.
+    """
+    render_options = dict(anomalies=args.anomalies, dpi=args.dpi, vector_plots=args.vector_plots, force=args.force,
+                          time_range=args.time_range, max_points=args.max_points, downsampler=args.downsampler)
+    # Polls bypass the response cache, which would serve the same bars until they expire.
+    with AlphaVantageAPI(args.api_key, cache=cache, scheduler=scheduler, base_url=args.base_url) as api, \
+            AlphaVantageAPI(args.api_key, scheduler=scheduler, base_url=args.base_url) as poll_api:
+        watcher = Watcher(api, args.symbol, args.output_dir, poll_api, scheduler, args.calls_per_minute, history,
+                          fundamentals, args.indicators, render_options, args.fetch_workers,
+                          min_interval=args.min_poll_interval)
+        print(f"Watching {', '.join(watcher.symbols)}; press Ctrl+C to stop.")
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            print("Stopped watching.")
+
+
+def generate_report(args, cache, scheduler, history, fundamentals):
+    symbol = args.symbol[0]
+
+    # data retrieval - all datasets are requested in parallel over one pooled session
+    with AlphaVantageAPI(args.api_key, cache=cache, scheduler=scheduler, base_url=args.base_url) as api:
+        datasets = fetch_symbol(api, symbol, history, args.derive_timeframes, fundamentals)
+
+    print("Data retrieved successfully.")
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Cache: {stats['hits']} hits, {stats['misses']} misses, {stats['stale_hits']} stale.")
+
+    # data processing and report generation
+    build_report(symbol, datasets, args.output_dir, args.indicators, args.anomalies, args.dpi, args.vector_plots,
+                 args.force, args.time_range, args.max_points, args.downsampler)
 
     print("PDF report generated successfully.")
 
+
+def report_instrumentation(recorder, args):
+    """
+    Prints the per-stage summary and writes the requested trace and profiles.
+    """
+    if not recorder.spans:
+        return
+    print(recorder.format_summary())
+    if args.trace:
+        recorder.write_trace(args.trace)
+        print(f"Trace written to {args.trace}.")
+    if args.profile:
+        recorder.dump_profiles(args.profile)
+        print(f"Stage profiles written to {args.profile}/.")
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
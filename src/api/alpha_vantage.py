@@ -1,24 +1,97 @@
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
+import numpy as np
 import pandas as pd
 
-from typing import Dict, Any
+import itertools
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple
+
+from src.api.cache import ResponseCache
+from src.api.exceptions import InvalidSymbolError, RateLimitError, TransportError
+from src.api.parser import iter_csv_blocks, parse_time_series
+from src.api.scheduler import Priority, RequestScheduler
+from src.utils import instrumentation
 # from src.utils.config import ALPHA_VANTAGE_API_KEY # activate when testing on local system
 
 class AlphaVantageAPI:
     '''
     Creates a new API object which gets financial data from 
     the Alpha Vantage website.
+
+    Requests go through a persistent, pooled HTTP session so that repeated
+    calls reuse the same keep-alive connection instead of paying a new
+    TCP+TLS handshake each time.
     '''
 
-    def __init__(self, api_key):
+    # Datasets retrieved for a report, keyed by the Alpha Vantage function name.
+    REPORT_FUNCTIONS = ('TIME_SERIES_INTRADAY', 'TIME_SERIES_WEEKLY', 'TIME_SERIES_MONTHLY', 'OVERVIEW')
+
+    def __init__(self, api_key, timeout: Tuple[float, float] = (3.05, 30), max_workers: int = 4,
+                 cache: Optional[ResponseCache] = None, scheduler: Optional[RequestScheduler] = None,
+                 default_priority: int = Priority.INTERACTIVE, base_url: str = "https://www.alphavantage.co/query"):
+        """
+        Args:
+            api_key (str): Alpha Vantage API key.
+            timeout (Tuple[float, float]): (connect, read) timeouts in seconds.
+            max_workers (int): Maximum number of requests run in parallel by
+                `fetch_many`, also used as the connection pool size.
+            cache (ResponseCache): Optional response cache consulted by `fetch_data`.
+            scheduler (RequestScheduler): Optional quota-aware scheduler every
+                network call is admitted through.
+            default_priority (int): Scheduling priority used when `fetch_data` is
+                not given one, e.g. `Priority.BATCH` for backfills.
+            base_url (str): Query endpoint, e.g. a local stub server in tests.
+        """
         self.api_key = api_key
-        self.base_url = "https://www.alphavantage.co/query"
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.cache = cache
+        self.scheduler = scheduler
+        self.default_priority = default_priority
+        self.session = self._create_session()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def _create_session(self) -> requests.Session:
+        """
+        Creates a keep-alive session whose pool holds one connection per worker.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def close(self) -> None:
+        """
+        Shuts down the worker pool and closes pooled connections.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
     
-    def fetch_data(self, function: str, symbol: str, interval: str = None, outputsize: str = 'compact') -> Dict[str, Any]:
+    @instrumentation.traced('fetch', 'function', 'symbol')
+    def fetch_data(self, function: str, symbol: str, interval: str = None, outputsize: str = 'compact',
+                   priority: Optional[int] = None) -> Dict[str, Any]:
         """
         Fetches the specified data from the Alpha Vantage website.
 
+        When a cache is configured a fresh cached response is returned without
+        a network call, and if the network call fails the last good copy is
+        served even if it has expired.
+
         Args:
             function (str): Function to get data.
             symbol (str): Name of stock wanted.
@@ -26,98 +99,288 @@ class AlphaVantageAPI:
                 e.g., '1min', '5min', '30min', '60min'.
             outputsize (str): Specifies the amount of data that the API should return.
                 'compact' returns recent data while 'full' returns a comprehensive dataset.
+            priority (int): Scheduling priority of the call, defaults to `default_priority`.
         
         Returns:
             Dict[str, Any]: JSON response with the requested data.
         
         Raises:
-            ValueError: If a connection cannot be made or server returns an error.
+            RateLimitError: If the API keeps throttling the call and there is no
+                cached copy to fall back on.
+            TransportError: If a connection cannot be made or server returns an
+                error and there is no cached copy to fall back on.
         """
+        if self.cache is not None:
+            cached = self.cache.get(function, symbol, interval, outputsize)
+            if cached is not None:
+                instrumentation.add(cache_hits=1)
+                return cached
+
+        params = {
+            "function": function,
+            "symbol": symbol,
+            "apikey": self.api_key,
+            "outputsize": outputsize
+        }
+
+        if interval:
+            params["interval"] = interval
+
         try:
-            params = {
-                "function": function,
-                "symbol": symbol,
-                "apikey": self.api_key,
-                "outputsize": outputsize
-            }
+            if self.scheduler is not None:
+                priority = self.default_priority if priority is None else priority
+                data = self.scheduler.submit(self._request, params, priority=priority)
+            else:
+                data = self._request(params)
+        except (RequestException, RateLimitError) as err:
+            if self.cache is not None:
+                stale = self.cache.get(function, symbol, interval, outputsize, allow_stale=True)
+                if stale is not None:
+                    instrumentation.add(cache_hits=1)
+                    return stale
+            if isinstance(err, RateLimitError):
+                raise
+            raise TransportError(f"An error occurred while fetching data: {err}", status=_status(err))
 
-            if interval:
-                params["interval"] = interval
+        if self.cache is not None and self._is_cacheable(data):
+            self.cache.set(function, symbol, interval, outputsize, data)
 
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
+        return data
+
+    def _request(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Performs a single API call over the pooled session.
+
+        Raises:
+            RateLimitError: If the API answered with a throttle message.
+            RequestException: If the call failed at the HTTP level.
+        """
+        response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        instrumentation.add(bytes=len(response.content))
+
+        data = response.json()
+        self._raise_for_throttle(data)
+        return data
+
+    def stream_intraday(self, symbol: str, interval: str = '1min', month: Optional[str] = None,
+                        chunk_size: int = 1 << 20, priority: Optional[int] = None) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Streams the intraday bars of a stock as typed column blocks.
+
+        Requests the `datatype=csv` variant, optionally for a single month, and
+        parses the body chunk by chunk as it downloads, so memory stays bounded
+        by `chunk_size` however many bars the response holds. Streams bypass
+        the response cache.
+
+        Args:
+            symbol (str): Ticker name of the stock.
+            interval (str): Bar interval: '1min', '5min', '15min', '30min' or '60min'.
+            month (str): Month to retrieve as 'YYYY-MM', the most recent bars if None.
+            chunk_size (int): Bytes read and parsed at a time.
+            priority (int): Scheduling priority of the call, defaults to `default_priority`.
+
+        Yields:
+            Dict[str, np.ndarray]: int64 nanosecond 'timestamp' and OHLCV columns
+                of each chunk, newest bars first as sent by the API.
+
+        Raises:
+            InvalidSymbolError: If the API has no data for the symbol.
+            RateLimitError: If the API keeps throttling the call.
+            TransportError: If the download fails at the HTTP level.
+        """
+        params = {"function": "TIME_SERIES_INTRADAY", "symbol": symbol, "interval": interval,
+                  "outputsize": "full", "datatype": "csv", "apikey": self.api_key}
+        if month:
+            params["month"] = month
 
-            return response.json()
+        try:
+            if self.scheduler is not None:
+                priority = self.default_priority if priority is None else priority
+                response, chunks = self.scheduler.submit(self._open_stream, params, chunk_size, priority=priority)
+            else:
+                response, chunks = self._open_stream(params, chunk_size)
+            with response:
+                yield from iter_csv_blocks(self._counted(chunks))
         except RequestException as err:
-            raise ValueError(f"An error occurred while fetching data: {err}")
+            raise TransportError(f"An error occurred while fetching data: {err}", status=_status(err))
+
+    def _open_stream(self, params: Dict[str, Any], chunk_size: int):
+        """
+        Starts a streamed API call and checks its first chunk for a JSON error
+        body, which Alpha Vantage sends instead of CSV.
+
+        Returns:
+            Tuple[requests.Response, Iterator[bytes]]: Open response and its
+                body chunks, including the first.
+        """
+        response = self.session.get(self.base_url, params=params, timeout=self.timeout, stream=True)
+        try:
+            response.raise_for_status()
+            chunks = response.iter_content(chunk_size)
+            first = next(chunks, b'')
+            if first.lstrip().startswith(b'{'):
+                data = json.loads(first + b''.join(chunks))
+                self._raise_for_throttle(data)
+                raise InvalidSymbolError("Invalid symbol please use a correct ticker symbol.")
+        except BaseException:
+            response.close()
+            raise
+        return response, itertools.chain([first], chunks)
+
+    @staticmethod
+    def _counted(chunks: Iterable[bytes]) -> Iterator[bytes]:
+        for chunk in chunks:
+            instrumentation.add(bytes=len(chunk))
+            yield chunk
+
+    @staticmethod
+    def _raise_for_throttle(data: Dict[str, Any]) -> None:
+        """
+        Detects the "Note"/"Information" bodies Alpha Vantage returns instead of
+        data when a rate limit is exceeded.
+        """
+        if not isinstance(data, dict):
+            return
+        message = data.get("Note") or data.get("Information")
+        if not message:
+            return
+
+        text = message.lower()
+        if "Note" in data or any(hint in text for hint in ("rate limit", "call frequency", "requests per day")):
+            daily = "per day" in text and "per minute" not in text
+            raise RateLimitError(message, daily=daily)
+
+    @staticmethod
+    def _is_cacheable(data: Dict[str, Any]) -> bool:
+        """
+        Error, throttle and empty (unknown symbol) responses must never be cached.
+        """
+        return bool(data) and not any(key in data for key in ("Error Message", "Note", "Information"))
     
-    def get_daily_stock_data(self, symbol: str) -> pd.DataFrame:
+    def fetch_many(self, symbol: str, functions: Iterable[str] = REPORT_FUNCTIONS,
+                   outputsizes: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Retrieves several datasets for a symbol in parallel.
+
+        Each function is fetched on a bounded thread pool sharing the pooled
+        session, so the wall-clock cost is roughly that of the slowest request
+        rather than the sum of all of them.
+
+        Args:
+            symbol (str): ticker name of stock.
+            functions (Iterable[str]): Alpha Vantage function names to retrieve,
+                e.g. 'TIME_SERIES_WEEKLY' or 'OVERVIEW'.
+            outputsizes (Dict[str, str]): Optional outputsize per time-series
+                function, 'compact' when not given.
+
+        Returns:
+            Dict[str, Any]: Results of the matching `get_*` method keyed by function.
+
+        Raises:
+            ValueError: If a function is not supported or any of the requests fails.
+        """
+        getters = {
+            'TIME_SERIES_INTRADAY': self.get_daily_stock_data,
+            'TIME_SERIES_DAILY': self.get_daily_time_series,
+            'TIME_SERIES_WEEKLY': self.get_weekly_stock_data,
+            'TIME_SERIES_MONTHLY': self.get_monthly_stock_data,
+            'OVERVIEW': self.get_company_overview_data,
+        }
+        functions = list(functions)
+        unsupported = [function for function in functions if function not in getters]
+        if unsupported:
+            raise ValueError(f"Unsupported function(s): {', '.join(unsupported)}")
+
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="alpha-vantage")
+
+        outputsizes = outputsizes or {}
+        futures = {}
+        for function in functions:
+            kwargs = {'outputsize': outputsizes[function]} if function in outputsizes else {}
+            futures[function] = self._executor.submit(getters[function], symbol, **kwargs)
+        # Wait for every request before raising so no work is left running in the background.
+        errors = [future.exception() for future in futures.values()]
+        for error in errors:
+            if error is not None:
+                raise error
+
+        return {function: future.result() for function, future in futures.items()}
+
+    def _time_series(self, function: str, key: str, symbol: str, interval: str = None,
+                     outputsize: str = 'compact') -> pd.DataFrame:
+        """
+        Fetches a time series and parses the bars under `key`. A response
+        without them means Alpha Vantage has no data for the symbol; network,
+        HTTP and throttling failures keep their own error types.
+        """
+        try:
+            data = self.fetch_data(function, symbol, interval=interval, outputsize=outputsize)
+        except RequestException as err:
+            raise TransportError(f"An error occurred while fetching data: {err}")
+        if key not in data:
+            raise InvalidSymbolError("Invalid symbol please use a correct ticker symbol.")
+        return parse_time_series(data[key])
+
+    def get_daily_stock_data(self, symbol: str, outputsize: str = 'compact') -> pd.DataFrame:
         """
         Fetches the daily data of a stock.
 
         Args:
             symbol: ticker name of stock.
+            outputsize: 'compact' for the latest 100 bars, 'full' for the whole history.
         
         Returns:
-            pd.DataFrame: DataFrame containing stock data.
+            pd.DataFrame: Typed OHLCV frame indexed by ascending timestamp.
         
         Raises:
-            ValueError: 1. Data not found
-                        2. Error while fetching data
-                        3. Invalid symbol
+            InvalidSymbolError: The response holds no bars for the symbol.
+            TransportError: The call failed at the network or HTTP level.
+            RateLimitError: API call limits were exceeded.
         """
-        try:
-            data = self.fetch_data('TIME_SERIES_INTRADAY', symbol, interval="60min")
-            if 'Time Series (60min)' in data:
-                return pd.DataFrame(data['Time Series (60min)']).T
-            else:
-                raise ValueError("Data not found in the response.")
-        except RequestException as err:
-            raise ValueError(f"An error occurred while fetching data: {err}")
-        except ValueError:
-            raise ValueError("Invalid symbol please use a correct ticker symbol.")
+        return self._time_series('TIME_SERIES_INTRADAY', 'Time Series (60min)', symbol, interval="60min",
+                                 outputsize=outputsize)
     
-    def get_weekly_stock_data(self, symbol: str) -> pd.DataFrame:
+    def get_daily_time_series(self, symbol: str, outputsize: str = 'compact') -> pd.DataFrame:
+        """
+        Fetches end-of-day bars of a stock.
+
+        Args:
+            symbol: ticker name of stock.
+            outputsize: 'compact' for the latest 100 bars, 'full' for the whole history.
+        
+        Returns:
+            pd.DataFrame: Typed OHLCV frame indexed by ascending timestamp.
+        """
+        return self._time_series('TIME_SERIES_DAILY', 'Time Series (Daily)', symbol, outputsize=outputsize)
+
+    def get_weekly_stock_data(self, symbol: str, outputsize: str = 'compact') -> pd.DataFrame:
         """
         Fetches weekly data of a stock.
 
         Args:
             symbol: ticker name of stock.
+            outputsize: 'compact' for the latest 100 bars, 'full' for the whole history.
         
         Returns:
-            pd.DataFrame: DataFrame containing stock data.
+            pd.DataFrame: Typed OHLCV frame indexed by ascending timestamp.
         """
-        try:
-            data = self.fetch_data('TIME_SERIES_WEEKLY', symbol)
-            if 'Weekly Time Series' in data:
-                return pd.DataFrame(data['Weekly Time Series']).T
-            else:
-                raise ValueError("Data not found in the response.")
-        except RequestException as err:
-            raise ValueError(f"An error occurred while fetching data: {err}")
-        except ValueError:
-            raise ValueError("Invalid symbol please use a correct ticker symbol.")
+        return self._time_series('TIME_SERIES_WEEKLY', 'Weekly Time Series', symbol, outputsize=outputsize)
 
-    def get_monthly_stock_data(self, symbol: str) -> pd.DataFrame:
+    def get_monthly_stock_data(self, symbol: str, outputsize: str = 'compact') -> pd.DataFrame:
         """
         Fetches monthly data of a stock.
 
         Args:
             symbol: ticker name of stock.
+            outputsize: 'compact' for the latest 100 bars, 'full' for the whole history.
         
         Returns:
-            pd.DataFrame: DataFrame containing stock data.
+            pd.DataFrame: Typed OHLCV frame indexed by ascending timestamp.
         """
-        try:
-            data = self.fetch_data('TIME_SERIES_MONTHLY', symbol)
-            if 'Monthly Time Series' in data:
-                return pd.DataFrame(data['Monthly Time Series']).T
-            else:
-                raise ValueError("Data not found in the response.")
-        except RequestException as err:
-            raise ValueError(f"An error occurred while fetching data: {err}")
-        except ValueError:
-            raise ValueError("Invalid symbol please use a correct ticker symbol.")
+        return self._time_series('TIME_SERIES_MONTHLY', 'Monthly Time Series', symbol, outputsize=outputsize)
     
     def get_company_overview_data(self, symbol: str) -> dict:
         """
@@ -132,20 +395,24 @@ class AlphaVantageAPI:
         """
         try:
             data = self.fetch_data('OVERVIEW', symbol)
-            # info_to_extract = [
-            #     "Symbol", "Name", "Description", "MarketCapitlization", "RevenueTTM",
-            #     "EPS", "PERatio", "Beta", "DividendYield"
-            #     ]
-            # company_info = {}
-
-            # for key, value in data.items():
-            #     if key in info_to_extract:
-            #         company_info[key] = value
-
-            company_info = data
-            return company_info
-               
         except RequestException as err:
-            raise ValueError(f"An error occurred while fetching data: {err}")
-        except ValueError:
-            raise ValueError("Invalid symbol please use a correct ticker symbol.")
\ No newline at end of file
+            raise TransportError(f"An error occurred while fetching data: {err}")
+        # info_to_extract = [
+        #     "Symbol", "Name", "Description", "MarketCapitlization", "RevenueTTM",
+        #     "EPS", "PERatio", "Beta", "DividendYield"
+        #     ]
+        # company_info = {}
+
+        # for key, value in data.items():
+        #     if key in info_to_extract:
+        #         company_info[key] = value
+
+        company_info = data
+        return company_info
+
+
+def _status(err: RequestException) -> Optional[int]:
+    """
+    HTTP status of the response a failed call received, None if it received none.
+    """
+    return err.response.status_code if err.response is not None else None
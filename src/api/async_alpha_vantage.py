@@ -0,0 +1,298 @@
+import asyncio
+import random
+
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple, Union
+
+import aiohttp
+import pandas as pd
+
+from src.api.alpha_vantage import AlphaVantageAPI
+from src.api.cache import ResponseCache
+from src.api.exceptions import AlphaVantageError, InvalidSymbolError, RateLimitError, TransportError
+from src.api.parser import parse_time_series, series_key
+from src.api.scheduler import TokenBucket
+
+
+class AsyncAlphaVantageAPI:
+    '''
+    Asyncio counterpart of `AlphaVantageAPI`.
+
+    Requests share one pooled aiohttp session whose connector caps the number
+    of open connections overall and per host, so thousands of fetches can be
+    fanned out from a single event loop. Connection failures, 5xx responses
+    and throttle notes are retried with exponential backoff and jitter; every
+    coroutine can be cancelled.
+
+    Failures are raised as InvalidSymbolError, RateLimitError or TransportError.
+    '''
+
+    REPORT_FUNCTIONS = AlphaVantageAPI.REPORT_FUNCTIONS
+
+    def __init__(self, api_key: str, base_url: str = "https://www.alphavantage.co/query",
+                 timeout: Tuple[float, float] = (3.05, 30), limit: int = 100, limit_per_host: int = 8,
+                 max_retries: int = 4, backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 calls_per_minute: Optional[int] = None, cache: Optional[ResponseCache] = None,
+                 sleep: Callable[[float], Awaitable[None]] = asyncio.sleep):
+        """
+        Args:
+            api_key (str): Alpha Vantage API key.
+            base_url (str): Query endpoint, e.g. a local stub server in tests.
+            timeout (Tuple[float, float]): (connect, read) timeouts in seconds.
+            limit (int): Maximum number of open connections.
+            limit_per_host (int): Maximum number of open connections to one host.
+            max_retries (int): Retries of a call failing with a retriable error.
+            backoff_base (float): Base delay in seconds of the exponential backoff.
+            backoff_max (float): Upper bound of a single backoff delay.
+            calls_per_minute (int): Optional client-side rate limit.
+            cache (ResponseCache): Optional response cache, also used as a
+                fallback when a call keeps failing.
+            sleep (Callable): Coroutine used to wait between retries.
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cache = cache
+        self.sleep = sleep
+        self.calls = 0
+        self.retries = 0
+        self._bucket = TokenBucket(calls_per_minute, 60.0) if calls_per_minute else None
+        self._bucket_lock: Optional[asyncio.Lock] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Creates the pooled session on first use, inside the running event loop.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host)
+            timeout = aiohttp.ClientTimeout(sock_connect=self.timeout[0], sock_read=self.timeout[1])
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+
+    async def close(self) -> None:
+        """
+        Closes pooled connections.
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def fetch_data(self, function: str, symbol: str, interval: str = None,
+                         outputsize: str = 'compact') -> Dict[str, Any]:
+        """
+        Fetches data from the Alpha Vantage API, retrying transient failures.
+
+        Args:
+            function (str): The API function to call (e.g., 'TIME_SERIES_DAILY').
+            symbol (str): The ticker symbol.
+            interval (str): Time interval for time series data, e.g. '60min'.
+            outputsize (str): 'compact' for recent data, 'full' for the whole history.
+
+        Returns:
+            Dict[str, Any]: JSON response with the requested data.
+
+        Raises:
+            InvalidSymbolError: If the API has no data for the symbol.
+            RateLimitError: If the call is still throttled after all retries, or
+                the daily budget is exhausted.
+            TransportError: If the call still fails at the HTTP level after all
+                retries.
+        """
+        if self.cache is not None:
+            cached = self.cache.get(function, symbol, interval, outputsize)
+            if cached is not None:
+                return cached
+
+        params = {"function": function, "symbol": symbol, "apikey": self.api_key, "outputsize": outputsize}
+        if interval:
+            params["interval"] = interval
+
+        attempt = 0
+        while True:
+            try:
+                await self._acquire()
+                data = await self._request(params)
+                break
+            except (RateLimitError, TransportError) as err:
+                retriable = not err.daily if isinstance(err, RateLimitError) else err.retriable
+                if not retriable or attempt >= self.max_retries:
+                    if self.cache is not None:
+                        stale = self.cache.get(function, symbol, interval, outputsize, allow_stale=True)
+                        if stale is not None:
+                            return stale
+                    raise
+                if isinstance(err, RateLimitError) and self._bucket is not None:
+                    self._bucket.drain()
+                self.retries += 1
+                await self.sleep(self._backoff(attempt))
+                attempt += 1
+
+        if "Error Message" in data or (function == 'OVERVIEW' and not data):
+            raise InvalidSymbolError(f"Invalid symbol '{symbol}': {data.get('Error Message', 'no data returned')}")
+
+        if self.cache is not None and AlphaVantageAPI._is_cacheable(data):
+            self.cache.set(function, symbol, interval, outputsize, data)
+        return data
+
+    async def _request(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Performs a single API call over the pooled session.
+
+        Raises:
+            RateLimitError: If the API answered with a throttle message or a 429.
+            TransportError: If the call failed at the network or HTTP level.
+        """
+        self.calls += 1
+        try:
+            async with self._get_session().get(self.base_url, params=params) as response:
+                if response.status == 429:
+                    raise RateLimitError("Too many requests.")
+                if response.status >= 400:
+                    raise TransportError(f"HTTP {response.status} from Alpha Vantage.", status=response.status)
+                data = await response.json(content_type=None)
+        except AlphaVantageError:
+            raise
+        except asyncio.TimeoutError:
+            raise TransportError("Timed out waiting for Alpha Vantage.")
+        except aiohttp.ClientError as err:
+            raise TransportError(f"An error occurred while fetching data: {err}")
+        except ValueError as err:
+            raise TransportError(f"Malformed response from Alpha Vantage: {err}")
+
+        AlphaVantageAPI._raise_for_throttle(data)
+        return data
+
+    async def _acquire(self) -> None:
+        """
+        Waits for the client-side rate limit, if any.
+        """
+        if self._bucket is None:
+            return
+        if self._bucket_lock is None:
+            self._bucket_lock = asyncio.Lock()
+        async with self._bucket_lock:
+            delay = self._bucket.time_until_available()
+            while delay > 0:
+                await self.sleep(delay)
+                delay = self._bucket.time_until_available()
+            self._bucket.consume()
+
+    def _backoff(self, attempt: int) -> float:
+        """
+        Exponential backoff with jitter so retrying requests do not stampede.
+        """
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def fetch_many(self, symbol: str, functions: Iterable[str] = REPORT_FUNCTIONS,
+                         outputsizes: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Retrieves several datasets for a symbol concurrently.
+
+        If any request fails, or the caller is cancelled, the remaining requests
+        are cancelled.
+
+        Args:
+            symbol (str): Ticker name of the stock.
+            functions (Iterable[str]): Alpha Vantage functions to retrieve.
+            outputsizes (Dict[str, str]): Optional outputsize per function.
+
+        Returns:
+            Dict[str, Any]: Result of each function, keyed by function name.
+
+        Raises:
+            ValueError: If a function is not supported.
+            AlphaVantageError: The first error of the failing requests.
+        """
+        getters = {
+            'TIME_SERIES_INTRADAY': self.get_daily_stock_data,
+            'TIME_SERIES_DAILY': self.get_daily_time_series,
+            'TIME_SERIES_WEEKLY': self.get_weekly_stock_data,
+            'TIME_SERIES_MONTHLY': self.get_monthly_stock_data,
+            'OVERVIEW': self.get_company_overview_data,
+        }
+        functions = list(functions)
+        unsupported = [function for function in functions if function not in getters]
+        if unsupported:
+            raise ValueError(f"Unsupported function(s): {', '.join(unsupported)}")
+
+        outputsizes = outputsizes or {}
+        tasks = {}
+        for function in functions:
+            kwargs = {'outputsize': outputsizes[function]} if function in outputsizes else {}
+            tasks[function] = asyncio.ensure_future(getters[function](symbol, **kwargs))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        return {function: task.result() for function, task in tasks.items()}
+
+    async def fetch_symbols(self, symbols: Iterable[str], functions: Iterable[str] = REPORT_FUNCTIONS,
+                            outputsizes: Optional[Dict[str, str]] = None) -> Dict[str, Union[Dict[str, Any], Exception]]:
+        """
+        Fans `fetch_many` out over many symbols; connections stay within the
+        connector limits however many symbols are requested.
+
+        Returns:
+            Dict[str, Union[Dict[str, Any], Exception]]: Datasets of each symbol,
+                or the error that symbol failed with.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        functions = list(functions)
+        results = await asyncio.gather(*(self.fetch_many(symbol, functions, outputsizes) for symbol in symbols),
+                                       return_exceptions=True)
+        for result in results:
+            if isinstance(result, asyncio.CancelledError):
+                raise result
+        return dict(zip(symbols, results))
+
+    async def _get_series(self, function: str, symbol: str, interval: Optional[str], outputsize: str) -> pd.DataFrame:
+        key = series_key(function, interval)
+        data = await self.fetch_data(function, symbol, interval=interval, outputsize=outputsize)
+        if key not in data:
+            raise InvalidSymbolError(f"Invalid symbol '{symbol}': no {key} in the response.")
+        return parse_time_series(data[key])
+
+    async def get_daily_stock_data(self, symbol: str, outputsize: str = 'compact') -> pd.DataFrame:
+        """
+        Fetches the hourly bars of a stock, see `AlphaVantageAPI.get_daily_stock_data`.
+        """
+        return await self._get_series('TIME_SERIES_INTRADAY', symbol, '60min', outputsize)
+
+    async def get_daily_time_series(self, symbol: str, outputsize: str = 'compact') -> pd.DataFrame:
+        """
+        Fetches the end-of-day bars of a stock.
+        """
+        return await self._get_series('TIME_SERIES_DAILY', symbol, None, outputsize)
+
+    async def get_weekly_stock_data(self, symbol: str, outputsize: str = 'compact') -> pd.DataFrame:
+        """
+        Fetches the weekly bars of a stock.
+        """
+        return await self._get_series('TIME_SERIES_WEEKLY', symbol, None, outputsize)
+
+    async def get_monthly_stock_data(self, symbol: str, outputsize: str = 'compact') -> pd.DataFrame:
+        """
+        Fetches the monthly bars of a stock.
+        """
+        return await self._get_series('TIME_SERIES_MONTHLY', symbol, None, outputsize)
+
+    async def get_company_overview_data(self, symbol: str) -> dict:
+        """
+        Gets the company information, financial ratios, and other key metrics.
+        """
+        return await self.fetch_data('OVERVIEW', symbol)
@@ -0,0 +1,175 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from typing import Dict, Any, Optional
+
+
+class ResponseCache:
+    """
+    Persistent on-disk cache for Alpha Vantage responses.
+
+    Entries are gzip-compressed JSON files keyed on (function, symbol, interval,
+    outputsize). Each function has its own time-to-live, the total size of the
+    cache is bounded with least-recently-used eviction, and expired entries are
+    kept around so they can be served when the network is unavailable.
+    """
+
+    # Time-to-live in seconds for each Alpha Vantage function.
+    DEFAULT_TTLS = {
+        'TIME_SERIES_INTRADAY': 15 * 60,
+        'TIME_SERIES_DAILY': 6 * 60 * 60,
+        'TIME_SERIES_WEEKLY': 24 * 60 * 60,
+        'TIME_SERIES_MONTHLY': 3 * 24 * 60 * 60,
+        'OVERVIEW': 7 * 24 * 60 * 60,
+    }
+
+    def __init__(self, cache_dir: str = ".cache/alpha_vantage", ttls: Optional[Dict[str, int]] = None,
+                 default_ttl: int = 60 * 60, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            cache_dir (str): Directory the cache entries are stored in.
+            ttls (Dict[str, int]): Per-function TTL overrides in seconds.
+            default_ttl (int): TTL for functions without a specific entry.
+            max_bytes (int): Maximum total size of the cache on disk.
+        """
+        self.cache_dir = cache_dir
+        self.ttls = {**self.DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._size = sum(os.path.getsize(path) for path in self._entry_paths())
+
+    @staticmethod
+    def make_key(function: str, symbol: str, interval: Optional[str] = None, outputsize: str = 'compact') -> str:
+        """
+        Builds the cache key of a request. The API key is deliberately left out.
+        """
+        raw = "|".join([function, symbol.upper(), interval or "", outputsize or ""])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, function: str, symbol: str, interval: Optional[str] = None, outputsize: str = 'compact',
+            allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Looks up a cached response.
+
+        Args:
+            function, symbol, interval, outputsize: Request parameters.
+            allow_stale (bool): Return the entry even if its TTL has expired.
+
+        Returns:
+            Dict[str, Any]: The cached response, or None if there is no usable entry.
+        """
+        path = self._path(self.make_key(function, symbol, interval, outputsize))
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            if not allow_stale:
+                self._count("misses")
+            return None
+
+        fresh = time.time() - entry["stored_at"] < self.ttls.get(function, self.default_ttl)
+        if not fresh and not allow_stale:
+            self._count("misses")
+            return None
+
+        self._count("hits" if fresh else "stale_hits")
+        self._touch(path)
+        return entry["data"]
+
+    def set(self, function: str, symbol: str, interval: Optional[str], outputsize: str, data: Dict[str, Any]) -> None:
+        """
+        Stores a response, replacing any previous entry atomically.
+        """
+        path = self._path(self.make_key(function, symbol, interval, outputsize))
+        entry = {"stored_at": time.time(), "function": function, "symbol": symbol, "data": data}
+        payload = gzip.compress(json.dumps(entry).encode("utf-8"))
+
+        # Write to a temporary file in the same directory and rename it into place
+        # so readers never observe a partially written entry.
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(payload)
+            with self._lock:
+                previous = os.path.getsize(path) if os.path.exists(path) else 0
+                os.replace(tmp_path, path)
+                self._size += len(payload) - previous
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._evict()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the hit/miss counters and the current size of the cache.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale_hits": self.stale_hits,
+                "evictions": self.evictions,
+                "size_bytes": self._size,
+            }
+
+    def clear(self) -> None:
+        """
+        Removes every entry from the cache.
+        """
+        with self._lock:
+            for path in self._entry_paths():
+                os.remove(path)
+            self._size = 0
+
+    def _evict(self) -> None:
+        """
+        Removes least recently used entries until the cache fits in `max_bytes`.
+        """
+        with self._lock:
+            if self._size <= self.max_bytes:
+                return
+            entries = []
+            for path in self._entry_paths():
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+            entries.sort()
+
+            for _, size, path in entries:
+                if self._size <= self.max_bytes:
+                    break
+                os.remove(path)
+                self._size -= size
+                self.evictions += 1
+
+    def _touch(self, path: str) -> None:
+        """
+        Marks an entry as recently used; the modification time drives LRU order.
+        """
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json.gz")
+
+    def _entry_paths(self):
+        return [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir) if name.endswith(".json.gz")]
@@ -0,0 +1,54 @@
+from typing import Optional
+
+
+class AlphaVantageError(ValueError):
+    """
+    Base class for errors raised while talking to Alpha Vantage.
+
+    Subclasses ValueError so existing callers that catch ValueError keep working.
+    """
+
+
+class RateLimitError(AlphaVantageError):
+    """
+    Raised when Alpha Vantage rejects a call because a rate limit was exceeded.
+    """
+
+    def __init__(self, message: str, daily: bool = False):
+        """
+        Args:
+            message (str): Message returned by the API.
+            daily (bool): True if the daily budget is exhausted, in which case
+                retrying before the budget resets is pointless.
+        """
+        super().__init__(message)
+        self.daily = daily
+
+
+class InvalidSymbolError(AlphaVantageError):
+    """
+    Raised when Alpha Vantage has no data for the requested symbol.
+    """
+
+
+class TransportError(AlphaVantageError):
+    """
+    Raised when a call fails at the network or HTTP level.
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        """
+        Args:
+            message (str): Description of the failure.
+            status (int): HTTP status of the response, None if no response was
+                received (connection error or timeout).
+        """
+        super().__init__(message)
+        self.status = status
+
+    @property
+    def retriable(self) -> bool:
+        """
+        Connection failures, timeouts and 5xx responses are worth retrying.
+        """
+        return self.status is None or self.status >= 500
@@ -0,0 +1,143 @@
+import io
+import operator
+
+import numpy as np
+import pandas as pd
+
+from typing import Dict, Iterable, Iterator, Mapping, Optional, Sequence
+
+# Alpha Vantage field names and the column names of a parsed series.
+TIME_SERIES_FIELDS = {
+    '1. open': 'open',
+    '2. high': 'high',
+    '3. low': 'low',
+    '4. close': 'close',
+    '5. volume': 'volume',
+}
+OHLCV_COLUMNS = tuple(TIME_SERIES_FIELDS.values())
+
+# dtypes of the columns of a `datatype=csv` response; timestamps become int64 nanoseconds.
+CSV_DTYPES = {'timestamp': object, 'open': np.float64, 'high': np.float64, 'low': np.float64,
+              'close': np.float64, 'volume': np.int64}
+
+
+def series_key(function: str, interval: Optional[str] = None) -> str:
+    """
+    Returns the key holding the time series in an Alpha Vantage response.
+
+    Args:
+        function (str): Alpha Vantage function, e.g. 'TIME_SERIES_WEEKLY'.
+        interval (str): Bar interval of intraday series, e.g. '60min'.
+
+    Returns:
+        str: Key of the time series mapping.
+    """
+    keys = {
+        'TIME_SERIES_INTRADAY': f"Time Series ({interval})",
+        'TIME_SERIES_DAILY': "Time Series (Daily)",
+        'TIME_SERIES_WEEKLY': "Weekly Time Series",
+        'TIME_SERIES_MONTHLY': "Monthly Time Series",
+    }
+    if function not in keys:
+        raise ValueError(f"{function} does not return a time series.")
+    return keys[function]
+
+
+def parse_time_series(series: Mapping[str, Mapping[str, str]]) -> pd.DataFrame:
+    """
+    Parses an Alpha Vantage time-series mapping into a typed OHLCV frame.
+
+    Every field is converted straight into a contiguous float64 (prices) or
+    int64 (volume) array with `np.fromiter`, so no object-dtype frame of strings
+    is ever built or transposed.
+
+    Args:
+        series (Mapping): Timestamp -> {'1. open': ..., '5. volume': ...} mapping
+            as found in the API response.
+
+    Returns:
+        pd.DataFrame: Frame with float64 open/high/low/close and int64 volume
+            columns indexed by an ascending DatetimeIndex.
+    """
+    count = len(series)
+    bars = list(series.values())
+
+    columns = {}
+    for field, column in TIME_SERIES_FIELDS.items():
+        values = map(operator.itemgetter(field), bars)
+        if column == 'volume':
+            columns[column] = np.fromiter(map(int, values), dtype=np.int64, count=count)
+        else:
+            columns[column] = np.fromiter(map(float, values), dtype=np.float64, count=count)
+
+    index = np.array(list(series.keys()), dtype='datetime64[ns]')
+
+    if count > 1 and not np.all(index[1:] >= index[:-1]):
+        # The API returns bars newest first; reversing is cheaper than a full sort.
+        if np.all(index[1:] <= index[:-1]):
+            order = slice(None, None, -1)
+        else:
+            order = np.argsort(index, kind='stable')
+        index = np.ascontiguousarray(index[order])
+        columns = {column: np.ascontiguousarray(values[order]) for column, values in columns.items()}
+
+    return pd.DataFrame(columns, index=pd.DatetimeIndex(index), copy=False)
+
+
+def parse_csv_block(block: bytes, header: Sequence[str]) -> Dict[str, np.ndarray]:
+    """
+    Parses complete lines of a `datatype=csv` response into typed columns.
+
+    Args:
+        block (bytes): One or more CSV lines, without the header line.
+        header (Sequence[str]): Column names of the response's header line.
+
+    Returns:
+        Dict[str, np.ndarray]: int64 nanosecond 'timestamp', float64 prices and
+            int64 'volume', in the order of the lines.
+    """
+    missing = [name for name in CSV_DTYPES if name not in header]
+    if missing:
+        raise ValueError(f"CSV response lacks the column(s): {', '.join(missing)}")
+    frame = pd.read_csv(io.BytesIO(block), header=None, names=list(header), usecols=list(CSV_DTYPES),
+                        dtype=CSV_DTYPES, engine='c')
+    columns = {'timestamp': pd.to_datetime(frame['timestamp'], format='ISO8601').to_numpy('datetime64[ns]').view(np.int64)}
+    for name in OHLCV_COLUMNS:
+        columns[name] = frame[name].to_numpy()
+    return columns
+
+
+def iter_csv_blocks(chunks: Iterable[bytes]) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Incrementally parses a `datatype=csv` response body.
+
+    Each chunk is parsed as soon as it arrives, up to its last complete line;
+    the partial line is carried over to the next chunk. Memory use is bounded
+    by the chunk size, whatever the length of the body.
+
+    Args:
+        chunks (Iterable[bytes]): Body of the response, e.g. `iter_content()`.
+
+    Yields:
+        Dict[str, np.ndarray]: Typed columns of each chunk's lines, see
+            `parse_csv_block`, in the order of the body.
+    """
+    header = None
+    pending = b''
+    for chunk in chunks:
+        data = pending + chunk if pending else chunk
+        end = data.rfind(b'\n')
+        if end < 0:
+            pending = data
+            continue
+        block, pending = data[:end + 1], data[end + 1:]
+        if header is None:
+            first, _, block = block.partition(b'\n')
+            header = first.decode().strip().split(',')
+        if block.strip():
+            yield parse_csv_block(block, header)
+
+    if header is None:
+        return
+    if pending.strip():
+        yield parse_csv_block(pending, header)
@@ -0,0 +1,246 @@
+import heapq
+import itertools
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+from enum import IntEnum
+from typing import Any, Callable, Dict, Optional
+
+from src.api.exceptions import RateLimitError
+from src.utils import instrumentation
+
+
+class Priority(IntEnum):
+    """
+    Scheduling priority of a request; lower values are served first.
+    """
+    INTERACTIVE = 0
+    BATCH = 10
+
+
+class TokenBucket:
+    """
+    Token bucket allowing `capacity` calls per `period` seconds.
+    """
+
+    def __init__(self, capacity: int, period: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until_available(self) -> float:
+        """
+        Returns the number of seconds until a token can be consumed.
+        """
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self) -> None:
+        self._refill()
+        self.tokens -= 1
+
+    def drain(self) -> None:
+        """
+        Empties the bucket, used when the server reports we are over the limit.
+        """
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+
+class RequestScheduler:
+    """
+    Quota-aware scheduler that sits in front of Alpha Vantage calls.
+
+    Calls are admitted through per-minute and per-day token buckets in priority
+    order, so interactive requests go ahead of queued batch backfills. Calls
+    rejected by the API as throttled are retried with exponential backoff and
+    jitter. With a `state_path` the daily bucket is saved after every call and
+    reloaded on start, so restarting the process does not reset the budget.
+    """
+
+    def __init__(self, calls_per_minute: int = 5, calls_per_day: Optional[int] = 25, max_retries: int = 5,
+                 backoff_base: float = 2.0, backoff_max: float = 60.0, sleep: Callable[[float], None] = time.sleep,
+                 state_path: Optional[str] = None):
+        """
+        Args:
+            calls_per_minute (int): Calls allowed per minute.
+            calls_per_day (int): Calls allowed per day, or None if unlimited.
+            max_retries (int): Maximum retries of a throttled call.
+            backoff_base (float): Base delay in seconds of the exponential backoff.
+            backoff_max (float): Upper bound of a single backoff delay.
+            sleep (Callable[[float], None]): Function used to wait between retries.
+            state_path (str): Optional JSON file the daily bucket is persisted in.
+        """
+        self.minute_bucket = TokenBucket(calls_per_minute, 60.0)
+        self.day_bucket = TokenBucket(calls_per_day, 24 * 60 * 60.0) if calls_per_day else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.sleep = sleep
+        self.state_path = state_path
+        self.calls = 0
+        self.retries = 0
+
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        # Serialises the state writes, and the call count of the last one written.
+        self._save_lock = threading.Lock()
+        self._saved_calls = 0
+        self._load_state()
+
+    def submit(self, function: Callable[..., Any], *args, priority: int = Priority.INTERACTIVE, **kwargs) -> Any:
+        """
+        Runs `function` once the quota allows it, retrying throttled calls.
+
+        Args:
+            function (Callable): Call to schedule, expected to raise RateLimitError
+                when the API reports it was throttled.
+            priority (int): Priority of the call, see `Priority`.
+
+        Returns:
+            Any: The return value of `function`.
+
+        Raises:
+            RateLimitError: If the daily budget is exhausted or the call is still
+                throttled after `max_retries` retries.
+        """
+        attempt = 0
+        while True:
+            self._acquire(priority)
+            try:
+                return function(*args, **kwargs)
+            except RateLimitError as err:
+                if err.daily or attempt >= self.max_retries:
+                    raise
+                with self._condition:
+                    self.minute_bucket.drain()
+                    self.retries += 1
+                instrumentation.add(retries=1)
+                self.sleep(self._backoff(attempt))
+                attempt += 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the number of admitted calls and throttle retries.
+        """
+        with self._condition:
+            return {"calls": self.calls, "retries": self.retries}
+
+    def remaining(self, horizon: float = 0.0) -> Optional[float]:
+        """
+        Returns the calls the daily budget allows over the next `horizon`
+        seconds, including those it refills in that time, or None if there is
+        no daily limit.
+        """
+        if self.day_bucket is None:
+            return None
+        with self._condition:
+            self.day_bucket._refill()
+            return max(0.0, self.day_bucket.tokens) + horizon * self.day_bucket.rate
+
+    def _load_state(self) -> None:
+        """
+        Restores the daily bucket saved by a previous process, if any.
+        """
+        if self.day_bucket is None or self.state_path is None:
+            return
+        try:
+            with open(self.state_path) as file:
+                state = json.load(file)
+            tokens, saved_at = float(state["tokens"]), float(state["saved_at"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        # The bucket runs on the monotonic clock, which does not carry across
+        # processes, so the time since the save is measured on the wall clock.
+        elapsed = max(0.0, time.time() - saved_at)
+        self.day_bucket.tokens = min(tokens, float(self.day_bucket.capacity))
+        self.day_bucket.updated = self.day_bucket.clock() - elapsed
+        self.day_bucket._refill()
+
+    def _snapshot(self) -> Optional[Dict[str, float]]:
+        """
+        Returns the daily bucket's state to save, or None if it is not saved.
+        Called with the condition held.
+        """
+        if self.day_bucket is None or self.state_path is None:
+            return None
+        self.day_bucket._refill()
+        return {"tokens": self.day_bucket.tokens, "saved_at": time.time(), "calls": self.calls}
+
+    def _save_state(self, state: Dict[str, float]) -> None:
+        """
+        Writes a snapshot to `state_path`, replacing the file atomically. Runs
+        without the condition held, so waiting calls are not blocked on the
+        disk; a snapshot older than the last one written is dropped.
+        """
+        directory = os.path.dirname(self.state_path) or "."
+        with self._save_lock:
+            if state["calls"] <= self._saved_calls:
+                return
+            try:
+                os.makedirs(directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            except OSError:
+                return
+            try:
+                with os.fdopen(fd, "w") as file:
+                    json.dump({"tokens": state["tokens"], "saved_at": state["saved_at"]}, file)
+                os.replace(tmp_path, self.state_path)
+                self._saved_calls = state["calls"]
+            except OSError:
+                # Losing the state only means the next process starts with a full bucket.
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def _backoff(self, attempt: int) -> float:
+        """
+        Exponential backoff with jitter so retrying workers do not stampede.
+        """
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _acquire(self, priority: int) -> None:
+        """
+        Blocks until this call is the highest-priority waiter and a token is free.
+        """
+        buckets = [bucket for bucket in (self.minute_bucket, self.day_bucket) if bucket is not None]
+
+        with self._condition:
+            ticket = (int(priority), next(self._sequence))
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    timeout = None
+                    if self._waiting[0] == ticket:
+                        if self.day_bucket is not None and self.day_bucket.time_until_available() > 0:
+                            raise RateLimitError("Daily API call budget exhausted.", daily=True)
+                        timeout = max(bucket.time_until_available() for bucket in buckets)
+                        if timeout <= 0:
+                            for bucket in buckets:
+                                bucket.consume()
+                            self.calls += 1
+                            state = self._snapshot()
+                            break
+                    self._condition.wait(timeout)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._condition.notify_all()
+
+        if state is not None:
+            self._save_state(state)
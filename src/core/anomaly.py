@@ -0,0 +1,211 @@
+import math
+
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+ANOMALY_COLUMNS = ['date', 'kind', 'value', 'score']
+
+
+def trailing_mean_std(values: np.ndarray, window: int):
+    """
+    Mean and population standard deviation of the `window` values before each
+    position, from cumulative sums in O(n). Positions with fewer than `window`
+    preceding values get NaN.
+
+    Roundoff in the cumulative sums leaves a small non-zero deviation on
+    windows that are flat or nearly so; windows whose variance is within the
+    error bound of the sums are recomputed directly from their values, so a
+    flat window has a deviation of exactly 0.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    mean = np.full(len(values), np.nan)
+    std = np.full(len(values), np.nan)
+    if len(values) > window:
+        shift = values[0]
+        shifted = values - shift
+        sums = np.cumsum(np.concatenate(([0.0], shifted)))
+        magnitudes = np.cumsum(np.concatenate(([0.0], np.abs(shifted))))
+        squares = np.cumsum(np.concatenate(([0.0], shifted * shifted)))
+        window_sum = sums[window:-1] - sums[:-window - 1]
+        window_squares = squares[window:-1] - squares[:-window - 1]
+        window_mean = window_sum / window
+        variance = window_squares / window - window_mean * window_mean
+
+        # A running sum of k terms is off by at most k * eps times the sum of
+        # their magnitudes, and each window is the difference of two of them.
+        terms = np.arange(window, len(values))
+        bound = 2 * terms * np.finfo(np.float64).eps * (
+            squares[window:-1] + 2 * np.abs(window_mean) * magnitudes[window:-1]) / window
+        inexact = np.flatnonzero(variance <= bound)
+        windows = np.lib.stride_tricks.sliding_window_view(values[:-1], window)[inexact]
+
+        mean[window:] = window_mean + shift
+        std[window:] = np.sqrt(np.maximum(variance, 0.0))
+        mean[window + inexact] = windows.mean(axis=1)
+        std[window + inexact] = windows.std(axis=1)
+    return mean, std
+
+
+class AnomalyDetector:
+    """
+    Flags unusual bars in a price series.
+
+    Detects returns whose z-score against the trailing window exceeds
+    `z_threshold`, volume more than `volume_ratio` times its trailing average,
+    opens that gap more than `gap_threshold` away from the previous close and,
+    optionally, missing bars where consecutive timestamps are more than
+    `max_gap` apart. `detect` runs over whole arrays with cumulative sums;
+    `update` processes only bars newer than the last one seen, keeping just the
+    trailing window as state, for streaming use.
+    """
+
+    def __init__(self, window: int = 20, z_threshold: float = 3.0, volume_ratio: float = 3.0,
+                 gap_threshold: float = 0.02, max_gap: Optional[pd.Timedelta] = None):
+        self.window = window
+        self.z_threshold = z_threshold
+        self.volume_ratio = volume_ratio
+        self.gap_threshold = gap_threshold
+        self.max_gap = pd.Timedelta(max_gap) if max_gap is not None else None
+        self.reset()
+
+    def reset(self) -> None:
+        self.last_timestamp: Optional[pd.Timestamp] = None
+        self.previous_close: Optional[float] = None
+        self.returns = deque(maxlen=self.window)
+        self.volumes = deque(maxlen=self.window)
+
+    def detect(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Finds anomalies over a whole series.
+
+        Args:
+            frame (pd.DataFrame): Frame indexed by ascending timestamp with a
+                'close' column and, optionally, 'open' and 'volume' columns.
+
+        Returns:
+            pd.DataFrame: One row per anomaly with the bar's date, the kind of
+                anomaly, the observed value and its score, ordered by date.
+        """
+        self.reset()
+        if frame.empty:
+            return pd.DataFrame(columns=ANOMALY_COLUMNS)
+
+        dates = pd.DatetimeIndex(frame.index)
+        close = frame['close'].to_numpy(dtype=np.float64)
+        found = []
+
+        returns = np.full(len(close), np.nan)
+        returns[1:] = close[1:] / close[:-1] - 1.0
+        mean, std = trailing_mean_std(returns[1:], self.window)
+        # A flat trailing window has no spread to score against, as in `update`.
+        std[std == 0] = np.nan
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z_scores = np.concatenate(([np.nan], (returns[1:] - mean) / std))
+        found.append(self._rows(dates, 'return_zscore', returns, z_scores, np.abs(z_scores) > self.z_threshold))
+
+        if 'volume' in frame.columns:
+            volume = frame['volume'].to_numpy(dtype=np.float64)
+            average, _ = trailing_mean_std(volume, self.window)
+            average[average <= 0] = np.nan
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ratio = volume / average
+            found.append(self._rows(dates, 'volume_spike', volume, ratio, ratio > self.volume_ratio))
+            self.volumes.extend(volume[-self.window:].tolist())
+
+        if 'open' in frame.columns and len(close) > 1:
+            gaps = np.full(len(close), np.nan)
+            gaps[1:] = frame['open'].to_numpy(dtype=np.float64)[1:] / close[:-1] - 1.0
+            found.append(self._rows(dates, 'price_gap', gaps, gaps, np.abs(gaps) > self.gap_threshold))
+
+        if self.max_gap is not None and len(dates) > 1:
+            deltas = np.concatenate(([0], np.diff(dates.asi8)))
+            limit = self.max_gap.value
+            found.append(self._rows(dates, 'time_gap', deltas / 1e9, deltas / limit, deltas > limit))
+
+        self.last_timestamp = dates[-1]
+        self.previous_close = float(close[-1])
+        self.returns.extend(returns[1:][-self.window:].tolist())
+
+        anomalies = pd.concat(found, ignore_index=True)
+        return anomalies.sort_values('date', kind='stable', ignore_index=True)
+
+    def update(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Streams bars newer than the last one seen through the detector.
+
+        Args:
+            frame (pd.DataFrame): Frame as for `detect`; bars at or before the last
+                seen timestamp are skipped.
+
+        Returns:
+            pd.DataFrame: Anomalies among the new bars.
+        """
+        if self.last_timestamp is not None:
+            frame = frame[frame.index > self.last_timestamp]
+
+        rows: List[Dict] = []
+        has_volume, has_open = 'volume' in frame.columns, 'open' in frame.columns
+        for date, bar in zip(frame.index, frame.to_dict('records')):
+            date = pd.Timestamp(date)
+            close = float(bar['close'])
+
+            if self.previous_close is not None:
+                value = close / self.previous_close - 1.0
+                if len(self.returns) == self.window:
+                    mean = sum(self.returns) / self.window
+                    std = math.sqrt(max(sum((item - mean) ** 2 for item in self.returns) / self.window, 0.0))
+                    if std > 0 and abs(value - mean) / std > self.z_threshold:
+                        rows.append({'date': date, 'kind': 'return_zscore', 'value': value, 'score': (value - mean) / std})
+                self.returns.append(value)
+
+                if has_open:
+                    gap = float(bar['open']) / self.previous_close - 1.0
+                    if abs(gap) > self.gap_threshold:
+                        rows.append({'date': date, 'kind': 'price_gap', 'value': gap, 'score': gap})
+
+            if has_volume:
+                volume = float(bar['volume'])
+                if len(self.volumes) == self.window:
+                    average = sum(self.volumes) / self.window
+                    if average > 0 and volume / average > self.volume_ratio:
+                        rows.append({'date': date, 'kind': 'volume_spike', 'value': volume, 'score': volume / average})
+                self.volumes.append(volume)
+
+            if self.max_gap is not None and self.last_timestamp is not None:
+                delta = date - self.last_timestamp
+                if delta > self.max_gap:
+                    rows.append({'date': date, 'kind': 'time_gap', 'value': delta.total_seconds(),
+                                 'score': delta / self.max_gap})
+
+            self.previous_close = close
+            self.last_timestamp = date
+
+        return pd.DataFrame(rows, columns=ANOMALY_COLUMNS)
+
+    @staticmethod
+    def _rows(dates: pd.DatetimeIndex, kind: str, values: np.ndarray, scores: np.ndarray,
+              mask: np.ndarray) -> pd.DataFrame:
+        positions = np.flatnonzero(mask)
+        return pd.DataFrame({'date': dates[positions], 'kind': kind, 'value': values[positions],
+                             'score': scores[positions]}, columns=ANOMALY_COLUMNS)
+
+
+def detect_anomalies(cleaned: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """
+    Anomaly detection stage, run over cleaned series keyed by time period.
+
+    Args:
+        cleaned: Output of `DataTransformer.clean_data` keyed by 'D', 'W' or 'M';
+            volume spikes and price gaps need `keep_ohlcv=True`
+
+    Time gaps are not looked for: nights, weekends and holidays would flag
+    most bars of the hourly and daily series.
+
+    Returns:
+        Dict[str, pd.DataFrame]: Anomalies of each time period
+    """
+    return {time_period: AnomalyDetector().detect(data.rename(columns={'stock_price': 'close'}).set_index('date'))
+            for time_period, data in cleaned.items()}
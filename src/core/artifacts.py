@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import tempfile
+
+from importlib import metadata
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Bump when the plots or the report layout change, so artifacts rendered by
+# older code are not reused.
+ARTIFACT_VERSION = 1
+
+# Overview fields shown in the report; changes to any other field do not
+# trigger a rebuild.
+REPORT_OVERVIEW_FIELDS = ('Name', 'Description', 'MarketCapitalization', 'EPS', 'PERatio', 'RevenueTTM',
+                          'GrossProfitTTM', 'OperatingMarginTTM', 'ReturnOnEquityTTM', 'RevenuePerShareTTM',
+                          'ProfitMargin', 'BookValue', 'DividendYield')
+
+# Packages whose versions are part of every artifact's inputs.
+RENDERING_PACKAGES = ('matplotlib', 'reportlab')
+
+MANIFEST_FILE = ".manifest.json"
+ARTIFACTS_DIR = ".artifacts"
+
+
+def _package_version(name: str) -> Optional[str]:
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+# Read from package metadata, so the packages themselves are not imported.
+RENDERER_VERSION = {'artifacts': ARTIFACT_VERSION, **{name: _package_version(name) for name in RENDERING_PACKAGES}}
+
+
+def _update(digest, value: Any) -> None:
+    """
+    Feeds a value into a hash, tagged with its type so that e.g. the string
+    '1' and the number 1 differ.
+    """
+    if isinstance(value, pd.DataFrame):
+        digest.update(b'frame')
+        _update(digest, [list(map(str, value.columns)), [str(dtype) for dtype in value.dtypes]])
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, (pd.Series, pd.Index)):
+        digest.update(b'series')
+        digest.update(pd.util.hash_pandas_object(value, index=isinstance(value, pd.Series)).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(f"array{value.dtype.str}{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, bytes):
+        digest.update(b'bytes%d:' % len(value))
+        digest.update(value)
+    elif isinstance(value, dict):
+        digest.update(b'dict%d:' % len(value))
+        for key in sorted(value, key=str):
+            _update(digest, str(key))
+            _update(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(b'list%d:' % len(value))
+        for item in value:
+            _update(digest, item)
+    else:
+        text = json.dumps(value, default=str).encode()
+        digest.update(b'json%d:' % len(text))
+        digest.update(text)
+
+
+def content_hash(*parts: Any) -> str:
+    """
+    Hex digest of the contents of any mix of frames, series, arrays, bytes,
+    dicts, sequences and JSON-serialisable values.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        _update(digest, part)
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """
+    Content-addressed artifacts of a report directory.
+
+    Artifacts, such as rendered plots, are stored in `.artifacts/` under the
+    hash of the inputs they were rendered from, and `.manifest.json` records
+    the hashes the current report was built from. A store opened with
+    `reuse=False` never returns stored artifacts, which forces a rebuild, but
+    still records the new ones.
+    """
+
+    def __init__(self, root: str, reuse: bool = True):
+        self.root = root
+        self.reuse = reuse
+        self._manifest: Optional[Dict[str, Any]] = None
+
+    @property
+    def manifest(self) -> Dict[str, Any]:
+        """
+        Hashes recorded by the last build, empty if there was none.
+        """
+        if self._manifest is None:
+            try:
+                with open(os.path.join(self.root, MANIFEST_FILE)) as file:
+                    self._manifest = json.load(file)
+            except (FileNotFoundError, ValueError):
+                self._manifest = {}
+        return self._manifest if self.reuse else {}
+
+    def unchanged(self, name: str, key: str, *paths: str) -> bool:
+        """
+        Returns True if the manifest records `key` for `name` and every output
+        path still exists.
+        """
+        return self.manifest.get(name) == key and all(os.path.exists(path) for path in paths)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        The artifact stored under `key`, or None.
+        """
+        if not self.reuse:
+            return None
+        try:
+            with open(self._path(key), 'rb') as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        self._write(self._path(key), data)
+
+    def record(self, entries: Dict[str, Any], keep: Iterable[str] = ()) -> None:
+        """
+        Writes the manifest with `entries` updated, and deletes the artifacts
+        whose keys are not in `keep`.
+        """
+        manifest = dict(self._manifest or {}) if self.reuse else {}
+        manifest.update(entries)
+        self._manifest = manifest
+        self._write(os.path.join(self.root, MANIFEST_FILE), json.dumps(manifest, indent=2).encode())
+
+        keep = set(keep)
+        directory = os.path.join(self.root, ARTIFACTS_DIR)
+        for name in os.listdir(directory) if os.path.isdir(directory) else ():
+            if name.split('.')[0] not in keep:
+                os.unlink(os.path.join(directory, name))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, ARTIFACTS_DIR, f"{key}.bin")
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, path)
@@ -0,0 +1,65 @@
+import importlib
+import sys
+import threading
+
+from typing import Any, Dict, List
+
+# Resolution of rasterised plots. Lives here so callers can use it without
+# importing matplotlib.
+DEFAULT_DPI = 300
+
+# Rendering backends, as 'module:attribute' import paths. The modules pull in
+# matplotlib and reportlab, which cost more start-up time than everything else
+# the CLI imports, so they are only imported once a backend is first used.
+BACKENDS = {
+    'report': 'src.core.report_generator:ReportGenerator',
+    'plot': 'src.core.plot_renderer:PlotRenderer',
+    'portfolio': 'src.core.report_generator:generate_portfolio_report',
+    'consolidated': 'src.core.report_generator:ConsolidatedReport',
+}
+
+# Third-party packages the backends import.
+HEAVY_PACKAGES = ('matplotlib', 'reportlab')
+
+_loaded: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def register_backend(name: str, path: str) -> None:
+    """
+    Registers, or replaces, a backend loaded lazily from `path`.
+
+    Args:
+        name (str): Backend name passed to `load_backend`.
+        path (str): 'module:attribute' import path, the attribute may be dotted.
+    """
+    with _lock:
+        BACKENDS[name] = path
+        _loaded.pop(name, None)
+
+
+def load_backend(name: str) -> Any:
+    """
+    Imports a backend on first use and returns it.
+
+    Raises:
+        KeyError: If no backend is registered under `name`.
+    """
+    backend = _loaded.get(name)
+    if backend is not None:
+        return backend
+    with _lock:
+        if name not in _loaded:
+            module_name, _, attribute = BACKENDS[name].partition(':')
+            backend = importlib.import_module(module_name)
+            for part in attribute.split('.') if attribute else []:
+                backend = getattr(backend, part)
+            _loaded[name] = backend
+        return _loaded[name]
+
+
+def loaded_packages() -> List[str]:
+    """
+    Heavy packages imported so far in this process.
+    """
+    return [package for package in HEAVY_PACKAGES if package in sys.modules]
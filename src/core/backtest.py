@@ -0,0 +1,428 @@
+import itertools
+import os
+import re
+import time
+
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.core.batch import batch_results, process_pool
+from src.core.fundamentals import FundamentalsStore
+from src.core.history_store import HistoryStore
+from src.core.pipeline import clean_series, fetch_symbol
+
+# Bars per year of each time period, to annualise returns and Sharpe ratios.
+PERIODS_PER_YEAR = {'D': 252, 'W': 52, 'M': 12}
+
+# Results file of `backtest_batch`, per rule.
+BACKTEST_FILE = "backtest_{rule}.csv"
+
+# Metrics reported for every configuration, in column order.
+METRICS = ['total_return', 'annual_return', 'volatility', 'sharpe', 'max_drawdown', 'trades', 'exposure']
+
+# Largest configurations x bars evaluated in one block; a block needs a few
+# float64 arrays of this size.
+MAX_BLOCK_CELLS = 1 << 22
+
+Grid = Mapping[str, Sequence[Union[int, float]]]
+
+
+def rolling_means(close: np.ndarray, windows: Sequence[int]) -> np.ndarray:
+    """
+    Simple moving averages of many windows from one running sum.
+
+    Returns:
+        np.ndarray: One row per window, NaN until the window is full.
+    """
+    sums = np.cumsum(np.concatenate(([0.0], close)))
+    means = np.full((len(windows), len(close)), np.nan)
+    for row, window in enumerate(windows):
+        if window <= len(close):
+            means[row, window - 1:] = (sums[window:] - sums[:-window]) / window
+    return means
+
+
+def trailing_extremes(close: np.ndarray, windows: Sequence[int], function=np.max) -> np.ndarray:
+    """
+    Highest (or lowest, with `np.min`) close of the `window` bars before each
+    bar, for many windows.
+
+    Returns:
+        np.ndarray: One row per window, NaN until `window` earlier bars exist.
+    """
+    extremes = np.full((len(windows), len(close)), np.nan)
+    for row, window in enumerate(windows):
+        if window < len(close):
+            extremes[row, window:] = function(sliding_window_view(close[:-1], window), axis=1)
+    return extremes
+
+
+class Rule:
+    """
+    Base class of parameterised trading rules.
+
+    `positions` evaluates the rule for every point of a parameter grid at
+    once: each parameter is one array dimension, in `parameters` order, and
+    time is the last. Positions are the exposure held after each bar's close,
+    True for long and False for flat.
+    """
+
+    # Names of the rule's parameters, in grid dimension order.
+    parameters = ()
+
+    # Grid swept when none is given.
+    default_grid: Dict[str, Sequence[int]] = {}
+
+    def positions(self, close: np.ndarray, **grid: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def valid(self, **grid: np.ndarray) -> np.ndarray:
+        """
+        Boolean array over the grid, False for meaningless combinations.
+        """
+        return np.ones([len(grid[name]) for name in self.parameters], dtype=bool)
+
+
+class MACrossover(Rule):
+    """
+    Long while the fast simple moving average is above the slow one.
+    """
+
+    parameters = ('fast', 'slow')
+    default_grid = {'fast': range(5, 55, 5), 'slow': range(20, 220, 20)}
+
+    def positions(self, close, fast, slow):
+        windows, inverse = np.unique(np.concatenate((fast, slow)).astype(int), return_inverse=True)
+        means = rolling_means(close, windows)
+        fast_means = means[inverse[:len(fast)]][:, None, :]
+        slow_means = means[inverse[len(fast):]][None, :, :]
+        return fast_means > slow_means
+
+    def valid(self, fast, slow):
+        return np.asarray(fast)[:, None] < np.asarray(slow)[None, :]
+
+
+class Breakout(Rule):
+    """
+    Goes long when the close exceeds the highest close of the previous `entry`
+    bars, and flat when it falls below the lowest close of the previous `exit`
+    bars.
+    """
+
+    parameters = ('entry', 'exit')
+    default_grid = {'entry': range(10, 110, 10), 'exit': range(5, 55, 5)}
+
+    def positions(self, close, entry, exit):
+        bars = np.arange(len(close))
+        entries = close > trailing_extremes(close, np.asarray(entry, dtype=int), np.max)
+        exits = close < trailing_extremes(close, np.asarray(exit, dtype=int), np.min)
+        # Position is held when the latest entry signal is more recent than the latest exit.
+        last_entry = np.maximum.accumulate(np.where(entries, bars, -1), axis=-1)
+        last_exit = np.maximum.accumulate(np.where(exits, bars, -1), axis=-1)
+        return last_entry[:, None, :] > last_exit[None, :, :]
+
+
+RULES = {
+    'ma_crossover': MACrossover,
+    'breakout': Breakout,
+}
+
+
+def parse_rule(name: str) -> Rule:
+    """
+    Creates a rule from its name in `RULES`.
+    """
+    if name not in RULES:
+        raise ValueError(f"Unknown rule '{name}', expected one of: {', '.join(RULES)}")
+    return RULES[name]()
+
+
+def parse_grid(specs: Sequence[str]) -> Dict[str, List[Union[int, float]]]:
+    """
+    Parses grid specs such as 'fast=5:50:5' (start:stop:step, stop inclusive)
+    or 'slow=50,100,200' into parameter values.
+    """
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition('=')
+        match = re.fullmatch(r'(-?[\d.]+):(-?[\d.]+):([\d.]+)', values.strip())
+        if match:
+            start, stop, step = (float(value) for value in match.groups())
+            if step <= 0:
+                raise ValueError(f"Grid step must be positive: '{spec}'")
+            points = np.arange(start, stop + step / 2, step)
+        else:
+            points = [float(value) for value in values.split(',') if value.strip()]
+        if not name.strip() or not len(points):
+            raise ValueError(f"Invalid grid spec '{spec}', expected name=start:stop:step or name=v1,v2,...")
+        grid[name.strip()] = [int(point) if float(point).is_integer() else float(point) for point in points]
+    return grid
+
+
+def performance(positions: np.ndarray, close: np.ndarray, periods_per_year: int = 252,
+                cost: float = 0.0) -> Dict[str, np.ndarray]:
+    """
+    Performance metrics of position series, reduced along the last axis.
+
+    A position taken at a bar's close earns the next bar's return; `cost` is
+    charged as a fraction of the traded exposure whenever the position changes.
+
+    Args:
+        positions (np.ndarray): Positions of any number of configurations,
+            time on the last axis; booleans for long or flat, or exposures.
+        close (np.ndarray): Close prices, one per bar.
+        periods_per_year (int): Bars per year, to annualise.
+        cost (float): Transaction cost per unit of exposure traded.
+
+    Returns:
+        Dict[str, np.ndarray]: Every metric of `METRICS`, shaped like
+            `positions` without its last axis.
+    """
+    bars = positions.shape[-1]
+    if bars == 0:
+        empty = np.zeros(positions.shape[:-1])
+        return dict({name: empty for name in METRICS}, sharpe=np.full(empty.shape, np.nan))
+    returns = close[1:] / close[:-1] - 1
+
+    # Few large arrays, updated in place: these passes dominate a sweep.
+    if positions.dtype == bool:
+        turnover = np.empty(positions.shape, dtype=bool)
+        turnover[..., 0] = positions[..., 0]
+        np.not_equal(positions[..., 1:], positions[..., :-1], out=turnover[..., 1:])
+    else:
+        turnover = np.empty(positions.shape)
+        turnover[..., 0] = positions[..., 0]
+        np.subtract(positions[..., 1:], positions[..., :-1], out=turnover[..., 1:])
+        np.abs(turnover, out=turnover)
+    strategy = np.zeros(positions.shape)
+    np.multiply(positions[..., :-1], returns, out=strategy[..., 1:], dtype=np.float64)
+    if cost:
+        strategy -= cost * turnover
+
+    total_sum = strategy.sum(axis=-1)
+    square_sum = np.einsum('...t,...t->...', strategy, strategy)
+    mean = total_sum / bars
+    volatility = np.sqrt(np.maximum(square_sum / bars - mean ** 2, 0.0))
+
+    equity = strategy
+    equity += 1.0
+    np.cumprod(equity, axis=-1, out=equity)
+    peak = np.maximum.accumulate(equity, axis=-1)
+    np.divide(equity, peak, out=peak)
+    total = equity[..., -1] - 1.0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(volatility > 0, mean / volatility * np.sqrt(periods_per_year), np.nan)
+        annual = np.where(total > -1, (1.0 + total) ** (periods_per_year / max(bars - 1, 1)) - 1.0, -1.0)
+    return {
+        'total_return': total,
+        'annual_return': annual,
+        'volatility': volatility * np.sqrt(periods_per_year),
+        'sharpe': sharpe,
+        'max_drawdown': peak.min(axis=-1) - 1.0,
+        'trades': np.count_nonzero(turnover, axis=-1),
+        'exposure': positions.mean(axis=-1),
+    }
+
+
+def sweep(close: np.ndarray, rule: Union[str, Rule], grid: Optional[Grid] = None, periods_per_year: int = 252,
+          cost: float = 0.0, max_block_cells: int = MAX_BLOCK_CELLS) -> pd.DataFrame:
+    """
+    Backtests a rule over every point of a parameter grid.
+
+    The grid is evaluated as array dimensions, in blocks of the first
+    parameter small enough to keep memory bounded.
+
+    Args:
+        close (np.ndarray): Close prices in ascending time order.
+        rule: Rule or its name in `RULES`.
+        grid (Grid): Values of each parameter, the rule's `default_grid` if None.
+        periods_per_year (int): Bars per year, to annualise.
+        cost (float): Transaction cost per unit of exposure traded.
+        max_block_cells (int): Largest configurations x bars per block.
+
+    Returns:
+        pd.DataFrame: One row per valid configuration, the parameters then `METRICS`.
+    """
+    rule = parse_rule(rule) if isinstance(rule, str) else rule
+    grid = {name: np.asarray((grid or rule.default_grid)[name]) for name in rule.parameters}
+    close = np.asarray(close, dtype=np.float64)
+    first, *others = rule.parameters
+    inner = int(np.prod([len(grid[name]) for name in others]))
+    step = max(1, max_block_cells // max(inner * len(close), 1))
+
+    frames = []
+    for start in range(0, len(grid[first]), step):
+        block = dict(grid, **{first: grid[first][start:start + step]})
+        metrics = performance(rule.positions(close, **block), close, periods_per_year, cost)
+        mesh = np.meshgrid(*(block[name] for name in rule.parameters), indexing='ij')
+        keep = rule.valid(**block)
+        columns = {name: values[keep] for name, values in zip(rule.parameters, mesh)}
+        columns.update({name: metrics[name][keep] for name in METRICS})
+        frames.append(pd.DataFrame(columns))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=list(rule.parameters) + METRICS)
+
+
+def sweep_task(symbol: str, close: np.ndarray, rule: str, grid: Grid, periods_per_year: int = 252,
+               cost: float = 0.0) -> pd.DataFrame:
+    """
+    `sweep` of one symbol, with a leading 'symbol' column; the unit of work
+    submitted to process pools.
+    """
+    results = sweep(close, rule, grid, periods_per_year, cost)
+    results.insert(0, 'symbol', symbol)
+    return results
+
+
+def sweep_tasks(symbol: str, close: np.ndarray, rule: str, grid: Optional[Grid] = None, periods_per_year: int = 252,
+                cost: float = 0.0, splits: int = 1) -> List[tuple]:
+    """
+    Arguments of the `sweep_task` calls covering a symbol's grid, one per
+    slice of the first parameter's values.
+    """
+    rule_class = parse_rule(rule)
+    grid = {name: list((grid or rule_class.default_grid)[name]) for name in rule_class.parameters}
+    first = rule_class.parameters[0]
+    slices = np.array_split(np.asarray(grid[first]), max(1, min(splits, len(grid[first]))))
+    close = np.asarray(close, dtype=np.float64)
+    return [(symbol, close, rule, dict(grid, **{first: values.tolist()}), periods_per_year, cost) for values in slices]
+
+
+def sweep_many(closes: Mapping[str, np.ndarray], rule: str, grid: Optional[Grid] = None, periods_per_year: int = 252,
+               cost: float = 0.0, executor: Optional[Executor] = None, splits: int = 1) -> pd.DataFrame:
+    """
+    Runs `sweep` for many symbols, spread over a process pool.
+
+    Each task is one symbol and one of `splits` slices of the first
+    parameter's values, so a single symbol's grid is shared across cores too.
+
+    Args:
+        closes (Mapping[str, np.ndarray]): Close prices of each symbol.
+        rule (str): Name of the rule in `RULES`.
+        grid (Grid): Values of each parameter, the rule's `default_grid` if None.
+        periods_per_year (int): Bars per year, to annualise.
+        cost (float): Transaction cost per unit of exposure traded.
+        executor (Executor): Process pool the tasks run on; run in this process if None.
+        splits (int): Slices of the first parameter per symbol.
+
+    Returns:
+        pd.DataFrame: One row per symbol and valid configuration, with a
+            'symbol' column, the parameters and `METRICS`.
+    """
+    tasks = [task for symbol, close in closes.items()
+             for task in sweep_tasks(symbol, close, rule, grid, periods_per_year, cost, splits)]
+    if executor is None:
+        frames = list(itertools.starmap(sweep_task, tasks))
+    else:
+        frames = [future.result() for future in [executor.submit(sweep_task, *task) for task in tasks]]
+    if not frames:
+        return pd.DataFrame(columns=['symbol', *parse_rule(rule).parameters, *METRICS])
+    return pd.concat(frames, ignore_index=True)
+
+
+def best_configurations(results: pd.DataFrame, metric: str = 'sharpe', top: int = 1) -> pd.DataFrame:
+    """
+    The `top` configurations of each symbol by `metric`, symbols in the order
+    of `results` and best first.
+    """
+    order = {symbol: position for position, symbol in enumerate(results['symbol'].unique())}
+    ranked = results.dropna(subset=[metric]).sort_values(metric, ascending=False, kind='stable')
+    best = ranked.groupby('symbol', sort=False).head(top)
+    return best.sort_values('symbol', key=lambda symbols: symbols.map(order), kind='stable').reset_index(drop=True)
+
+
+def _timed_sweep_task(*task):
+    start = time.perf_counter()
+    results = sweep_task(*task)
+    return results, time.perf_counter() - start
+
+
+def backtest_batch(api, symbols: Iterable[str], rule: str, grid: Optional[Dict[str, Sequence]] = None,
+                   time_period: str = 'D', output_root: str = "output", fetch_workers: int = 4,
+                   workers: Optional[int] = None, history: Optional[HistoryStore] = None,
+                   cost: float = 0.0, fundamentals: Optional[FundamentalsStore] = None) -> List[Dict[str, Any]]:
+    """
+    Sweeps a trading rule's parameter grid over many symbols' price series.
+
+    Series are fetched as in `fetch_symbol` with derived timeframes, so every
+    time period has the full daily history behind it. Each symbol's grid is
+    split into slices submitted to a process pool as soon as its data arrives,
+    and every configuration's metrics are written to
+    `output_root/backtest_<rule>.csv`.
+
+    Args:
+        api: AlphaVantageAPI used to fetch the data
+        symbols: Stock ticker symbols to backtest
+        rule: Name of the rule in `backtest.RULES`
+        grid: Values of each rule parameter, the rule's default grid if None
+        time_period: Bars backtested, 'D', 'W' or 'M'
+        output_root: Directory of the results file
+        fetch_workers: Maximum number of symbols fetched concurrently
+        workers: Number of worker processes, defaults to the core count
+        history: Optional history store the fetched series are merged into
+        cost: Transaction cost per unit of exposure traded
+        fundamentals: Optional store the company overviews are kept in
+
+    Returns:
+        List[Dict[str, Any]]: One result per symbol, in input order, shaped like
+            those of `run_batch`; 'report' describes the best configuration by
+            Sharpe ratio and 'render_seconds' the sweep time summed over workers
+    """
+    parameters = parse_rule(rule).parameters
+    symbols, results = batch_results(symbols)
+    workers = workers or os.cpu_count()
+    # Spread a few symbols' grids over every worker, but no finer.
+    splits = -(-workers // max(len(symbols), 1))
+
+    def fetch(symbol: str):
+        start = time.perf_counter()
+        try:
+            return clean_series(fetch_symbol(api, symbol, history, True, fundamentals), time_period)
+        finally:
+            results[symbol]["fetch_seconds"] = time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool, \
+            process_pool(workers) as sweep_pool:
+        fetches = {fetch_pool.submit(fetch, symbol): symbol for symbol in symbols}
+        sweeps = {}
+        for future in as_completed(fetches):
+            symbol = fetches[future]
+            try:
+                close = future.result()['stock_price'].to_numpy()
+            except Exception as err:
+                results[symbol]["error"] = f"fetch: {err}"
+                continue
+            sweeps[symbol] = [sweep_pool.submit(_timed_sweep_task, *task)
+                              for task in sweep_tasks(symbol, close, rule, grid, PERIODS_PER_YEAR[time_period], cost,
+                                                      splits)]
+
+        frames = []
+        for symbol in symbols:
+            if symbol not in sweeps:
+                continue
+            try:
+                parts = [future.result() for future in sweeps[symbol]]
+            except Exception as err:
+                results[symbol]["error"] = f"backtest: {err}"
+                continue
+            frames += [frame for frame, _ in parts]
+            results[symbol]["render_seconds"] = sum(seconds for _, seconds in parts)
+            best = best_configurations(pd.concat([frame for frame, _ in parts]))
+            if best.empty:
+                results[symbol]["error"] = "backtest: no configuration with a Sharpe ratio"
+                continue
+            best = best.iloc[0]
+            settings = " ".join(f"{name}={best[name]:g}" for name in parameters)
+            results[symbol]["report"] = (f"{settings} sharpe {best['sharpe']:.2f}, return {best['total_return']:.1%}, "
+                                         f"drawdown {best['max_drawdown']:.1%}")
+            results[symbol]["status"] = "ok"
+
+    if frames:
+        os.makedirs(output_root, exist_ok=True)
+        pd.concat(frames, ignore_index=True).to_csv(os.path.join(output_root, BACKTEST_FILE.format(rule=rule)),
+                                                    index=False, columns=['symbol', *parameters, *METRICS])
+    return [results[symbol] for symbol in symbols]
@@ -0,0 +1,49 @@
+import multiprocessing
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Start method of the render and sweep process pools. They are created while
+# fetch threads hold locks, which a forked child would inherit held.
+PROCESS_START_METHOD = 'spawn'
+
+
+def process_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Process pool whose workers are started with `PROCESS_START_METHOD`.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(PROCESS_START_METHOD))
+
+
+def batch_results(symbols: Iterable[str]) -> Tuple[List[str], Dict[str, Dict[str, Any]]]:
+    """
+    Normalises and deduplicates the symbols of a batch and creates a failed
+    result for each, which the batch fills in as it goes.
+
+    Returns:
+        Tuple[List[str], Dict[str, Dict[str, Any]]]: The symbols, in input
+            order, and their results
+    """
+    symbols = list(dict.fromkeys(symbol.strip().upper() for symbol in symbols if symbol.strip()))
+    results = {symbol: {"symbol": symbol, "status": "failed", "error": None, "report": None,
+                        "fetch_seconds": 0.0, "render_seconds": 0.0} for symbol in symbols}
+    return symbols, results
+
+
+def format_summary(results: List[Dict[str, Any]], outcome: str = "reports generated") -> str:
+    """
+    Formats batch results as a plain-text summary table.
+
+    Args:
+        results: Results of `run_batch`, `consolidated_batch` or `fetch_batch`
+        outcome: What succeeded, for the closing line
+    """
+    lines = [f"{'Symbol':<10}{'Status':<8}{'Fetch (s)':>10}{'Render (s)':>12}  Detail"]
+    for result in results:
+        detail = (result["report"] or "") if result["status"] == "ok" else result["error"]
+        lines.append(f"{result['symbol']:<10}{result['status']:<8}{result['fetch_seconds']:>10.2f}"
+                     f"{result['render_seconds']:>12.2f}  {detail}")
+
+    succeeded = sum(result["status"] == "ok" for result in results)
+    lines.append(f"{succeeded}/{len(results)} {outcome} successfully.")
+    return "\n".join(lines)
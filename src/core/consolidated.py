@@ -0,0 +1,122 @@
+import os
+import time
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.core.backends import load_backend
+from src.core.batch import batch_results, process_pool
+from src.core.fundamentals import FundamentalsStore
+from src.core.history_store import HistoryStore
+from src.core.pipeline import fetch_symbol, prepare_report
+from src.utils import instrumentation
+
+
+def render_section(symbol: str, datasets: Dict[str, Any], **options) -> Dict[str, Any]:
+    """
+    Renders the plots of a symbol and returns its report section, see
+    `ReportGenerator.section`. Runs inside a worker process.
+
+    Args:
+        symbol: Stock ticker symbol
+        datasets: Results of `AlphaVantageAPI.fetch_many` keyed by function
+        **options: Rendering options of `prepare_report`
+    """
+    return prepare_report(symbol, datasets, **options).section()
+
+
+def _timed_render_section(symbol: str, datasets: Dict[str, Any], **options):
+    start = time.perf_counter()
+    section = render_section(symbol, datasets, **options)
+    return section, time.perf_counter() - start
+
+
+def consolidated_batch(api, symbols: Iterable[str], output_path: str, fetch_workers: int = 4,
+                       render_workers: Optional[int] = None, history: Optional[HistoryStore] = None,
+                       derive_timeframes: bool = False, fundamentals: Optional[FundamentalsStore] = None,
+                       title: str = "Market Report", window: Optional[int] = None,
+                       **render_options) -> List[Dict[str, Any]]:
+    """
+    Writes the reports of many symbols into one PDF, with a table of contents
+    and a bookmark per symbol.
+
+    Symbols are fetched on a thread pool and their plots rendered on a process
+    pool, at most `window` of them at a time; their sections are collected in
+    input order and laid out as one PDF once all are ready, so every section's
+    plots are held until then, see `ConsolidatedReport`. A failing symbol is
+    listed at the end of the PDF instead of aborting it.
+
+    Args:
+        api: AlphaVantageAPI used to fetch the data
+        symbols: Stock ticker symbols, in the order of the sections
+        output_path: Path the PDF is written to
+        fetch_workers: Maximum number of symbols fetched concurrently
+        render_workers: Number of worker processes, defaults to the core count
+        history: Optional history store the fetched series are merged into
+        derive_timeframes: Derive weekly and monthly bars from the daily series
+        fundamentals: Optional store the company overviews are kept in
+        title: Title of the report
+        window: Symbols fetched or rendered ahead of the section being
+            collected, defaults to twice the number of workers
+        **render_options: Rendering options of `prepare_report`
+
+    Returns:
+        List[Dict[str, Any]]: One result per symbol, in input order, with its
+            status, error, page and fetch/render timings
+    """
+    symbols, results = batch_results(symbols)
+    render_workers = render_workers or os.cpu_count()
+    window = window or 2 * max(fetch_workers, render_workers)
+    recorder = instrumentation.active()
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool, \
+            process_pool(render_workers) as render_pool:
+
+        def fetch_and_render(symbol: str):
+            start = time.perf_counter()
+            try:
+                datasets = fetch_symbol(api, symbol, history, derive_timeframes, fundamentals)
+            except Exception as err:
+                results[symbol]["error"] = f"fetch: {err}"
+                raise
+            finally:
+                results[symbol]["fetch_seconds"] = time.perf_counter() - start
+            if recorder is not None:
+                return render_pool.submit(instrumentation.call_traced, recorder.profile, _timed_render_section,
+                                          symbol, datasets, **render_options)
+            return render_pool.submit(_timed_render_section, symbol, datasets, **render_options)
+
+        def submit_next() -> None:
+            symbol = next(queued, None)
+            if symbol is not None:
+                pending.append((symbol, fetch_pool.submit(fetch_and_render, symbol)))
+
+        def sections():
+            # Each symbol's slot in the window is refilled as its section is collected.
+            while pending:
+                symbol, future = pending.popleft()
+                try:
+                    result = future.result().result()
+                    if recorder is not None:
+                        result, exported = result
+                        recorder.merge(exported)
+                    section, results[symbol]["render_seconds"] = result
+                except Exception as err:
+                    results[symbol]["error"] = results[symbol]["error"] or f"render: {err}"
+                    section = results[symbol]["error"]
+                submit_next()
+                yield symbol, section
+
+        report = load_backend('consolidated')(output_path, symbols, title)
+        pending, queued = deque(), iter(symbols)
+        for _ in range(window):
+            submit_next()
+        pages = report.build(sections())
+
+    for symbol in symbols:
+        if symbol in report.pages and results[symbol]["error"] is None:
+            results[symbol]["status"] = "ok"
+            results[symbol]["report"] = f"{output_path} page {report.pages[symbol]} of {pages}"
+    return [results[symbol] for symbol in symbols]
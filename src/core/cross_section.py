@@ -0,0 +1,510 @@
+import os
+import sys
+import threading
+
+from concurrent.futures import Executor
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.core.artifacts import RENDERER_VERSION, ArtifactStore, content_hash
+from src.core.backends import load_backend
+from src.utils import instrumentation
+
+# Sector of symbols whose overview has none.
+UNKNOWN_SECTOR = 'UNKNOWN'
+
+# Rolling beta window of the portfolio report in each time period: about a
+# quarter of bars, a year of weeks and three years of months.
+BETA_WINDOWS = {'D': 60, 'W': 52, 'M': 36}
+
+# Symbol of the portfolio row in batch results.
+PORTFOLIO = 'PORTFOLIO'
+
+# Columns per task of `parallel_rolling_beta`.
+BETA_COLUMNS_PER_TASK = 64
+
+SharedHandle = Tuple[str, Tuple[int, ...], str]
+
+_attach_lock = threading.Lock()
+
+
+class SharedArray:
+    """
+    A numpy array backed by a named shared memory block.
+
+    The creating process owns the block and unlinks it on `close` or when the
+    context exits; other processes `attach` to it from its picklable `handle`,
+    so worker processes read and write the same memory instead of receiving
+    pickled copies.
+    """
+
+    def __init__(self, shape: Sequence[int], dtype=np.float64, name: Optional[str] = None):
+        """
+        Args:
+            shape (Sequence[int]): Shape of the array.
+            dtype: Element type of the array.
+            name (str): Name of an existing block to attach to, a new block is
+                created if None.
+        """
+        self.shape = tuple(int(size) for size in shape)
+        self.dtype = np.dtype(dtype)
+        self.owner = name is None
+        if self.owner:
+            size = max(int(np.prod(self.shape)) * self.dtype.itemsize, 1)
+            self._memory = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self._memory = _attach_untracked(name)
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self._memory.buf)
+
+    @property
+    def handle(self) -> SharedHandle:
+        """
+        Picklable reference to the block, passed to `attach`.
+        """
+        return self._memory.name, self.shape, self.dtype.str
+
+    @classmethod
+    def attach(cls, handle: SharedHandle) -> 'SharedArray':
+        """
+        Maps an array created by another process.
+        """
+        name, shape, dtype = handle
+        return cls(shape, dtype, name=name)
+
+    def close(self) -> None:
+        """
+        Unmaps the block, and frees it if this process created it.
+        """
+        self.array = None
+        self._memory.close()
+        if self.owner:
+            self._memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _attach_untracked(name: str) -> shared_memory.SharedMemory:
+    """
+    Opens an existing block without registering it with this process's
+    resource tracker. A pool worker forked before the owner started its
+    tracker runs a tracker of its own, which would unlink the block when the
+    worker exits.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    with _attach_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class PriceMatrix:
+    """
+    Close prices of many symbols aligned on a common timestamp grid.
+
+    `values` is one C-contiguous 2-D float64 array with a row per timestamp
+    and a column per symbol. Bars a symbol does not have on the grid are NaN,
+    or forward-filled when `align` is given a `fill_limit`; `filled` marks the
+    cells that were filled, so missing data is never hidden.
+    """
+
+    def __init__(self, timestamps: np.ndarray, symbols: Sequence[str], values: np.ndarray,
+                 filled: Optional[np.ndarray] = None):
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.symbols = list(symbols)
+        self.values = values
+        self.filled = filled if filled is not None else np.zeros(values.shape, dtype=bool)
+
+    @classmethod
+    def align(cls, series: Mapping[str, Union[pd.Series, pd.DataFrame]], how: str = 'outer',
+              fill_limit: int = 0) -> 'PriceMatrix':
+        """
+        Aligns many price series on a common timestamp grid.
+
+        Args:
+            series (Mapping): Close prices by symbol, as Series indexed by
+                timestamp, OHLCV frames indexed by timestamp, or frames from
+                `DataTransformer.clean_data`.
+            how (str): 'outer' keeps every timestamp of any symbol, 'inner'
+                only the timestamps every symbol has.
+            fill_limit (int): Forward-fill gaps of up to this many bars with the
+                last observed price; longer gaps and bars before a symbol's
+                first price stay NaN.
+
+        Returns:
+            PriceMatrix: The aligned prices.
+        """
+        if how not in ('outer', 'inner'):
+            raise ValueError(f"Unknown alignment '{how}', expected 'outer' or 'inner'")
+        closes = {symbol: _close_series(data) for symbol, data in series.items()}
+        stamps = [close.index.asi8 for close in closes.values()]
+
+        if not stamps:
+            grid = np.empty(0, dtype=np.int64)
+        elif how == 'outer':
+            grid = np.unique(np.concatenate(stamps))
+        else:
+            grid, counts = np.unique(np.concatenate([np.unique(stamp) for stamp in stamps]), return_counts=True)
+            grid = grid[counts == len(stamps)]
+
+        values = np.full((len(grid), len(closes)), np.nan)
+        for column, close in enumerate(closes.values()):
+            timestamps = close.index.asi8
+            positions = np.searchsorted(grid, timestamps)
+            on_grid = positions < len(grid)
+            on_grid[on_grid] = grid[positions[on_grid]] == timestamps[on_grid]
+            values[positions[on_grid], column] = close.to_numpy(dtype=np.float64)[on_grid]
+
+        filled = np.zeros(values.shape, dtype=bool)
+        if fill_limit > 0 and values.size:
+            observed = ~np.isnan(values)
+            rows = np.arange(len(grid))[:, None]
+            last = np.maximum.accumulate(np.where(observed, rows, -1), axis=0)
+            filled = ~observed & (last >= 0) & (rows - last <= fill_limit)
+            values[filled] = values[last[filled], np.nonzero(filled)[1]]
+        return cls(grid, list(closes), values, filled)
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(self.timestamps.view('datetime64[ns]'))
+
+    def frame(self) -> pd.DataFrame:
+        """
+        The matrix as a frame indexed by timestamp with a column per symbol.
+        """
+        return pd.DataFrame(self.values, index=self.index, columns=self.symbols, copy=False)
+
+    def coverage(self) -> np.ndarray:
+        """
+        Fraction of the grid each symbol has an observed, not filled, price for.
+        """
+        if not len(self.timestamps):
+            return np.zeros(len(self.symbols))
+        return (~np.isnan(self.values) & ~self.filled).mean(axis=0)
+
+    def returns(self) -> np.ndarray:
+        """
+        Bar-to-bar simple returns, NaN where either price is missing.
+
+        Returns:
+            np.ndarray: Array shaped like `values`; the first row is NaN.
+        """
+        return _returns(self.values)
+
+    def share(self) -> SharedArray:
+        """
+        Copies the prices into shared memory. The caller owns the block and
+        must close it.
+        """
+        shared = SharedArray(self.values.shape)
+        shared.array[...] = self.values
+        return shared
+
+
+def _close_series(data: Union[pd.Series, pd.DataFrame]) -> pd.Series:
+    if isinstance(data, pd.DataFrame):
+        if 'stock_price' in data.columns:
+            data = pd.Series(data['stock_price'].to_numpy(), index=pd.DatetimeIndex(data['date']))
+        else:
+            data = data['close']
+    data = data[~data.index.duplicated(keep='last')]
+    return data.set_axis(pd.DatetimeIndex(data.index)).sort_index()
+
+
+def _returns(values: np.ndarray) -> np.ndarray:
+    returns = np.full(values.shape, np.nan)
+    if len(values) > 1:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns[1:] = values[1:] / values[:-1] - 1
+    return returns
+
+
+def correlation_matrix(returns: np.ndarray, min_periods: int = 20) -> np.ndarray:
+    """
+    Pairwise Pearson correlations of return columns with missing values.
+
+    Each pair uses the rows where both columns have a return, like
+    `DataFrame.corr`, but all pairs are computed at once from a few matrix
+    products.
+
+    Args:
+        returns (np.ndarray): 2-D array of returns, a column per symbol, NaN
+            where missing.
+        min_periods (int): Fewest shared returns a pair needs, NaN otherwise.
+
+    Returns:
+        np.ndarray: Symmetric correlation matrix with ones on the diagonal of
+            columns that have enough returns.
+    """
+    mask = ~np.isnan(returns)
+    present = mask.astype(np.float64)
+    x = np.where(mask, returns, 0.0)
+
+    count = present.T @ present
+    sums = x.T @ present            # sums[i, j]: sum of column i where j is present too
+    squares = (x * x).T @ present
+    products = x.T @ x
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = products - sums * sums.T / count
+        variance = (squares - sums * sums / count) * (squares.T - sums.T * sums.T / count)
+        correlation = covariance / np.sqrt(variance)
+    correlation[(count < max(min_periods, 2)) | ~(variance > 0)] = np.nan
+    return np.clip(correlation, -1.0, 1.0)
+
+
+def rolling_beta(returns: np.ndarray, benchmark: np.ndarray, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+    """
+    Rolling beta of every return column against a benchmark return series.
+
+    Beta is the covariance with the benchmark over the trailing `window` bars
+    divided by the benchmark's variance, computed for all columns at once from
+    cumulative sums. Bars where the column or the benchmark has no return are
+    left out of the window's sums.
+
+    Args:
+        returns (np.ndarray): 2-D array of returns, a column per symbol.
+        benchmark (np.ndarray): Benchmark returns, one per row.
+        window (int): Bars in the trailing window.
+        min_periods (int): Fewest usable bars in a window, defaults to half of it.
+
+    Returns:
+        np.ndarray: Betas shaped like `returns`, NaN where the window has too
+            few bars.
+    """
+    min_periods = max(window // 2 if min_periods is None else min_periods, 2)
+    valid = ~np.isnan(returns) & ~np.isnan(benchmark)[:, None]
+    x = np.where(valid, benchmark[:, None], 0.0)
+    y = np.where(valid, returns, 0.0)
+
+    def window_sums(values: np.ndarray) -> np.ndarray:
+        sums = np.cumsum(np.concatenate((np.zeros((1, values.shape[1])), values)), axis=0)
+        lagged = np.zeros_like(sums[1:])
+        if len(values) >= window:
+            lagged[window - 1:] = sums[:len(values) - window + 1]
+        return sums[1:] - lagged
+
+    count = window_sums(valid.astype(np.float64))
+    sum_x, sum_y = window_sums(x), window_sums(y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = window_sums(x * y) - sum_x * sum_y / count
+        variance = window_sums(x * x) - sum_x * sum_x / count
+        beta = covariance / variance
+    beta[(count < min_periods) | ~(variance > 1e-18)] = np.nan
+    return beta
+
+
+def _rolling_beta_task(prices: SharedHandle, output: SharedHandle, benchmark: np.ndarray, window: int,
+                       min_periods: Optional[int], start: int, stop: int) -> None:
+    with SharedArray.attach(prices) as shared_prices, SharedArray.attach(output) as shared_output:
+        returns = _returns(shared_prices.array[:, start:stop])
+        shared_output.array[:, start:stop] = rolling_beta(returns, benchmark, window, min_periods)
+
+
+def parallel_rolling_beta(matrix: PriceMatrix, benchmark: np.ndarray, window: int, executor: Optional[Executor] = None,
+                          min_periods: Optional[int] = None, columns_per_task: int = BETA_COLUMNS_PER_TASK) -> np.ndarray:
+    """
+    `rolling_beta` of every symbol of a matrix, split over worker processes.
+
+    The prices and the betas live in shared memory: each task is handed the
+    handles of both blocks and the range of columns it computes, so neither
+    matrix is pickled.
+
+    Args:
+        matrix (PriceMatrix): Aligned prices.
+        benchmark (np.ndarray): Benchmark returns, one per row of the matrix.
+        window (int): Bars in the trailing window.
+        executor (Executor): Process pool the tasks run on; computed in this
+            process if None.
+        min_periods (int): Fewest usable bars in a window.
+        columns_per_task (int): Symbols computed per task.
+
+    Returns:
+        np.ndarray: Betas shaped like `matrix.values`.
+    """
+    if executor is None:
+        return rolling_beta(matrix.returns(), benchmark, window, min_periods)
+
+    with matrix.share() as prices, SharedArray(matrix.values.shape) as output:
+        futures = [executor.submit(_rolling_beta_task, prices.handle, output.handle, benchmark, window,
+                                   min_periods, start, min(start + columns_per_task, len(matrix.symbols)))
+                   for start in range(0, len(matrix.symbols), columns_per_task)]
+        for future in futures:
+            future.result()
+        return output.array.copy()
+
+
+def sector_relative(matrix: PriceMatrix, sectors: Mapping[str, str]) -> pd.DataFrame:
+    """
+    Performance of every symbol against the equal-weighted average of its sector.
+
+    Each symbol's return runs from its first to its last observed price on the
+    grid; the sector return is the mean return of the sector's symbols.
+
+    Args:
+        matrix (PriceMatrix): Aligned prices.
+        sectors (Mapping[str, str]): Sector of each symbol.
+
+    Returns:
+        pd.DataFrame: Indexed by symbol with 'sector', 'total_return',
+            'sector_return' and 'relative_return' columns.
+    """
+    values = matrix.values
+    observed = ~np.isnan(values)
+    has_price = observed.any(axis=0)
+    first = np.argmax(observed, axis=0)
+    last = len(values) - 1 - np.argmax(observed[::-1], axis=0)
+    columns = np.arange(values.shape[1])
+    total = np.full(values.shape[1], np.nan)
+    if len(values):
+        total[has_price] = (values[last, columns] / values[first, columns] - 1)[has_price]
+
+    names = np.array([sectors.get(symbol) or UNKNOWN_SECTOR for symbol in matrix.symbols], dtype=object)
+    labels, groups = np.unique(names, return_inverse=True) if len(names) else (np.array([]), np.array([], dtype=int))
+    known = ~np.isnan(total)
+    sums = np.bincount(groups[known], weights=total[known], minlength=len(labels))
+    counts = np.bincount(groups[known], minlength=len(labels))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sector_return = (sums / counts)[groups]
+
+    return pd.DataFrame({'sector': names, 'total_return': total, 'sector_return': sector_return,
+                         'relative_return': total - sector_return}, index=pd.Index(matrix.symbols, name='symbol'))
+
+
+def correlated_pairs(correlation: np.ndarray, symbols: Sequence[str], count: int = 10) -> pd.DataFrame:
+    """
+    The most and least correlated symbol pairs.
+
+    Returns:
+        pd.DataFrame: 'first', 'second' and 'correlation' columns, the `count`
+            highest correlations then the `count` lowest, without duplicates.
+    """
+    first, second = np.triu_indices(len(symbols), k=1)
+    values = correlation[first, second]
+    known = np.flatnonzero(~np.isnan(values))
+    order = known[np.argsort(-values[known], kind='stable')]
+    picked = order if len(order) <= 2 * count else np.concatenate((order[:count], order[-count:]))
+    names = np.asarray(symbols, dtype=object)
+    return pd.DataFrame({'first': names[first[picked]], 'second': names[second[picked]],
+                         'correlation': values[picked]})
+
+
+def analyse_portfolio(matrix: PriceMatrix, sectors: Mapping[str, str], benchmark: Optional[pd.Series] = None,
+                      benchmark_name: Optional[str] = None, window: int = 52, min_periods: int = 20,
+                      executor: Optional[Executor] = None) -> Dict[str, Any]:
+    """
+    Cross-sectional statistics of a universe, as shown in the portfolio report.
+
+    Args:
+        matrix (PriceMatrix): Aligned prices of the universe.
+        sectors (Mapping[str, str]): Sector of each symbol.
+        benchmark (pd.Series): Index prices the betas are measured against,
+            aligned onto the matrix grid; the equal-weighted average return of
+            the universe if None.
+        benchmark_name (str): Label of the benchmark.
+        window (int): Bars of the rolling beta window.
+        min_periods (int): Fewest shared returns of a correlation.
+        executor (Executor): Process pool the rolling betas are split over.
+
+    Returns:
+        Dict[str, Any]: 'summary' frame indexed by symbol (sector returns,
+            latest and mean beta, coverage), 'sectors' frame, 'correlation'
+            frame, 'pairs' frame and the 'start', 'end', 'bars', 'benchmark'
+            and 'window' of the analysis.
+    """
+    returns = matrix.returns()
+    if benchmark is not None:
+        aligned = PriceMatrix.align({'benchmark': benchmark}).frame()['benchmark']
+        benchmark_returns = _returns(aligned.reindex(matrix.index).to_numpy()[:, None])[:, 0]
+    else:
+        with np.errstate(invalid='ignore'):
+            counts = (~np.isnan(returns)).sum(axis=1)
+            benchmark_returns = np.where(counts > 0, np.nansum(returns, axis=1) / np.maximum(counts, 1), np.nan)
+        benchmark_name = "Equal-weighted universe"
+
+    betas = parallel_rolling_beta(matrix, benchmark_returns, window, executor)
+    correlation = correlation_matrix(returns, min_periods)
+
+    summary = sector_relative(matrix, sectors)
+    latest = np.full(betas.shape[1], np.nan)
+    has_beta = ~np.isnan(betas)
+    if len(betas):
+        last = len(betas) - 1 - np.argmax(has_beta[::-1], axis=0)
+        latest = np.where(has_beta.any(axis=0), betas[last, np.arange(betas.shape[1])], np.nan)
+    with np.errstate(invalid='ignore'):
+        summary['beta'] = latest
+        summary['mean_beta'] = np.where(has_beta.any(axis=0), np.nansum(betas, axis=0) / np.maximum(has_beta.sum(axis=0), 1),
+                                        np.nan)
+    summary['coverage'] = matrix.coverage()
+
+    sector_table = summary.groupby('sector').agg(symbols=('total_return', 'size'), mean_return=('total_return', 'mean'),
+                                                 mean_beta=('beta', 'mean'))
+    index = matrix.index
+    return {
+        'summary': summary,
+        'sectors': sector_table,
+        'correlation': pd.DataFrame(correlation, index=matrix.symbols, columns=matrix.symbols),
+        'pairs': correlated_pairs(correlation, matrix.symbols),
+        'start': index[0] if len(index) else None,
+        'end': index[-1] if len(index) else None,
+        'bars': len(index),
+        'benchmark': benchmark_name,
+        'window': window,
+    }
+
+
+def build_portfolio_report(series: Dict[str, pd.DataFrame], sectors: Dict[str, str], output_path: str,
+                           time_period: str = 'W', benchmark: Optional[pd.DataFrame] = None,
+                           benchmark_name: Optional[str] = None, window: Optional[int] = None,
+                           executor: Optional[Executor] = None, force: bool = False) -> str:
+    """
+    Renders the cross-sectional portfolio report of many symbols.
+
+    The series are aligned into one `PriceMatrix`, missing bars left as
+    gaps, and analysed with `analyse_portfolio`; the PDF backend is imported
+    on the first call. Like `build_report`, nothing is recomputed when the
+    hash of the inputs matches the one recorded next to the PDF.
+
+    Args:
+        series: Cleaned series of each symbol, from `clean_series`
+        sectors: Sector of each symbol, from its company overview
+        output_path: Path the PDF is written to
+        time_period: 'D', 'W' or 'M', picks the default beta window
+        benchmark: Cleaned series of the index betas are measured against;
+            the equal-weighted universe if None
+        benchmark_name: Label of the benchmark
+        window: Bars of the rolling beta window, defaults to `BETA_WINDOWS`
+        executor: Process pool the rolling betas are split over
+        force: Rebuild the report regardless of the manifest
+
+    Returns:
+        str: Path of the generated PDF report
+    """
+    window = window or BETA_WINDOWS[time_period]
+    artifacts = ArtifactStore(os.path.dirname(output_path) or '.', reuse=not force)
+    name = os.path.basename(output_path)
+    with instrumentation.stage('manifest', symbol=PORTFOLIO):
+        inputs = content_hash(RENDERER_VERSION, series, sectors, benchmark, benchmark_name, window)
+        if artifacts.unchanged(name, inputs, output_path):
+            instrumentation.add(cache_hits=1)
+            return output_path
+
+    with instrumentation.stage('portfolio', symbols=len(series)):
+        matrix = PriceMatrix.align(series)
+        instrumentation.add(rows=matrix.values.size)
+        close = benchmark.set_index('date')['stock_price'] if benchmark is not None else None
+        analysis = analyse_portfolio(matrix, sectors, close, benchmark_name, window, executor=executor)
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    load_backend('portfolio')(analysis, output_path)
+    artifacts.record({name: inputs})
+    return output_path
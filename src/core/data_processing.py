@@ -1,6 +1,10 @@
 import os
+import numpy as np
 import pandas as pd
 
+from src.api.parser import TIME_SERIES_FIELDS
+from src.utils import instrumentation
+
 
 class DataTransformer():
     """
@@ -12,29 +16,35 @@ class DataTransformer():
         self.dataframe = dataframe
         self.output_dir = 'testfiles'
 
-    def clean_data(self) -> pd.DataFrame:
+    @instrumentation.traced('clean')
+    def clean_data(self, keep_ohlcv: bool = False) -> pd.DataFrame:
         """
         Cleans the data for analysis
 
         Args:
-            None
+            keep_ohlcv: also keep the open, high, low and volume fields, which
+                indicators such as ATR and VWAP need
         
         Returns:
             pd.DataFrame: cleaned data
         """
-        df = self.dataframe.copy()
-        df = df.reset_index()
-    
-        df['date'] = df['index']
-        df['stock_price'] = df['4. close']
-        
-        df2 = df[['date', 'stock_price']].copy()
-        df2['stock_price'] = df2['stock_price'].apply(lambda x: round(float(x), 2))
-        df2['date'] = pd.to_datetime(df2['date'])
+        # Accept both raw Alpha Vantage frames and frames from `parse_time_series`.
+        df = self.dataframe.rename(columns=TIME_SERIES_FIELDS)
+        dates = df['index'] if 'index' in df.columns else df.index
+
+        df2 = pd.DataFrame({
+            'date': pd.to_datetime(np.asarray(dates)),
+            'stock_price': df['close'].astype(np.float64).round(2).to_numpy(),
+        })
+        if keep_ohlcv:
+            for column in ('open', 'high', 'low'):
+                df2[column] = df[column].astype(np.float64).to_numpy()
+            df2['volume'] = df['volume'].astype(np.int64).to_numpy()
 
         # self._save_to_csv(df2) testing code to examine output of transformation
+        instrumentation.add(rows=len(df2))
 
-        return df2.copy()
+        return df2
 
     
     def _save_to_csv(self, dataframe: pd.DataFrame):
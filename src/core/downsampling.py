@@ -0,0 +1,186 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from typing import Optional, Tuple
+
+# Units of relative time ranges such as '90d' or '5y'.
+RANGE_UNITS = {
+    'h': lambda count: pd.DateOffset(hours=count),
+    'd': lambda count: pd.DateOffset(days=count),
+    'w': lambda count: pd.DateOffset(weeks=count),
+    'm': lambda count: pd.DateOffset(months=count),
+    'y': lambda count: pd.DateOffset(years=count),
+}
+
+# Downsamplers by name, see `downsample`.
+DOWNSAMPLERS = ('lttb', 'minmax')
+
+
+class TimeRange:
+    """
+    Dates a plot covers: either a span ending at the latest bar, such as
+    '6m' or '5y', or fixed 'START:END' dates, either of which may be left
+    out. 'all' covers the whole history.
+    """
+
+    def __init__(self, start: Optional[pd.Timestamp] = None, end: Optional[pd.Timestamp] = None,
+                 span: Optional[pd.DateOffset] = None):
+        self.start = start
+        self.end = end
+        self.span = span
+
+    @classmethod
+    def parse(cls, text: str) -> 'TimeRange':
+        """
+        Parses '5y', '6m', '2w', '90d', '48h', 'all', or 'START:END' with ISO
+        dates. Raises ValueError for anything else.
+        """
+        text = text.strip().lower()
+        if text == 'all':
+            return cls()
+        match = re.fullmatch(r'(\d+)([hdwmy])', text)
+        if match:
+            return cls(span=RANGE_UNITS[match.group(2)](int(match.group(1))))
+        if ':' not in text:
+            raise ValueError(f"invalid time range {text!r}, expected e.g. 5y, 6m, 90d, all or START:END")
+        start, end = (pd.Timestamp(part) if part else None for part in text.split(':', 1))
+        if start is not None and end is not None and start > end:
+            raise ValueError(f"time range {text!r} ends before it starts")
+        return cls(start, end)
+
+    def bounds(self, dates: np.ndarray) -> Tuple[int, int]:
+        """
+        Positions [lo, hi) of the dates in the range, found by binary search.
+
+        Args:
+            dates (np.ndarray): Ascending datetime64 values.
+
+        Returns:
+            Tuple[int, int]: Slice bounds into `dates`.
+        """
+        if not len(dates):
+            return 0, 0
+        start, end = self.start, self.end
+        if self.span is not None:
+            start = pd.Timestamp(dates[-1]) - self.span
+        lo = int(np.searchsorted(dates, np.datetime64(start), side='left')) if start is not None else 0
+        hi = int(np.searchsorted(dates, np.datetime64(end), side='right')) if end is not None else len(dates)
+        return lo, max(lo, hi)
+
+
+def parse_range(text: str) -> str:
+    """
+    Validates a time range for the command line, returning it unchanged so
+    it stays picklable and hashable as an option.
+    """
+    TimeRange.parse(text)
+    return text
+
+
+def _as_float(x: np.ndarray) -> np.ndarray:
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return np.asarray(x, dtype=np.float64)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last points are kept, and the points between are split
+    into `threshold - 2` equal buckets. From each bucket the point forming
+    the largest triangle with the point kept from the previous bucket and
+    the mean of the next bucket is kept, which preserves the peaks and
+    troughs a line plot shows.
+
+    Args:
+        x (np.ndarray): Ascending x values, numbers or datetime64.
+        y (np.ndarray): Finite y values.
+        threshold (int): Number of points to keep, at least 3.
+
+    Returns:
+        np.ndarray: Ascending positions of the kept points; all of them when
+            there are no more than `threshold`.
+    """
+    length = len(y)
+    if threshold >= length or threshold < 3:
+        return np.arange(length)
+    x, y = _as_float(x), np.asarray(y, dtype=np.float64)
+
+    edges = (np.arange(threshold - 1) * ((length - 2) / (threshold - 2))).astype(np.int64) + 1
+    edges[-1] = length - 1
+    # Mean of every bucket, the third vertex of the previous bucket's triangles.
+    counts = np.diff(edges)
+    x_means = np.add.reduceat(x[:-1], edges[:-1]) / counts
+    y_means = np.add.reduceat(y[:-1], edges[:-1]) / counts
+    x_means = np.append(x_means, x[-1])
+    y_means = np.append(y_means, y[-1])
+
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, length - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        ax, ay = x[previous], y[previous]
+        cx, cy = x_means[bucket + 1], y_means[bucket + 1]
+        # Twice the triangle areas, up to sign.
+        areas = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        previous = kept[bucket + 1] = lo + int(np.argmax(areas))
+    return kept
+
+
+def minmax(x: np.ndarray, y: np.ndarray, buckets: int) -> np.ndarray:
+    """
+    Min/max downsampling: splits the x range into `buckets` equal columns,
+    such as the pixel columns of a plot, and keeps the lowest and highest
+    point of each one, plus the first and last points.
+
+    Args:
+        x (np.ndarray): Ascending x values, numbers or datetime64.
+        y (np.ndarray): y values; NaNs are never kept.
+        buckets (int): Number of columns.
+
+    Returns:
+        np.ndarray: Ascending positions of the kept points, at most
+            `2 * buckets + 2`.
+    """
+    length = len(y)
+    if 2 * buckets + 2 >= length or buckets < 1:
+        return np.arange(length)
+    x, y = _as_float(x), np.asarray(y, dtype=np.float64)
+
+    span = x[-1] - x[0]
+    columns = ((x - x[0]) * (buckets / span)).astype(np.int64) if span > 0 else np.zeros(length, dtype=np.int64)
+    np.minimum(columns, buckets - 1, out=columns)
+    starts = np.flatnonzero(np.r_[True, columns[1:] != columns[:-1]])
+    groups = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, length]))
+
+    kept = [np.array([0, length - 1])]
+    for extremes in (np.fmin.reduceat(y, starts), np.fmax.reduceat(y, starts)):
+        positions = np.flatnonzero(y == extremes[groups])
+        # First position reaching each column's extreme.
+        _, first = np.unique(groups[positions], return_index=True)
+        kept.append(positions[first])
+    return np.unique(np.concatenate(kept))
+
+
+def downsample(x: np.ndarray, y: np.ndarray, points: int, method: str = 'lttb') -> np.ndarray:
+    """
+    Positions of at most about `points` points that keep the shape of a line.
+
+    Args:
+        x (np.ndarray): Ascending x values, numbers or datetime64.
+        y (np.ndarray): y values.
+        points (int): Number of points to keep, e.g. the plot's pixel width.
+        method (str): 'lttb' or 'minmax', see `lttb` and `minmax`.
+
+    Returns:
+        np.ndarray: Ascending positions of the kept points.
+    """
+    if method == 'lttb':
+        return lttb(x, y, points)
+    if method == 'minmax':
+        return minmax(x, y, points // 2)
+    raise ValueError(f"unknown downsampler {method!r}, expected one of {', '.join(DOWNSAMPLERS)}")
@@ -0,0 +1,106 @@
+import json
+import os
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.core.batch import batch_results
+from src.core.fundamentals import FundamentalsStore
+from src.core.history_store import HistoryStore
+from src.core.pipeline import TIMEFRAMES, clean_series, fetch_symbol
+
+# Formats of `export_data`.
+EXPORT_FORMATS = ('csv', 'json')
+
+
+def export_data(symbol: str, datasets: Dict[str, Any], output_dir: str, format: str = 'csv') -> List[str]:
+    """
+    Writes the cleaned series and company overview of a symbol, without
+    rendering anything.
+
+    Args:
+        symbol: Stock ticker symbol
+        datasets: Results of `AlphaVantageAPI.fetch_many` keyed by function
+        output_dir: Directory the files are written to
+        format: 'csv' or 'json' (records) for the series
+
+    Returns:
+        List[str]: Paths of `daily`, `weekly` and `monthly` series files and of
+            `overview.json`
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{format}', expected one of: {', '.join(EXPORT_FORMATS)}")
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for name, time_period in TIMEFRAMES.items():
+        data = clean_series(datasets, time_period)
+        paths.append(os.path.join(output_dir, f"{name}.{format}"))
+        if format == 'csv':
+            data.to_csv(paths[-1], index=False)
+        else:
+            data.to_json(paths[-1], orient='records', date_format='iso')
+
+    paths.append(os.path.join(output_dir, "overview.json"))
+    with open(paths[-1], 'w') as file:
+        json.dump(datasets['OVERVIEW'], file, indent=2)
+    return paths
+
+
+def fetch_batch(api, symbols: Iterable[str], output_root: str = "output", fetch_workers: int = 4,
+                history: Optional[HistoryStore] = None, derive_timeframes: bool = False,
+                export_format: Optional[str] = None,
+                fundamentals: Optional[FundamentalsStore] = None) -> List[Dict[str, Any]]:
+    """
+    Fetches many symbols without rendering reports, e.g. to warm the response
+    cache and history store from a cron job.
+
+    Never imports the plotting and PDF backends.
+
+    Args:
+        api: AlphaVantageAPI used to fetch the data
+        symbols: Stock ticker symbols to fetch
+        output_root: With `export_format`, each symbol's data is written to its
+            own `output_root/<SYMBOL>` directory
+        fetch_workers: Maximum number of symbols fetched concurrently
+        history: Optional history store the fetched series are merged into
+        derive_timeframes: Derive weekly and monthly bars from the daily series
+        export_format: Export the cleaned series with `export_data` in this
+            format, 'csv' or 'json'
+        fundamentals: Optional store the company overviews are kept in
+
+    Returns:
+        List[Dict[str, Any]]: One result per symbol, in input order, shaped like
+            those of `run_batch`; 'report' holds the export directory and
+            'render_seconds' the export time
+    """
+    symbols, results = batch_results(symbols)
+
+    def fetch(symbol: str) -> None:
+        result = results[symbol]
+        start = time.perf_counter()
+        try:
+            datasets = fetch_symbol(api, symbol, history, derive_timeframes, fundamentals)
+        except Exception as err:
+            result["error"] = f"fetch: {err}"
+            return
+        finally:
+            result["fetch_seconds"] = time.perf_counter() - start
+
+        if export_format is not None:
+            start = time.perf_counter()
+            try:
+                output_dir = os.path.join(output_root, symbol)
+                export_data(symbol, datasets, output_dir, export_format)
+                result["report"] = output_dir
+            except Exception as err:
+                result["error"] = f"export: {err}"
+                return
+            finally:
+                result["render_seconds"] = time.perf_counter() - start
+        result["status"] = "ok"
+
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool:
+        list(fetch_pool.map(fetch, symbols))
+
+    return [results[symbol] for symbol in symbols]
@@ -0,0 +1,446 @@
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.core.batch import batch_results
+
+# Text fields of an overview that are indexed for equality queries.
+CATEGORY_FIELDS = ('Sector', 'Industry', 'Exchange', 'Country', 'Currency', 'AssetType')
+
+# Numeric fields of an overview, stored as float64 with NaN for "None" or "-".
+NUMERIC_FIELDS = (
+    'MarketCapitalization', 'EBITDA', 'PERatio', 'PEGRatio', 'BookValue', 'DividendPerShare', 'DividendYield', 'EPS',
+    'RevenuePerShareTTM', 'ProfitMargin', 'OperatingMarginTTM', 'ReturnOnAssetsTTM', 'ReturnOnEquityTTM',
+    'RevenueTTM', 'GrossProfitTTM', 'DilutedEPSTTM', 'QuarterlyEarningsGrowthYOY', 'QuarterlyRevenueGrowthYOY',
+    'AnalystTargetPrice', 'TrailingPE', 'ForwardPE', 'PriceToSalesRatioTTM', 'PriceToBookRatio', 'EVToRevenue',
+    'EVToEBITDA', 'Beta', '52WeekHigh', '52WeekLow', '50DayMovingAverage', '200DayMovingAverage',
+    'SharesOutstanding',
+)
+
+# Columns of the typed table, besides the numeric fields.
+TEXT_FIELDS = ('Symbol', 'Name') + CATEGORY_FIELDS
+
+# Days after a quarter ends before its results are expected in the overview.
+REPORTING_LAG_DAYS = 45
+
+# Minimum interval between checks of an overview whose next quarter is due,
+# and between checks of overviews without a LatestQuarter.
+RECHECK_INTERVAL = pd.Timedelta(days=1)
+UNDATED_MAX_AGE = pd.Timedelta(days=7)
+
+# Multipliers of value suffixes in screener queries, e.g. 'MarketCapitalization > 10B'.
+VALUE_SUFFIXES = {'%': 0.01, 'K': 1e3, 'M': 1e6, 'B': 1e9, 'T': 1e12}
+
+_TOKEN = re.compile(r"\s*(?:(<=|>=|==|!=|<|>|=)|'([^']*)'|\"([^\"]*)\"|(,)|([^\s,<>=!'\"]+))")
+
+
+def parse_overview(data: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Converts an OVERVIEW response, where every value is a string, to typed values.
+
+    Returns:
+        Dict[str, Any]: `TEXT_FIELDS` as stripped strings (category fields upper
+            case), `NUMERIC_FIELDS` as floats, NaN when missing, and
+            'LatestQuarter' as a `datetime64[D]`, NaT when missing.
+    """
+    record = {field: str(data.get(field) or '').strip() for field in TEXT_FIELDS}
+    record['Symbol'] = record['Symbol'].upper()
+    for field in CATEGORY_FIELDS:
+        record[field] = record[field].upper()
+    for field in NUMERIC_FIELDS:
+        try:
+            record[field] = float(data.get(field))
+        except (TypeError, ValueError):
+            record[field] = np.nan
+    try:
+        record['LatestQuarter'] = np.datetime64(data.get('LatestQuarter'), 'D')
+    except (TypeError, ValueError):
+        record['LatestQuarter'] = np.datetime64('NaT', 'D')
+    return record
+
+
+def parse_value(text: str) -> float:
+    """
+    Parses a screener number such as '15', '3%' or '10B'.
+    """
+    multiplier = VALUE_SUFFIXES.get(text[-1:].upper(), 1.0)
+    try:
+        return float(text[:-1] if multiplier != 1.0 else text) * multiplier
+    except ValueError:
+        raise ValueError(f"Invalid number '{text}' in screener query")
+
+
+def parse_query(query: str) -> List[Tuple[str, str, Any]]:
+    """
+    Parses a screener query into (field, operator, value) conditions.
+
+    Conditions are joined by 'and'. Numeric fields compare with <, <=, >, >=,
+    == or !=; category fields with == or != against a name, quoted if it has
+    spaces. A trailing 'in NAME[, NAME...]' keeps symbols whose sector,
+    industry or exchange is one of the names, e.g.
+    "PERatio < 15 and DividendYield > 3% in TECHNOLOGY".
+
+    Returns:
+        List[Tuple[str, str, Any]]: Conditions with canonical field names;
+            'in' conditions have the field None and a list of names.
+    """
+    tokens, position = [], 0
+    query = query.strip()
+    while position < len(query):
+        match = _TOKEN.match(query, position)
+        if not match or match.end() == position:
+            raise ValueError(f"Invalid screener query near '{query[position:]}'")
+        operator, single, double, comma, word = match.groups()
+        tokens.append(('op', operator) if operator else ('comma', comma) if comma else
+                      ('name', single if single is not None else double) if word is None else ('word', word))
+        position = match.end()
+
+    fields = {field.lower(): field for field in NUMERIC_FIELDS + CATEGORY_FIELDS}
+    conditions, index = [], 0
+
+    def take(kind: Optional[str] = None) -> str:
+        nonlocal index
+        if index >= len(tokens) or (kind and tokens[index][0] != kind):
+            raise ValueError(f"Incomplete screener query '{query}'")
+        index += 1
+        return tokens[index - 1][1]
+
+    while index < len(tokens):
+        word = take()
+        if word.lower() == 'in':
+            names = [take().upper()]
+            while index < len(tokens) and tokens[index][0] == 'comma':
+                take('comma')
+                names.append(take().upper())
+            conditions.append((None, 'in', names))
+        else:
+            field = fields.get(word.lower())
+            if field is None:
+                raise ValueError(f"Unknown field '{word}', expected one of: {', '.join(NUMERIC_FIELDS + CATEGORY_FIELDS)}")
+            operator = take('op').replace('==', '=')
+            value = take()
+            if field in CATEGORY_FIELDS:
+                if operator not in ('=', '!='):
+                    raise ValueError(f"{field} can only be compared with == or !=")
+                conditions.append((field, operator, value.upper()))
+            else:
+                conditions.append((field, operator, parse_value(value)))
+        if index < len(tokens):
+            following = tokens[index][1].lower()
+            if following == 'and':
+                take()
+                if index == len(tokens):
+                    raise ValueError(f"Incomplete screener query '{query}'")
+            elif following != 'in':
+                raise ValueError(f"Expected 'and' or 'in' in screener query near '{tokens[index][1]}'")
+    return conditions
+
+
+class FundamentalsTable:
+    """
+    Typed, column-oriented company overviews with query indexes.
+
+    Category fields are indexed by value, mapping each to the sorted rows that
+    hold it, and numeric fields by their sort order, so every condition of a
+    screen is answered by binary searches and the conditions are intersected
+    starting from the most selective.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+        self.rows = {symbol: row for row, symbol in enumerate(columns['Symbol'].tolist())}
+        self._postings: Dict[str, Dict[str, np.ndarray]] = {}
+        self._sorted: Dict[str, Tuple[np.ndarray, np.ndarray, int]] = {}
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> 'FundamentalsTable':
+        """
+        Builds a table from `parse_overview` records.
+        """
+        records = list(records)
+        columns = {field: np.array([record[field] for record in records], dtype=str) for field in TEXT_FIELDS}
+        for field in NUMERIC_FIELDS:
+            columns[field] = np.array([record[field] for record in records], dtype=np.float64)
+        columns['LatestQuarter'] = np.array([record['LatestQuarter'] for record in records], dtype='datetime64[D]')
+        columns['checked'] = np.array([record.get('checked', np.datetime64('NaT')) for record in records],
+                                      dtype='datetime64[s]')
+        return cls(columns)
+
+    def __len__(self) -> int:
+        return len(self.columns['Symbol'])
+
+    def record(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        Typed values of one symbol, or None if it is not stored.
+        """
+        row = self.rows.get(symbol.upper())
+        return None if row is None else {field: values[row].item() if field in TEXT_FIELDS else values[row]
+                                         for field, values in self.columns.items()}
+
+    def upsert(self, record: Dict[str, Any]) -> 'FundamentalsTable':
+        """
+        Returns a table with `record` replacing or added to the stored rows.
+        """
+        row = self.rows.get(record['Symbol'])
+        columns = {}
+        for field, values in self.columns.items():
+            value = record.get(field, np.datetime64('NaT')) if field == 'checked' else record[field]
+            value = np.array([value], dtype=values.dtype if field not in TEXT_FIELDS else str)
+            if row is None:
+                columns[field] = np.concatenate((values, value))
+            else:
+                values = values.astype(np.result_type(values, value)) if field in TEXT_FIELDS else values.copy()
+                values[row] = value[0]
+                columns[field] = values
+        return FundamentalsTable(columns)
+
+    def select(self, field: Optional[str], operator: str, value: Any) -> np.ndarray:
+        """
+        Rows matching one condition of `parse_query`, in ascending order.
+        """
+        if field is None:
+            matches = [self.select(category, '=', name) for category in ('Sector', 'Industry', 'Exchange')
+                       for name in value]
+            return np.unique(np.concatenate(matches)) if matches else np.empty(0, dtype=np.intp)
+        if field in CATEGORY_FIELDS:
+            rows = self.postings(field).get(value, np.empty(0, dtype=np.intp))
+            if operator == '!=':
+                rows = np.setdiff1d(np.arange(len(self)), rows, assume_unique=True)
+            return rows
+
+        order, values, valid = self.sort_index(field)
+        if operator == '<':
+            rows = order[:np.searchsorted(values, value, side='left')]
+        elif operator == '<=':
+            rows = order[:np.searchsorted(values, value, side='right')]
+        elif operator == '>':
+            rows = order[np.searchsorted(values, value, side='right'):valid]
+        elif operator == '>=':
+            rows = order[np.searchsorted(values, value, side='left'):valid]
+        elif operator == '=':
+            rows = order[np.searchsorted(values, value, side='left'):np.searchsorted(values, value, side='right')]
+        else:
+            equal = order[np.searchsorted(values, value, side='left'):np.searchsorted(values, value, side='right')]
+            rows = np.setdiff1d(order[:valid], equal)
+        return np.sort(rows)
+
+    def screen(self, query: str, sort: Optional[str] = None, descending: bool = False,
+               limit: Optional[int] = None, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Symbols matching a screener query, see `parse_query`.
+
+        Args:
+            query (str): Conditions, e.g. "PERatio < 15 and DividendYield > 0.03 in TECHNOLOGY".
+            sort (str): Field the matches are ordered by, Symbol if None.
+            descending (bool): Order from the largest value.
+            limit (int): Maximum number of matches returned.
+            columns (Sequence[str]): Fields shown besides Symbol, Name and
+                Sector; the queried and sort fields if None.
+
+        Returns:
+            pd.DataFrame: One row per match.
+        """
+        conditions = parse_query(query) if query.strip() else []
+        matches = sorted((self.select(*condition) for condition in conditions), key=len)
+        rows = matches[0] if matches else np.arange(len(self))
+        for other in matches[1:]:
+            member = np.zeros(len(self), dtype=bool)
+            member[other] = True
+            rows = rows[member[rows]]
+
+        sort = {field.lower(): field for field in self.columns}.get((sort or 'Symbol').lower())
+        if sort is None:
+            raise ValueError(f"Unknown sort field, expected one of: {', '.join(NUMERIC_FIELDS + TEXT_FIELDS)}")
+        keys = self.columns[sort][rows]
+        if sort in NUMERIC_FIELDS:
+            # Missing values sort last either way.
+            order = np.argsort(-keys if descending else keys, kind='stable')
+        else:
+            order = np.argsort(keys, kind='stable')
+            order = order[::-1] if descending else order
+        rows = rows[order][:limit]
+
+        if columns is None:
+            columns = [field for field, _, _ in conditions if field is not None] + [sort]
+        shown = list(dict.fromkeys(['Symbol', 'Name', 'Sector', *columns]))
+        return pd.DataFrame({field: self.columns[field][rows] for field in shown})
+
+    def postings(self, field: str) -> Dict[str, np.ndarray]:
+        """
+        Rows holding each value of a category field, built on first use.
+        """
+        if field not in self._postings:
+            values = self.columns[field]
+            order = np.argsort(values, kind='stable')
+            names, starts = np.unique(values[order], return_index=True)
+            bounds = np.append(starts, len(values))
+            self._postings[field] = {name: np.sort(order[bounds[i]:bounds[i + 1]]) for i, name in enumerate(names)}
+        return self._postings[field]
+
+    def sort_index(self, field: str) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Sort order of a numeric field, its sorted values and the number that
+        are not NaN (which sort last), built on first use.
+        """
+        if field not in self._sorted:
+            values = self.columns[field]
+            order = np.argsort(values, kind='stable')
+            self._sorted[field] = (order, values[order], int(np.count_nonzero(~np.isnan(values))))
+        return self._sorted[field]
+
+
+class FundamentalsStore:
+    """
+    Local store of company overviews.
+
+    Each symbol's raw OVERVIEW response is kept as `overviews/<SYMBOL>.json`,
+    which reports are built from, and all symbols are kept typed in one
+    `table.npz` for screening. An overview is only fetched again once results
+    for the quarter after its `LatestQuarter` are due, and only rewritten when
+    `LatestQuarter` actually changes.
+    """
+
+    def __init__(self, root: str = ".cache/fundamentals"):
+        self.root = root
+        self._table: Optional[FundamentalsTable] = None
+        self._lock = threading.Lock()
+
+    def table(self) -> FundamentalsTable:
+        """
+        The typed table of every stored overview, loaded once.
+        """
+        with self._lock:
+            if self._table is None:
+                self._table = self._load_table()
+            return self._table
+
+    def has(self, symbol: str) -> bool:
+        return self.table().record(symbol) is not None
+
+    def needs_refresh(self, symbol: str, now: Optional[pd.Timestamp] = None) -> bool:
+        """
+        Returns True if the overview is not stored, or the quarter after its
+        `LatestQuarter` should have been reported and it was not checked in
+        the last `RECHECK_INTERVAL`.
+        """
+        record = self.table().record(symbol)
+        if record is None:
+            return True
+        now = pd.Timestamp(now) if now is not None else pd.Timestamp.now()
+        checked = pd.Timestamp(record['checked']) if not np.isnat(record['checked']) else pd.Timestamp.min
+        if np.isnat(record['LatestQuarter']):
+            return now - checked >= UNDATED_MAX_AGE
+        due = pd.Timestamp(record['LatestQuarter']) + pd.offsets.QuarterEnd(1) + pd.Timedelta(days=REPORTING_LAG_DAYS)
+        return now >= due and now - checked >= RECHECK_INTERVAL
+
+    def update(self, symbol: str, overview: Dict[str, str], now: Optional[pd.Timestamp] = None) -> bool:
+        """
+        Records a fetched overview.
+
+        Returns:
+            bool: True if the overview is new or its `LatestQuarter` changed and
+                it was stored; False if only its check time was updated.
+
+        Raises:
+            ValueError: If the response is not an overview, e.g. the empty
+                object returned for unknown symbols.
+        """
+        if not overview.get('Symbol'):
+            raise ValueError(f"No company overview for {symbol}: {json.dumps(overview)[:200]}")
+        record = parse_overview(overview)
+        record['Symbol'] = symbol.upper()
+        record['checked'] = np.datetime64(pd.Timestamp(now) if now is not None else pd.Timestamp.now(), 's')
+        with self._lock:
+            table = self._table if self._table is not None else self._load_table()
+            stored = table.record(symbol)
+            changed = stored is None or stored['LatestQuarter'] != record['LatestQuarter']
+            if changed:
+                self._write(self._overview_path(symbol), lambda file: file.write(json.dumps(overview).encode()))
+            else:
+                record = dict(stored, checked=record['checked'])
+            self._table = table.upsert(record)
+            self._write(os.path.join(self.root, "table.npz"), lambda file: np.savez(file, **self._table.columns))
+        return changed
+
+    def overview(self, symbol: str) -> Dict[str, str]:
+        """
+        The stored raw OVERVIEW response of a symbol.
+        """
+        with open(self._overview_path(symbol)) as file:
+            return json.load(file)
+
+    def screen(self, query: str, sort: Optional[str] = None, descending: bool = False,
+               limit: Optional[int] = None) -> pd.DataFrame:
+        """
+        Screens the stored overviews, see `FundamentalsTable.screen`.
+        """
+        return self.table().screen(query, sort, descending, limit)
+
+    def _overview_path(self, symbol: str) -> str:
+        return os.path.join(self.root, "overviews", f"{symbol.upper()}.json")
+
+    def _load_table(self) -> FundamentalsTable:
+        try:
+            with np.load(os.path.join(self.root, "table.npz"), allow_pickle=False) as data:
+                return FundamentalsTable({name: data[name] for name in data.files})
+        except FileNotFoundError:
+            return FundamentalsTable.from_records([])
+
+    @staticmethod
+    def _write(path: str, write) -> None:
+        """
+        Writes a file atomically through a temporary file in its directory.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                write(file)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def refresh_fundamentals(api, symbols: Iterable[str], fundamentals: FundamentalsStore,
+                         fetch_workers: int = 4) -> List[Dict[str, Any]]:
+    """
+    Fetches the company overviews of many symbols into the fundamentals store,
+    skipping those whose next quarter is not due yet.
+
+    Returns:
+        List[Dict[str, Any]]: One result per symbol, in input order, shaped like
+            those of `run_batch`; 'report' tells whether the overview was
+            skipped, unchanged or updated
+    """
+    symbols, results = batch_results(symbols)
+
+    def refresh(symbol: str) -> None:
+        result = results[symbol]
+        start = time.perf_counter()
+        try:
+            if not fundamentals.needs_refresh(symbol):
+                result["report"] = "up to date"
+            else:
+                overview = api.fetch_many(symbol, ('OVERVIEW',))['OVERVIEW']
+                changed = fundamentals.update(symbol, overview)
+                result["report"] = f"updated to {overview.get('LatestQuarter')}" if changed else "unchanged"
+            result["status"] = "ok"
+        except Exception as err:
+            result["error"] = f"fetch: {err}"
+        finally:
+            result["fetch_seconds"] = time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool:
+        list(fetch_pool.map(refresh, symbols))
+
+    return [results[symbol] for symbol in symbols]
@@ -0,0 +1,271 @@
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from typing import Dict, Iterable, Optional
+
+from src.api.parser import OHLCV_COLUMNS
+
+
+class HistoryStore:
+    """
+    Local columnar store of price history, one partition per symbol and interval.
+
+    Each partition is a directory holding one raw binary file per column
+    (timestamps as int64 nanoseconds, float64 prices, int64 volume) and a
+    `meta.json` with the committed row count and high-water mark. New bars are
+    merged by truncating the files to the first overlapping timestamp and
+    appending, so a run only rewrites the bars it actually received, and reads
+    are memory-mapped so long series load without copying.
+    """
+
+    DTYPES = {
+        'timestamp': np.int64,
+        'open': np.float64,
+        'high': np.float64,
+        'low': np.float64,
+        'close': np.float64,
+        'volume': np.int64,
+    }
+
+    def __init__(self, root: str = ".cache/history"):
+        self.root = root
+
+    def partition_dir(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, symbol.upper(), interval)
+
+    def has(self, symbol: str, interval: str) -> bool:
+        """
+        Returns True if the partition holds at least one bar.
+        """
+        return self._read_meta(symbol, interval)["rows"] > 0
+
+    def high_water_mark(self, symbol: str, interval: str) -> Optional[pd.Timestamp]:
+        """
+        Returns the timestamp of the most recent stored bar, or None if empty.
+        """
+        mark = self._read_meta(symbol, interval)["high_water_mark"]
+        return pd.Timestamp(mark) if mark else None
+
+    def merge(self, symbol: str, interval: str, frame: pd.DataFrame) -> int:
+        """
+        Merges new bars into the stored series.
+
+        Bars are deduplicated by timestamp; where a timestamp is already stored
+        the new values win, which refreshes the still-forming latest bar.
+
+        Args:
+            symbol (str): Stock ticker symbol.
+            interval (str): Interval name of the partition, e.g. '60min' or 'weekly'.
+            frame (pd.DataFrame): OHLCV frame indexed by timestamp, as returned
+                by `parse_time_series`.
+
+        Returns:
+            int: Number of bars that were not stored before.
+        """
+        if frame.empty:
+            return 0
+        return self.merge_arrays(symbol, interval, self._normalise(frame))
+
+    def merge_arrays(self, symbol: str, interval: str, new: Dict[str, np.ndarray]) -> int:
+        """
+        Merges sorted, deduplicated column arrays into the stored series.
+
+        Args:
+            symbol (str): Stock ticker symbol.
+            interval (str): Interval name of the partition.
+            new (Dict[str, np.ndarray]): One array per column of `DTYPES`, with
+                strictly increasing timestamps.
+
+        Returns:
+            int: Number of bars that were not stored before.
+        """
+        if not len(new['timestamp']):
+            return 0
+
+        partition = self.partition_dir(symbol, interval)
+        os.makedirs(partition, exist_ok=True)
+        meta = self._read_meta(symbol, interval)
+        rows = meta["rows"]
+
+        stored_timestamps = self._column(partition, 'timestamp', rows)
+        cut = int(np.searchsorted(stored_timestamps, new['timestamp'][0], side='left')) if rows else 0
+
+        # Only the stored bars at or after the first new timestamp take part in the merge.
+        tail = {name: np.array(self._column(partition, name, rows)[cut:]) for name in self.DTYPES}
+        previous_mark = int(stored_timestamps[cut - 1]) if cut else None
+        del stored_timestamps  # release the mapping before the files are truncated
+        merged = self._union(tail, new)
+        added = len(merged['timestamp']) - len(tail['timestamp'])
+
+        # Commit the truncation first so a crash mid-append leaves a consistent prefix.
+        self._write_meta(partition, cut, previous_mark)
+        for name, dtype in self.DTYPES.items():
+            path = os.path.join(partition, f"{name}.bin")
+            with open(path, "ab") as file:
+                file.truncate(cut * np.dtype(dtype).itemsize)
+                file.write(np.ascontiguousarray(merged[name], dtype=dtype).tobytes())
+        self._write_meta(partition, cut + len(merged['timestamp']), merged['timestamp'][-1])
+
+        return added
+
+    def ingest(self, symbol: str, interval: str, blocks: Iterable[Dict[str, np.ndarray]],
+               block_rows: int = 1 << 16) -> int:
+        """
+        Merges a stream of column blocks into the stored series with bounded memory.
+
+        Blocks, as yielded by `iter_csv_blocks`, are spooled to staging files
+        as they arrive, so the whole download is never held in memory. When the
+        staged bars are in order, ascending or descending, and all newer than the
+        high-water mark, which is the case when months are ingested oldest first,
+        they are appended to the partition `block_rows` at a time straight from
+        the memory-mapped staging files. Otherwise the staged bars are merged
+        with `merge_arrays`.
+
+        Args:
+            symbol (str): Stock ticker symbol.
+            interval (str): Interval name of the partition.
+            blocks (Iterable[Dict[str, np.ndarray]]): Column blocks in any order.
+            block_rows (int): Bars copied per write on the append path.
+
+        Returns:
+            int: Number of bars that were not stored before.
+        """
+        partition = self.partition_dir(symbol, interval)
+        staging = os.path.join(partition, "staging")
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        try:
+            rows, ascending, descending = 0, True, True
+            first = last = None
+            files = {name: open(os.path.join(staging, f"{name}.bin"), "wb") for name in self.DTYPES}
+            try:
+                for block in blocks:
+                    timestamps = block['timestamp']
+                    if not len(timestamps):
+                        continue
+                    steps = np.diff(timestamps)
+                    ascending &= bool((steps > 0).all()) and (last is None or timestamps[0] > last)
+                    descending &= bool((steps < 0).all()) and (last is None or timestamps[0] < last)
+                    if first is None:
+                        first = int(timestamps[0])
+                    last = int(timestamps[-1])
+                    rows += len(timestamps)
+                    for name, dtype in self.DTYPES.items():
+                        files[name].write(np.ascontiguousarray(block[name], dtype=dtype).tobytes())
+            finally:
+                for file in files.values():
+                    file.close()
+            if not rows:
+                return 0
+
+            staged = {name: self._column(staging, name, rows) for name in self.DTYPES}
+            if descending and not ascending:
+                staged = {name: values[::-1] for name, values in staged.items()}
+            oldest = first if ascending else last
+
+            meta = self._read_meta(symbol, interval)
+            stored = meta["rows"]
+            mark = pd.Timestamp(meta["high_water_mark"]).value if meta["high_water_mark"] else None
+            if not (ascending or descending) or (mark is not None and oldest <= mark):
+                staged = self._sort_unique({name: np.array(values) for name, values in staged.items()})
+                return self.merge_arrays(symbol, interval, staged)
+
+            # Append path: drop any bytes past the committed rows left by an
+            # interrupted run, append, then commit the new row count.
+            for name, dtype in self.DTYPES.items():
+                with open(os.path.join(partition, f"{name}.bin"), "ab") as file:
+                    file.truncate(stored * np.dtype(dtype).itemsize)
+                    for start in range(0, rows, block_rows):
+                        chunk = staged[name][start:start + block_rows]
+                        file.write(np.ascontiguousarray(chunk, dtype=dtype).tobytes())
+            newest = staged['timestamp'][-1]
+            del staged  # release the mappings before the staging files are removed
+            self._write_meta(partition, stored + rows, newest)
+            return rows
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def load_arrays(self, symbol: str, interval: str) -> Dict[str, np.ndarray]:
+        """
+        Returns read-only memory-mapped arrays of every column of a partition.
+        """
+        partition = self.partition_dir(symbol, interval)
+        rows = self._read_meta(symbol, interval)["rows"]
+        return {name: self._column(partition, name, rows) for name in self.DTYPES}
+
+    def load(self, symbol: str, interval: str, start=None, end=None) -> pd.DataFrame:
+        """
+        Loads a stored series as an OHLCV frame.
+
+        Args:
+            symbol (str): Stock ticker symbol.
+            interval (str): Interval name of the partition.
+            start, end: Optional inclusive bounds; only the bars in range are
+                read from the memory-mapped files.
+
+        Returns:
+            pd.DataFrame: OHLCV frame indexed by ascending timestamp.
+        """
+        arrays = self.load_arrays(symbol, interval)
+        timestamps = arrays['timestamp']
+        lo = int(np.searchsorted(timestamps, pd.Timestamp(start).value, side='left')) if start is not None else 0
+        hi = int(np.searchsorted(timestamps, pd.Timestamp(end).value, side='right')) if end is not None else len(timestamps)
+
+        index = pd.DatetimeIndex(np.array(timestamps[lo:hi]).view('datetime64[ns]'))
+        return pd.DataFrame({name: np.array(arrays[name][lo:hi]) for name in OHLCV_COLUMNS}, index=index, copy=False)
+
+    def _normalise(self, frame: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Sorts the incoming bars and drops duplicate timestamps, keeping the last.
+        """
+        columns = {'timestamp': pd.DatetimeIndex(frame.index).asi8}
+        for name in OHLCV_COLUMNS:
+            columns[name] = frame[name].to_numpy(dtype=self.DTYPES[name])
+        return self._sort_unique(columns)
+
+    @staticmethod
+    def _sort_unique(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Sorts column arrays by timestamp and drops duplicate timestamps, keeping the last.
+        """
+        order = np.argsort(columns['timestamp'], kind='stable')
+        timestamps = columns['timestamp'][order]
+        keep = np.append(timestamps[1:] != timestamps[:-1], True)
+        return {name: values[order][keep] for name, values in columns.items()}
+
+    @staticmethod
+    def _union(stored: Dict[str, np.ndarray], new: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Merges two sorted column sets, preferring `new` on equal timestamps.
+        """
+        keep_stored = ~np.isin(stored['timestamp'], new['timestamp'])
+        combined = {name: np.concatenate((stored[name][keep_stored], new[name])) for name in new}
+        order = np.argsort(combined['timestamp'], kind='stable')
+        return {name: values[order] for name, values in combined.items()}
+
+    def _column(self, partition: str, name: str, rows: int) -> np.ndarray:
+        dtype = self.DTYPES[name]
+        if rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(os.path.join(partition, f"{name}.bin"), dtype=dtype, mode='r', shape=(rows,))
+
+    def _read_meta(self, symbol: str, interval: str) -> dict:
+        path = os.path.join(self.partition_dir(symbol, interval), "meta.json")
+        try:
+            with open(path) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {"rows": 0, "high_water_mark": None}
+
+    @staticmethod
+    def _write_meta(partition: str, rows: int, high_water_mark) -> None:
+        mark = pd.Timestamp(int(high_water_mark)).isoformat() if high_water_mark is not None else None
+        fd, tmp_path = tempfile.mkstemp(dir=partition, suffix=".tmp")
+        with os.fdopen(fd, "w") as file:
+            json.dump({"rows": rows, "high_water_mark": mark}, file)
+        os.replace(tmp_path, os.path.join(partition, "meta.json"))
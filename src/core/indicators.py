@@ -0,0 +1,659 @@
+import inspect
+import math
+
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+def sma(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Simple moving average from a running sum; NaN until `window` values are seen.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        sums = np.cumsum(np.concatenate(([0.0], values)))
+        out[window - 1:] = (sums[window:] - sums[:-window]) / window
+    return out
+
+
+def ema(values: np.ndarray, span: Optional[int] = None, alpha: Optional[float] = None) -> np.ndarray:
+    """
+    Exponential moving average seeded with the first value.
+
+    Args:
+        values (np.ndarray): Input series.
+        span (int): Span of the average, alpha = 2 / (span + 1).
+        alpha (float): Smoothing factor, used instead of `span` when given.
+
+    Returns:
+        np.ndarray: Recursively smoothed series.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return values.copy()
+    alpha = alpha if alpha is not None else 2.0 / (span + 1)
+    return pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Rolling population standard deviation from running sums of x and x².
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        # Shifting by the first value keeps the running sums small and accurate.
+        shifted = values - values[0]
+        sums = np.cumsum(np.concatenate(([0.0], shifted)))
+        squares = np.cumsum(np.concatenate(([0.0], shifted * shifted)))
+        mean = (sums[window:] - sums[:-window]) / window
+        variance = (squares[window:] - squares[:-window]) / window - mean * mean
+        out[window - 1:] = np.sqrt(np.maximum(variance, 0.0))
+    return out
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """
+    True range of every bar; the first bar has no previous close and uses high - low.
+    """
+    high, low, close = (np.asarray(values, dtype=np.float64) for values in (high, low, close))
+    previous_close = np.concatenate(([np.nan], close[:-1]))
+    ranges = np.fmax(high - low, np.fmax(np.abs(high - previous_close), np.abs(low - previous_close)))
+    return ranges
+
+
+def _rsi_from_averages(avg_gain, avg_loss):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100.0 - 100.0 / (1.0 + np.divide(avg_gain, avg_loss))
+
+
+class Indicator(ABC):
+    """
+    Base class of technical indicators.
+
+    `compute` evaluates the indicator over whole arrays and leaves the
+    indicator's state positioned after the last bar; `update` then advances the
+    state by one bar in constant time, so appending bars never recomputes the
+    history. `get_state`/`set_state` capture and restore the state, as plain
+    values.
+    """
+
+    # Bar fields the indicator reads.
+    inputs = ('close',)
+
+    def __init__(self):
+        self.reset()
+
+    @property
+    @abstractmethod
+    def columns(self) -> List[str]:
+        """
+        Names of the output columns.
+        """
+
+    @property
+    @abstractmethod
+    def spec(self) -> str:
+        """
+        Spec the indicator is parsed from, e.g. 'sma:20'.
+        """
+
+    @abstractmethod
+    def reset(self) -> None:
+        """
+        Clears the state, as before the first bar.
+        """
+
+    @abstractmethod
+    def compute(self, data: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Evaluates the indicator over whole input arrays.
+        """
+
+    @abstractmethod
+    def update(self, bar: Mapping[str, float]) -> Dict[str, float]:
+        """
+        Advances the state by one bar and returns its values.
+        """
+
+    @abstractmethod
+    def get_state(self) -> Dict[str, Any]:
+        """
+        Returns the state as JSON-serialisable values.
+        """
+
+    def set_state(self, state: Mapping[str, Any]) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+class SMA(Indicator):
+    """
+    Simple moving average.
+
+    The streaming update keeps a running total of the window, which is summed
+    afresh from the window once every `window` bars so that its roundoff does
+    not accumulate over long runs.
+    """
+
+    def __init__(self, window: int = 20):
+        self.window = window
+        super().__init__()
+
+    @property
+    def columns(self):
+        return [f"sma_{self.window}"]
+
+    @property
+    def spec(self):
+        return f"sma:{self.window}"
+
+    def reset(self):
+        self.buffer = deque(maxlen=self.window)
+        self.total = 0.0
+        self.updates = 0
+
+    def compute(self, data):
+        close = np.asarray(data['close'], dtype=np.float64)
+        self.reset()
+        self.buffer.extend(close[-self.window:].tolist())
+        self.total = math.fsum(self.buffer)
+        return {self.columns[0]: sma(close, self.window)}
+
+    def update(self, bar):
+        if len(self.buffer) == self.window:
+            self.total -= self.buffer[0]
+        self.buffer.append(float(bar['close']))
+        self.total += float(bar['close'])
+        self.updates += 1
+        if self.updates % self.window == 0:
+            self.total = math.fsum(self.buffer)
+        value = self.total / self.window if len(self.buffer) == self.window else math.nan
+        return {self.columns[0]: value}
+
+    def get_state(self):
+        return {"buffer": list(self.buffer), "total": self.total}
+
+    def set_state(self, state):
+        self.buffer = deque(state["buffer"], maxlen=self.window)
+        self.total = state["total"]
+
+
+class EMA(Indicator):
+
+    def __init__(self, span: int = 20):
+        self.span = span
+        self.alpha = 2.0 / (span + 1)
+        super().__init__()
+
+    @property
+    def columns(self):
+        return [f"ema_{self.span}"]
+
+    @property
+    def spec(self):
+        return f"ema:{self.span}"
+
+    def reset(self):
+        self.value = None
+
+    def compute(self, data):
+        values = ema(data['close'], alpha=self.alpha)
+        self.value = float(values[-1]) if len(values) else None
+        return {self.columns[0]: values}
+
+    def update(self, bar):
+        close = float(bar['close'])
+        self.value = close if self.value is None else self.alpha * close + (1 - self.alpha) * self.value
+        return {self.columns[0]: self.value}
+
+    def get_state(self):
+        return {"value": self.value}
+
+
+class RSI(Indicator):
+    """
+    Relative strength index with Wilder smoothing (alpha = 1 / window).
+    """
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.alpha = 1.0 / window
+        super().__init__()
+
+    @property
+    def columns(self):
+        return [f"rsi_{self.window}"]
+
+    @property
+    def spec(self):
+        return f"rsi:{self.window}"
+
+    def reset(self):
+        self.previous_close = None
+        self.avg_gain = None
+        self.avg_loss = None
+
+    def compute(self, data):
+        close = np.asarray(data['close'], dtype=np.float64)
+        out = np.full(len(close), np.nan)
+        self.reset()
+        if len(close):
+            self.previous_close = float(close[-1])
+        if len(close) > 1:
+            change = np.diff(close)
+            avg_gain = ema(np.maximum(change, 0.0), alpha=self.alpha)
+            avg_loss = ema(np.maximum(-change, 0.0), alpha=self.alpha)
+            out[1:] = _rsi_from_averages(avg_gain, avg_loss)
+            self.avg_gain, self.avg_loss = float(avg_gain[-1]), float(avg_loss[-1])
+        return {self.columns[0]: out}
+
+    def update(self, bar):
+        close = float(bar['close'])
+        if self.previous_close is None:
+            self.previous_close = close
+            return {self.columns[0]: math.nan}
+
+        change = close - self.previous_close
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        self.previous_close = close
+        if self.avg_gain is None:
+            self.avg_gain, self.avg_loss = gain, loss
+        else:
+            self.avg_gain = self.alpha * gain + (1 - self.alpha) * self.avg_gain
+            self.avg_loss = self.alpha * loss + (1 - self.alpha) * self.avg_loss
+        return {self.columns[0]: float(_rsi_from_averages(np.float64(self.avg_gain), np.float64(self.avg_loss)))}
+
+    def get_state(self):
+        return {"previous_close": self.previous_close, "avg_gain": self.avg_gain, "avg_loss": self.avg_loss}
+
+
+class MACD(Indicator):
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast, self.slow, self.signal = EMA(fast), EMA(slow), EMA(signal)
+        super().__init__()
+
+    @property
+    def columns(self):
+        return ["macd", "macd_signal", "macd_hist"]
+
+    @property
+    def spec(self):
+        return f"macd:{self.fast.span},{self.slow.span},{self.signal.span}"
+
+    def reset(self):
+        for average in (self.fast, self.slow, self.signal):
+            average.reset()
+
+    def compute(self, data):
+        line = self.fast.compute(data)[self.fast.columns[0]] - self.slow.compute(data)[self.slow.columns[0]]
+        signal = self.signal.compute({'close': line})[self.signal.columns[0]]
+        return {"macd": line, "macd_signal": signal, "macd_hist": line - signal}
+
+    def update(self, bar):
+        line = self.fast.update(bar)[self.fast.columns[0]] - self.slow.update(bar)[self.slow.columns[0]]
+        signal = self.signal.update({'close': line})[self.signal.columns[0]]
+        return {"macd": line, "macd_signal": signal, "macd_hist": line - signal}
+
+    def get_state(self):
+        return {"fast": self.fast.get_state(), "slow": self.slow.get_state(), "signal": self.signal.get_state()}
+
+    def set_state(self, state):
+        for name in ("fast", "slow", "signal"):
+            getattr(self, name).set_state(state[name])
+
+
+class BollingerBands(Indicator):
+    """
+    Moving average with bands `width` population standard deviations away.
+
+    The streaming update keeps the window's mean and sum of squared deviations
+    and adjusts both as values enter and leave the window, which stays accurate
+    over long runs where a plain running sum of squares would drift.
+    """
+
+    def __init__(self, window: int = 20, width: float = 2.0):
+        self.window = window
+        self.width = width
+        super().__init__()
+
+    @property
+    def columns(self):
+        return [f"bb_mid_{self.window}", f"bb_upper_{self.window}", f"bb_lower_{self.window}"]
+
+    @property
+    def spec(self):
+        return f"bollinger:{self.window},{self.width:g}"
+
+    def reset(self):
+        self.buffer = deque(maxlen=self.window)
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def _bands(self, mid, std):
+        return dict(zip(self.columns, (mid, mid + self.width * std, mid - self.width * std)))
+
+    def compute(self, data):
+        close = np.asarray(data['close'], dtype=np.float64)
+        self.reset()
+        tail = close[-self.window:]
+        self.buffer.extend(tail.tolist())
+        if len(tail):
+            self.mean = float(tail.mean())
+            self.m2 = float(((tail - self.mean) ** 2).sum())
+        return self._bands(sma(close, self.window), rolling_std(close, self.window))
+
+    def update(self, bar):
+        value = float(bar['close'])
+        if len(self.buffer) < self.window:
+            self.buffer.append(value)
+            delta = value - self.mean
+            self.mean += delta / len(self.buffer)
+            self.m2 += delta * (value - self.mean)
+        else:
+            oldest = self.buffer[0]
+            self.buffer.append(value)
+            previous_mean = self.mean
+            self.mean += (value - oldest) / self.window
+            self.m2 += (value - oldest) * (value - self.mean + oldest - previous_mean)
+
+        if len(self.buffer) < self.window:
+            return self._bands(math.nan, math.nan)
+        return self._bands(self.mean, math.sqrt(max(self.m2, 0.0) / self.window))
+
+    def get_state(self):
+        return {"buffer": list(self.buffer), "mean": self.mean, "m2": self.m2}
+
+    def set_state(self, state):
+        self.buffer = deque(state["buffer"], maxlen=self.window)
+        self.mean, self.m2 = state["mean"], state["m2"]
+
+
+class ATR(Indicator):
+    """
+    Average true range with Wilder smoothing (alpha = 1 / window).
+    """
+
+    inputs = ('high', 'low', 'close')
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.alpha = 1.0 / window
+        super().__init__()
+
+    @property
+    def columns(self):
+        return [f"atr_{self.window}"]
+
+    @property
+    def spec(self):
+        return f"atr:{self.window}"
+
+    def reset(self):
+        self.previous_close = None
+        self.value = None
+
+    def compute(self, data):
+        values = ema(true_range(data['high'], data['low'], data['close']), alpha=self.alpha)
+        self.reset()
+        if len(values):
+            self.previous_close = float(data['close'][-1])
+            self.value = float(values[-1])
+        return {self.columns[0]: values}
+
+    def update(self, bar):
+        high, low, close = float(bar['high']), float(bar['low']), float(bar['close'])
+        true_range = high - low
+        if self.previous_close is not None:
+            true_range = max(true_range, abs(high - self.previous_close), abs(low - self.previous_close))
+        self.previous_close = close
+        self.value = true_range if self.value is None else self.alpha * true_range + (1 - self.alpha) * self.value
+        return {self.columns[0]: self.value}
+
+    def get_state(self):
+        return {"previous_close": self.previous_close, "value": self.value}
+
+
+class VWAP(Indicator):
+    """
+    Volume-weighted average of the typical price (high + low + close) / 3.
+
+    The average is cumulative, or restarts whenever the session key changes
+    when `session` is given ('D' restarts every calendar day).
+    """
+
+    inputs = ('high', 'low', 'close', 'volume')
+
+    def __init__(self, session: Optional[str] = None):
+        self.session = session
+        super().__init__()
+
+    @property
+    def columns(self):
+        return [f"vwap_{self.session.lower()}"] if self.session else ["vwap"]
+
+    @property
+    def spec(self):
+        return f"vwap:{self.session}" if self.session else "vwap"
+
+    def reset(self):
+        self.price_volume = 0.0
+        self.volume = 0.0
+        self.session_key = None
+
+    def _session_keys(self, timestamps) -> Optional[np.ndarray]:
+        if self.session is None or timestamps is None:
+            return None
+        return pd.DatetimeIndex(timestamps).to_period(self.session).asi8
+
+    def compute(self, data):
+        typical = (np.asarray(data['high'], dtype=np.float64) + data['low'] + data['close']) / 3.0
+        volume = np.asarray(data['volume'], dtype=np.float64)
+        price_volume = np.cumsum(typical * volume)
+        total_volume = np.cumsum(volume)
+
+        keys = self._session_keys(data.get('timestamp'))
+        self.reset()
+        if keys is not None and len(keys):
+            # Subtract the running totals at the start of each session.
+            starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+            session_id = np.cumsum(np.r_[True, keys[1:] != keys[:-1]]) - 1
+            offset_pv = np.concatenate(([0.0], price_volume))[starts][session_id]
+            offset_v = np.concatenate(([0.0], total_volume))[starts][session_id]
+            price_volume, total_volume = price_volume - offset_pv, total_volume - offset_v
+            self.session_key = int(keys[-1])
+
+        if len(volume):
+            self.price_volume, self.volume = float(price_volume[-1]), float(total_volume[-1])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return {self.columns[0]: price_volume / total_volume}
+
+    def update(self, bar):
+        if self.session is not None and 'timestamp' in bar:
+            key = int(pd.Timestamp(bar['timestamp']).to_period(self.session).ordinal)
+            if key != self.session_key:
+                self.price_volume, self.volume, self.session_key = 0.0, 0.0, key
+        typical = (float(bar['high']) + float(bar['low']) + float(bar['close'])) / 3.0
+        self.price_volume += typical * float(bar['volume'])
+        self.volume += float(bar['volume'])
+        return {self.columns[0]: self.price_volume / self.volume if self.volume else math.nan}
+
+    def get_state(self):
+        return {"price_volume": self.price_volume, "volume": self.volume, "session_key": self.session_key}
+
+
+INDICATORS = {
+    'sma': SMA,
+    'ema': EMA,
+    'rsi': RSI,
+    'macd': MACD,
+    'bollinger': BollingerBands,
+    'atr': ATR,
+    'vwap': VWAP,
+}
+
+
+def parse_indicator(spec: str) -> Indicator:
+    """
+    Creates an indicator from a spec such as 'sma:20', 'macd:12,26,9' or 'vwap:D'.
+    """
+    name, _, params = spec.strip().lower().partition(':')
+    if name not in INDICATORS:
+        raise ValueError(f"Unknown indicator '{name}', expected one of: {', '.join(INDICATORS)}")
+    if not params:
+        return INDICATORS[name]()
+    if name == 'vwap':
+        return VWAP(params.upper())
+    parameters = list(inspect.signature(INDICATORS[name]).parameters.values())
+    values = [value.strip() for value in params.split(',')]
+    if len(values) > len(parameters):
+        raise ValueError(f"'{name}' takes at most {len(parameters)} argument(s), got '{params}'")
+    return INDICATORS[name](*(_argument(name, parameter, value) for parameter, value in zip(parameters, values)))
+
+
+def _argument(name: str, parameter: inspect.Parameter, value: str) -> Union[int, float]:
+    """
+    Converts an indicator argument to the type of its parameter: windows and
+    spans are positive integers, widths any positive number.
+    """
+    kind = int if parameter.annotation is int else float
+    try:
+        number = kind(value)
+    except ValueError:
+        raise ValueError(f"'{name}' {parameter.name} must be {'a whole' if kind is int else 'a'} number, "
+                         f"got '{value}'") from None
+    if not number > 0:
+        raise ValueError(f"'{name}' {parameter.name} must be positive, got '{value}'")
+    return number
+
+
+def parse_indicator_list(value: str) -> List[str]:
+    """
+    Splits 'sma:20,bollinger:20,2,rsi' into specs; numbers after a comma belong
+    to the preceding indicator. Raises ValueError for unknown indicators.
+    """
+    specs = []
+    for item in value.split(','):
+        if specs and item.strip().replace('.', '', 1).isdigit():
+            specs[-1] += f",{item.strip()}"
+        elif item.strip():
+            specs.append(item.strip())
+    for spec in specs:
+        parse_indicator(spec)
+    return specs
+
+
+class IndicatorEngine:
+    """
+    Computes a set of indicators over OHLCV data, in batch or bar by bar.
+
+    `compute` evaluates every indicator over whole arrays. `update` feeds only
+    bars newer than the last one seen through the indicators' constant-time
+    updates, and `revise` replaces the last bar seen, so a long-lived process
+    such as the watcher keeps the indicators current without recomputing the
+    history.
+    """
+
+    def __init__(self, indicators: Iterable[Union[str, Indicator]]):
+        self.indicators = [parse_indicator(item) if isinstance(item, str) else item for item in indicators]
+        self.last_timestamp: Optional[pd.Timestamp] = None
+        # State of every indicator before the last bar seen, which `revise` rewinds to.
+        self._before_last: Optional[List[Dict[str, Any]]] = None
+
+    @property
+    def columns(self) -> List[str]:
+        return [column for indicator in self.indicators for column in indicator.columns]
+
+    def compute(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Evaluates every indicator over the whole frame.
+
+        Args:
+            frame (pd.DataFrame): OHLCV frame indexed by ascending timestamp.
+
+        Returns:
+            pd.DataFrame: Indicator columns aligned with `frame`.
+        """
+        # All bars but the last are computed in batch, so the state before the
+        # last bar can be kept for `revise`; the last bar is then stepped.
+        data = {field: values[:-1] for field, values in self._arrays(frame).items()}
+        columns = {}
+        for indicator in self.indicators:
+            columns.update(indicator.compute(data))
+        result = pd.DataFrame(columns, index=frame.index[:-1], columns=self.columns)
+        self.last_timestamp = pd.Timestamp(frame.index[-2]) if len(frame) > 1 else None
+        if len(frame):
+            result = pd.concat([result, self._advance(frame.iloc[-1:])])
+        return result
+
+    def update(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Advances every indicator over the bars newer than the last one seen.
+
+        Args:
+            frame (pd.DataFrame): OHLCV frame indexed by ascending timestamp; bars
+                at or before the last seen timestamp are ignored.
+
+        Returns:
+            pd.DataFrame: Indicator values of the new bars.
+        """
+        if self.last_timestamp is not None:
+            frame = frame[frame.index > self.last_timestamp]
+        return self._advance(frame)
+
+    def revise(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Replaces the last bar seen, such as a still-forming intraday bar whose
+        values changed, and advances over any bars after it.
+
+        Args:
+            frame (pd.DataFrame): OHLCV frame whose first bar has the last seen
+                timestamp.
+
+        Returns:
+            pd.DataFrame: Indicator values of the replaced and the new bars.
+
+        Raises:
+            ValueError: If the frame does not start at the last seen bar.
+        """
+        if self._before_last is None or not len(frame) or frame.index[0] != self.last_timestamp:
+            raise ValueError("Only the last bar seen can be revised.")
+        for indicator, state in zip(self.indicators, self._before_last):
+            indicator.set_state(state)
+        return self._advance(frame)
+
+    def _advance(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Steps every indicator through the bars of `frame`, keeping the state
+        before the last of them.
+        """
+        rows = []
+        fields = sorted({field for indicator in self.indicators for field in indicator.inputs})
+        for position, (timestamp, values) in enumerate(zip(frame.index,
+                                                           zip(*(frame[field].to_numpy() for field in fields)))):
+            if position == len(frame) - 1:
+                self._before_last = [indicator.get_state() for indicator in self.indicators]
+            bar = dict(zip(fields, values), timestamp=timestamp)
+            row = {}
+            for indicator in self.indicators:
+                row.update(indicator.update(bar))
+            rows.append(row)
+
+        if len(frame):
+            self.last_timestamp = pd.Timestamp(frame.index[-1])
+        return pd.DataFrame(rows, index=frame.index, columns=self.columns)
+
+    def _arrays(self, frame: pd.DataFrame) -> Dict[str, np.ndarray]:
+        needed = {field for indicator in self.indicators for field in indicator.inputs}
+        missing = needed - set(frame.columns)
+        if missing:
+            raise ValueError(f"Indicators require the columns: {', '.join(sorted(missing))}")
+        data = {field: frame[field].to_numpy(dtype=np.float64) for field in needed}
+        data['timestamp'] = frame.index
+        return data
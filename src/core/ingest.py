@@ -0,0 +1,76 @@
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+
+from src.core.batch import batch_results
+from src.core.history_store import HistoryStore
+from src.utils import instrumentation
+
+
+def month_range(start: str, end: Optional[str] = None) -> List[str]:
+    """
+    Lists the months from `start` to `end` inclusive, as 'YYYY-MM'.
+    """
+    return [str(period) for period in pd.period_range(start, end or start, freq='M')]
+
+
+def ingest_intraday(api, history: HistoryStore, symbol: str, interval: str = '1min',
+                    months: Sequence[Optional[str]] = (None,), chunk_size: int = 1 << 20) -> Dict[Optional[str], int]:
+    """
+    Streams month slices of a symbol's intraday bars into the history store.
+
+    Each month is downloaded as CSV and parsed and written chunk by chunk, so
+    memory stays bounded however long the history is. Months are ingested in
+    the given order; oldest first lets every slice take the append path of
+    `HistoryStore.ingest`.
+
+    Args:
+        api: AlphaVantageAPI used to stream the data
+        history: History store the bars are written to, partition `interval`
+        symbol: Stock ticker symbol
+        interval: Bar interval, e.g. '1min'
+        months: Months as 'YYYY-MM', None for the most recent bars
+        chunk_size: Bytes parsed at a time
+
+    Returns:
+        Dict[Optional[str], int]: Bars added by each month
+    """
+    added = {}
+    for month in months:
+        with instrumentation.stage('ingest', symbol=symbol, month=month):
+            blocks = api.stream_intraday(symbol, interval, month, chunk_size)
+            added[month] = history.ingest(symbol, interval, blocks)
+            instrumentation.add(rows=added[month])
+    return added
+
+
+def ingest_batch(api, symbols: Iterable[str], history: HistoryStore, interval: str = '1min',
+                 months: Sequence[Optional[str]] = (None,), fetch_workers: int = 4) -> List[Dict[str, Any]]:
+    """
+    Runs `ingest_intraday` for many symbols concurrently.
+
+    Returns:
+        List[Dict[str, Any]]: One result per symbol, in input order, shaped like
+            those of `run_batch`; 'report' holds the number of bars added
+    """
+    symbols, results = batch_results(symbols)
+
+    def ingest(symbol: str) -> None:
+        result = results[symbol]
+        start = time.perf_counter()
+        try:
+            added = ingest_intraday(api, history, symbol, interval, months)
+            result["report"] = f"{sum(added.values())} bars added"
+            result["status"] = "ok"
+        except Exception as err:
+            result["error"] = f"ingest: {err}"
+        finally:
+            result["fetch_seconds"] = time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool:
+        list(fetch_pool.map(ingest, symbols))
+
+    return [results[symbol] for symbol in symbols]
@@ -0,0 +1,340 @@
+import os
+import time
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+
+from src.core.anomaly import detect_anomalies
+from src.core.artifacts import REPORT_OVERVIEW_FIELDS, RENDERER_VERSION, ArtifactStore, content_hash
+from src.core.backends import DEFAULT_DPI, load_backend
+from src.core.batch import batch_results, process_pool
+from src.core.cross_section import PORTFOLIO, build_portfolio_report
+from src.core.data_processing import DataTransformer
+from src.core.fundamentals import FundamentalsStore
+from src.core.history_store import HistoryStore
+from src.core.resampling import resample_ohlcv
+from src.utils import instrumentation
+
+if TYPE_CHECKING:
+    from src.core.report_generator import ReportGenerator
+
+# History store partition of each time-series dataset.
+HISTORY_INTERVALS = {
+    'TIME_SERIES_INTRADAY': '60min',
+    'TIME_SERIES_DAILY': 'daily',
+    'TIME_SERIES_WEEKLY': 'weekly',
+    'TIME_SERIES_MONTHLY': 'monthly',
+}
+
+# Datasets fetched when weekly and monthly bars are derived from the daily series.
+DERIVED_FUNCTIONS = ('TIME_SERIES_DAILY', 'OVERVIEW')
+
+# Name of each time period in URLs and exported file names.
+TIMEFRAMES = {'daily': 'D', 'weekly': 'W', 'monthly': 'M'}
+
+
+def fetch_symbol(api, symbol: str, history: Optional[HistoryStore] = None,
+                 derive_timeframes: bool = False, fundamentals: Optional[FundamentalsStore] = None) -> Dict[str, Any]:
+    """
+    Fetches the datasets of a report, merging price series into the history store.
+
+    With a history store, series already tracked are fetched in compact form and
+    merged into the stored history, so only the latest bars cross the network;
+    new symbols are bootstrapped with the full history. The returned series are
+    the complete stored histories. With a fundamentals store, the company
+    overview is only fetched once a new quarter is due, and served from the
+    store otherwise.
+
+    Args:
+        api: AlphaVantageAPI used to fetch the data
+        symbol: Stock ticker symbol
+        history: Optional local history store
+        derive_timeframes: Fetch only the daily series and compute the weekly
+            and monthly bars locally, one price call instead of three
+        fundamentals: Optional local store of company overviews
+
+    Returns:
+        Dict[str, Any]: Datasets keyed by Alpha Vantage function
+    """
+    functions = DERIVED_FUNCTIONS if derive_timeframes else api.REPORT_FUNCTIONS
+    if fundamentals is not None and not fundamentals.needs_refresh(symbol):
+        functions = tuple(function for function in functions if function != 'OVERVIEW')
+    intervals = {function: interval for function, interval in HISTORY_INTERVALS.items() if function in functions}
+
+    if history is not None:
+        outputsizes = {function: 'compact' if history.has(symbol, interval) else 'full'
+                       for function, interval in intervals.items()}
+    else:
+        # Derived monthly bars need more than the 100 days of a compact response.
+        outputsizes = {'TIME_SERIES_DAILY': 'full'} if derive_timeframes else {}
+    datasets = api.fetch_many(symbol, functions, outputsizes=outputsizes)
+
+    if history is not None:
+        for function, interval in intervals.items():
+            history.merge(symbol, interval, datasets[function])
+            datasets[function] = history.load(symbol, interval)
+
+    if fundamentals is not None:
+        if 'OVERVIEW' in functions:
+            fundamentals.update(symbol, datasets['OVERVIEW'])
+        else:
+            datasets['OVERVIEW'] = fundamentals.overview(symbol)
+
+    if derive_timeframes:
+        datasets['TIME_SERIES_WEEKLY'] = resample_ohlcv(datasets['TIME_SERIES_DAILY'], 'W')
+        datasets['TIME_SERIES_MONTHLY'] = resample_ohlcv(datasets['TIME_SERIES_DAILY'], 'M')
+    return datasets
+
+
+def clean_series(datasets: Dict[str, Any], time_period: str) -> pd.DataFrame:
+    """
+    Cleaned OHLCV series of a time period, as plotted in the report.
+    """
+    if time_period == 'W':
+        data = datasets['TIME_SERIES_WEEKLY']
+    elif time_period == 'M':
+        data = datasets['TIME_SERIES_MONTHLY']
+    else:
+        data = datasets.get('TIME_SERIES_INTRADAY', datasets.get('TIME_SERIES_DAILY'))
+    return DataTransformer(data).clean_data(keep_ohlcv=True).sort_values(by='date', ignore_index=True)
+
+
+def prepare_report(symbol: str, datasets: Dict[str, Any], indicators: Optional[Sequence[str]] = None,
+                   anomalies: bool = False, dpi: int = DEFAULT_DPI, vector_plots: bool = False,
+                   artifacts: Optional[ArtifactStore] = None, time_range: Optional[str] = None,
+                   max_points: Optional[int] = None, downsampler: str = 'lttb') -> 'ReportGenerator':
+    """
+    Cleans the fetched datasets of a symbol and renders its plots in memory.
+
+    The plotting and PDF backends are imported on the first call.
+
+    Args:
+        symbol: Stock ticker symbol
+        datasets: Results of `AlphaVantageAPI.fetch_many` keyed by function
+        indicators: Optional indicator specs overlaid on every plot
+        anomalies: Flag anomalies on the plots and list them in the report
+        dpi: Resolution of the rasterised plots
+        vector_plots: Embed the plots as vector drawings instead of PNG images
+        artifacts: Optional store unchanged plots are reused from
+        time_range: Dates plotted, e.g. '5y' or '2020-01-01:2022-12-31', see
+            `TimeRange.parse`; defaults to the last few bars of each period
+        max_points: Points a plot is downsampled to, defaults to its pixel width
+        downsampler: 'lttb' or 'minmax'
+
+    Returns:
+        ReportGenerator: Generator holding the rendered plots, ready to build the PDF
+    """
+    keep_ohlcv = bool(indicators) or anomalies
+    # Without the hourly series the daily plot shows end-of-day bars.
+    if 'TIME_SERIES_INTRADAY' in datasets:
+        daily_data, daily_label = DataTransformer(datasets['TIME_SERIES_INTRADAY']).clean_data(keep_ohlcv), "Daily (Hrs)"
+    else:
+        daily_data, daily_label = DataTransformer(datasets['TIME_SERIES_DAILY']).clean_data(keep_ohlcv), "Daily"
+    weekly_data = DataTransformer(datasets['TIME_SERIES_WEEKLY']).clean_data(keep_ohlcv)
+    monthly_data = DataTransformer(datasets['TIME_SERIES_MONTHLY']).clean_data(keep_ohlcv)
+
+    found = detect_anomalies({'D': daily_data, 'W': weekly_data, 'M': monthly_data}) if anomalies else None
+
+    report_generator = load_backend('report')(datasets['OVERVIEW'], monthly_data, weekly_data, daily_data,
+                                       daily_label=daily_label, anomalies=found, dpi=dpi, vector_plots=vector_plots,
+                                       artifacts=artifacts, time_range=time_range, max_points=max_points,
+                                       downsampler=downsampler)
+    report_generator.plot_line(symbol, indicators=indicators)
+    report_generator.plot_line(symbol, "W", indicators=indicators)
+    report_generator.plot_line(symbol, "M", indicators=indicators)
+    return report_generator
+
+
+def render_report(symbol: str, datasets: Dict[str, Any], output: Optional[BinaryIO] = None,
+                  **options) -> Optional[bytes]:
+    """
+    Renders the PDF report of a symbol entirely in memory.
+
+    Args:
+        symbol: Stock ticker symbol
+        datasets: Results of `AlphaVantageAPI.fetch_many` keyed by function
+        output: Optional binary file object the PDF is streamed to
+        **options: Rendering options of `prepare_report`
+
+    Returns:
+        Optional[bytes]: The PDF, unless it was written to `output`
+    """
+    return prepare_report(symbol, datasets, **options).generate_pdf_report(output)
+
+
+def build_report(symbol: str, datasets: Dict[str, Any], output_dir: str,
+                 indicators: Optional[Sequence[str]] = None, anomalies: bool = False, dpi: int = DEFAULT_DPI,
+                 vector_plots: bool = False, force: bool = False, time_range: Optional[str] = None,
+                 max_points: Optional[int] = None, downsampler: str = 'lttb') -> str:
+    """
+    Renders the PDF report of a symbol and writes it to `output_dir/report.pdf`.
+
+    Builds are incremental, following the dependency graph from data to plots
+    to report. The hash of the fetched inputs and rendering options is checked
+    first, so an unchanged symbol costs one hash and no cleaning, rendering or
+    backend import. Otherwise each plot whose cleaned data slice, overlays and
+    settings are unchanged is reused from `output_dir/.artifacts`, and the PDF
+    is only rewritten when the hash of its sections changes. The hashes are
+    recorded in `output_dir/.manifest.json`.
+
+    Runs inside a worker process during batch runs, so it only takes picklable
+    arguments.
+
+    Args:
+        symbol: Stock ticker symbol
+        datasets: Results of `AlphaVantageAPI.fetch_many` keyed by function
+        output_dir: Directory the report is written to
+        indicators, anomalies, dpi, vector_plots: Rendering options of `prepare_report`
+        force: Rebuild every plot and the PDF regardless of the manifest
+        time_range, max_points, downsampler: Plotting options of `prepare_report`
+
+    Returns:
+        str: Path of the generated PDF report
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, "report.pdf")
+    artifacts = ArtifactStore(output_dir, reuse=not force)
+
+    with instrumentation.stage('manifest', symbol=symbol):
+        daily = 'TIME_SERIES_INTRADAY' if 'TIME_SERIES_INTRADAY' in datasets else 'TIME_SERIES_DAILY'
+        overview = {field: datasets['OVERVIEW'].get(field) for field in REPORT_OVERVIEW_FIELDS}
+        options = {'indicators': list(indicators or []), 'anomalies': anomalies, 'dpi': dpi, 'vector_plots': vector_plots,
+                   'time_range': time_range, 'max_points': max_points, 'downsampler': downsampler}
+        inputs = content_hash(RENDERER_VERSION, symbol, daily, datasets[daily], datasets['TIME_SERIES_WEEKLY'],
+                              datasets['TIME_SERIES_MONTHLY'], overview, options)
+        if artifacts.unchanged('inputs', inputs, output_path):
+            instrumentation.add(cache_hits=1)
+            return output_path
+
+    report_generator = prepare_report(symbol, datasets, indicators, anomalies, dpi, vector_plots, artifacts,
+                                      time_range, max_points, downsampler)
+    report = report_generator.report_key()
+    if not artifacts.unchanged('report', report, output_path):
+        report_generator.generate_pdf_report(output_path)
+    artifacts.record({'inputs': inputs, 'report': report, 'sections': report_generator.section_keys},
+                     keep=report_generator.section_keys.values())
+    return output_path
+
+
+def _timed_build_report(symbol: str, datasets: Dict[str, Any], output_dir: str, **options):
+    start = time.perf_counter()
+    output_path = build_report(symbol, datasets, output_dir, **options)
+    return output_path, time.perf_counter() - start
+
+
+def run_batch(api, symbols: Iterable[str], output_root: str = "output", fetch_workers: int = 4,
+              render_workers: Optional[int] = None, history: Optional[HistoryStore] = None,
+              derive_timeframes: bool = False, indicators: Optional[Sequence[str]] = None,
+              anomalies: bool = False, dpi: int = DEFAULT_DPI, vector_plots: bool = False,
+              portfolio: Optional[str] = None, benchmark: Optional[str] = None,
+              fundamentals: Optional[FundamentalsStore] = None, force: bool = False, time_range: Optional[str] = None,
+              max_points: Optional[int] = None, downsampler: str = 'lttb') -> List[Dict[str, Any]]:
+    """
+    Generates reports for many symbols in one process.
+
+    Fetching is I/O-bound and runs on a bounded thread pool; cleaning, plotting
+    and PDF generation are CPU-bound and run on a process pool sized to the core
+    count. A symbol is handed to the process pool as soon as its data arrives,
+    and a failing symbol is recorded without aborting the rest of the batch.
+    When instrumentation is enabled, the stages run by the worker processes are
+    recorded in the parent's recorder too.
+
+    Args:
+        api: AlphaVantageAPI used to fetch the data
+        symbols: Stock ticker symbols to report on
+        output_root: Each symbol writes to its own `output_root/<SYMBOL>` directory
+        fetch_workers: Maximum number of symbols fetched concurrently
+        render_workers: Number of worker processes, defaults to the core count
+        history: Optional history store the fetched series are merged into
+        derive_timeframes: Derive weekly and monthly bars from the daily series
+        indicators: Optional indicator specs overlaid on every plot
+        anomalies: Flag anomalies on the plots and list them in the reports
+        dpi: Resolution of the rasterised plots
+        vector_plots: Embed the plots as vector drawings instead of PNG images
+        portfolio: Also write `output_root/portfolio.pdf`, comparing the
+            symbols' 'daily', 'weekly' or 'monthly' series
+        benchmark: Index symbol the portfolio betas are measured against,
+            fetched without a report of its own
+        fundamentals: Optional store the company overviews are kept in
+        force: Rebuild every report, even those whose inputs are unchanged
+        time_range, max_points, downsampler: Plotting options of `prepare_report`
+
+    Returns:
+        List[Dict[str, Any]]: One result per symbol, in input order, with its
+            status, error, output path and fetch/render timings, followed by a
+            `PORTFOLIO` result when a portfolio report was requested
+    """
+    symbols, results = batch_results(symbols)
+    time_period = TIMEFRAMES[portfolio] if portfolio else None
+    series, sectors = {}, {}
+    render_options = dict(indicators=indicators, anomalies=anomalies, dpi=dpi, vector_plots=vector_plots, force=force,
+                          time_range=time_range, max_points=max_points, downsampler=downsampler)
+    recorder = instrumentation.active()
+
+    def fetch(symbol: str):
+        start = time.perf_counter()
+        try:
+            return fetch_symbol(api, symbol, history, derive_timeframes, fundamentals)
+        finally:
+            results[symbol]["fetch_seconds"] = time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool, \
+            process_pool(render_workers or os.cpu_count()) as render_pool:
+        fetches = {fetch_pool.submit(fetch, symbol): symbol for symbol in symbols}
+        benchmark_fetch = fetch_pool.submit(fetch_symbol, api, benchmark, history, derive_timeframes, fundamentals) \
+            if time_period and benchmark else None
+        renders = {}
+
+        for future in as_completed(fetches):
+            symbol = fetches[future]
+            try:
+                datasets = future.result()
+            except Exception as err:
+                results[symbol]["error"] = f"fetch: {err}"
+                continue
+            if time_period is not None:
+                series[symbol] = clean_series(datasets, time_period)
+                sectors[symbol] = datasets['OVERVIEW'].get('Sector')
+            output_dir = os.path.join(output_root, symbol)
+            if recorder is not None:
+                future = render_pool.submit(instrumentation.call_traced, recorder.profile, _timed_build_report,
+                                            symbol, datasets, output_dir, **render_options)
+            else:
+                future = render_pool.submit(_timed_build_report, symbol, datasets, output_dir, **render_options)
+            renders[future] = symbol
+
+        for future in as_completed(renders):
+            symbol = renders[future]
+            try:
+                result = future.result()
+                if recorder is not None:
+                    result, exported = result
+                    recorder.merge(exported)
+                results[symbol]["report"], results[symbol]["render_seconds"] = result
+                results[symbol]["status"] = "ok"
+            except Exception as err:
+                results[symbol]["error"] = f"render: {err}"
+
+        if time_period is not None:
+            result = results[PORTFOLIO] = batch_results([PORTFOLIO])[1][PORTFOLIO]
+            start = time.perf_counter()
+            try:
+                benchmark_series = clean_series(benchmark_fetch.result(), time_period) if benchmark_fetch else None
+            except Exception as err:
+                result["error"] = f"fetch {benchmark}: {err}"
+            else:
+                result["fetch_seconds"] = time.perf_counter() - start
+                start = time.perf_counter()
+                try:
+                    result["report"] = build_portfolio_report(series, sectors, os.path.join(output_root, "portfolio.pdf"),
+                                                              time_period, benchmark_series, benchmark,
+                                                              executor=render_pool, force=force)
+                    result["status"] = "ok"
+                except Exception as err:
+                    result["error"] = f"portfolio: {err}"
+                result["render_seconds"] = time.perf_counter() - start
+            symbols.append(PORTFOLIO)
+
+    return [results[symbol] for symbol in symbols]
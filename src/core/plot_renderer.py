@@ -0,0 +1,220 @@
+import threading
+
+from typing import BinaryIO, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from reportlab.graphics.charts.legends import Legend
+from reportlab.graphics.charts.lineplots import LinePlot
+from reportlab.graphics.shapes import Drawing, Group, String, UserNode
+from reportlab.graphics.widgets.markers import makeMarker
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+
+from src.core.backends import DEFAULT_DPI
+
+# Plot size: A4 width less a small margin, at a 1:3 aspect ratio (height:width).
+PLOT_WIDTH = 8.27 - 2 * 0.09
+PLOT_HEIGHT = PLOT_WIDTH / 3
+
+# Close prices are drawn with point markers only up to this many points;
+# denser lines are unreadable with them.
+MARKER_POINTS = 60
+
+# Colours of the overlay series in vector drawings, after the close line.
+VECTOR_COLOURS = (colors.darkorange, colors.green, colors.purple, colors.brown, colors.teal, colors.olive)
+
+Series = Mapping[str, Sequence[float]]
+Marks = Tuple[Sequence, Sequence[float]]
+
+
+class PlotRenderer:
+    """
+    Renders line plots with matplotlib's object-oriented Agg API.
+
+    One figure is created per renderer and redrawn for every plot, so rendering
+    many plots neither goes through pyplot's global figure registry nor leaks
+    figures. A renderer is not thread-safe; use `default_renderer` to get one
+    per thread.
+    """
+
+    def __init__(self, dpi: int = DEFAULT_DPI, width: float = PLOT_WIDTH, height: float = PLOT_HEIGHT):
+        self.dpi = dpi
+        self.figure = Figure(figsize=(width, height))
+        FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_subplot()
+
+    def draw(self, title: str, dates: Sequence, close: Sequence[float], overlays: Optional[Series] = None,
+             secondary: Optional[Series] = None, marks: Optional[Marks] = None) -> Figure:
+        """
+        Draws a price plot on the figure template, replacing the previous plot.
+
+        Args:
+            title (str): Plot title.
+            dates (Sequence): X values of every series.
+            close (Sequence[float]): Close prices.
+            overlays (Series): Extra series drawn on the price axis, by label.
+            secondary (Series): Series drawn dashed on a secondary axis, by label.
+            marks (Marks): Dates and prices of points to highlight.
+
+        Returns:
+            Figure: The redrawn figure, valid until the next call.
+        """
+        self.clear()
+        axes = self.axes
+        axes.plot(dates, close, marker='o' if len(close) <= MARKER_POINTS else None, label='Close')
+        for label, values in (overlays or {}).items():
+            axes.plot(dates, values, linewidth=1, label=label)
+        if marks is not None and len(marks[0]):
+            axes.scatter(marks[0], marks[1], color='red', marker='x', s=40, zorder=3, label='Anomaly')
+
+        handles, labels = axes.get_legend_handles_labels()
+        if secondary:
+            secondary_axes = axes.twinx()
+            for label, values in secondary.items():
+                secondary_axes.plot(dates, values, linewidth=1, linestyle='--', label=label)
+            extra_handles, extra_labels = secondary_axes.get_legend_handles_labels()
+            handles, labels = handles + extra_handles, labels + extra_labels
+        if len(handles) > 1:
+            axes.legend(handles, labels, fontsize=6, loc='upper left')
+
+        axes.set_title(title, loc='left', fontweight='bold', fontsize=10)
+        axes.set_ylabel("Stock Price (USD)")
+        axes.tick_params(axis='x', labelrotation=45)
+        axes.grid(True)
+        self.figure.tight_layout()
+        return self.figure
+
+    def save(self, target: Union[str, BinaryIO], format: str = 'png') -> None:
+        """
+        Writes the current plot to a path or binary file object.
+        """
+        self.figure.savefig(target, format=format, dpi=self.dpi)
+
+    def clear(self) -> None:
+        """
+        Empties the figure template, dropping any secondary axes.
+        """
+        for axes in self.figure.axes[1:]:
+            self.figure.delaxes(axes)
+        self.axes.clear()
+
+    @staticmethod
+    def drawing(title: str, dates: Sequence, close: Sequence[float], overlays: Optional[Series] = None,
+                secondary: Optional[Series] = None, marks: Optional[Marks] = None,
+                width: float = 8 * inch, height: float = 3 * inch) -> Drawing:
+        """
+        Builds the same plot as `draw` as a reportlab vector drawing, which
+        reportlab embeds in a PDF without rasterising.
+
+        Args:
+            title, dates, close, overlays, secondary, marks: As for `draw`.
+            width (float): Drawing width in points.
+            height (float): Drawing height in points.
+
+        Returns:
+            Drawing: Flowable vector drawing.
+        """
+        drawing = Drawing(width, height)
+        drawing.add(String(0, height - 12, title, fontName='Helvetica-Bold', fontSize=10))
+
+        x = pd.DatetimeIndex(dates).asi8 / 86400e9
+        plot_area = dict(x=45, y=40, width=width - 90, height=height - 70)
+
+        series = [('Close', close)] + list((overlays or {}).items())
+        price_plot = _line_plot(x, series, plot_area)
+        if len(close) <= MARKER_POINTS:
+            price_plot.lines[0].symbol = makeMarker('FilledCircle', size=3)
+        if marks is not None and len(marks[0]):
+            price_plot.data.append(_points(pd.DatetimeIndex(marks[0]).asi8 / 86400e9, marks[1]))
+            mark_line = price_plot.lines[len(price_plot.data) - 1]
+            mark_line.strokeColor = None
+            mark_line.symbol = makeMarker('Cross', size=6, fillColor=colors.red, strokeColor=colors.red)
+        drawing.add(price_plot)
+
+        if secondary:
+            secondary_plot = _line_plot(x, list(secondary.items()), plot_area, first_colour=len(series) - 1)
+            for index in range(len(secondary)):
+                secondary_plot.lines[index].strokeDashArray = (3, 2)
+            secondary_plot.xValueAxis.visible = False
+            secondary_plot.yValueAxis.joinAxisMode = 'right'
+            secondary_plot.yValueAxis.labels.boxAnchor = 'w'
+            secondary_plot.yValueAxis.labels.dx = 6
+            secondary_plot.yValueAxis.visibleGrid = False
+            drawing.add(secondary_plot)
+            series += list(secondary.items())
+
+        if len(series) > 1:
+            legend = Legend()
+            legend.x, legend.y = plot_area['x'] + 5, height - 24
+            legend.fontSize = 6
+            legend.dx = legend.dy = 6
+            legend.columnMaximum = 1
+            legend.alignment = 'right'
+            legend.colorNamePairs = [(colors.steelblue, 'Close')] + [
+                (VECTOR_COLOURS[index % len(VECTOR_COLOURS)], label) for index, (label, _) in enumerate(series[1:])]
+            drawing.add(legend)
+        return drawing
+
+
+def _points(x: np.ndarray, values: Sequence[float]) -> list:
+    values = np.asarray(values, dtype=np.float64)
+    keep = ~np.isnan(values)
+    return list(zip(x[keep].tolist(), values[keep].tolist()))
+
+
+def _line_plot(x: np.ndarray, series: list, area: dict, first_colour: int = -1) -> LinePlot:
+    plot = LinePlot()
+    plot.x, plot.y, plot.width, plot.height = area['x'], area['y'], area['width'], area['height']
+    plot.data = [_points(x, values) for _, values in series]
+    for index in range(len(series)):
+        colour_index = first_colour + index
+        plot.lines[index].strokeColor = colors.steelblue if colour_index < 0 else \
+            VECTOR_COLOURS[colour_index % len(VECTOR_COLOURS)]
+        plot.lines[index].strokeWidth = 1
+
+    steps = x[np.linspace(0, len(x) - 1, min(len(x), 8)).astype(int)] if len(x) else []
+    plot.xValueAxis.valueMin, plot.xValueAxis.valueMax = (x[0], x[-1]) if len(x) > 1 else (None, None)
+    plot.xValueAxis.valueSteps = list(steps)
+    plot.xValueAxis.labelTextFormat = lambda value: pd.Timestamp(value * 86400e9).strftime('%Y-%m-%d')
+    plot.xValueAxis.labels.angle = 45
+    plot.xValueAxis.labels.boxAnchor = 'ne'
+    plot.xValueAxis.labels.fontSize = 6
+    plot.yValueAxis.labels.fontSize = 6
+    plot.yValueAxis.visibleGrid = True
+    plot.yValueAxis.gridStrokeColor = colors.lightgrey
+    return plot
+
+
+def flatten(drawing: Drawing) -> Drawing:
+    """
+    Expands the charts, axes and labels of a vector drawing into plain shapes.
+    The drawing looks the same, but unlike the charts, which hold instances
+    of classes made at runtime, it can be pickled and sent between processes.
+    """
+    def expand(node):
+        while isinstance(node, UserNode):
+            node = node.provideNode()
+        if isinstance(node, Group):
+            node.contents = [expand(child) for child in node.contents]
+        return node
+
+    return expand(drawing.expandUserNodes())
+
+
+_local = threading.local()
+
+
+def default_renderer(dpi: int = DEFAULT_DPI) -> PlotRenderer:
+    """
+    Returns a renderer owned by the calling thread, created on first use, so
+    its figure template is reused across reports.
+    """
+    renderer = getattr(_local, 'renderer', None)
+    if renderer is None:
+        renderer = _local.renderer = PlotRenderer(dpi)
+    renderer.dpi = dpi
+    return renderer
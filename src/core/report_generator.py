@@ -1,35 +1,151 @@
+import io
+import math
 import os
+import tempfile
 import pandas as pd
-import matplotlib.pyplot as plt
+
+from typing import Any, BinaryIO, Dict, Iterable, Optional, Sequence, Tuple, Union
 
 from reportlab.lib import styles
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import (BaseDocTemplate, Flowable, Frame, PageBreak, PageTemplate, SimpleDocTemplate, Paragraph,
+                                Spacer, Image, Table, TableStyle)
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import inch
 from reportlab.lib import colors
+from reportlab.graphics.shapes import Drawing
+
+from src.core.artifacts import REPORT_OVERVIEW_FIELDS, RENDERER_VERSION, ArtifactStore, content_hash
+from src.core.downsampling import TimeRange, downsample
+from src.core.indicators import IndicatorEngine
+from src.core.plot_renderer import DEFAULT_DPI, PLOT_WIDTH, PlotRenderer, default_renderer, flatten
+from src.utils import instrumentation
+
+# Indicators drawn on the price axis; the others get a secondary axis.
+PRICE_SCALE_INDICATORS = ('sma_', 'ema_', 'bb_', 'vwap')
+
+# Most recent bars plotted for each time period when no time range is given.
+DEFAULT_PLOT_POINTS = {'M': 11, 'W': 7, 'D': 11}
+
+# Points kept by the downsampler of vector plots, about their width in points.
+VECTOR_PLOT_POINTS = int(PLOT_WIDTH * 72)
+
+# Rows of the anomaly table in the PDF, most recent first.
+MAX_ANOMALY_ROWS = 20
+
+# Symbols in the correlation grid of the portfolio report, by coverage.
+MAX_CORRELATION_SYMBOLS = 10
+
+# Styles are built once and shared by every report; they are never mutated.
+STYLES = styles.getSampleStyleSheet()
+OVERVIEW_STYLE = ParagraphStyle('Overview', parent=STYLES['Normal'], fontSize=12, leading=14)
+METRICS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.beige),
+    ('TEXTCOLOR',(0,0),(-1,0),colors.black),
+    ('ALIGN',(0,0),(-1,-1),'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica'),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND',(0,1),(-1,-1),colors.beige),
+    ('GRID', (0,0), (-1,-1), 1, colors.black),
+])
+ANOMALY_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.beige),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+])
+PORTFOLIO_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.beige),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+])
+# Font of the contents entries and page numbers of the consolidated report.
+CONTENTS_FONT = ('Helvetica', 10)
+CONTENTS_ENTRY_HEIGHT = 16
+
+REPORT_CREDITS = ("Report generated by Financial Market Analyzer "
+                  "(https://github.com/KenImade/financial-market-analyser) by Kenneth Imade")
 
 class ReportGenerator:
     """
     Generates plots and reports for stock data
     """
 
-    def __init__(self, company_info: dict, monthly_data: pd.DataFrame, weekly_data: pd.DataFrame, daily_data: pd.DataFrame):
+    def __init__(self, company_info: dict, monthly_data: pd.DataFrame, weekly_data: pd.DataFrame, daily_data: pd.DataFrame,
+                 output_dir: str = "output", daily_label: str = "Daily (Hrs)",
+                 anomalies: Optional[Dict[str, pd.DataFrame]] = None, renderer: Optional[PlotRenderer] = None,
+                 dpi: int = DEFAULT_DPI, vector_plots: bool = False, artifacts: Optional[ArtifactStore] = None,
+                 time_range: Optional[str] = None, max_points: Optional[int] = None, downsampler: str = 'lttb'):
         self.company_info = company_info
-        self.monthly_data = monthly_data.iloc[:11, :].copy()
-        self.weekly_data = weekly_data.iloc[:7, :].copy()
-        self.daily_data = daily_data.iloc[:11, :].copy()
+        self.output_dir = output_dir
+        self.daily_label = daily_label
+        # Output of the anomaly detection stage keyed by time period ('D', 'W', 'M').
+        self.anomalies = anomalies or {}
+        # Rasterised plots reuse the thread's figure template. Plots are kept in
+        # memory, as PNG bytes or reportlab drawings, until the PDF is built.
+        self.renderer = renderer or default_renderer(dpi)
+        self.vector_plots = vector_plots
+        self.plots: Dict[str, Union[bytes, Drawing]] = {}
+        # Rasterised plots whose inputs hash to a stored artifact are reused
+        # instead of redrawn. The hash of each section's inputs is kept under
+        # its label.
+        self.artifacts = artifacts
+        self.section_keys: Dict[str, str] = {}
+        # Full sorted histories, so indicators are not cut short by the plotted window.
+        self._history = {
+            'M': monthly_data.sort_values(by='date'),
+            'W': weekly_data.sort_values(by='date'),
+            'D': daily_data.sort_values(by='date'),
+        }
+        # Plotted rows of each history: the time range if one is given, else
+        # the most recent `DEFAULT_PLOT_POINTS`. Plots with more points than
+        # `max_points`, by default the plot's pixel width, are downsampled.
+        self.time_range = TimeRange.parse(time_range) if time_range else None
+        self.max_points = max_points
+        self.downsampler = downsampler
+        self._windows = {period: self._window(period) for period in self._history}
+        self.monthly_data = self._history['M'].iloc[self._windows['M']].copy()
+        self.weekly_data = self._history['W'].iloc[self._windows['W']].copy()
+        self.daily_data = self._history['D'].iloc[self._windows['D']].copy()
+
+    def _window(self, time_period: str) -> slice:
+        """
+        Positions of the plotted rows in the sorted history of a time period
+        """
+        history = self._history[time_period]
+        if self.time_range is None:
+            return slice(max(0, len(history) - DEFAULT_PLOT_POINTS[time_period]), len(history))
+        return slice(*self.time_range.bounds(history['date'].to_numpy()))
 
-        self._preprocessing()
+    def plot_points(self) -> int:
+        """
+        Most points a plot is drawn with before it is downsampled
+        """
+        if self.max_points:
+            return self.max_points
+        if self.vector_plots:
+            return VECTOR_PLOT_POINTS
+        return int(self.renderer.figure.get_size_inches()[0] * self.renderer.dpi)
 
-    def _preprocessing(self):
+    def indicator_values(self, time_period: str, indicators: Sequence[str]) -> pd.DataFrame:
         """
-        Sorts data by date
+        Computes technical indicators over the full history of a time period
+
+        Args:
+            time_period: 'D', 'W' or 'M'
+            indicators: indicator specs such as 'sma:20' or 'macd:12,26,9'
+
+        Returns:
+            pd.DataFrame: indicator columns aligned with the history rows
         """
-        self.monthly_data.sort_values(by='date', inplace=True)
-        self.weekly_data.sort_values(by='date', inplace=True)
-        self.daily_data.sort_values(by='date', inplace=True)
+        history = self._history.get(time_period, self._history['D'])
+        frame = history.rename(columns={'stock_price': 'close'}).set_index('date')
+        return IndicatorEngine(indicators).compute(frame)
 
-    def plot_line(self, symbol: str, time_period: str = "D") -> None:
+    @instrumentation.traced('plot', 'symbol', 'time_period')
+    def plot_line(self, symbol: str, time_period: str = "D", indicators: Optional[Sequence[str]] = None) -> None:
         """
         Generates line plot for stock data
 
@@ -37,7 +153,13 @@ class ReportGenerator:
             symbol: Stock ticker symbol
             time_period: Interval of stock data. 'W' denotes weekly, 'M' denotes monthly
                 defaults to daily if not specified.
-        
+            indicators: Optional indicator specs to overlay, e.g. ['sma:20', 'rsi:14'].
+                ATR and VWAP need data cleaned with `keep_ohlcv=True`.
+
+        The plot is kept in `plots` under its label until the report is built.
+        With an artifact store, a raster plot whose inputs are unchanged is
+        read back instead of drawn.
+
         Returns:
             None
         """
@@ -48,142 +170,504 @@ class ReportGenerator:
             period = "Monthly"
             data = self.monthly_data
         else:
-            period = "Daily (Hrs)"
+            period = self.daily_label
             data = self.daily_data
+        instrumentation.add(rows=len(data))
+
+        title = f"{period} trend of '{symbol}' stock"
+        overlays, secondary = {}, {}
+        if indicators:
+            window = self._windows[time_period if time_period in ('W', 'M') else 'D']
+            values = self.indicator_values(time_period, indicators).iloc[window]
+            for column in values.columns:
+                target = overlays if column.startswith(PRICE_SCALE_INDICATORS) else secondary
+                target[column] = values[column].to_numpy()
+
+        anomalies = self.anomalies.get(time_period if time_period in ('W', 'M') else 'D')
+        marked = data[data['date'].isin(anomalies['date'])] if anomalies is not None else data.iloc[:0]
+        marks = (marked['date'], marked['stock_price'].to_numpy()) if not marked.empty else None
+
+        # Anomalies are marked before downsampling, so none of them is dropped.
+        dates, close = data['date'], data['stock_price'].to_numpy()
+        if len(data) > self.plot_points():
+            kept = downsample(dates.to_numpy(), close, self.plot_points(), self.downsampler)
+            dates, close = dates.iloc[kept], close[kept]
+            overlays = {label: values[kept] for label, values in overlays.items()}
+            secondary = {label: values[kept] for label, values in secondary.items()}
+
+        settings = 'vector' if self.vector_plots else (self.renderer.dpi, tuple(self.renderer.figure.get_size_inches()))
+        key = self.section_keys[period] = content_hash(RENDERER_VERSION, settings, title, dates, close,
+                                                       overlays, secondary, marks)
+        if self.vector_plots:
+            self.plots[period] = PlotRenderer.drawing(title, dates, close, overlays, secondary, marks)
+            return
+
+        cached = self.artifacts.get(key) if self.artifacts is not None else None
+        if cached is not None:
+            instrumentation.add(cache_hits=1)
+            self.plots[period] = cached
+            return
+
+        self.renderer.draw(title, dates, close, overlays, secondary, marks)
+        buffer = io.BytesIO()
+        self.renderer.save(buffer)
+        self.plots[period] = buffer.getvalue()
+        if self.artifacts is not None:
+            self.artifacts.put(key, self.plots[period])
+
+    def report_key(self) -> str:
+        """
+        Hash of everything the PDF is built from: the overview fields shown,
+        the anomaly table and the plots, which must have been rendered.
 
+        The overview and anomaly section hashes are added to `section_keys`.
+        """
+        self.section_keys['overview'] = content_hash({field: self.company_info.get(field)
+                                                      for field in REPORT_OVERVIEW_FIELDS})
+        self.section_keys['anomalies'] = content_hash(self.anomaly_rows())
+        return content_hash(RENDERER_VERSION, self.daily_label, self.section_keys)
 
-        margin = 0.09  # margin in inches
-        a4_width = 8.27  # A4 width in inches
-        plot_width = a4_width - (2 * margin)  # width of the plot
-        plot_height = plot_width / 3  # maintain a 1:3 aspect ratio (height:width)
-
-        fig = plt.figure(figsize=(plot_width, plot_height))
-        plt.plot(data['date'], data['stock_price'], marker='o')
-        plt.title(f"{period} trend of '{symbol}' stock", loc='left', fontweight='bold', fontsize=10)
-        plt.ylabel("Stock Price (USD)")
-        plt.xticks(rotation=45)
-        plt.grid(True)
-        plt.tight_layout()
+    def anomaly_rows(self, limit: int = MAX_ANOMALY_ROWS) -> list:
+        """
+        Formats the most recent anomalies of every time period as table rows
 
-        self.save_plot(fig, f"{period}_plot.png")
+        Args:
+            limit: maximum number of anomalies listed
 
-    def save_plot(self, figure: plt.Figure, filename="plot.png") -> None:
+        Returns:
+            list: header row followed by one row per anomaly
+        """
+        labels = {'D': self.daily_label, 'W': "Weekly", 'M': "Monthly"}
+        rows = []
+        for time_period, anomalies in self.anomalies.items():
+            for anomaly in anomalies.itertuples(index=False):
+                rows.append((anomaly.date, labels.get(time_period, time_period), anomaly.kind,
+                             self._format_anomaly_value(anomaly.kind, anomaly.value), f"{anomaly.score:.2f}"))
+        rows.sort(key=lambda row: row[0], reverse=True)
+
+        table = [["Date", "Timeframe", "Type", "Value", "Score"]]
+        for date, *cells in rows[:limit]:
+            table.append([pd.Timestamp(date).strftime('%Y-%m-%d %H:%M'), *cells])
+        return table
+
+    @staticmethod
+    def _format_anomaly_value(kind: str, value: float) -> str:
+        if kind == 'volume_spike':
+            return f"{value:,.0f}"
+        if kind == 'time_gap':
+            return f"{value / 3600:.1f} h"
+        return f"{value:+.2%}"
+
+    def save_plot(self, period: str, filename: Optional[str] = None) -> str:
         """
-        Saves plot as png file to the output directory
+        Saves a rendered plot as a png file to the output directory
 
         Args:
-            figure: figure object to be saved
-            filename: name of the plot
-        
-        Retuns:
-            None
+            period: label of the plot, e.g. 'Weekly'
+            filename: name of the file, defaults to '<period>_plot.png'
+
+        Returns:
+            str: path of the saved file
         """
-        output_dir = "output"
-        os.makedirs(output_dir, exist_ok=True)
-        output_path = os.path.join(output_dir, filename)
-        figure.savefig(output_path, dpi=300) # save with high dpi for better resolution
+        os.makedirs(self.output_dir, exist_ok=True)
+        output_path = os.path.join(self.output_dir, filename or f"{period}_plot.png")
+        with open(output_path, 'wb') as file:
+            file.write(self.plots[period])
+        return output_path
+
+    @instrumentation.traced('pdf')
+    def generate_pdf_report(self, output_path: Union[str, BinaryIO, None] = None) -> Optional[bytes]:
+        """
+        Compiles company information and the rendered plots into a PDF report
 
-    def generate_pdf_report(self, output_path="output/report.pdf"):
-        data = self.company_info
+        The report is assembled from the in-memory plots; nothing but the PDF
+        itself is written, and only when a path is given.
 
-        width, height = A4
+        Args:
+            output_path: path or binary file object the PDF is written to; when
+                None, the PDF is returned as bytes instead
 
-        # Define left and right margins
-        left_margin = 1 * inch
-        right_margin = 1 * inch
+        Returns:
+            Optional[bytes]: the PDF when no output was given, otherwise None
+        """
+        buffer = io.BytesIO() if output_path is None else None
+        doc = SimpleDocTemplate(buffer or output_path, pagesize=A4, leftMargin=1 * inch, rightMargin=1 * inch)
+        doc.build(self.build_story())
+        if buffer is not None:
+            instrumentation.add(bytes=buffer.getbuffer().nbytes)
+            return buffer.getvalue()
+        if isinstance(output_path, str):
+            instrumentation.add(bytes=os.path.getsize(output_path))
+        return None
+
+    def build_story(self) -> list:
+        """
+        Builds the flowables of the report
 
-        doc = SimpleDocTemplate(output_path, pagesize=A4, leftMargin=left_margin, rightMargin=right_margin)
-        story = []
+        Returns:
+            list: reportlab flowables, in page order
+        """
+        return report_story(**self.section())
 
-        # Title style
-        title_style = styles.getSampleStyleSheet()['Title']
+    def section(self) -> Dict[str, Any]:
+        """
+        Everything the report's story is built from: the overview fields
+        shown, the rendered plots and the anomaly rows. Unlike the generator
+        itself, the section can be sent between processes; vector plots are
+        flattened to plain shapes for that.
+        """
+        return {
+            'company_info': {field: self.company_info.get(field) for field in REPORT_OVERVIEW_FIELDS},
+            'plots': {label: flatten(plot) if isinstance(plot, Drawing) else plot
+                      for label, plot in self.plots.items()},
+            'daily_label': self.daily_label,
+            'anomaly_rows': self.anomaly_rows(),
+        }
 
-        # Add Title
-        title = Paragraph(f"Stock Analysis Report for {data['Name']}", title_style)
-        story.append(title)
-        story.append(Spacer(1, 12))  # Add a little space
 
-        # Company Overview Heading
-        heading_style = styles.getSampleStyleSheet()['Heading2']
-        overview_title = Paragraph("Company Overview", heading_style)
-        story.append(overview_title)
-        story.append(Spacer(1, 12))
+def report_story(company_info: Dict[str, Any], plots: Dict[str, Union[bytes, Drawing]], daily_label: str,
+                 anomaly_rows: list, credits: bool = True) -> list:
+    """
+    Builds the flowables of a symbol's report.
 
-        # Company Overview Style - Increase font size here
-        overview_style = styles.getSampleStyleSheet()['Normal']
-        overview_style.fontSize = 12  # Increase font size as needed
-        overview_style.leading = 14  # Adjust leading (space between lines) to match font size
+    Args:
+        company_info, plots, daily_label, anomaly_rows: a report section, see
+            `ReportGenerator.section`
+        credits: end with the credits line
 
-        # Company Overview Paragraph - Adjust width if necessary
-        overview_text = data['Description']
-        overview_paragraph = Paragraph(overview_text, overview_style)
-        story.append(overview_paragraph)
+    Returns:
+        list: reportlab flowables, in page order
+    """
+    data = company_info
+    story = []
+
+    # Add Title
+    story.append(Paragraph(f"Stock Analysis Report for {data['Name']}", STYLES['Title']))
+    story.append(Spacer(1, 12))  # Add a little space
+
+    # Company Overview
+    story.append(Paragraph("Company Overview", STYLES['Heading2']))
+    story.append(Spacer(1, 12))
+    story.append(Paragraph(data['Description'], OVERVIEW_STYLE))
+    story.append(Spacer(1, 12))
+
+    # Metrics
+    story.append(Paragraph("Metrics", STYLES['Heading2']))
+    story.append(Spacer(1, 12))
+
+    # Prepare data for the table
+    metrics_data = [
+        ["MarketCap", data['MarketCapitalization'], "EPS", data['EPS'], "P/E Ratio", data['PERatio']],
+        ["Revenue", data['RevenueTTM'], "Gross Profit", data['GrossProfitTTM'], "Operating Margin", data['OperatingMarginTTM']],
+        ["Return on Equity", data['ReturnOnEquityTTM'], "Rev. per Share", data['RevenuePerShareTTM'], "Profit Margin", data['ProfitMargin']],
+        ["Book Value", data['BookValue'], "Dividend Yield", data['DividendYield']]
+    ]
+    metrics_table = Table(metrics_data, colWidths=[1.25*inch]*3)
+    metrics_table.setStyle(METRICS_TABLE_STYLE)
+    story.append(metrics_table)
+    story.append(Spacer(1, 12))
+
+    # Plots, in the order they appear in the report
+    for period in (daily_label, "Weekly", "Monthly"):
+        plot = plots.get(period)
+        if isinstance(plot, bytes):
+            story.append(Image(io.BytesIO(plot), 8*inch, 3*inch))
+        elif plot is not None:
+            story.append(plot)
+    story.append(Spacer(1, 12))
+
+    if len(anomaly_rows) > 1:
+        story.append(Paragraph("Anomalies", STYLES['Heading2']))
         story.append(Spacer(1, 12))
-
-        # Metrics
-        metrics_title = Paragraph("Metrics", heading_style)
-        story.append(metrics_title)
+        anomaly_table = Table(anomaly_rows, repeatRows=1)
+        anomaly_table.setStyle(ANOMALY_TABLE_STYLE)
+        story.append(anomaly_table)
         story.append(Spacer(1, 12))
 
-        # Prepare data for the table
-        metrics_data = [
-            ["MarketCap", data['MarketCapitalization'], "EPS", data['EPS'], "P/E Ratio", data['PERatio']],
-            ["Revenue", data['RevenueTTM'], "Gross Profit", data['GrossProfitTTM'], "Operating Margin", data['OperatingMarginTTM']],
-            ["Return on Equity", data['ReturnOnEquityTTM'], "Rev. per Share", data['RevenuePerShareTTM'], "Profit Margin", data['ProfitMargin']],
-            ["Book Value", data['BookValue'], "Dividend Yield", data['DividendYield']]
-        ]
-
-        # Create the table with the data
-        metrics_table = Table(metrics_data, colWidths=[1.25*inch]*3)
-
-        # Add style to the table
-        table_style = TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.beige),
-            ('TEXTCOLOR',(0,0),(-1,0),colors.black),
-            ('ALIGN',(0,0),(-1,-1),'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND',(0,1),(-1,-1),colors.beige),
-            ('GRID', (0,0), (-1,-1), 1, colors.black),
-        ])
-        metrics_table.setStyle(table_style)
-
-        # Add table to story
-        story.append(metrics_table)
+    # Add credits text with URL at the end
+    if credits:
+        story.append(Paragraph(REPORT_CREDITS, STYLES['Normal']))
+    return story
+
+
+def _percent(value: float) -> str:
+    return "-" if value is None or math.isnan(value) else f"{value:+.1%}"
 
+
+def _number(value: float) -> str:
+    return "-" if value is None or math.isnan(value) else f"{value:.2f}"
+
+
+def _correlation_colour(value: float):
+    if math.isnan(value):
+        return colors.lightgrey
+    target = colors.steelblue if value >= 0 else colors.salmon
+    return colors.linearlyInterpolatedColor(colors.white, target, 0, 1, abs(value))
+
+
+def portfolio_story(analysis: Dict[str, Any]) -> list:
+    """
+    Builds the flowables of the portfolio section
+
+    Args:
+        analysis: output of `cross_section.analyse_portfolio`
+
+    Returns:
+        list: reportlab flowables, in page order
+    """
+    summary = analysis['summary'].sort_values('relative_return', ascending=False, na_position='last')
+    story = [Paragraph("Portfolio Overview", STYLES['Heading2']), Spacer(1, 12)]
+    period = (f"from {analysis['start']:%Y-%m-%d} to {analysis['end']:%Y-%m-%d}, {analysis['bars']} bars"
+              if analysis['bars'] else "with no bars")
+    story.append(Paragraph(
+        f"{len(summary)} symbols {period}. Betas are measured against {analysis['benchmark']} "
+        f"over a rolling {analysis['window']}-bar window. Returns run from each symbol's first to its last "
+        f"observed price; coverage is the share of bars with an observed price.", OVERVIEW_STYLE))
+    story.append(Spacer(1, 12))
+
+    sectors = [["Sector", "Symbols", "Mean return", "Mean beta"]]
+    for sector, row in analysis['sectors'].iterrows():
+        sectors.append([sector, str(row['symbols']), _percent(row['mean_return']), _number(row['mean_beta'])])
+    story.append(Paragraph("Sectors", STYLES['Heading3']))
+    story.append(_table(sectors))
+    story.append(Spacer(1, 12))
+
+    symbols = [["Symbol", "Sector", "Return", "Sector return", "Relative", "Beta", "Mean beta", "Coverage"]]
+    for symbol, row in summary.iterrows():
+        symbols.append([symbol, row['sector'], _percent(row['total_return']), _percent(row['sector_return']),
+                        _percent(row['relative_return']), _number(row['beta']), _number(row['mean_beta']),
+                        f"{row['coverage']:.0%}"])
+    story.append(Paragraph("Sector-relative performance", STYLES['Heading3']))
+    story.append(_table(symbols))
+    story.append(Spacer(1, 12))
+
+    correlation = analysis['correlation']
+    if len(correlation) > 1:
+        shown = summary.sort_values('coverage', ascending=False, kind='stable').index[:MAX_CORRELATION_SYMBOLS]
+        shown = [symbol for symbol in correlation.index if symbol in set(shown)]
+        values = correlation.loc[shown, shown].to_numpy()
+        grid = [[""] + shown] + [[symbol] + [_number(value) for value in row] for symbol, row in zip(shown, values)]
+        grid_table = _table(grid)
+        grid_table.setStyle(TableStyle([('BACKGROUND', (column + 1, row + 1), (column + 1, row + 1),
+                                         _correlation_colour(values[row, column]))
+                                        for row in range(len(shown)) for column in range(len(shown))]))
+        story.append(Paragraph("Return correlations", STYLES['Heading3']))
+        story.append(grid_table)
         story.append(Spacer(1, 12))
 
-        # Plots
-        # You can convert other metrics to Paragraphs as well and append to story
-
-        # Add plots
-        # Check if the image file exists before adding
-        daily_plot_path = "output/Daily (Hrs)_plot.png"
-        weekly_plot_path = "output/Weekly_plot.png"
-        monthly_plot_path = "output/Monthly_plot.png"
-        
-        if os.path.exists(daily_plot_path):
-            img = Image(daily_plot_path, 8*inch, 3*inch)  # Example size
-            story.append(img)
-        
-        if os.path.exists(weekly_plot_path):
-            img = Image(weekly_plot_path, 8*inch, 3*inch)
-            story.append(img)
-
-        if os.path.exists(monthly_plot_path):
-            img = Image(monthly_plot_path, 8*inch, 3*inch)
-            story.append(img)
-        
+        pairs = [["Symbol", "Symbol", "Correlation"]]
+        pairs += [[pair.first, pair.second, _number(pair.correlation)] for pair in analysis['pairs'].itertuples()]
+        story.append(Paragraph("Most and least correlated pairs", STYLES['Heading3']))
+        story.append(_table(pairs))
         story.append(Spacer(1, 12))
-        
-        # Add credits text with URL at the end
-        normal_style = styles.getSampleStyleSheet()['Normal']
-        report_credits = "Report generated by Financial Market Analyzer (https://github.com/KenImade/financial-market-analyser) by Kenneth Imade"
-        credits_paragraph = Paragraph(report_credits, normal_style)
-        story.append(credits_paragraph)
-        
-        # Build the document with the story
-        doc.build(story)
-
-        # If you need to add elements with exact positioning using Canvas, do it after building the document.
-        # But be cautious, as it can overlap with existing content if not carefully positioned.
\ No newline at end of file
+    return story
+
+
+def _table(rows: list) -> Table:
+    table = Table(rows, repeatRows=1)
+    table.setStyle(PORTFOLIO_TABLE_STYLE)
+    return table
+
+
+@instrumentation.traced('pdf')
+def generate_portfolio_report(analysis: Dict[str, Any],
+                              output_path: Union[str, BinaryIO, None] = None) -> Optional[bytes]:
+    """
+    Builds a PDF holding the portfolio section
+
+    Args:
+        analysis: output of `cross_section.analyse_portfolio`
+        output_path: path or binary file object the PDF is written to; when
+            None, the PDF is returned as bytes instead
+
+    Returns:
+        Optional[bytes]: the PDF when no output was given, otherwise None
+    """
+    buffer = io.BytesIO() if output_path is None else None
+    doc = SimpleDocTemplate(buffer or output_path, pagesize=A4, leftMargin=1 * inch, rightMargin=1 * inch)
+    story = [Paragraph("Portfolio Analysis Report", STYLES['Title']), Spacer(1, 12)]
+    story += portfolio_story(analysis)
+    story.append(Paragraph(REPORT_CREDITS, STYLES['Normal']))
+    doc.build(story)
+    if buffer is not None:
+        instrumentation.add(bytes=buffer.getbuffer().nbytes)
+        return buffer.getvalue()
+    if isinstance(output_path, str):
+        instrumentation.add(bytes=os.path.getsize(output_path))
+    return None
+
+
+class _SectionStart(Flowable):
+    """
+    Invisible flowable at the top of a section: bookmarks its page and adds
+    it to the PDF outline.
+    """
+
+    def __init__(self, report: 'ConsolidatedReport', symbol: str, title: Optional[str] = None):
+        super().__init__()
+        self.report = report
+        self.symbol = symbol
+        self.title = title or symbol
+
+    def wrap(self, available_width, available_height):
+        return 0, 0
+
+    def draw(self):
+        key = _section_key(self.symbol)
+        self.canv.bookmarkPage(key)
+        self.canv.addOutlineEntry(self.title, key, level=0)
+        self.report.pages[self.symbol] = self.canv.getPageNumber()
+
+
+class _ContentsEntry(Flowable):
+    """
+    Line of the table of contents linking to a section. Its page number is
+    a form, defined by `_PageNumbers` once every page is known.
+    """
+
+    def __init__(self, symbol: str):
+        super().__init__()
+        self.symbol = symbol
+
+    def wrap(self, available_width, available_height):
+        self.width = available_width
+        return available_width, CONTENTS_ENTRY_HEIGHT
+
+    def draw(self):
+        self.canv.setFont(*CONTENTS_FONT)
+        self.canv.drawString(0, 4, self.symbol)
+        self.canv.setDash(1, 2)
+        self.canv.line(self.canv.stringWidth(self.symbol, *CONTENTS_FONT) + 6, 4, self.width - 36, 4)
+        self.canv.doForm(_page_form(self.symbol))
+        self.canv.linkRect("", _section_key(self.symbol), (0, 0, self.width, CONTENTS_ENTRY_HEIGHT), relative=1)
+
+
+class _PageNumbers(Flowable):
+    """
+    Invisible last flowable: defines the page number forms of the contents
+    and records the number of pages.
+    """
+
+    def __init__(self, report: 'ConsolidatedReport'):
+        super().__init__()
+        self.report = report
+
+    def wrap(self, available_width, available_height):
+        self.width = available_width
+        return 0, 0
+
+    def draw(self):
+        for symbol in self.report.symbols:
+            self.canv.beginForm(_page_form(symbol), 0, 0, self.width, CONTENTS_ENTRY_HEIGHT)
+            self.canv.setFont(*CONTENTS_FONT)
+            self.canv.drawRightString(self.width, 4, str(self.report.pages[symbol]))
+            self.canv.endForm()
+        self.canv.showOutline()
+        self.report.page_count = self.canv.getPageNumber()
+
+
+def _section_key(symbol: str) -> str:
+    return f"section-{symbol}"
+
+
+def _page_form(symbol: str) -> str:
+    return f"contents-page-{symbol}"
+
+
+def _page_footer(canvas, doc) -> None:
+    canvas.saveState()
+    canvas.setFont(*CONTENTS_FONT)
+    canvas.drawRightString(doc.pagesize[0] - doc.rightMargin, doc.bottomMargin / 2, str(canvas.getPageNumber()))
+    canvas.restoreState()
+
+
+class ConsolidatedReport:
+    """
+    One PDF holding the reports of many symbols, laid out section by section.
+
+    A title page with a table of contents of every symbol comes first; each
+    symbol's section then starts on a new page and has a bookmark in the PDF
+    outline. All sections are collected into one story before it is laid out,
+    so their plots are held in memory until the PDF is written. The contents'
+    page numbers are forms defined after the last page, so no second layout
+    pass is needed. Symbols without a section are listed on a last page, with
+    the reason given for them.
+    """
+
+    def __init__(self, output: Union[str, BinaryIO], symbols: Sequence[str], title: str = "Market Report"):
+        """
+        Args:
+            output: Path or binary file object the PDF is written to
+            symbols: Symbols of the sections, in the order they will be built
+            title: Title of the first page and of the document
+        """
+        self.output = output
+        self.symbols = list(dict.fromkeys(symbols))
+        self.title = title
+        # Page each section starts on, set as it is laid out.
+        self.pages: Dict[str, int] = {}
+        self.skipped: Dict[str, str] = {}
+        self.page_count = 0
+
+    def build(self, sections: Iterable[Tuple[str, Union[Dict[str, Any], str]]]) -> int:
+        """
+        Collects the sections, lays them out and writes the PDF. A path is
+        written through a temporary file, so if a section fails to build no
+        partial report is left behind.
+
+        Args:
+            sections: (symbol, section) pairs in the order of `symbols`, where
+                section is a `ReportGenerator.section`, or the reason the
+                symbol has none
+
+        Returns:
+            int: Number of pages
+        """
+        if not isinstance(self.output, str):
+            self._build(self.output, sections)
+            return self.page_count
+
+        directory = os.path.dirname(self.output) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                self._build(file, sections)
+            os.replace(tmp_path, self.output)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return self.page_count
+
+    def _build(self, output: BinaryIO, sections) -> None:
+        doc = BaseDocTemplate(output, pagesize=A4, leftMargin=1 * inch, rightMargin=1 * inch, title=self.title)
+        frame = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height)
+        doc.addPageTemplates([PageTemplate('page', [frame], onPage=_page_footer)])
+        story = self._story(sections)
+        with instrumentation.stage('pdf'):
+            doc.build(story)
+
+    def _story(self, sections) -> list:
+        """
+        Flowables of the report: the title page, the sections, the missing
+        symbols and the page numbers.
+        """
+        story = ([Paragraph(self.title, STYLES['Title']), Spacer(1, 12), Paragraph(REPORT_CREDITS, STYLES['Normal']),
+                  Spacer(1, 12), Paragraph("Contents", STYLES['Heading2'])]
+                 + [_ContentsEntry(symbol) for symbol in self.symbols])
+
+        built = []
+        for symbol, section in sections:
+            if isinstance(section, str):
+                self.skipped[symbol] = section
+                continue
+            with instrumentation.stage('pdf', symbol=symbol):
+                story += [PageBreak(), _SectionStart(self, symbol)] + report_story(**section, credits=False)
+            built.append(symbol)
+
+        missing = [symbol for symbol in self.symbols if symbol not in built]
+        if missing:
+            rows = [["Symbol", "Reason"]] + [[symbol, self.skipped.get(symbol, "not built")] for symbol in missing]
+            story += ([PageBreak(), Paragraph("Symbols without a report", STYLES['Heading2'])]
+                      + [_SectionStart(self, symbol, f"{symbol} (missing)") for symbol in missing]
+                      + [Spacer(1, 12), _table(rows)])
+        return story + [_PageNumbers(self)]
@@ -0,0 +1,81 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from typing import Sequence, Union
+
+from src.api.parser import OHLCV_COLUMNS
+
+# Calendar aliases and the pandas period each one buckets by. Weeks end on
+# Friday to match the bars Alpha Vantage returns.
+CALENDARS = {
+    'W': 'W-FRI',
+    'M': 'M',
+    'Q': 'Q-DEC',
+    'Y': 'A-DEC',
+}
+
+
+def bucket_keys(index: pd.DatetimeIndex, rule: Union[str, Sequence]) -> np.ndarray:
+    """
+    Assigns every timestamp to a calendar bucket.
+
+    Args:
+        index (pd.DatetimeIndex): Ascending timestamps of the bars.
+        rule: One of the `CALENDARS` aliases, any pandas period alias optionally
+            with a multiple (e.g. 'W-MON', '2W', '6M'), or an ascending sequence
+            of bucket boundaries; a bar belongs to the first bucket whose
+            boundary is at or after it.
+
+    Returns:
+        np.ndarray: Integer bucket key of every bar, non-decreasing.
+    """
+    if not isinstance(rule, str):
+        boundaries = pd.DatetimeIndex(rule).asi8
+        return np.searchsorted(boundaries, index.asi8, side='left')
+
+    match = re.fullmatch(r'(\d*)(.+)', rule)
+    multiple = int(match.group(1) or 1)
+    period = CALENDARS.get(match.group(2), match.group(2))
+    return index.to_period(period).asi8 // multiple
+
+
+def resample_ohlcv(frame: pd.DataFrame, rule: Union[str, Sequence] = 'W') -> pd.DataFrame:
+    """
+    Aggregates OHLCV bars into a coarser calendar.
+
+    Each bucket takes the first open, highest high, lowest low, last close and
+    total volume of its bars. Bucket boundaries are found in a single pass and
+    the aggregations run as `ufunc.reduceat` calls over the whole arrays.
+
+    Args:
+        frame (pd.DataFrame): OHLCV frame indexed by ascending timestamp, as
+            returned by `parse_time_series`.
+        rule: Calendar to aggregate to, see `bucket_keys`.
+
+    Returns:
+        pd.DataFrame: Aggregated OHLCV frame. Each bar is labelled with the
+            timestamp of the last bar in its bucket, like Alpha Vantage's
+            weekly and monthly series.
+    """
+    if frame.empty:
+        return frame.copy()
+
+    index = pd.DatetimeIndex(frame.index)
+    if not index.is_monotonic_increasing:
+        frame = frame.sort_index()
+        index = pd.DatetimeIndex(frame.index)
+
+    keys = bucket_keys(index, rule)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+
+    columns = {
+        'open': frame['open'].to_numpy()[starts],
+        'high': np.maximum.reduceat(frame['high'].to_numpy(), starts),
+        'low': np.minimum.reduceat(frame['low'].to_numpy(), starts),
+        'close': frame['close'].to_numpy()[ends],
+        'volume': np.add.reduceat(frame['volume'].to_numpy(), starts),
+    }
+    return pd.DataFrame({column: columns[column] for column in OHLCV_COLUMNS}, index=index[ends])
@@ -0,0 +1,351 @@
+import datetime
+import os
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from src.core.fundamentals import FundamentalsStore
+from src.core.history_store import HistoryStore
+from src.core.indicators import IndicatorEngine
+from src.core.pipeline import HISTORY_INTERVALS, build_report, fetch_symbol
+from src.utils import instrumentation
+
+# Regular trading session of the US exchanges, in exchange time. Holidays are
+# not modelled; polls on a holiday find no new bars and cost nothing else.
+MARKET_TIMEZONE = 'America/New_York'
+MARKET_OPEN = datetime.time(9, 30)
+MARKET_CLOSE = datetime.time(16, 0)
+
+# Shortest time between two polling rounds while the market is open.
+MIN_POLL_INTERVAL = 60.0
+
+# Longest sleep while the market is closed, so the schedule is rechecked at
+# least this often, in seconds.
+MAX_IDLE = 3600.0
+
+INTRADAY = 'TIME_SERIES_INTRADAY'
+
+
+class MarketHours:
+    """
+    Weekday trading sessions between an opening and a closing time in the
+    exchange's time zone. Timestamps passed in may be in any time zone.
+    """
+
+    def __init__(self, timezone: str = MARKET_TIMEZONE, open: datetime.time = MARKET_OPEN,
+                 close: datetime.time = MARKET_CLOSE):
+        self.timezone = timezone
+        self.open = open
+        self.close = close
+
+    def is_open(self, now: pd.Timestamp) -> bool:
+        local = self._local(now)
+        return local.weekday() < 5 and self.open <= local.time() < self.close
+
+    def last_open(self, now: pd.Timestamp) -> pd.Timestamp:
+        """
+        Opening time of the current session, or of the last one if closed.
+        """
+        local = self._local(now)
+        day = local.date()
+        while day.weekday() >= 5 or self._at(day, self.open) > local:
+            day -= datetime.timedelta(days=1)
+        return self._at(day, self.open)
+
+    def last_close(self, now: pd.Timestamp) -> pd.Timestamp:
+        """
+        Closing time of the last session that has ended.
+        """
+        local = self._local(now)
+        day = local.date()
+        while day.weekday() >= 5 or self._at(day, self.close) > local:
+            day -= datetime.timedelta(days=1)
+        return self._at(day, self.close)
+
+    def next_open(self, now: pd.Timestamp) -> pd.Timestamp:
+        """
+        Opening time of the next session that has not started yet.
+        """
+        local = self._local(now)
+        day = local.date()
+        while day.weekday() >= 5 or self._at(day, self.open) <= local:
+            day += datetime.timedelta(days=1)
+        return self._at(day, self.open)
+
+    def next_close(self, now: pd.Timestamp) -> pd.Timestamp:
+        """
+        Closing time of the current session, or of the next one if closed.
+        """
+        local = self._local(now)
+        day = local.date()
+        while day.weekday() >= 5 or self._at(day, self.close) <= local:
+            day += datetime.timedelta(days=1)
+        return self._at(day, self.close)
+
+    def _local(self, now: pd.Timestamp) -> pd.Timestamp:
+        now = pd.Timestamp(now)
+        return (now.tz_localize('UTC') if now.tzinfo is None else now).tz_convert(self.timezone)
+
+    def _at(self, day: datetime.date, at: datetime.time) -> pd.Timestamp:
+        return pd.Timestamp.combine(day, at).tz_localize(self.timezone)
+
+
+def poll_interval(symbols: int, until_close: float, calls_per_minute: float,
+                  calls_left: Optional[float] = None, min_interval: float = MIN_POLL_INTERVAL) -> float:
+    """
+    Seconds between polling rounds while the market is open.
+
+    Each round costs one call per symbol. Rounds are spaced so they fit the
+    per-minute rate, and so the calls left in the daily budget last until
+    the close instead of running out mid-session.
+
+    Args:
+        symbols: Symbols polled each round
+        until_close: Seconds until the session closes
+        calls_per_minute: Calls allowed per minute
+        calls_left: Calls the daily budget allows until the close, None if
+            there is no daily limit
+        min_interval: Shortest interval returned
+
+    Returns:
+        float: Seconds to wait before the next round
+    """
+    interval = max(min_interval, symbols * 60.0 / calls_per_minute)
+    if calls_left is not None:
+        rounds = int(calls_left // max(symbols, 1))
+        interval = max(interval, until_close / rounds if rounds else until_close)
+    return interval
+
+
+def new_bars(series: pd.DataFrame, frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Bars of `frame` newer than the last bar of `series`, led by that last bar
+    when `frame` has it with different values, as while it is still forming.
+    """
+    if series.empty:
+        return frame
+    last = series.index[-1]
+    bars = frame[frame.index >= last]
+    if len(bars) and bars.index[0] == last and np.array_equal(
+            bars[series.columns].iloc[0].to_numpy(dtype=np.float64),
+            series.iloc[-1].to_numpy(dtype=np.float64), equal_nan=True):
+        bars = bars.iloc[1:]
+    return bars
+
+
+class Watcher:
+    """
+    Keeps the reports of a few symbols up to date in one long-lived process.
+
+    Every symbol is fetched in full once per session. While the market is
+    open, and once more after it closes, only the latest intraday bars are
+    polled, and just the bars newer than the last one seen are appended to
+    the in-memory series and fed through the indicators' bar-by-bar updates.
+    The last bar seen is replaced, and its indicator step redone, when a poll
+    returns it with different values, as the latest bar changes until its
+    interval ends. The in-memory series keeps as many bars as the full fetch
+    returned, so it does not grow while the process stays alive.
+    Reports are rebuilt only for symbols that received new bars, and then
+    incrementally, so the weekly and monthly plots are reused as long as
+    their inputs are unchanged. While the market is closed the watcher idles.
+    """
+
+    def __init__(self, api, symbols: Iterable[str], output_root: str = "output", poll_api=None,
+                 scheduler=None, calls_per_minute: float = 5, history: Optional[HistoryStore] = None,
+                 fundamentals: Optional[FundamentalsStore] = None, indicators: Optional[Sequence[str]] = None,
+                 render_options: Optional[Dict[str, Any]] = None, fetch_workers: int = 4,
+                 hours: Optional[MarketHours] = None, min_interval: float = MIN_POLL_INTERVAL,
+                 clock: Callable[[], pd.Timestamp] = lambda: pd.Timestamp.now(tz='UTC'),
+                 sleep: Callable[[float], None] = time.sleep, log: Callable[[str], None] = print):
+        """
+        Args:
+            api: AlphaVantageAPI the full datasets are fetched with
+            symbols: Stock ticker symbols to watch
+            output_root: Each symbol's report is kept in `output_root/<SYMBOL>`
+            poll_api: API the intraday polls go through, which should not
+                serve cached responses; defaults to `api`
+            scheduler: RequestScheduler whose daily budget paces the polls
+            calls_per_minute: Calls allowed per minute
+            history: Optional history store the new bars are merged into
+            fundamentals: Optional store the company overviews are kept in
+            indicators: Optional indicator specs overlaid on the plots, whose
+                latest values are logged with every update
+            render_options: Other keyword arguments of `build_report`
+            fetch_workers: Symbols polled concurrently
+            hours: Trading sessions, the US regular session by default
+            min_interval: Shortest time between polling rounds in seconds
+            clock: Returns the current time as a timestamp
+            sleep: Waits the given number of seconds
+            log: Receives a line for every update and error
+        """
+        self.api = api
+        self.poll_api = poll_api or api
+        self.symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+        self.output_root = output_root
+        self.scheduler = scheduler
+        self.calls_per_minute = calls_per_minute
+        self.history = history
+        self.fundamentals = fundamentals
+        self.indicators = list(indicators or [])
+        self.render_options = dict(render_options or {}, indicators=self.indicators or None)
+        self.fetch_workers = fetch_workers
+        self.hours = hours or MarketHours()
+        self.min_interval = min_interval
+        self.clock = clock
+        self.sleep = sleep
+        self.log = log
+
+        # Latest datasets, indicator engine and intraday bars kept of each symbol.
+        self.datasets: Dict[str, Dict[str, Any]] = {}
+        self.engines: Dict[str, IndicatorEngine] = {}
+        self.bars_kept: Dict[str, int] = {}
+        # Opening time of the session the datasets were fetched in, and time of
+        # the last polling round.
+        self.session: Optional[pd.Timestamp] = None
+        self.last_poll: Optional[pd.Timestamp] = None
+
+    def bootstrap(self) -> Dict[str, Union[int, str]]:
+        """
+        Fetches every symbol's datasets in full and builds its report.
+
+        Returns:
+            Dict[str, Union[int, str]]: Intraday bars of each symbol, or the error
+        """
+        self.session = self.hours.last_open(self.clock())
+        return self._each(self._bootstrap_symbol)
+
+    def poll(self) -> Dict[str, Union[int, str]]:
+        """
+        Polls the latest intraday bars of every symbol and applies the new ones.
+
+        Returns:
+            Dict[str, Union[int, str]]: New bars of each symbol, or the error
+        """
+        self.last_poll = self.clock()
+        # Symbols whose full fetch failed are fetched in full again instead.
+        polled = [symbol for symbol in self.symbols if symbol in self.datasets]
+        with ThreadPoolExecutor(max_workers=self.fetch_workers) as pool:
+            frames = dict(zip(polled, pool.map(self._poll_symbol, polled)))
+
+        def update(symbol: str) -> int:
+            if symbol not in frames:
+                return self._bootstrap_symbol(symbol)
+            if isinstance(frames[symbol], Exception):
+                raise frames[symbol]
+            return self._apply(symbol, frames[symbol])
+
+        return self._each(update)
+
+    def step(self) -> float:
+        """
+        Runs whatever the schedule calls for now: a full fetch at the start of
+        a session, a polling round while the market is open or if the last
+        session's final bars have not been polled yet, or nothing.
+
+        Returns:
+            float: Seconds until the next step is due
+        """
+        now = self.clock()
+        if self.session is None or (self.hours.is_open(now) and self.session < self.hours.last_open(now)):
+            self.bootstrap()
+            self.last_poll = now
+        elif self.hours.is_open(now) or self.last_poll is None or self.last_poll < self.hours.last_close(now):
+            self.poll()
+        return self.next_step(self.clock())
+
+    def next_step(self, now: pd.Timestamp) -> float:
+        """
+        Seconds until the next step: the polling interval while the market is
+        open, else until the next session opens, at most `MAX_IDLE`.
+        """
+        if self.hours.is_open(now):
+            until_close = (self.hours.next_close(now) - now).total_seconds()
+            calls_left = self.scheduler.remaining(until_close) if self.scheduler is not None else None
+            # The final round after the close needs a call per symbol too.
+            if calls_left is not None:
+                calls_left = max(0.0, calls_left - len(self.symbols))
+            interval = poll_interval(len(self.symbols), until_close, self.calls_per_minute, calls_left,
+                                     self.min_interval)
+            # Poll once more just after the close for the session's final bars.
+            return min(interval, until_close + 1.0)
+        if self.last_poll is not None and self.last_poll < self.hours.last_close(now):
+            return 0.0
+        return min(MAX_IDLE, (self.hours.next_open(now) - now).total_seconds())
+
+    def run(self, steps: Optional[int] = None) -> None:
+        """
+        Steps the watcher until interrupted, or `steps` times.
+        """
+        count = 0
+        while steps is None or count < steps:
+            wait = self.step()
+            count += 1
+            if steps is None or count < steps:
+                self.sleep(wait)
+
+    def _each(self, function: Callable[[str], int]) -> Dict[str, Union[int, str]]:
+        results = {}
+        for symbol in self.symbols:
+            try:
+                results[symbol] = function(symbol)
+            except Exception as err:
+                results[symbol] = f"error: {err}"
+                self.log(f"{symbol}: {err}")
+        return results
+
+    def _bootstrap_symbol(self, symbol: str) -> int:
+        with instrumentation.stage('fetch', symbol=symbol):
+            datasets = fetch_symbol(self.api, symbol, self.history, fundamentals=self.fundamentals)
+        intraday = datasets[INTRADAY]
+        self.datasets[symbol] = datasets
+        self.bars_kept[symbol] = len(intraday)
+        values = None
+        if self.indicators:
+            self.engines[symbol] = IndicatorEngine(self.indicators)
+            values = self.engines[symbol].compute(intraday)
+        self._refresh(symbol, intraday, values, "fetched")
+        return len(intraday)
+
+    def _poll_symbol(self, symbol: str) -> Union[pd.DataFrame, Exception]:
+        try:
+            with instrumentation.stage('poll', symbol=symbol):
+                return self.poll_api.get_daily_stock_data(symbol)
+        except Exception as err:
+            return err
+
+    def _apply(self, symbol: str, frame: pd.DataFrame) -> int:
+        datasets = self.datasets[symbol]
+        series = datasets[INTRADAY]
+        bars = new_bars(series, frame)
+        if bars.empty:
+            return 0
+        revised = not series.empty and bars.index[0] == series.index[-1]
+        if self.history is not None:
+            self.history.merge(symbol, HISTORY_INTERVALS[INTRADAY], bars)
+        series = pd.concat([series.iloc[:-1] if revised else series, bars])
+        datasets[INTRADAY] = series.iloc[-self.bars_kept[symbol]:] if self.bars_kept[symbol] else series
+        values = None
+        if symbol in self.engines:
+            engine = self.engines[symbol]
+            values = engine.revise(bars) if revised else engine.update(bars)
+
+        added = len(bars) - revised
+        what = [f"{added} new bar{'s' if added > 1 else ''}"] if added else []
+        self._refresh(symbol, bars, values, ", ".join(what + (["last bar revised"] if revised else [])))
+        return len(bars)
+
+    def _refresh(self, symbol: str, bars: pd.DataFrame, values: Optional[pd.DataFrame], what: str) -> None:
+        """
+        Rebuilds the report of a symbol and logs its latest bar and
+        indicator values.
+        """
+        build_report(symbol, self.datasets[symbol], os.path.join(self.output_root, symbol), **self.render_options)
+        if bars.empty:
+            return
+        latest = values.iloc[-1].dropna().to_dict() if values is not None and len(values) else {}
+        details = "".join(f", {name} {value:.2f}" for name, value in latest.items())
+        self.log(f"{bars.index[-1]:%Y-%m-%d %H:%M} {symbol}: {what}, close {bars['close'].iloc[-1]:.2f}{details}")
@@ -0,0 +1,244 @@
+import asyncio
+import time
+
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Sequence
+
+from aiohttp import web
+
+from src.api.exceptions import InvalidSymbolError, RateLimitError, TransportError
+from src.core.backends import DEFAULT_DPI
+from src.core.batch import process_pool
+from src.core.history_store import HistoryStore
+from src.core.indicators import parse_indicator_list
+from src.core.pipeline import TIMEFRAMES, clean_series, fetch_symbol, prepare_report
+
+
+class AsyncMemo:
+    """
+    Bounded, expiring memo of coroutine results.
+
+    Concurrent calls for a key that is being computed share the in-flight
+    computation instead of starting their own. Results are kept in LRU order
+    up to `max_entries`; failures are not memoized.
+    """
+
+    def __init__(self, max_entries: int = 128, ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_entries (int): Maximum number of results kept.
+            ttl (float): Seconds a result stays valid, None for no expiry.
+            clock (Callable[[], float]): Monotonic time source.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+
+    async def get(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Returns the memoized result of `key`, computing it with `factory` if needed.
+
+        Cancelling a caller does not cancel a computation other callers share.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and (entry[0] is None or entry[0] > self.clock()):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        task = self._pending.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(factory())
+            self._pending[key] = task
+            task.add_done_callback(lambda done: self._settle(key, done))
+        return await asyncio.shield(task)
+
+    def _settle(self, key: Hashable, task: asyncio.Future) -> None:
+        self._pending.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        expires = self.clock() + self.ttl if self.ttl is not None else None
+        self._entries[key] = (expires, task.result())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "in_flight": len(self._pending), "hits": self.hits,
+                "misses": self.misses, "coalesced": self.coalesced}
+
+
+def render_symbol(symbol: str, datasets: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Renders the PDF report and plots of a symbol; runs in a worker process.
+
+    Returns:
+        Dict[str, Any]: 'pdf' bytes and, for rasterised plots, 'plots' PNG bytes
+            keyed by time period
+    """
+    generator = prepare_report(symbol, datasets, **options)
+    labels = {'D': generator.daily_label, 'W': "Weekly", 'M': "Monthly"}
+    plots = {} if options.get('vector_plots') else \
+        {time_period: generator.plots[label] for time_period, label in labels.items()}
+    return {'pdf': generator.generate_pdf_report(), 'plots': plots}
+
+
+class ReportService:
+    """
+    Serves reports, cleaned series and plots over HTTP from a long-running process.
+
+    Fetches run on threads and rendering on a process pool, so the event loop
+    only routes requests. Fetched datasets and renders are memoized, and
+    concurrent requests for the same symbol share one fetch and one render.
+
+    Endpoints:
+        GET /reports/{symbol}.pdf                 PDF report
+        GET /series/{symbol}/{timeframe}.json     cleaned series as JSON records
+        GET /series/{symbol}/{timeframe}.csv      cleaned series as CSV
+        GET /plots/{symbol}/{timeframe}.png       plot image
+        GET /health                               memo statistics
+
+    `timeframe` is daily, weekly or monthly. Report and plot endpoints accept
+    `indicators` (e.g. sma:20,rsi:14) and `anomalies=1`; reports also accept
+    `vector=1`.
+    """
+
+    def __init__(self, api, history: Optional[HistoryStore] = None, derive_timeframes: bool = False,
+                 executor: Optional[Executor] = None, render_workers: Optional[int] = None,
+                 max_entries: int = 128, ttl: Optional[float] = 900.0, dpi: int = DEFAULT_DPI):
+        """
+        Args:
+            api: AlphaVantageAPI used to fetch the data
+            history (HistoryStore): Optional history store the fetched series are merged into.
+            derive_timeframes (bool): Derive weekly and monthly bars from the daily series.
+            executor (Executor): Pool the rendering runs on, defaults to a process pool.
+            render_workers (int): Size of the default process pool.
+            max_entries (int): Symbols, and renders, kept in memory.
+            ttl (float): Seconds fetched data and renders are reused for.
+            dpi (int): Resolution of the plot images.
+        """
+        self.api = api
+        self.history = history
+        self.derive_timeframes = derive_timeframes
+        self.executor = executor or process_pool(render_workers)
+        self.dpi = dpi
+        self.datasets_memo = AsyncMemo(max_entries, ttl)
+        self.renders_memo = AsyncMemo(max_entries, ttl)
+
+    async def datasets(self, symbol: str) -> Dict[str, Any]:
+        """
+        Fetched datasets of a symbol.
+        """
+        loop = asyncio.get_running_loop()
+        return await self.datasets_memo.get(symbol, lambda: loop.run_in_executor(
+            None, fetch_symbol, self.api, symbol, self.history, self.derive_timeframes))
+
+    async def render(self, symbol: str, indicators: Sequence[str] = (), anomalies: bool = False,
+                     vector_plots: bool = False) -> Dict[str, Any]:
+        """
+        Rendered report and plots of a symbol, see `render_symbol`.
+        """
+        options = dict(indicators=list(indicators) or None, anomalies=anomalies, dpi=self.dpi,
+                       vector_plots=vector_plots)
+
+        async def render():
+            datasets = await self.datasets(symbol)
+            return await asyncio.get_running_loop().run_in_executor(self.executor, render_symbol, symbol,
+                                                                    datasets, options)
+
+        return await self.renders_memo.get((symbol, tuple(indicators), anomalies, vector_plots), render)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+
+    def app(self) -> web.Application:
+        """
+        Builds the aiohttp application serving the endpoints.
+        """
+        app = web.Application(middlewares=[self._errors])
+        app.add_routes([
+            web.get('/health', self._health),
+            web.get('/reports/{symbol}.pdf', self._report),
+            web.get(r'/series/{symbol}/{timeframe}.{format:(json|csv)}', self._series),
+            web.get('/plots/{symbol}/{timeframe}.png', self._plot),
+        ])
+        return app
+
+    async def _health(self, request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok", "datasets": self.datasets_memo.stats(),
+                                  "renders": self.renders_memo.stats()})
+
+    async def _report(self, request: web.Request) -> web.Response:
+        symbol, options = self._symbol(request), self._options(request)
+        rendered = await self.render(symbol, **options, vector_plots=request.query.get('vector') == '1')
+        return web.Response(body=rendered['pdf'], content_type='application/pdf',
+                            headers={'Content-Disposition': f'inline; filename="{symbol}.pdf"'})
+
+    async def _series(self, request: web.Request) -> web.Response:
+        symbol, time_period = self._symbol(request), self._time_period(request)
+        datasets = await self.datasets(symbol)
+        data = await asyncio.get_running_loop().run_in_executor(None, clean_series, datasets, time_period)
+        if request.match_info['format'] == 'csv':
+            return web.Response(text=data.to_csv(index=False), content_type='text/csv')
+        return web.Response(text=data.to_json(orient='records', date_format='iso'), content_type='application/json')
+
+    async def _plot(self, request: web.Request) -> web.Response:
+        symbol, time_period = self._symbol(request), self._time_period(request)
+        rendered = await self.render(symbol, **self._options(request))
+        return web.Response(body=rendered['plots'][time_period], content_type='image/png')
+
+    @staticmethod
+    def _symbol(request: web.Request) -> str:
+        return request.match_info['symbol'].strip().upper()
+
+    @staticmethod
+    def _time_period(request: web.Request) -> str:
+        timeframe = request.match_info['timeframe'].lower()
+        if timeframe not in TIMEFRAMES:
+            raise web.HTTPNotFound(reason=f"Unknown timeframe '{timeframe}', expected one of: {', '.join(TIMEFRAMES)}")
+        return TIMEFRAMES[timeframe]
+
+    @staticmethod
+    def _options(request: web.Request) -> Dict[str, Any]:
+        try:
+            indicators = parse_indicator_list(request.query.get('indicators', ''))
+        except ValueError as err:
+            raise web.HTTPBadRequest(reason=str(err))
+        return {'indicators': indicators, 'anomalies': request.query.get('anomalies') == '1'}
+
+    @web.middleware
+    async def _errors(self, request: web.Request, handler) -> web.StreamResponse:
+        """
+        Maps fetch failures to HTTP errors with a JSON body.
+        """
+        try:
+            return await handler(request)
+        except web.HTTPException as err:
+            if err.status < 400:
+                raise
+            return web.json_response({"error": err.reason}, status=err.status)
+        except InvalidSymbolError as err:
+            return web.json_response({"error": str(err)}, status=404)
+        except RateLimitError as err:
+            return web.json_response({"error": str(err)}, status=429)
+        except (TransportError, ValueError) as err:
+            return web.json_response({"error": str(err)}, status=502)
+
+
+def run_server(service: ReportService, host: str = '127.0.0.1', port: int = 8080) -> None:
+    """
+    Serves `service` until interrupted.
+    """
+    try:
+        web.run_app(service.app(), host=host, port=port)
+    finally:
+        service.close()
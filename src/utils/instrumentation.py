@@ -0,0 +1,283 @@
+import cProfile
+import functools
+import inspect
+import json
+import os
+import pstats
+import threading
+import time
+
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Counters stages may report, in summary table order.
+COUNTERS = ('bytes', 'rows', 'cache_hits', 'retries')
+
+
+class Recorder:
+    """
+    Collects timed spans of the pipeline stages.
+
+    Each span records the wall and CPU time of one call of a stage, the thread
+    and process it ran on, its arguments and counters (bytes downloaded, rows
+    processed, cache hits, retries). With `profile` every stage also runs under
+    cProfile, and the profiles of each stage are merged.
+    """
+
+    def __init__(self, profile: bool = False):
+        """
+        Args:
+            profile (bool): Profile every stage with cProfile.
+        """
+        self.profile = profile
+        self.spans: List[Dict[str, Any]] = []
+        self.profiles: Dict[str, pstats.Stats] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def stage(self, name: str, **args) -> Iterator[Dict[str, Any]]:
+        """
+        Times the enclosed block as a call of stage `name`.
+
+        Yields:
+            Dict[str, Any]: Counters of the span; `add` increments them too.
+        """
+        counters = dict.fromkeys(COUNTERS, 0)
+        stack = self._local.__dict__.setdefault('stack', [])
+        profiler = cProfile.Profile() if self.profile and not stack else None
+        stack.append(counters)
+
+        if profiler is not None:
+            try:
+                profiler.enable()
+            except ValueError:
+                # Python 3.12+ allows one active profiler per process.
+                profiler = None
+        start_ns, wall, cpu = time.time_ns(), time.perf_counter(), time.thread_time()
+        error = None
+        try:
+            yield counters
+        except BaseException as err:
+            error = type(err).__name__
+            raise
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+            if profiler is not None:
+                profiler.disable()
+            stack.pop()
+            span = {'name': name, 'start_ns': start_ns, 'wall': wall, 'cpu': cpu, 'pid': os.getpid(),
+                    'tid': threading.get_native_id(), 'args': args, 'counters': counters}
+            if error is not None:
+                span['error'] = error
+            with self._lock:
+                self.spans.append(span)
+                if profiler is not None:
+                    self._add_profile(name, profiler)
+
+    def add(self, **counters: int) -> None:
+        """
+        Increments counters of the innermost stage running on this thread.
+        """
+        stack = getattr(self._local, 'stack', None)
+        if stack:
+            for name, value in counters.items():
+                stack[-1][name] = stack[-1].get(name, 0) + value
+
+    def _add_profile(self, name: str, profile) -> None:
+        if name in self.profiles:
+            self.profiles[name].add(profile)
+        else:
+            self.profiles[name] = pstats.Stats(profile)
+
+    def export(self) -> Dict[str, Any]:
+        """
+        Picklable copy of the spans and profiles, to `merge` into a recorder of
+        another process.
+        """
+        with self._lock:
+            return {'spans': list(self.spans),
+                    'profiles': {name: stats.stats for name, stats in self.profiles.items()}}
+
+    def merge(self, exported: Dict[str, Any]) -> None:
+        """
+        Adds the spans and profiles of an `export`.
+        """
+        with self._lock:
+            self.spans.extend(exported['spans'])
+            for name, stats in exported['profiles'].items():
+                self._add_profile(name, _ProfileSnapshot(stats))
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        Aggregates the spans by stage, in order of first appearance.
+
+        Returns:
+            List[Dict[str, Any]]: Per stage, the number of calls, summed wall and
+                CPU seconds, mean wall milliseconds and summed counters.
+        """
+        totals: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in sorted(spans, key=lambda span: span['start_ns']):
+            total = totals.setdefault(span['name'], dict(stage=span['name'], calls=0, errors=0, wall=0.0, cpu=0.0,
+                                                         **dict.fromkeys(COUNTERS, 0)))
+            total['calls'] += 1
+            total['errors'] += 'error' in span
+            total['wall'] += span['wall']
+            total['cpu'] += span['cpu']
+            for name in COUNTERS:
+                total[name] += span['counters'].get(name, 0)
+        for total in totals.values():
+            total['mean_ms'] = total['wall'] / total['calls'] * 1e3
+        return list(totals.values())
+
+    def format_summary(self) -> str:
+        """
+        Formats `summary` as a plain-text table.
+        """
+        lines = [f"{'Stage':<10}{'Calls':>7}{'Errors':>8}{'Wall (s)':>10}{'CPU (s)':>9}{'Mean (ms)':>11}"
+                 f"{'Bytes':>13}{'Rows':>10}{'Cache hits':>12}{'Retries':>9}"]
+        for total in self.summary():
+            lines.append(f"{total['stage']:<10}{total['calls']:>7}{total['errors']:>8}{total['wall']:>10.2f}"
+                         f"{total['cpu']:>9.2f}{total['mean_ms']:>11.1f}{total['bytes']:>13,}{total['rows']:>10,}"
+                         f"{total['cache_hits']:>12}{total['retries']:>9}")
+        return "\n".join(lines)
+
+    def write_trace(self, path: str) -> None:
+        """
+        Writes the spans as a Chrome trace (chrome://tracing, Perfetto), or as
+        JSON lines, one span per line, if `path` ends with .jsonl.
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span['start_ns'])
+        with open(path, 'w') as file:
+            if path.endswith('.jsonl'):
+                for span in spans:
+                    file.write(json.dumps(span, default=str) + "\n")
+                return
+            events = [{'name': span['name'], 'cat': 'pipeline', 'ph': 'X', 'ts': span['start_ns'] / 1e3,
+                       'dur': span['wall'] * 1e6, 'pid': span['pid'], 'tid': span['tid'],
+                       'args': dict(span['args'], cpu_ms=span['cpu'] * 1e3, **span['counters'],
+                                    **({'error': span['error']} if 'error' in span else {}))}
+                      for span in spans]
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file, default=str)
+
+    def dump_profiles(self, directory: str) -> List[str]:
+        """
+        Writes the merged profile of each stage to `directory/<stage>.prof`,
+        readable with pstats or snakeviz.
+
+        Returns:
+            List[str]: Paths of the written profiles.
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        with self._lock:
+            for name, stats in self.profiles.items():
+                paths.append(os.path.join(directory, f"{name}.prof"))
+                stats.dump_stats(paths[-1])
+        return paths
+
+
+class _ProfileSnapshot:
+    """
+    Exported profile statistics, in the form `pstats.Stats` loads.
+    """
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+_recorder: Optional[Recorder] = None
+
+
+def enable(profile: bool = False) -> Recorder:
+    """
+    Starts recording the instrumented stages of this process.
+    """
+    global _recorder
+    _recorder = Recorder(profile)
+    return _recorder
+
+
+def disable() -> Optional[Recorder]:
+    """
+    Stops recording and returns the recorder that was active.
+    """
+    global _recorder
+    recorder, _recorder = _recorder, None
+    return recorder
+
+
+def active() -> Optional[Recorder]:
+    return _recorder
+
+
+@contextmanager
+def stage(name: str, **args) -> Iterator[Optional[Dict[str, Any]]]:
+    """
+    Times the enclosed block if recording is enabled, see `Recorder.stage`.
+    """
+    recorder = _recorder
+    if recorder is None:
+        yield None
+        return
+    with recorder.stage(name, **args) as counters:
+        yield counters
+
+
+def add(**counters: int) -> None:
+    """
+    Increments counters of the current stage; a no-op when not recording.
+    """
+    recorder = _recorder
+    if recorder is not None:
+        recorder.add(**counters)
+
+
+def traced(name: str, *arg_names: str) -> Callable:
+    """
+    Decorator recording every call of a function as a span of stage `name`.
+
+    Args:
+        name (str): Stage name.
+        *arg_names (str): Arguments of the function recorded with the span.
+    """
+
+    def decorator(function: Callable) -> Callable:
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            recorder = _recorder
+            if recorder is None:
+                return function(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            with recorder.stage(name, **{arg: bound.arguments[arg] for arg in arg_names}):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def call_traced(profile: bool, function: Callable, *args, **kwargs):
+    """
+    Calls `function` under a fresh recorder, e.g. in a worker process whose
+    spans would otherwise be lost.
+
+    Returns:
+        Tuple[Any, Dict[str, Any]]: The result and the recorder's `export`.
+    """
+    global _recorder
+    previous, recorder = _recorder, Recorder(profile)
+    _recorder = recorder
+    try:
+        return function(*args, **kwargs), recorder.export()
+    finally:
+        _recorder = previous
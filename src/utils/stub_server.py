@@ -0,0 +1,150 @@
+import json
+import threading
+import time
+import zlib
+
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlsplit
+
+from src.utils.synthetic import make_intraday_csv, make_overview, make_payload
+
+
+class StubAlphaVantageServer:
+    """
+    Local stand-in for the Alpha Vantage query endpoint.
+
+    Serves synthetic payloads generated from the requested symbol, so responses
+    are deterministic, and records every request it receives. Failures such as
+    throttle notes or 5xx responses can be queued with `inject` to exercise
+    retry paths. Runs on a background thread; point a client at `url`.
+    """
+
+    def __init__(self, compact_bars: int = 100, full_bars: int = 1000, invalid_symbols=('BAD',),
+                 host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 payload_factory: Optional[Callable[[Dict[str, str]], Union[Dict[str, Any], bytes]]] = None):
+        """
+        Args:
+            compact_bars (int): Bars in a compact response.
+            full_bars (int): Bars in a full response.
+            payload_factory (Callable): Builds the payload of a query's parameters,
+                e.g. to replay recorded responses; synthetic data by default.
+                May return the JSON body already encoded.
+            invalid_symbols: Symbols answered with an "Error Message".
+            host (str): Interface to listen on.
+            port (int): Port to listen on, 0 for any free port.
+            latency (float): Seconds each response is delayed by.
+        """
+        self.compact_bars = compact_bars
+        self.full_bars = full_bars
+        self.invalid_symbols = set(invalid_symbols)
+        self.latency = latency
+        self.payload_factory = payload_factory or self.synthetic_payload
+        self.requests: List[Dict[str, str]] = []
+        self._failures = deque()
+        self._payloads: Dict[Tuple, bytes] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/query"
+
+    def start(self) -> 'StubAlphaVantageServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def inject(self, status: int = 200, payload: Optional[Dict[str, Any]] = None, count: int = 1) -> None:
+        """
+        Queues failures answered instead of the next `count` requests.
+
+        Args:
+            status (int): HTTP status of the failure, e.g. 503.
+            payload (Dict[str, Any]): JSON body, e.g. a throttle "Note".
+        """
+        with self._lock:
+            self._failures.extend([(status, json.dumps(payload or {}).encode())] * count)
+
+    def respond(self, params: Dict[str, str]) -> Tuple[int, bytes]:
+        """
+        Builds the response to a query.
+
+        Returns:
+            Tuple[int, bytes]: HTTP status and body, JSON or CSV.
+        """
+        with self._lock:
+            self.requests.append(params)
+            if self._failures:
+                return self._failures.popleft()
+
+        function, symbol = params.get('function', ''), params.get('symbol', '').upper()
+        if symbol in self.invalid_symbols or not symbol:
+            return 200, json.dumps({"Error Message": f"Invalid API call for {symbol}."}).encode()
+
+        key = (function, symbol, params.get('interval'), params.get('outputsize', 'compact'),
+               params.get('month'), params.get('datatype', 'json'))
+        body = self._payloads.get(key)
+        if body is None:
+            body = self.payload_factory(dict(params, symbol=symbol))
+            if not isinstance(body, bytes):
+                body = json.dumps(body).encode()
+            with self._lock:
+                self._payloads[key] = body
+        return 200, body
+
+    def synthetic_payload(self, params: Dict[str, str]) -> Union[Dict[str, Any], bytes]:
+        """
+        Random-walk payload seeded by the symbol, sized by the outputsize.
+
+        Intraday requests with `datatype=csv` get a month of bars as CSV, the
+        `month` requested or January 2024.
+        """
+        function, symbol = params.get('function', ''), params['symbol']
+        seed = zlib.crc32(symbol.encode())
+        if function == 'TIME_SERIES_INTRADAY' and params.get('datatype') == 'csv':
+            month = params.get('month', '2024-01')
+            return make_intraday_csv(month, params.get('interval', '1min'), seed=seed + zlib.crc32(month.encode()))
+        if function == 'OVERVIEW':
+            return make_overview(symbol, seed=seed)
+        if function.startswith('TIME_SERIES_'):
+            bars = self.full_bars if params.get('outputsize') == 'full' else self.compact_bars
+            return make_payload(function, symbol, bars, interval=params.get('interval'), seed=seed)
+        return {"Error Message": f"Unknown function {function}."}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if stub.latency:
+                    time.sleep(stub.latency)
+                status, body = stub.respond(dict(parse_qsl(urlsplit(self.path).query)))
+                self.send_response(status)
+                csv = not body.lstrip().startswith(b'{')
+                self.send_header('Content-Type', 'text/csv' if csv else 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,204 @@
+import numpy as np
+import pandas as pd
+
+from typing import Any, Dict, Optional
+
+from src.api.parser import series_key
+
+# pandas frequency of each Alpha Vantage function's bars.
+FUNCTION_FREQUENCIES = {
+    'TIME_SERIES_INTRADAY': 'H',
+    'TIME_SERIES_DAILY': 'B',
+    'TIME_SERIES_WEEKLY': 'W-FRI',
+    'TIME_SERIES_MONTHLY': 'M',
+}
+
+
+def make_time_series(n_bars: int, freq: str = 'B', end: str = '2024-01-31', seed: int = 0,
+                     start_price: float = 100.0, volatility: Optional[float] = None) -> Dict[str, Dict[str, str]]:
+    """
+    Generates a random-walk time series in the Alpha Vantage JSON layout.
+
+    Args:
+        n_bars (int): Number of bars to generate.
+        freq (str): pandas frequency of the bars.
+        end (str): Timestamp of the most recent bar.
+        seed (int): Seed of the random generator.
+        start_price (float): Price of the oldest bar.
+        volatility (float): Standard deviation of the per-bar log return, by
+            default scaled so the whole series drifts by about 20%.
+
+    Returns:
+        Dict[str, Dict[str, str]]: Timestamp -> field mapping, newest bar first.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end=end, periods=n_bars, freq=freq)
+    intraday = freq.endswith(('H', 'T', 'min'))
+    timestamps = dates.strftime('%Y-%m-%d %H:%M:%S' if intraday else '%Y-%m-%d')
+
+    if volatility is None:
+        volatility = min(0.02, 0.2 / np.sqrt(max(n_bars, 1)))
+
+    close = start_price * np.exp(np.cumsum(rng.normal(0, volatility, n_bars)))
+    open_ = np.concatenate(([start_price], close[:-1]))
+    spread = np.abs(rng.normal(0, volatility / 2, n_bars)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.integers(10_000, 10_000_000, n_bars)
+
+    series = {}
+    for i in range(n_bars - 1, -1, -1):
+        series[timestamps[i]] = {
+            '1. open': f"{open_[i]:.4f}",
+            '2. high': f"{high[i]:.4f}",
+            '3. low': f"{low[i]:.4f}",
+            '4. close': f"{close[i]:.4f}",
+            '5. volume': str(volume[i]),
+        }
+    return series
+
+
+def scale_time_series(series: Dict[str, Dict[str, str]], n_bars: int, freq: str = 'B') -> Dict[str, Dict[str, str]]:
+    """
+    Stretches a recorded series to `n_bars` by replaying its bar-to-bar moves.
+
+    Each generated bar repeats the open/high/low/close ratios to the previous
+    close and the volume of a recorded bar, cycling through the recording, so
+    the scaled series keeps the recording's volatility and volume profile.
+
+    Args:
+        series (Dict[str, Dict[str, str]]): Recorded series in the Alpha Vantage layout.
+        n_bars (int): Number of bars to generate.
+        freq (str): pandas frequency of the generated bars.
+
+    Returns:
+        Dict[str, Dict[str, str]]: Timestamp -> field mapping ending on the
+            last `freq` boundary up to the recording's last bar, at its close,
+            newest bar first.
+    """
+    dates = sorted(series)
+    fields = np.array([[float(series[date][field]) for field in ('1. open', '2. high', '3. low', '4. close')]
+                       for date in dates])
+    volumes = np.array([int(float(series[date]['5. volume'])) for date in dates])
+    previous = np.concatenate(([fields[0, 0]], fields[:-1, 3]))
+    ratios = fields / previous[:, None]
+
+    cycle = np.arange(n_bars) % len(dates)
+    close = fields[0, 0] * np.cumprod(ratios[cycle, 3])
+    bars = ratios[cycle] * np.concatenate(([fields[0, 0]], close[:-1]))[:, None]
+    bars[:, 3] = close
+    # Anchor the scaled series on the recording's latest close.
+    bars *= fields[-1, 3] / close[-1]
+
+    end = pd.Timestamp(dates[-1])
+    intraday = freq.endswith(('H', 'T', 'min')) or end != end.normalize()
+    timestamps = pd.date_range(end=end, periods=n_bars, freq=freq).strftime(
+        '%Y-%m-%d %H:%M:%S' if intraday else '%Y-%m-%d')
+    scaled = {}
+    for i in range(n_bars - 1, -1, -1):
+        scaled[timestamps[i]] = {
+            '1. open': f"{bars[i, 0]:.4f}",
+            '2. high': f"{bars[i, 1]:.4f}",
+            '3. low': f"{bars[i, 2]:.4f}",
+            '4. close': f"{bars[i, 3]:.4f}",
+            '5. volume': str(volumes[cycle[i]]),
+        }
+    return scaled
+
+
+def make_payload(function: str, symbol: str, n_bars: int, interval: Optional[str] = '60min', seed: int = 0,
+                 end: str = '2024-01-31') -> Dict[str, Any]:
+    """
+    Generates a complete Alpha Vantage time-series response.
+
+    Args:
+        function (str): Alpha Vantage function, e.g. 'TIME_SERIES_WEEKLY'.
+        symbol (str): Ticker symbol reported in the meta data.
+        n_bars (int): Number of bars in the series.
+        interval (str): Bar interval of intraday series.
+        seed (int): Seed of the random generator.
+        end (str): Timestamp of the most recent bar.
+
+    Returns:
+        Dict[str, Any]: Response with "Meta Data" and the time series.
+    """
+    freq = FUNCTION_FREQUENCIES[function]
+    if function == 'TIME_SERIES_INTRADAY' and interval:
+        freq = interval.replace('min', 'T')
+    return {
+        "Meta Data": {"1. Information": f"Synthetic {function}", "2. Symbol": symbol},
+        series_key(function, interval): make_time_series(n_bars, freq, end=end, seed=seed),
+    }
+
+
+def make_intraday_csv(month: str, interval: str = '1min', seed: int = 0, start_price: float = 100.0) -> bytes:
+    """
+    Generates an intraday CSV response covering one month of extended hours.
+
+    Bars run from 04:00 to 20:00 on every weekday of the month, as returned
+    by TIME_SERIES_INTRADAY with `month` and `datatype=csv`.
+
+    Args:
+        month (str): Month to cover, as 'YYYY-MM'.
+        interval (str): Bar interval, e.g. '1min' or '60min'.
+        seed (int): Seed of the random generator.
+        start_price (float): Open of the month's first bar.
+
+    Returns:
+        bytes: CSV body with a header row, newest bar first.
+    """
+    period = pd.Period(month, freq='M')
+    dates = pd.date_range(period.start_time, period.end_time, freq=interval.replace('min', 'T'))
+    dates = dates[(dates.dayofweek < 5) & (dates.hour >= 4) & (dates.hour < 20)]
+    n_bars = len(dates)
+
+    rng = np.random.default_rng(seed)
+    volatility = 0.2 / np.sqrt(max(n_bars, 1))
+    close = start_price * np.exp(np.cumsum(rng.normal(0, volatility, n_bars)))
+    open_ = np.concatenate(([start_price], close[:-1]))
+    spread = np.abs(rng.normal(0, volatility / 2, n_bars)) * close
+    frame = pd.DataFrame({
+        'timestamp': dates.strftime('%Y-%m-%d %H:%M:%S'),
+        'open': open_,
+        'high': np.maximum(open_, close) + spread,
+        'low': np.minimum(open_, close) - spread,
+        'close': close,
+        'volume': rng.integers(100, 100_000, n_bars),
+    })
+    return frame.iloc[::-1].to_csv(index=False, float_format='%.4f', lineterminator='\r\n').encode()
+
+
+def make_overview(symbol: str, sector: str = 'TECHNOLOGY', seed: int = 0) -> Dict[str, str]:
+    """
+    Generates a company overview response with the fields used by reports.
+
+    Args:
+        symbol (str): Ticker symbol.
+        sector (str): Sector reported for the company.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        Dict[str, str]: Overview with numbers formatted as strings, as returned by the API.
+    """
+    rng = np.random.default_rng(seed)
+    return {
+        'Symbol': symbol,
+        'AssetType': 'Common Stock',
+        'Name': f"{symbol} Corporation",
+        'Description': f"{symbol} Corporation is a synthetic company used for testing.",
+        'Exchange': 'NYSE',
+        'Currency': 'USD',
+        'Sector': sector,
+        'LatestQuarter': '2023-12-31',
+        'MarketCapitalization': str(int(rng.integers(10**9, 10**12))),
+        'EPS': f"{rng.uniform(0.5, 15):.2f}",
+        'PERatio': f"{rng.uniform(5, 40):.2f}",
+        'RevenueTTM': str(int(rng.integers(10**8, 10**11))),
+        'GrossProfitTTM': str(int(rng.integers(10**7, 10**10))),
+        'OperatingMarginTTM': f"{rng.uniform(0, 0.4):.3f}",
+        'ReturnOnEquityTTM': f"{rng.uniform(0, 0.4):.3f}",
+        'RevenuePerShareTTM': f"{rng.uniform(5, 100):.2f}",
+        'ProfitMargin': f"{rng.uniform(0, 0.3):.3f}",
+        'BookValue': f"{rng.uniform(5, 100):.2f}",
+        'DividendYield': f"{rng.uniform(0, 0.06):.4f}",
+    }
@@ -0,0 +1,99 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from src.api.parser import parse_time_series
+from src.core.anomaly import AnomalyDetector, detect_anomalies, trailing_mean_std
+from src.utils.synthetic import make_time_series
+
+
+class TestAnomalyDetector(unittest.TestCase):
+
+    def setUp(self):
+        self.frame = parse_time_series(make_time_series(400, 'B'))
+        # Plant a 15% jump, a volume spike and an overnight gap.
+        self.frame.iloc[200:, self.frame.columns.get_indexer(['open', 'high', 'low', 'close'])] *= 1.15
+        self.frame.iloc[300, self.frame.columns.get_loc('volume')] *= 20
+        self.frame.iloc[350, self.frame.columns.get_loc('open')] *= 1.05
+
+    def test_trailing_mean_std_matches_pandas(self):
+        values = self.frame['close'].to_numpy()
+        mean, std = trailing_mean_std(values, 20)
+        shifted = self.frame['close'].shift(1).rolling(20)
+        np.testing.assert_allclose(mean, shifted.mean().to_numpy(), rtol=1e-9)
+        np.testing.assert_allclose(std, shifted.std(ddof=0).to_numpy(), rtol=1e-6)
+
+    def test_detect_planted_anomalies(self):
+        anomalies = AnomalyDetector().detect(self.frame)
+        found = set(zip(anomalies['kind'], anomalies['date']))
+
+        self.assertIn(('return_zscore', self.frame.index[200]), found)
+        self.assertIn(('price_gap', self.frame.index[200]), found)
+        self.assertIn(('volume_spike', self.frame.index[300]), found)
+        self.assertIn(('price_gap', self.frame.index[350]), found)
+        self.assertTrue(anomalies['date'].is_monotonic_increasing)
+
+    def test_time_gaps(self):
+        frame = self.frame.drop(self.frame.index[100:110])
+        anomalies = AnomalyDetector(max_gap=pd.Timedelta(days=4)).detect(frame)
+        gaps = anomalies[anomalies['kind'] == 'time_gap']
+        self.assertListEqual(list(gaps['date']), [self.frame.index[110]])
+
+    def test_streaming_matches_batch(self):
+        expected = AnomalyDetector(max_gap='4D').detect(self.frame)
+        detector = AnomalyDetector(max_gap='4D')
+        detector.detect(self.frame.iloc[:150])
+        streamed = detector.update(self.frame)
+
+        expected = expected[expected['date'] > self.frame.index[149]]
+        key = ['date', 'kind']
+        expected = expected.sort_values(key, ignore_index=True)
+        streamed = streamed.sort_values(key, ignore_index=True)
+        pd.testing.assert_frame_equal(streamed[key], expected[key])
+        np.testing.assert_allclose(streamed['score'].astype(float), expected['score'], rtol=1e-6)
+
+    def test_flat_series_streaming_matches_batch(self):
+        index = pd.date_range('2024-01-01', periods=40, freq='D')
+        frame = pd.DataFrame({'open': 100.0, 'close': 100.0, 'volume': 0.0}, index=index)
+        frame.iloc[30, frame.columns.get_indexer(['close', 'volume'])] = [110.0, 1000.0]
+        frame.iloc[31:, frame.columns.get_loc('open')] = 110.0
+        frame.iloc[31:, frame.columns.get_loc('close')] = 110.0
+
+        batch = AnomalyDetector().detect(frame)
+        detector = AnomalyDetector()
+        detector.detect(frame.iloc[:25])
+        streamed = detector.update(frame)
+        # A flat window has no spread or volume to score the jump against.
+        self.assertListEqual(list(batch['kind']), [])
+        pd.testing.assert_frame_equal(streamed, batch[batch['date'] > index[24]].reset_index(drop=True),
+                                      check_dtype=False)
+
+    def test_flat_window_after_volatile_history(self):
+        close = self.frame['close'].to_numpy()
+        close = np.concatenate((close, np.full(25, close[-1]), [close[-1] * 1.0001]))
+        frame = pd.DataFrame({'close': close}, index=pd.date_range('2020-01-01', periods=len(close), freq='B'))
+
+        _, std = trailing_mean_std(np.diff(close) / close[:-1], 20)
+        self.assertEqual(std[-1], 0.0)
+
+        batch = AnomalyDetector().detect(frame)
+        detector = AnomalyDetector()
+        detector.detect(frame.iloc[:150])
+        streamed = detector.update(frame)
+        self.assertNotIn(frame.index[-1], set(batch['date']))
+        batch = batch[batch['date'] > frame.index[149]]
+        self.assertListEqual(list(zip(streamed['date'], streamed['kind'])), list(zip(batch['date'], batch['kind'])))
+
+    def test_close_only_series(self):
+        anomalies = AnomalyDetector().detect(self.frame[['close']])
+        self.assertSetEqual(set(anomalies['kind']), {'return_zscore'})
+        self.assertTrue(AnomalyDetector().detect(self.frame.iloc[:0]).empty)
+
+    def test_pipeline_stage(self):
+        cleaned = pd.DataFrame({'date': self.frame.index, 'stock_price': self.frame['close'].to_numpy()})
+        anomalies = detect_anomalies({'D': cleaned})
+        self.assertIn(self.frame.index[200], set(anomalies['D']['date']))
+
+
+if __name__ == '__main__':
+    unittest.main()
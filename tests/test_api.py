@@ -3,20 +3,22 @@ import unittest
 import json
 import pandas as pd
 from unittest.mock import patch
-from requests.exceptions import RequestException
+from requests import Response
+from requests.exceptions import ConnectionError, RequestException, Timeout
 from pathlib import Path
 
 root_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(root_dir))
 
 from src.api.alpha_vantage import AlphaVantageAPI
+from src.api.exceptions import InvalidSymbolError, TransportError
 
 class TestAlphaVantageAPI(unittest.TestCase):
 
     def setUp(self):
         self.api = AlphaVantageAPI(api_key='T8NPRZVP5SXGO4XS')
     
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_fetch_data(self, mock_get):
         mock_response = mock_get.return_value
         mock_response.status_code = 200
@@ -24,6 +26,24 @@ class TestAlphaVantageAPI(unittest.TestCase):
 
         response = self.api.fetch_data('TIME_SERIES_DAILY', 'IBM')
         self.assertEqual(response, {"sample_key": "sample_value"})
+        self.assertEqual(mock_get.call_args.kwargs['timeout'], self.api.timeout)
+
+    def test_fetch_many(self):
+        payloads = {
+            'TIME_SERIES_WEEKLY': {'Weekly Time Series': {'2024-01-26': {
+                '1. open': '400.02', '2. high': '407.01', '3. low': '393.59', '4. close': '403.93', '5. volume': '109649099'}}},
+            'OVERVIEW': {'Symbol': 'IBM', 'Name': 'International Business Machines'},
+        }
+        with patch.object(self.api, 'fetch_data', side_effect=lambda function, *args, **kwargs: payloads[function]):
+            result = self.api.fetch_many('IBM', ['TIME_SERIES_WEEKLY', 'OVERVIEW'])
+
+        self.assertListEqual(['TIME_SERIES_WEEKLY', 'OVERVIEW'], list(result))
+        self.assertIsInstance(result['TIME_SERIES_WEEKLY'], pd.DataFrame)
+        self.assertEqual(result['OVERVIEW']['Symbol'], 'IBM')
+
+    def test_fetch_many_unsupported_function(self):
+        with self.assertRaises(ValueError):
+            self.api.fetch_many('IBM', ['NEWS_SENTIMENT'])
 
     def test_get_daily_stock_data(self):
         symbol = "AAPL"
@@ -40,12 +60,28 @@ class TestAlphaVantageAPI(unittest.TestCase):
         result_df = self.api.get_monthly_stock_data(symbol)
         self.assertIsInstance(result_df, pd.DataFrame)
 
-    def test_invalid_symbol(self):
+    @patch('requests.Session.get')
+    def test_invalid_symbol(self, mock_get):
+        mock_get.return_value.json.return_value = {"Error Message": "Invalid API call."}
         invalid_symbol = "INVALID"
-        with self.assertRaises(ValueError) as context:
+        with self.assertRaises(InvalidSymbolError) as context:
             self.api.get_daily_stock_data(invalid_symbol)
         self.assertIn("Invalid symbol please use a correct ticker symbol.", str(context.exception))
 
+    def test_transport_errors_are_not_invalid_symbols(self):
+        server_error = Response()
+        server_error.status_code = 503
+        failures = [ConnectionError("Connection refused"), Timeout("Read timed out"), server_error]
+        getters = [self.api.get_daily_stock_data, self.api.get_daily_time_series, self.api.get_weekly_stock_data,
+                   self.api.get_monthly_stock_data, self.api.get_company_overview_data]
+        for failure in failures:
+            for getter in getters:
+                kwargs = {'side_effect': failure} if isinstance(failure, Exception) else {'return_value': failure}
+                with self.subTest(failure=failure, getter=getter.__name__), patch('requests.Session.get', **kwargs):
+                    with self.assertRaises(TransportError) as context:
+                        getter('IBM')
+                    self.assertEqual(context.exception.status, 503 if failure is server_error else None)
+
     def test_valid_symbol(self):
         # Test with a valid symbol
         symbol = "AAPL"
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.core.artifacts import ArtifactStore, content_hash
+
+
+class TestContentHash(unittest.TestCase):
+
+    def test_stable_and_sensitive(self):
+        frame = pd.DataFrame({'date': pd.date_range('2024-01-01', periods=3), 'stock_price': [1.0, 2.0, np.nan]})
+        self.assertEqual(content_hash(frame, {'b': 1, 'a': [1, 2]}), content_hash(frame.copy(), {'a': [1, 2], 'b': 1}))
+
+        changed = frame.copy()
+        changed.loc[1, 'stock_price'] = 2.5
+        self.assertNotEqual(content_hash(frame), content_hash(changed))
+        self.assertNotEqual(content_hash(frame), content_hash(frame.rename(columns={'stock_price': 'close'})))
+        self.assertNotEqual(content_hash(np.arange(3)), content_hash(np.arange(3).astype(float)))
+        self.assertNotEqual(content_hash('1'), content_hash(1))
+        self.assertNotEqual(content_hash(['ab', 'c']), content_hash(['a', 'bc']))
+
+
+class TestArtifactStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_manifest_and_pruning(self):
+        store = ArtifactStore(self.root)
+        store.put('a', b'plot a')
+        store.put('b', b'plot b')
+        output = os.path.join(self.root, 'report.pdf')
+        open(output, 'wb').close()
+        store.record({'inputs': 'x'}, keep=['a'])
+
+        reopened = ArtifactStore(self.root)
+        self.assertTrue(reopened.unchanged('inputs', 'x', output))
+        self.assertFalse(reopened.unchanged('inputs', 'y', output))
+        self.assertFalse(reopened.unchanged('inputs', 'x', os.path.join(self.root, 'missing.pdf')))
+        self.assertEqual(reopened.get('a'), b'plot a')
+        self.assertIsNone(reopened.get('b'))
+
+    def test_forced_store_ignores_previous_builds(self):
+        ArtifactStore(self.root).put('a', b'plot a')
+        ArtifactStore(self.root).record({'inputs': 'x', 'report': 'r'}, keep=['a'])
+
+        forced = ArtifactStore(self.root, reuse=False)
+        self.assertFalse(forced.unchanged('inputs', 'x'))
+        self.assertIsNone(forced.get('a'))
+        forced.record({'inputs': 'x'})
+        self.assertNotIn('report', ArtifactStore(self.root).manifest)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import asyncio
+import socket
+import unittest
+import pandas as pd
+
+from src.api.async_alpha_vantage import AsyncAlphaVantageAPI
+from src.api.exceptions import InvalidSymbolError, RateLimitError, TransportError
+from src.utils.stub_server import StubAlphaVantageServer
+
+
+async def no_sleep(delay):
+    pass
+
+
+class TestAsyncAlphaVantageAPI(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.stub = StubAlphaVantageServer(compact_bars=20).start()
+        self.api = AsyncAlphaVantageAPI('demo', base_url=self.stub.url, limit_per_host=4, sleep=no_sleep)
+
+    async def asyncTearDown(self):
+        await self.api.close()
+        self.stub.stop()
+
+    async def test_fetch_many(self):
+        result = await self.api.fetch_many('IBM', outputsizes={'TIME_SERIES_WEEKLY': 'full'})
+
+        self.assertListEqual(list(result), list(AsyncAlphaVantageAPI.REPORT_FUNCTIONS))
+        self.assertIsInstance(result['TIME_SERIES_INTRADAY'], pd.DataFrame)
+        self.assertEqual(len(result['TIME_SERIES_WEEKLY']), self.stub.full_bars)
+        self.assertEqual(result['OVERVIEW']['Symbol'], 'IBM')
+
+    async def test_retries_server_errors_and_throttling(self):
+        self.stub.inject(status=503, count=2)
+        self.stub.inject(payload={"Note": "Thank you for using Alpha Vantage! Our standard API call frequency is 5 calls per minute."})
+        frame = await self.api.get_monthly_stock_data('IBM')
+
+        self.assertEqual(len(frame), 20)
+        self.assertEqual(self.api.retries, 3)
+        self.assertEqual(len(self.stub.requests), 4)
+
+    async def test_typed_errors(self):
+        with self.assertRaises(InvalidSymbolError):
+            await self.api.get_weekly_stock_data('BAD')
+
+        self.stub.inject(payload={"Information": "You have reached the 25 requests per day rate limit."})
+        with self.assertRaises(RateLimitError) as context:
+            await self.api.get_weekly_stock_data('IBM')
+        self.assertTrue(context.exception.daily)
+
+        self.stub.inject(status=404)
+        with self.assertRaises(TransportError) as context:
+            await self.api.get_weekly_stock_data('IBM')
+        self.assertEqual(context.exception.status, 404)
+        self.assertEqual(self.api.retries, 0)
+
+    async def test_connection_failure_exhausts_retries(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        api = AsyncAlphaVantageAPI('demo', base_url=f"http://127.0.0.1:{port}/query", max_retries=2, sleep=no_sleep)
+        async with api:
+            with self.assertRaises(TransportError) as context:
+                await api.get_company_overview_data('IBM')
+        self.assertIsNone(context.exception.status)
+        self.assertEqual(api.calls, 3)
+
+    async def test_cancellation(self):
+        self.stub.latency = 0.5
+        task = asyncio.ensure_future(self.api.fetch_many('IBM'))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+        self.stub.latency = 0
+        self.assertEqual((await self.api.get_company_overview_data('IBM'))['Symbol'], 'IBM')
+
+    async def test_fetch_symbols(self):
+        results = await self.api.fetch_symbols(['IBM', 'BAD', 'MSFT'], functions=['TIME_SERIES_WEEKLY'])
+
+        self.assertListEqual(list(results), ['IBM', 'BAD', 'MSFT'])
+        self.assertIsInstance(results['BAD'], InvalidSymbolError)
+        self.assertIsInstance(results['MSFT']['TIME_SERIES_WEEKLY'], pd.DataFrame)
+
+    async def test_payload_factory(self):
+        body = b'{"Time Series (Daily)": {"2024-01-30": {"1. open": "1", "2. high": "2", "3. low": "0.5", ' \
+               b'"4. close": "1.5", "5. volume": "100"}}}'
+        with StubAlphaVantageServer(payload_factory=lambda params: body) as stub:
+            api = AsyncAlphaVantageAPI('demo', base_url=stub.url, sleep=no_sleep)
+            async with api:
+                frame = await api.get_daily_time_series('ANY')
+        self.assertListEqual(frame['close'].tolist(), [1.5])
+        self.assertEqual(stub.requests[0]['symbol'], 'ANY')
+
+
+if __name__ == '__main__':
+    unittest.main()
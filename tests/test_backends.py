@@ -0,0 +1,36 @@
+import subprocess
+import sys
+import unittest
+
+from pathlib import Path
+
+from src.core import backends
+
+
+class TestBackends(unittest.TestCase):
+
+    def tearDown(self):
+        backends.register_backend('report', 'src.core.report_generator:ReportGenerator')
+        backends.BACKENDS.pop('test', None)
+
+    def test_load_backend(self):
+        backends.register_backend('test', 'os.path:join')
+        self.assertIs(backends.load_backend('test'), __import__('os').path.join)
+        with self.assertRaises(KeyError):
+            backends.load_backend('missing')
+
+        report_generator = backends.load_backend('report')
+        self.assertEqual(report_generator.__name__, 'ReportGenerator')
+        self.assertIs(backends.load_backend('report'), report_generator)
+
+    def test_data_modes_do_not_import_backends(self):
+        # A fresh interpreter: this process may already have imported them.
+        code = ("import main, src.core.pipeline, src.api.alpha_vantage; from src.core import backends; "
+                "print(','.join(backends.loaded_packages()))")
+        output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True,
+                                cwd=Path(__file__).parent.parent).stdout
+        self.assertEqual(output.strip(), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
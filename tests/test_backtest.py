@@ -0,0 +1,146 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.core.backtest import (Breakout, MACrossover, backtest_batch, best_configurations, parse_grid, parse_rule,
+                               performance, sweep, sweep_many)
+from src.core.batch import format_summary
+from tests.test_pipeline import FakeAPI
+
+
+def make_prices(periods: int = 600, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 100 * np.cumprod(1 + rng.normal(0.0005, 0.01, periods))
+
+
+def reference_crossover(close: np.ndarray, fast: int, slow: int, cost: float) -> dict:
+    """
+    One configuration with pandas, the way the notebooks backtested.
+    """
+    prices = pd.Series(close)
+    positions = (prices.rolling(fast).mean() > prices.rolling(slow).mean()).astype(float)
+    strategy = positions.shift(1).fillna(0) * prices.pct_change().fillna(0) - \
+        cost * positions.diff().fillna(positions.iloc[0]).abs()
+    equity = (1 + strategy).cumprod()
+    return {
+        'total_return': equity.iloc[-1] - 1,
+        'max_drawdown': (equity / equity.cummax() - 1).min(),
+        'sharpe': strategy.mean() / strategy.std(ddof=0) * np.sqrt(252),
+    }
+
+
+def reference_breakout(close: np.ndarray, entry: int, exit: int) -> np.ndarray:
+    positions, position = np.zeros(len(close)), 0.0
+    for bar in range(len(close)):
+        if bar >= entry and close[bar] > close[bar - entry:bar].max():
+            position = 1.0
+        elif bar >= exit and close[bar] < close[bar - exit:bar].min():
+            position = 0.0
+        positions[bar] = position
+    return positions
+
+
+class TestRules(unittest.TestCase):
+
+    def setUp(self):
+        self.close = make_prices()
+
+    def test_crossover_grid_shape(self):
+        positions = MACrossover().positions(self.close, np.array([5, 10, 20]), np.array([20, 50]))
+        self.assertEqual(positions.shape, (3, 2, len(self.close)))
+        # Nothing is held before the slow average has a value.
+        self.assertEqual(positions.dtype, bool)
+        self.assertFalse(positions[:, 1, :49].any())
+        valid = MACrossover().valid(np.array([5, 10, 20]), np.array([20, 50]))
+        self.assertListEqual(valid.tolist(), [[True, True], [True, True], [False, True]])
+
+    def test_breakout_matches_loop(self):
+        positions = Breakout().positions(self.close, np.array([20, 55]), np.array([10, 20]))
+        for row, entry in enumerate([20, 55]):
+            for column, exit in enumerate([10, 20]):
+                np.testing.assert_array_equal(positions[row, column], reference_breakout(self.close, entry, exit))
+
+    def test_unknown_rule(self):
+        with self.assertRaises(ValueError):
+            parse_rule('momentum')
+
+
+class TestSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.close = make_prices()
+
+    def test_crossover_matches_pandas(self):
+        results = sweep(self.close, 'ma_crossover', {'fast': [5, 10, 50], 'slow': [20, 50]}, cost=0.001)
+        # fast=50 is never faster than slow, so only four configurations are valid.
+        self.assertEqual(len(results), 4)
+        for _, row in results.iterrows():
+            expected = reference_crossover(self.close, int(row['fast']), int(row['slow']), 0.001)
+            for metric, value in expected.items():
+                self.assertAlmostEqual(row[metric], value, places=10)
+
+    def test_blocks_do_not_change_results(self):
+        grid = {'entry': [10, 20, 30, 40], 'exit': [5, 10]}
+        whole = sweep(self.close, 'breakout', grid)
+        blocked = sweep(self.close, 'breakout', grid, max_block_cells=len(self.close) * 2)
+        pd.testing.assert_frame_equal(whole, blocked)
+
+    def test_performance(self):
+        close = np.array([100.0, 110.0, 99.0, 99.0])
+        metrics = performance(np.array([[1.0, 1.0, 0.0, 0.0], [0.0, 0.0, 0.0, 0.0]]), close, cost=0.01)
+        # Long from the first close to the third: +10%, then -10%, less 1% on entry and exit.
+        equity = 0.99 * 1.1 * 0.89
+        np.testing.assert_allclose(metrics['total_return'], [equity - 1, 0.0])
+        np.testing.assert_allclose(metrics['max_drawdown'], [0.89 - 1, 0.0])
+        np.testing.assert_array_equal(metrics['trades'], [2, 0])
+        self.assertTrue(np.isnan(metrics['sharpe'][1]))
+
+    def test_sweep_many(self):
+        closes = {'A': self.close, 'B': make_prices(seed=1)}
+        grid = {'fast': [5, 10, 20], 'slow': [30, 60]}
+        serial = sweep_many(closes, 'ma_crossover', grid)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            parallel = sweep_many(closes, 'ma_crossover', grid, executor=executor, splits=2)
+        pd.testing.assert_frame_equal(serial, parallel)
+        self.assertListEqual(serial['symbol'].tolist(), ['A'] * 6 + ['B'] * 6)
+
+        best = best_configurations(serial, top=2)
+        self.assertListEqual(best['symbol'].tolist(), ['A', 'A', 'B', 'B'])
+        self.assertGreaterEqual(best['sharpe'].iloc[0], serial[serial['symbol'] == 'A']['sharpe'].max())
+
+    def test_parse_grid(self):
+        self.assertDictEqual(parse_grid(['fast=5:20:5', 'slow=50,100']), {'fast': [5, 10, 15, 20], 'slow': [50, 100]})
+        self.assertListEqual(parse_grid(['band=0.5:1.5:0.5'])['band'], [0.5, 1, 1.5])
+        with self.assertRaises(ValueError):
+            parse_grid(['fast='])
+
+
+class TestBacktestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_backtest_batch(self):
+        api = FakeAPI()
+        results = backtest_batch(api, ['IBM', 'BAD', 'MSFT'], 'ma_crossover', {'fast': [5, 10], 'slow': [20, 50]},
+                                 output_root=self.tmp_dir.name, workers=2)
+
+        self.assertListEqual(['ok', 'failed', 'ok'], [result['status'] for result in results])
+        self.assertRegex(results[0]['report'], r'^fast=\d+ slow=\d+ sharpe ')
+        self.assertTrue(all(functions == ('TIME_SERIES_DAILY', 'OVERVIEW') for functions, _ in api.calls))
+        backtest = pd.read_csv(os.path.join(self.tmp_dir.name, 'backtest_ma_crossover.csv'))
+        self.assertListEqual(sorted(set(backtest['symbol'])), ['IBM', 'MSFT'])
+        # Four configurations per symbol, each from one of the two slices of the fast windows.
+        self.assertEqual(len(backtest), 8)
+        self.assertIn('2/3 backtested successfully.', format_summary(results, "backtested"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from requests.exceptions import ConnectionError
+
+from src.api.alpha_vantage import AlphaVantageAPI
+from src.api.cache import ResponseCache
+from src.api.exceptions import RateLimitError
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(self.tmp_dir.name)
+        self.payload = {"Symbol": "IBM", "Name": "International Business Machines"}
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_hit_and_miss_counters(self):
+        self.assertIsNone(self.cache.get('OVERVIEW', 'IBM'))
+        self.cache.set('OVERVIEW', 'IBM', None, 'compact', self.payload)
+        self.assertEqual(self.cache.get('OVERVIEW', 'IBM'), self.payload)
+
+        stats = self.cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+    def test_key_includes_interval_and_outputsize(self):
+        self.cache.set('TIME_SERIES_INTRADAY', 'IBM', '60min', 'compact', self.payload)
+        self.assertIsNone(self.cache.get('TIME_SERIES_INTRADAY', 'IBM', '5min', 'compact'))
+        self.assertIsNone(self.cache.get('TIME_SERIES_INTRADAY', 'IBM', '60min', 'full'))
+
+    def test_expired_entry_is_only_served_as_stale(self):
+        cache = ResponseCache(self.tmp_dir.name, ttls={'OVERVIEW': 0})
+        cache.set('OVERVIEW', 'IBM', None, 'compact', self.payload)
+
+        self.assertIsNone(cache.get('OVERVIEW', 'IBM'))
+        self.assertEqual(cache.get('OVERVIEW', 'IBM', allow_stale=True), self.payload)
+        self.assertEqual(cache.stats()['stale_hits'], 1)
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(self.tmp_dir.name, max_bytes=1)
+        cache.set('OVERVIEW', 'IBM', None, 'compact', self.payload)
+        cache.set('OVERVIEW', 'AAPL', None, 'compact', self.payload)
+
+        self.assertIsNone(cache.get('OVERVIEW', 'IBM'))
+        self.assertEqual(cache.stats()['evictions'], 2)
+        self.assertEqual(len(os.listdir(self.tmp_dir.name)), 0)
+
+
+class TestAlphaVantageAPICache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(self.tmp_dir.name, ttls={'OVERVIEW': 0})
+        self.api = AlphaVantageAPI(api_key='demo', cache=self.cache)
+
+    def tearDown(self):
+        self.api.close()
+        self.tmp_dir.cleanup()
+
+    @patch('requests.Session.get')
+    def test_stale_copy_served_on_network_error(self, mock_get):
+        mock_get.return_value.json.return_value = {"Symbol": "IBM"}
+        self.assertEqual(self.api.fetch_data('OVERVIEW', 'IBM'), {"Symbol": "IBM"})
+
+        mock_get.side_effect = ConnectionError("Network error")
+        self.assertEqual(self.api.fetch_data('OVERVIEW', 'IBM'), {"Symbol": "IBM"})
+
+    @patch('requests.Session.get')
+    def test_throttle_response_not_cached(self, mock_get):
+        mock_get.return_value.json.return_value = {"Note": "Thank you for using Alpha Vantage!"}
+        with self.assertRaises(RateLimitError):
+            self.api.fetch_data('OVERVIEW', 'IBM')
+
+        self.assertIsNone(self.cache.get('OVERVIEW', 'IBM', allow_stale=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+
+from src.core.batch import format_summary
+from src.core.consolidated import consolidated_batch
+from src.utils import instrumentation
+from tests.test_pipeline import FakeAPI
+
+
+class TestConsolidatedBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_sections_in_input_order(self):
+        path = os.path.join(self.tmp_dir.name, 'reports', 'all.pdf')
+        recorder = instrumentation.enable()
+        try:
+            results = consolidated_batch(FakeAPI(), ['msft', 'BAD', 'IBM', 'AAPL'], path, fetch_workers=2,
+                                         render_workers=1, window=2, indicators=['sma:3'], vector_plots=True)
+        finally:
+            instrumentation.disable()
+
+        self.assertListEqual([result['status'] for result in results], ['ok', 'failed', 'ok', 'ok'])
+        self.assertIn('Invalid symbol', results[1]['error'])
+        self.assertListEqual([result['report'] for result in results if result['report']],
+                             [f"{path} page {page} of 8" for page in (2, 4, 6)])
+        self.assertIn('3/4 sections written successfully.', format_summary(results, "sections written"))
+        stages = {row['stage']: row for row in recorder.summary()}
+        # One call per section and one for laying out the whole PDF.
+        self.assertEqual(stages['pdf']['calls'], 4)
+        self.assertEqual(stages['plot']['calls'], 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.core.cross_section import (PriceMatrix, SharedArray, analyse_portfolio, correlated_pairs, correlation_matrix,
+                                    parallel_rolling_beta, rolling_beta, sector_relative)
+from src.core.report_generator import generate_portfolio_report
+
+
+def make_universe(betas=(0.5, 1.0, 1.5), periods: int = 300, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2020-01-01', periods=periods, freq='B')
+    market = rng.normal(0, 0.01, periods)
+    series = {f"S{column}": pd.Series(100 * np.cumprod(1 + beta * market + rng.normal(0, 0.005, periods)), index=index)
+              for column, beta in enumerate(betas)}
+    return series, pd.Series(np.r_[np.nan, market[1:]], index=index)
+
+
+class TestPriceMatrix(unittest.TestCase):
+
+    def setUp(self):
+        index = pd.date_range('2024-01-01', periods=5, freq='D')
+        self.series = {
+            'A': pd.Series([1.0, 2.0, 3.0, 4.0, 5.0], index=index),
+            # Missing the 2nd to 4th bars, and out of order.
+            'B': pd.Series([50.0, 10.0], index=index[[4, 0]]),
+            'C': pd.DataFrame({'date': index[1:], 'stock_price': [7.0, 8.0, 9.0, 10.0]}),
+        }
+
+    def test_outer_alignment(self):
+        matrix = PriceMatrix.align(self.series)
+        self.assertEqual(matrix.values.shape, (5, 3))
+        self.assertTrue(matrix.values.flags['C_CONTIGUOUS'])
+        np.testing.assert_array_equal(matrix.values[:, 1], [10.0, np.nan, np.nan, np.nan, 50.0])
+        self.assertTrue(np.isnan(matrix.values[0, 2]))
+        np.testing.assert_allclose(matrix.coverage(), [1.0, 0.4, 0.8])
+        self.assertListEqual(list(matrix.frame().columns), ['A', 'B', 'C'])
+
+    def test_inner_alignment(self):
+        matrix = PriceMatrix.align(self.series, how='inner')
+        self.assertListEqual(list(matrix.index), [pd.Timestamp('2024-01-05')])
+        with self.assertRaises(ValueError):
+            PriceMatrix.align(self.series, how='left')
+
+    def test_fill_limit(self):
+        matrix = PriceMatrix.align(self.series, fill_limit=2)
+        # Two of the three missing bars are filled, and nothing before the first price.
+        np.testing.assert_array_equal(matrix.values[:, 1], [10.0, 10.0, 10.0, np.nan, 50.0])
+        self.assertListEqual(np.flatnonzero(matrix.filled[:, 1]).tolist(), [1, 2])
+        self.assertTrue(np.isnan(matrix.values[0, 2]))
+        self.assertAlmostEqual(matrix.coverage()[1], 0.4)
+
+    def test_returns(self):
+        returns = PriceMatrix.align(self.series).returns()
+        self.assertTrue(np.isnan(returns[0]).all())
+        self.assertAlmostEqual(returns[1, 0], 1.0)
+        self.assertTrue(np.isnan(returns[1:4, 1]).all() and np.isnan(returns[4, 1]))
+
+
+class TestStatistics(unittest.TestCase):
+
+    def setUp(self):
+        self.series, self.market = make_universe()
+        self.series['S1'] = self.series['S1'].drop(self.series['S1'].index[50:60])
+        self.matrix = PriceMatrix.align(self.series)
+
+    def test_correlation_matches_pandas(self):
+        expected = self.matrix.frame().pct_change(fill_method=None).corr(min_periods=20).to_numpy()
+        np.testing.assert_allclose(correlation_matrix(self.matrix.returns()), expected)
+        self.assertTrue(np.isnan(correlation_matrix(self.matrix.returns(), min_periods=1000)).all())
+
+    def test_rolling_beta_matches_pandas(self):
+        betas = rolling_beta(self.matrix.returns(), self.market.to_numpy(), window=60)
+
+        returns = self.matrix.frame().pct_change(fill_method=None)['S1']
+        market = self.market.where(returns.notna())
+        expected = returns.where(self.market.notna()).rolling(60, min_periods=30).cov(market) / \
+            market.rolling(60, min_periods=30).var()
+        np.testing.assert_allclose(betas[:, 1], expected.to_numpy(), rtol=1e-9)
+        np.testing.assert_allclose(betas[-1], [0.5, 1.0, 1.5], atol=0.1)
+
+    def test_parallel_rolling_beta_uses_shared_memory(self):
+        serial = rolling_beta(self.matrix.returns(), self.market.to_numpy(), window=60)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            parallel = parallel_rolling_beta(self.matrix, self.market.to_numpy(), 60, executor, columns_per_task=1)
+        np.testing.assert_array_equal(parallel, serial)
+
+    def test_shared_array(self):
+        with SharedArray((2, 3)) as shared:
+            shared.array[...] = 1.5
+            attached = SharedArray.attach(shared.handle)
+            attached.array[1, 2] = 7.0
+            self.assertFalse(attached.owner)
+            attached.close()
+            self.assertEqual(shared.array[1, 2], 7.0)
+
+    def test_sector_relative(self):
+        relative = sector_relative(self.matrix, {'S0': 'TECHNOLOGY', 'S1': 'TECHNOLOGY'})
+        self.assertListEqual(relative['sector'].tolist(), ['TECHNOLOGY', 'TECHNOLOGY', 'UNKNOWN'])
+        total = self.series['S0'].iloc[-1] / self.series['S0'].iloc[0] - 1
+        self.assertAlmostEqual(relative.loc['S0', 'total_return'], total)
+        self.assertAlmostEqual(relative.loc[['S0', 'S1'], 'relative_return'].sum(), 0.0)
+        self.assertEqual(relative.loc['S2', 'relative_return'], 0.0)
+
+    def test_correlated_pairs(self):
+        correlation = np.array([[1.0, 0.2, 0.9], [0.2, 1.0, np.nan], [0.9, np.nan, 1.0]])
+        pairs = correlated_pairs(correlation, ['A', 'B', 'C'], count=1)
+        self.assertListEqual(pairs[['first', 'second']].values.tolist(), [['A', 'C'], ['A', 'B']])
+
+
+class TestAnalysePortfolio(unittest.TestCase):
+
+    def test_analysis_and_report(self):
+        series, market = make_universe(betas=(0.5, 1.0, 1.5, 2.0))
+        index_prices = 100 * (1 + market.fillna(0)).cumprod()
+        analysis = analyse_portfolio(PriceMatrix.align(series), {'S0': 'ENERGY', 'S1': 'ENERGY'}, index_prices,
+                                     'INDEX', window=60)
+
+        summary = analysis['summary']
+        np.testing.assert_allclose(summary['beta'], [0.5, 1.0, 1.5, 2.0], atol=0.15)
+        self.assertListEqual(list(analysis['sectors'].index), ['ENERGY', 'UNKNOWN'])
+        self.assertEqual(analysis['correlation'].shape, (4, 4))
+        self.assertEqual((analysis['bars'], analysis['benchmark']), (300, 'INDEX'))
+
+        pdf = generate_portfolio_report(analysis)
+        self.assertTrue(pdf.startswith(b'%PDF'))
+
+    def test_equal_weighted_benchmark(self):
+        series, _ = make_universe(betas=(1.0, 1.0))
+        analysis = analyse_portfolio(PriceMatrix.align(series), {}, window=60)
+        self.assertEqual(analysis['benchmark'], "Equal-weighted universe")
+        self.assertAlmostEqual(analysis['summary']['beta'].mean(), 1.0, places=6)
+
+
+if __name__ == '__main__':
+    unittest.main()
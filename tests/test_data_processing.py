@@ -1,6 +1,7 @@
 import unittest
 import pandas as pd
 
+from src.api.parser import parse_time_series
 from src.core.data_processing import DataTransformer
 
 class TestDataTransformer(unittest.TestCase):
@@ -25,6 +26,13 @@ class TestDataTransformer(unittest.TestCase):
         self.assertTrue(pd.api.types.is_float_dtype(cleaned_data['stock_price']))
         # Check values are as expected
         self.assertEqual(cleaned_data.iloc[0]['stock_price'], 100.12)
+
+    def test_clean_parsed_data(self):
+        series = self.data.set_index('index').to_dict(orient='index')
+        cleaned_data = DataTransformer(parse_time_series(series)).clean_data()
+        self.assertListEqual(['date', 'stock_price'], list(cleaned_data.columns))
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(cleaned_data['date']))
+        self.assertListEqual([100.12, 200.46], cleaned_data['stock_price'].tolist())
     
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,104 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.core.downsampling import TimeRange, downsample, lttb, minmax, parse_range
+
+
+def reference_lttb(x, y, threshold):
+    """
+    Point-by-point LTTB, as in the original description of the algorithm.
+    """
+    every = (len(y) - 2) / (threshold - 2)
+    kept, previous = [0], 0
+    for bucket in range(threshold - 2):
+        lo, hi = int(bucket * every) + 1, int((bucket + 1) * every) + 1
+        next_hi = min(int((bucket + 2) * every) + 1, len(y))
+        if bucket == threshold - 3:
+            cx, cy = x[-1], y[-1]
+        else:
+            cx, cy = np.mean(x[hi:next_hi]), np.mean(y[hi:next_hi])
+        best, best_area = lo, -1.0
+        for index in range(lo, hi):
+            area = abs((x[previous] - cx) * (y[index] - y[previous]) - (x[previous] - x[index]) * (cy - y[previous]))
+            if area > best_area:
+                best, best_area = index, area
+        kept.append(best)
+        previous = best
+    return kept + [len(y) - 1]
+
+
+class TestTimeRange(unittest.TestCase):
+
+    def setUp(self):
+        self.dates = pd.date_range('2020-01-01', periods=1000, freq='D').to_numpy()
+
+    def test_span(self):
+        lo, hi = TimeRange.parse('90d').bounds(self.dates)
+        self.assertEqual(hi, len(self.dates))
+        self.assertEqual(pd.Timestamp(self.dates[lo]), pd.Timestamp(self.dates[-1]) - pd.Timedelta(days=90))
+        self.assertEqual(TimeRange.parse('1y').bounds(self.dates), (len(self.dates) - 366, len(self.dates)))
+
+    def test_dates(self):
+        lo, hi = TimeRange.parse('2020-02-01:2020-02-29').bounds(self.dates)
+        self.assertEqual((lo, hi - lo), (31, 29))
+        self.assertEqual(TimeRange.parse('2021-01-01:').bounds(self.dates), (366, 1000))
+        self.assertEqual(TimeRange.parse(':2019-12-31').bounds(self.dates), (0, 0))
+        self.assertEqual(TimeRange.parse('all').bounds(self.dates), (0, 1000))
+        self.assertEqual(TimeRange.parse('5y').bounds(self.dates[:0]), (0, 0))
+
+    def test_invalid(self):
+        for text in ('5x', '2020-01-01', '2021-01-01:2020-01-01', 'y'):
+            with self.assertRaises(ValueError):
+                parse_range(text)
+        self.assertEqual(parse_range('6m'), '6m')
+
+
+class TestDownsampling(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x = pd.date_range('2000-01-01', periods=5003, freq='h').to_numpy()
+        self.y = np.cumsum(rng.normal(0, 1, len(self.x)))
+
+    def test_lttb_matches_reference(self):
+        x = self.x.astype(np.int64).astype(np.float64)
+        for threshold in (3, 10, 500):
+            np.testing.assert_array_equal(lttb(self.x, self.y, threshold), reference_lttb(x, self.y, threshold))
+
+    def test_lttb_keeps_spikes(self):
+        y = np.zeros(10000)
+        y[1234], y[7777] = 50.0, -50.0
+        kept = lttb(np.arange(10000), y, 100)
+        self.assertEqual(len(kept), 100)
+        self.assertIn(1234, kept)
+        self.assertIn(7777, kept)
+
+    def test_short_series_unchanged(self):
+        np.testing.assert_array_equal(lttb(self.x[:50], self.y[:50], 100), np.arange(50))
+        np.testing.assert_array_equal(minmax(self.x[:50], self.y[:50], 100), np.arange(50))
+
+    def test_minmax_keeps_column_extremes(self):
+        kept = minmax(self.x, self.y, 100)
+        self.assertLessEqual(len(kept), 202)
+        self.assertTrue(np.all(np.diff(kept) > 0))
+        self.assertEqual((kept[0], kept[-1]), (0, len(self.y) - 1))
+        self.assertEqual(self.y[kept].max(), self.y.max())
+        self.assertEqual(self.y[kept].min(), self.y.min())
+        # Every column of the plot still spans the same prices.
+        columns = np.minimum(((self.x - self.x[0]) / (self.x[-1] - self.x[0]) * 100).astype(int), 99)
+        for column in (0, 37, 99):
+            inside = columns == column
+            self.assertEqual(self.y[inside].max(), self.y[kept][inside[kept]].max())
+            self.assertEqual(self.y[inside].min(), self.y[kept][inside[kept]].min())
+
+    def test_downsample(self):
+        self.assertEqual(len(downsample(self.x, self.y, 300)), 300)
+        self.assertLessEqual(len(downsample(self.x, self.y, 300, 'minmax')), 302)
+        with self.assertRaises(ValueError):
+            downsample(self.x, self.y, 300, 'mean')
+
+
+if __name__ == '__main__':
+    unittest.main()
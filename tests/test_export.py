@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+
+from src.core.batch import format_summary
+from src.core.export import fetch_batch
+from tests.test_pipeline import FakeAPI
+
+
+class TestFetchBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_fetch_only(self):
+        api = FakeAPI()
+        results = fetch_batch(api, ['IBM', 'BAD'], self.tmp_dir.name, fetch_workers=2)
+
+        self.assertListEqual(['ok', 'failed'], [result['status'] for result in results])
+        self.assertEqual(len(api.calls), 1)
+        self.assertListEqual(os.listdir(self.tmp_dir.name), [])
+        self.assertIn('1/2 fetched successfully.', format_summary(results, "fetched"))
+
+    def test_export_data(self):
+        results = fetch_batch(FakeAPI(), ['IBM'], self.tmp_dir.name, export_format='csv')
+
+        output_dir = os.path.join(self.tmp_dir.name, 'IBM')
+        self.assertEqual(results[0]['report'], output_dir)
+        self.assertListEqual(sorted(os.listdir(output_dir)), ['daily.csv', 'monthly.csv', 'overview.json', 'weekly.csv'])
+        weekly = pd.read_csv(os.path.join(output_dir, 'weekly.csv'), parse_dates=['date'])
+        self.assertListEqual(list(weekly.columns), ['date', 'stock_price', 'open', 'high', 'low', 'volume'])
+        self.assertEqual(len(weekly), 20)
+        self.assertTrue(weekly['date'].is_monotonic_increasing)
+
+        results = fetch_batch(FakeAPI(), ['IBM'], self.tmp_dir.name, export_format='json')
+        self.assertTrue(os.path.exists(os.path.join(output_dir, 'monthly.json')))
+
+
+if __name__ == '__main__':
+    unittest.main()
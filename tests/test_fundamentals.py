@@ -0,0 +1,148 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.core.fundamentals import (FundamentalsStore, FundamentalsTable, parse_overview, parse_query,
+                                   refresh_fundamentals)
+from src.utils.synthetic import make_overview
+from tests.test_pipeline import FakeAPI
+
+
+def make_table(count: int = 400) -> FundamentalsTable:
+    sectors = ['TECHNOLOGY', 'ENERGY', 'FINANCE', 'HEALTH CARE']
+    overviews = [dict(make_overview(f"S{i:03d}", sectors[i % 4], seed=i), Industry=f"INDUSTRY {i % 7}")
+                 for i in range(count)]
+    overviews[0]['PERatio'] = 'None'
+    return FundamentalsTable.from_records(parse_overview(overview) for overview in overviews)
+
+
+class TestParsing(unittest.TestCase):
+
+    def test_parse_overview(self):
+        record = parse_overview(dict(make_overview('ibm'), PEGRatio='None', Beta='-', Industry='Software'))
+        self.assertEqual(record['Symbol'], 'IBM')
+        self.assertEqual(record['Industry'], 'SOFTWARE')
+        self.assertIsInstance(record['PERatio'], float)
+        self.assertTrue(np.isnan(record['PEGRatio']) and np.isnan(record['Beta']))
+        self.assertEqual(record['LatestQuarter'], np.datetime64('2023-12-31'))
+        self.assertTrue(np.isnat(parse_overview({})['LatestQuarter']))
+
+    def test_parse_query(self):
+        self.assertListEqual(parse_query("PERatio < 15 and dividendyield >= 3% in TECHNOLOGY, 'HEALTH CARE'"),
+                             [('PERatio', '<', 15.0), ('DividendYield', '>=', 0.03),
+                              (None, 'in', ['TECHNOLOGY', 'HEALTH CARE'])])
+        self.assertListEqual(parse_query("MarketCapitalization > 10B and Exchange == nyse"),
+                             [('MarketCapitalization', '>', 1e10), ('Exchange', '=', 'NYSE')])
+        for query in ("Price < 10", "PERatio < ", "PERatio < 15 or EPS > 1", "Sector < TECHNOLOGY", "EPS > abc"):
+            with self.assertRaises(ValueError, msg=query):
+                parse_query(query)
+
+
+class TestScreen(unittest.TestCase):
+
+    def setUp(self):
+        self.table = make_table()
+        self.frame = pd.DataFrame(self.table.columns)
+
+    def test_matches_boolean_filter(self):
+        frame = self.frame
+        cases = {
+            "PERatio < 15 and DividendYield > 0.03 in TECHNOLOGY":
+                (frame.PERatio < 15) & (frame.DividendYield > 0.03) & (frame.Sector == 'TECHNOLOGY'),
+            "PERatio >= 20 and PERatio <= 30 and Sector != ENERGY":
+                (frame.PERatio >= 20) & (frame.PERatio <= 30) & (frame.Sector != 'ENERGY'),
+            "EPS > 5 in 'INDUSTRY 3', NYSE": (frame.EPS > 5),
+            "ProfitMargin != 0.1 in 'INDUSTRY 3'": (frame.ProfitMargin != 0.1) & (frame.Industry == 'INDUSTRY 3'),
+        }
+        for query, expected in cases.items():
+            matches = self.table.screen(query)
+            self.assertListEqual(matches['Symbol'].tolist(), sorted(frame.Symbol[expected]), query)
+
+    def test_missing_values_never_match(self):
+        self.assertNotIn('S000', self.table.screen("PERatio < 1000")['Symbol'].tolist())
+        self.assertNotIn('S000', self.table.screen("PERatio != 1")['Symbol'].tolist())
+        self.assertIn('S000', self.table.screen("")['Symbol'].tolist())
+
+    def test_sort_and_limit(self):
+        matches = self.table.screen("in ENERGY", sort='peratio', descending=True, limit=5)
+        expected = self.frame[self.frame.Sector == 'ENERGY'].nlargest(5, 'PERatio')
+        self.assertListEqual(matches['Symbol'].tolist(), expected['Symbol'].tolist())
+        self.assertListEqual(list(matches.columns), ['Symbol', 'Name', 'Sector', 'PERatio'])
+        with self.assertRaises(ValueError):
+            self.table.screen("", sort='Price')
+
+    def test_upsert(self):
+        record = parse_overview(dict(make_overview('S001', 'A VERY LONG SECTOR NAME'), PERatio='1'))
+        table = self.table.upsert(record)
+        self.assertEqual(len(table), len(self.table))
+        self.assertListEqual(table.screen("PERatio < 2")['Sector'].tolist(), ['A VERY LONG SECTOR NAME'])
+        self.assertEqual(len(table.upsert(parse_overview(make_overview('NEW')))), len(self.table) + 1)
+
+
+class TestFundamentalsStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = FundamentalsStore(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_refreshed_when_next_quarter_is_due(self):
+        overview = make_overview('IBM')  # LatestQuarter 2023-12-31, next results due mid-May
+        self.assertTrue(self.store.needs_refresh('IBM'))
+        self.assertTrue(self.store.update('IBM', overview, now='2024-01-10'))
+        self.assertFalse(self.store.needs_refresh('IBM', now='2024-05-01'))
+        self.assertTrue(self.store.needs_refresh('IBM', now='2024-05-20'))
+
+        # The same quarter again: only the check time moves, the raw response is kept.
+        self.assertFalse(self.store.update('IBM', dict(overview, Name='Changed'), now='2024-05-20'))
+        self.assertFalse(self.store.needs_refresh('IBM', now='2024-05-20 12:00'))
+        self.assertTrue(self.store.needs_refresh('IBM', now='2024-05-21 12:00'))
+        self.assertEqual(self.store.overview('IBM')['Name'], 'IBM Corporation')
+
+        self.assertTrue(self.store.update('IBM', dict(overview, LatestQuarter='2024-03-31', Name='Changed'),
+                                          now='2024-05-22'))
+        self.assertFalse(self.store.needs_refresh('IBM', now='2024-06-30'))
+
+        reopened = FundamentalsStore(self.tmp_dir.name)
+        self.assertEqual(reopened.overview('IBM')['Name'], 'Changed')
+        self.assertEqual(reopened.table().record('IBM')['LatestQuarter'], np.datetime64('2024-03-31'))
+        self.assertListEqual(os.listdir(os.path.join(self.tmp_dir.name, 'overviews')), ['IBM.json'])
+
+    def test_undated_overviews_expire(self):
+        self.store.update('SPY', {'Symbol': 'SPY', 'AssetType': 'ETF'}, now='2024-01-01')
+        self.assertFalse(self.store.needs_refresh('SPY', now='2024-01-05'))
+        self.assertTrue(self.store.needs_refresh('SPY', now='2024-01-08'))
+
+    def test_rejects_error_responses(self):
+        with self.assertRaises(ValueError):
+            self.store.update('BAD', {})
+        self.assertFalse(self.store.has('BAD'))
+
+    def test_screen(self):
+        for symbol, sector in [('IBM', 'TECHNOLOGY'), ('XOM', 'ENERGY')]:
+            self.store.update(symbol, make_overview(symbol, sector))
+        self.assertListEqual(FundamentalsStore(self.tmp_dir.name).screen("in energy")['Symbol'].tolist(), ['XOM'])
+
+
+class TestRefreshFundamentals(unittest.TestCase):
+
+    def test_refresh_fundamentals(self):
+        api = FakeAPI()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            fundamentals = FundamentalsStore(tmp_dir)
+            results = refresh_fundamentals(api, ['IBM', 'BAD'], fundamentals)
+            again = refresh_fundamentals(api, ['IBM'], fundamentals)
+
+            self.assertListEqual([result['status'] for result in results], ['ok', 'failed'])
+            self.assertEqual(again[0]['report'], 'up to date')
+            self.assertListEqual(api.calls, [(('OVERVIEW',), None)])
+            self.assertListEqual(fundamentals.screen("EPS >= 1")['Symbol'].tolist(), ['IBM'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from src.core.history_store import HistoryStore
+
+
+def make_bars(start: str, periods: int, close_offset: float = 0.0) -> pd.DataFrame:
+    index = pd.date_range(start=start, periods=periods, freq='D')
+    close = np.arange(periods, dtype=np.float64) + close_offset
+    return pd.DataFrame({'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+                         'volume': np.arange(periods, dtype=np.int64)}, index=index)
+
+
+class TestHistoryStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = HistoryStore(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_empty_partition(self):
+        self.assertFalse(self.store.has('IBM', 'daily'))
+        self.assertIsNone(self.store.high_water_mark('IBM', 'daily'))
+        self.assertEqual(len(self.store.load('IBM', 'daily')), 0)
+
+    def test_merge_appends_and_dedupes(self):
+        self.assertEqual(self.store.merge('IBM', 'daily', make_bars('2024-01-01', 10)), 10)
+        # Overlapping compact fetch: 5 known bars with revised values and 3 new ones.
+        self.assertEqual(self.store.merge('IBM', 'daily', make_bars('2024-01-06', 8, close_offset=100)), 3)
+
+        df = self.store.load('IBM', 'daily')
+        self.assertEqual(len(df), 13)
+        self.assertTrue(df.index.is_unique and df.index.is_monotonic_increasing)
+        self.assertEqual(df.loc['2024-01-05', 'close'], 4.0)
+        self.assertEqual(df.loc['2024-01-06', 'close'], 100.0)
+        self.assertEqual(self.store.high_water_mark('IBM', 'daily'), pd.Timestamp('2024-01-13'))
+        self.assertEqual(df['volume'].dtype, np.int64)
+
+    def test_load_range(self):
+        self.store.merge('IBM', 'daily', make_bars('2024-01-01', 30))
+        df = self.store.load('IBM', 'daily', start='2024-01-10', end='2024-01-12')
+        self.assertListEqual(list(pd.date_range('2024-01-10', '2024-01-12')), list(df.index))
+
+    def test_memory_mapped_arrays(self):
+        self.store.merge('IBM', 'daily', make_bars('2024-01-01', 5))
+        arrays = HistoryStore(self.tmp_dir.name).load_arrays('IBM', 'daily')
+        self.assertIsInstance(arrays['close'], np.memmap)
+        self.assertListEqual([0.0, 1.0, 2.0, 3.0, 4.0], arrays['close'].tolist())
+
+
+    def test_ingest_streamed_blocks(self):
+        bars = self.store._normalise(make_bars('2024-01-01', 10))
+        descending = {name: values[::-1] for name, values in bars.items()}
+        blocks = [{name: values[start:start + 3] for name, values in descending.items()} for start in (0, 3, 6, 9)]
+
+        self.assertEqual(self.store.ingest('IBM', 'daily', blocks, block_rows=4), 10)
+        df = self.store.load('IBM', 'daily')
+        self.assertTrue(df.index.is_monotonic_increasing)
+        self.assertListEqual(df['close'].tolist(), list(np.arange(10.0)))
+        self.assertFalse(os.path.exists(os.path.join(self.store.partition_dir('IBM', 'daily'), 'staging')))
+
+        # Newer bars take the append path, overlapping ones are merged.
+        newer = self.store._normalise(make_bars('2024-01-11', 5, close_offset=10))
+        self.assertEqual(self.store.ingest('IBM', 'daily', [newer]), 5)
+        overlap = self.store._normalise(make_bars('2024-01-14', 4, close_offset=100))
+        self.assertEqual(self.store.ingest('IBM', 'daily', [overlap]), 2)
+        df = self.store.load('IBM', 'daily')
+        self.assertEqual(len(df), 17)
+        self.assertEqual(df.loc['2024-01-13', 'close'], 12.0)
+        self.assertEqual(df.loc['2024-01-14', 'close'], 100.0)
+        self.assertEqual(self.store.ingest('IBM', 'daily', []), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import numpy as np
+
+from src.api.parser import parse_time_series
+from src.core.indicators import (SMA, Indicator, IndicatorEngine, parse_indicator, parse_indicator_list, rolling_std,
+                                 sma)
+from src.utils.synthetic import make_time_series
+
+SPECS = ['sma:20', 'ema:12', 'rsi:14', 'macd:12,26,9', 'bollinger:20,2', 'atr:14', 'vwap', 'vwap:D']
+
+
+class TestVectorizedIndicators(unittest.TestCase):
+
+    def setUp(self):
+        self.frame = parse_time_series(make_time_series(300, 'H'))
+
+    def test_sma_and_std_match_pandas(self):
+        close = self.frame['close']
+        np.testing.assert_allclose(sma(close.to_numpy(), 20), close.rolling(20).mean().to_numpy())
+        np.testing.assert_allclose(rolling_std(close.to_numpy(), 20), close.rolling(20).std(ddof=0).to_numpy(),
+                                   rtol=1e-7)
+
+    def test_rsi_bounds(self):
+        rsi = IndicatorEngine(['rsi:14']).compute(self.frame)['rsi_14'].to_numpy()
+        self.assertTrue(np.isnan(rsi[0]))
+        self.assertTrue(np.all((rsi[1:] >= 0) & (rsi[1:] <= 100)))
+
+    def test_missing_columns(self):
+        with self.assertRaises(ValueError):
+            IndicatorEngine(['atr:14']).compute(self.frame[['close']])
+
+    def test_parse_indicator(self):
+        self.assertEqual(parse_indicator('bollinger:20,2.5').spec, 'bollinger:20,2.5')
+        with self.assertRaises(ValueError):
+            parse_indicator('ichimoku')
+
+    def test_parse_indicator_arguments(self):
+        self.assertIsInstance(parse_indicator('sma:20').window, int)
+        self.assertEqual(parse_indicator('bollinger:20,2').width, 2.0)
+        for spec in ('sma:20.0', 'rsi:x', 'ema:0', 'macd:12,26,9,3'):
+            with self.assertRaises(ValueError):
+                parse_indicator(spec)
+        with self.assertRaisesRegex(ValueError, "'sma' window must be a whole number, got '20.0'"):
+            parse_indicator_list('sma:20.0')
+
+    def test_incomplete_indicator(self):
+        class Incomplete(Indicator):
+            @property
+            def columns(self):
+                return ['value']
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    def test_parse_indicator_list(self):
+        self.assertListEqual(parse_indicator_list('sma:20,bollinger:20,2,rsi'), ['sma:20', 'bollinger:20,2', 'rsi'])
+        self.assertListEqual(parse_indicator_list(''), [])
+
+
+class TestIncrementalIndicators(unittest.TestCase):
+
+    def setUp(self):
+        self.frame = parse_time_series(make_time_series(300, 'H'))
+        self.expected = IndicatorEngine(SPECS).compute(self.frame)
+
+    def test_streaming_matches_batch(self):
+        streamed = IndicatorEngine(SPECS).update(self.frame)
+        np.testing.assert_allclose(streamed.to_numpy(), self.expected.to_numpy(), rtol=1e-9, atol=1e-9)
+
+    def test_only_new_bars_are_processed(self):
+        engine = IndicatorEngine(SPECS)
+        engine.compute(self.frame.iloc[:200])
+
+        # Bars already seen are skipped; only the 100 new ones are processed.
+        appended = engine.update(self.frame)
+        self.assertEqual(len(appended), 100)
+        np.testing.assert_allclose(appended.to_numpy(), self.expected.iloc[200:].to_numpy(), rtol=1e-9, atol=1e-9)
+        self.assertEqual(engine.last_timestamp, self.frame.index[-1])
+
+    def test_revise_last_bar(self):
+        engine = IndicatorEngine(SPECS)
+        engine.compute(self.frame.iloc[:200])
+        revised = self.frame.iloc[199:201].copy()
+        revised.iloc[0, revised.columns.get_indexer(['high', 'close', 'volume'])] *= 1.01
+
+        values = engine.revise(revised)
+        frame = self.frame.iloc[:201].copy()
+        frame.iloc[199] = revised.iloc[0]
+        expected = IndicatorEngine(SPECS).compute(frame).iloc[199:]
+        np.testing.assert_allclose(values.to_numpy(), expected.to_numpy(), rtol=1e-9, atol=1e-9)
+        with self.assertRaises(ValueError):
+            engine.revise(revised)
+
+    def test_sma_running_total_does_not_drift(self):
+        indicator = SMA(3)
+        for close in [1e9] + [1e-3] * 11:
+            value = indicator.update({'close': close})['sma_3']
+        # A plain running total would keep the roundoff of adding 1e-3 to 1e9.
+        self.assertAlmostEqual(value, 1e-3, places=12)
+
+
+if __name__ == '__main__':
+    unittest.main()
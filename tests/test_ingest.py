@@ -0,0 +1,54 @@
+import tempfile
+import unittest
+import pandas as pd
+
+from src.api.alpha_vantage import AlphaVantageAPI
+from src.api.exceptions import InvalidSymbolError, RateLimitError
+from src.core.history_store import HistoryStore
+from src.core.ingest import ingest_batch, ingest_intraday, month_range
+from src.utils.stub_server import StubAlphaVantageServer
+
+
+class TestIngestIntraday(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.history = HistoryStore(self.tmp_dir.name)
+        self.stub = StubAlphaVantageServer().start()
+        self.api = AlphaVantageAPI('demo', base_url=self.stub.url)
+
+    def tearDown(self):
+        self.api.close()
+        self.stub.stop()
+        self.tmp_dir.cleanup()
+
+    def test_month_slices(self):
+        months = month_range('2023-12', '2024-01')
+        self.assertListEqual(months, ['2023-12', '2024-01'])
+        added = ingest_intraday(self.api, self.history, 'IBM', '60min', months, chunk_size=4096)
+
+        df = self.history.load('IBM', '60min')
+        self.assertEqual(len(df), sum(added.values()))
+        self.assertTrue(df.index.is_unique and df.index.is_monotonic_increasing)
+        self.assertEqual(df.index[-1], pd.Timestamp('2024-01-31 19:00'))
+        self.assertDictEqual(self.stub.requests[0], {'function': 'TIME_SERIES_INTRADAY', 'symbol': 'IBM',
+                                                     'interval': '60min', 'outputsize': 'full', 'datatype': 'csv',
+                                                     'apikey': 'demo', 'month': '2023-12'})
+        # A month already stored adds nothing.
+        self.assertDictEqual(ingest_intraday(self.api, self.history, 'IBM', '60min', ['2024-01']), {'2024-01': 0})
+
+    def test_json_errors(self):
+        with self.assertRaises(InvalidSymbolError):
+            list(self.api.stream_intraday('BAD'))
+        self.stub.inject(payload={"Information": "You have reached the 25 requests per day rate limit."})
+        with self.assertRaises(RateLimitError):
+            list(self.api.stream_intraday('IBM'))
+
+    def test_ingest_batch(self):
+        results = ingest_batch(self.api, ['IBM', 'BAD'], self.history, '60min', ['2024-01'], fetch_workers=2)
+        self.assertListEqual(['ok', 'failed'], [result['status'] for result in results])
+        self.assertRegex(results[0]['report'], r'^\d+ bars added$')
+
+
+if __name__ == '__main__':
+    unittest.main()
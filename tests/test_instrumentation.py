@@ -0,0 +1,127 @@
+import json
+import os
+import pstats
+import tempfile
+import unittest
+
+from src.api.alpha_vantage import AlphaVantageAPI
+from src.api.cache import ResponseCache
+from src.core.pipeline import run_batch
+from src.utils import instrumentation
+from src.utils.stub_server import StubAlphaVantageServer
+from tests.test_pipeline import FakeAPI
+
+
+@instrumentation.traced('square', 'value')
+def square(value, scale=1):
+    instrumentation.add(rows=value)
+    return value * value * scale
+
+
+class TestRecorder(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        instrumentation.disable()
+        self.tmp_dir.cleanup()
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(instrumentation.active())
+        self.assertEqual(square(3), 9)
+        instrumentation.add(rows=1)
+
+    def test_spans_and_counters(self):
+        recorder = instrumentation.enable()
+        with instrumentation.stage('outer', symbol='IBM') as counters:
+            square(2)
+            instrumentation.add(bytes=10)
+            counters['retries'] += 1
+        with self.assertRaises(ZeroDivisionError):
+            with recorder.stage('outer'):
+                1 / 0
+
+        inner, outer, failed = recorder.spans
+        self.assertEqual(inner['name'], 'square')
+        self.assertDictEqual(inner['args'], {'value': 2})
+        self.assertEqual(inner['counters']['rows'], 2)
+        # Counters go to the innermost stage only.
+        self.assertDictEqual(outer['counters'], {'bytes': 10, 'rows': 0, 'cache_hits': 0, 'retries': 1})
+        self.assertEqual(failed['error'], 'ZeroDivisionError')
+
+        summary = {total['stage']: total for total in recorder.summary()}
+        self.assertEqual(summary['outer']['calls'], 2)
+        self.assertEqual(summary['outer']['errors'], 1)
+        self.assertGreaterEqual(summary['outer']['wall'], summary['square']['wall'])
+        self.assertIn('square', recorder.format_summary())
+
+    def test_write_trace(self):
+        recorder = instrumentation.enable()
+        square(4)
+        square(5)
+
+        path = os.path.join(self.tmp_dir.name, 'trace.json')
+        recorder.write_trace(path)
+        with open(path) as file:
+            events = json.load(file)['traceEvents']
+        self.assertEqual(len(events), 2)
+        self.assertTrue(all(event['ph'] == 'X' and event['name'] == 'square' for event in events))
+        self.assertEqual(events[1]['args']['rows'], 5)
+
+        path = os.path.join(self.tmp_dir.name, 'trace.jsonl')
+        recorder.write_trace(path)
+        with open(path) as file:
+            self.assertListEqual([json.loads(line)['args']['value'] for line in file], [4, 5])
+
+    def test_profiles_and_merge(self):
+        recorder = instrumentation.enable(profile=True)
+        square(3)
+        worker_result, exported = instrumentation.call_traced(True, square, 6)
+        self.assertIs(instrumentation.active(), recorder)
+        self.assertEqual(worker_result, 36)
+        self.assertEqual(len(recorder.spans), 1)
+
+        recorder.merge(exported)
+        self.assertEqual(recorder.summary()[0]['calls'], 2)
+        paths = recorder.dump_profiles(self.tmp_dir.name)
+        self.assertListEqual([os.path.basename(path) for path in paths], ['square.prof'])
+        calls = [stats[1] for function, stats in pstats.Stats(paths[0]).stats.items() if function[2] == 'square']
+        self.assertListEqual(calls, [2])
+
+
+class TestInstrumentedPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.recorder = instrumentation.enable()
+
+    def tearDown(self):
+        instrumentation.disable()
+        self.tmp_dir.cleanup()
+
+    def test_fetch_bytes_and_cache_hits(self):
+        cache = ResponseCache(os.path.join(self.tmp_dir.name, 'cache'))
+        with StubAlphaVantageServer(compact_bars=10) as stub, \
+                AlphaVantageAPI('demo', cache=cache, base_url=stub.url) as api:
+            api.get_weekly_stock_data('IBM')
+            api.get_weekly_stock_data('IBM')
+
+        fetch = self.recorder.summary()[0]
+        self.assertEqual((fetch['stage'], fetch['calls'], fetch['cache_hits']), ('fetch', 2, 1))
+        self.assertGreater(fetch['bytes'], 0)
+        self.assertDictEqual(self.recorder.spans[0]['args'], {'function': 'TIME_SERIES_WEEKLY', 'symbol': 'IBM'})
+
+    def test_batch_collects_worker_spans(self):
+        results = run_batch(FakeAPI(), ['IBM'], self.tmp_dir.name, fetch_workers=1, render_workers=1)
+
+        self.assertEqual(results[0]['status'], 'ok')
+        summary = {total['stage']: total for total in self.recorder.summary()}
+        self.assertEqual(summary['clean']['calls'], 3)
+        self.assertEqual(summary['clean']['rows'], 60)
+        self.assertEqual(summary['plot']['calls'], 3)
+        self.assertEqual(summary['pdf']['bytes'], os.path.getsize(results[0]['report']))
+
+
+if __name__ == '__main__':
+    unittest.main()
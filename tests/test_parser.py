@@ -0,0 +1,86 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from src.api.parser import iter_csv_blocks, parse_time_series, series_key
+from src.utils.synthetic import scale_time_series
+
+
+class TestParseTimeSeries(unittest.TestCase):
+
+    def setUp(self):
+        self.series = {
+            '2024-01-30': {'1. open': '406.0600', '2. high': '413.0500', '3. low': '404.3300', '4. close': '408.5900', '5. volume': '57987846'},
+            '2024-01-26': {'1. open': '400.0200', '2. high': '407.0100', '3. low': '393.5900', '4. close': '403.9300', '5. volume': '109649099'},
+            '2024-01-19': {'1. open': '393.6600', '2. high': '398.6700', '3. low': '384.8100', '4. close': '398.6700', '5. volume': '102159580'},
+        }
+
+    def test_typed_columns(self):
+        df = parse_time_series(self.series)
+        self.assertListEqual(['open', 'high', 'low', 'close', 'volume'], list(df.columns))
+        self.assertTrue(all(df[column].dtype == np.float64 for column in ['open', 'high', 'low', 'close']))
+        self.assertEqual(df['volume'].dtype, np.int64)
+        self.assertIsInstance(df.index, pd.DatetimeIndex)
+
+    def test_sorted_ascending(self):
+        df = parse_time_series(self.series)
+        self.assertTrue(df.index.is_monotonic_increasing)
+        self.assertEqual(df['close'].iloc[-1], 408.59)
+        self.assertEqual(df['volume'].iloc[0], 102159580)
+
+    def test_unordered_input(self):
+        keys = ['2024-01-26', '2024-01-30', '2024-01-19']
+        df = parse_time_series({key: self.series[key] for key in keys})
+        self.assertListEqual([398.67, 403.93, 408.59], df['close'].tolist())
+
+    def test_empty_series(self):
+        self.assertEqual(len(parse_time_series({})), 0)
+
+    def test_series_key(self):
+        self.assertEqual(series_key('TIME_SERIES_INTRADAY', '60min'), 'Time Series (60min)')
+        with self.assertRaises(ValueError):
+            series_key('OVERVIEW')
+
+    def test_scale_time_series(self):
+        recorded = parse_time_series(self.series)
+        scaled = parse_time_series(scale_time_series(self.series, 7, freq='W-FRI'))
+
+        self.assertEqual(len(scaled), 7)
+        self.assertEqual(scaled.index[-1], pd.Timestamp('2024-01-26'))
+        self.assertAlmostEqual(scaled['close'].iloc[-1], recorded['close'].iloc[-1], places=3)
+        # Bar-to-bar moves of the recording are replayed in a cycle.
+        np.testing.assert_allclose(scaled['close'].pct_change().iloc[1:4].to_numpy(),
+                                   scaled['close'].pct_change().iloc[4:7].to_numpy(), rtol=1e-4)
+        self.assertListEqual(scaled['volume'].tolist()[:3], recorded['volume'].tolist())
+
+
+
+class TestIterCsvBlocks(unittest.TestCase):
+
+    def setUp(self):
+        self.body = (b"timestamp,open,high,low,close,volume\r\n"
+                     b"2024-01-31 19:59:00,1.5,1.75,1.25,1.5,100\r\n"
+                     b"2024-01-31 19:58:00,1.25,1.5,1.0,1.25,200\r\n")
+
+    def chunks(self, size):
+        return [self.body[start:start + size] for start in range(0, len(self.body), size)]
+
+    def test_any_chunk_size(self):
+        for size in (1, 7, len(self.body)):
+            blocks = list(iter_csv_blocks(self.chunks(size)))
+            close = np.concatenate([block['close'] for block in blocks])
+            self.assertListEqual([1.5, 1.25], close.tolist(), size)
+
+    def test_typed_columns(self):
+        block, = iter_csv_blocks([self.body])
+        self.assertEqual(block['volume'].dtype, np.int64)
+        self.assertEqual(block['high'].dtype, np.float64)
+        self.assertEqual(pd.Timestamp(block['timestamp'][1]), pd.Timestamp('2024-01-31 19:58'))
+
+    def test_missing_column(self):
+        with self.assertRaises(ValueError):
+            list(iter_csv_blocks([b"timestamp,open\n2024-01-31,1.0\n"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+
+from src.api.parser import parse_time_series
+from src.core.batch import format_summary
+from src.core.fundamentals import FundamentalsStore
+from src.core.pipeline import build_report, fetch_symbol, render_report, run_batch
+from src.utils import instrumentation
+from src.utils.synthetic import make_time_series
+
+
+def make_series(periods: int, freq: str) -> pd.DataFrame:
+    dates = pd.date_range(end='2024-01-31', periods=periods, freq=freq)[::-1]
+    close = [f"{100 + i:.4f}" for i in range(periods)]
+    return pd.DataFrame({'1. open': close, '2. high': close, '3. low': close, '4. close': close,
+                         '5. volume': ['1000'] * periods}, index=dates.strftime('%Y-%m-%d %H:%M:%S'))
+
+
+class FakeAPI:
+
+    overview_keys = ['MarketCapitalization', 'EPS', 'PERatio', 'RevenueTTM', 'GrossProfitTTM', 'OperatingMarginTTM',
+                     'ReturnOnEquityTTM', 'RevenuePerShareTTM', 'ProfitMargin', 'BookValue', 'DividendYield']
+
+    REPORT_FUNCTIONS = ('TIME_SERIES_INTRADAY', 'TIME_SERIES_WEEKLY', 'TIME_SERIES_MONTHLY', 'OVERVIEW')
+
+    def __init__(self):
+        self.calls = []
+
+    def fetch_many(self, symbol, functions=REPORT_FUNCTIONS, outputsizes=None):
+        if symbol == 'BAD':
+            raise ValueError("Invalid symbol please use a correct ticker symbol.")
+        self.calls.append((tuple(functions), outputsizes))
+        overview = {key: '1' for key in self.overview_keys}
+        overview.update({'Symbol': symbol, 'Name': symbol, 'Description': 'Test company'})
+        datasets = {
+            'TIME_SERIES_INTRADAY': make_series(20, 'H'),
+            'TIME_SERIES_DAILY': parse_time_series(make_time_series(300, 'B')),
+            'TIME_SERIES_WEEKLY': make_series(20, 'W'),
+            'TIME_SERIES_MONTHLY': make_series(20, 'M'),
+            'OVERVIEW': overview,
+        }
+        return {function: datasets[function] for function in functions}
+
+
+class TestRunBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_bad_ticker_does_not_abort_batch(self):
+        results = run_batch(FakeAPI(), ['ibm', 'BAD', 'IBM'], self.tmp_dir.name, fetch_workers=2, render_workers=1)
+
+        self.assertListEqual(['IBM', 'BAD'], [result['symbol'] for result in results])
+        self.assertEqual(results[0]['status'], 'ok')
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir.name, 'IBM', 'report.pdf')))
+        self.assertEqual(results[1]['status'], 'failed')
+        self.assertIn('Invalid symbol', results[1]['error'])
+        self.assertIn('1/2 reports generated successfully.', format_summary(results))
+
+    def test_portfolio_report(self):
+        results = run_batch(FakeAPI(), ['IBM', 'MSFT', 'BAD'], self.tmp_dir.name, render_workers=1,
+                            portfolio='weekly', benchmark='SPY')
+
+        self.assertListEqual([result['symbol'] for result in results], ['IBM', 'MSFT', 'BAD', 'PORTFOLIO'])
+        self.assertEqual(results[-1]['status'], 'ok', results[-1]['error'])
+        with open(results[-1]['report'], 'rb') as file:
+            self.assertEqual(file.read(4), b'%PDF')
+        self.assertIn('3/4 reports generated successfully.', format_summary(results))
+
+    def test_anomaly_stage(self):
+        results = run_batch(FakeAPI(), ['IBM'], self.tmp_dir.name, render_workers=1, derive_timeframes=True,
+                            anomalies=True)
+        self.assertEqual(results[0]['status'], 'ok', results[0]['error'])
+
+
+class TestRenderReport(unittest.TestCase):
+
+    def test_render_to_bytes(self):
+        datasets = FakeAPI().fetch_many('IBM')
+        self.assertTrue(render_report('IBM', datasets, indicators=['sma:3']).startswith(b'%PDF'))
+
+
+class TestIncrementalBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.datasets = FakeAPI().fetch_many('IBM')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def build(self, datasets, **options):
+        recorder = instrumentation.enable()
+        try:
+            path = build_report('IBM', datasets, self.tmp_dir.name, **options)
+        finally:
+            instrumentation.disable()
+        stages = {row['stage']: row for row in recorder.summary()}
+        return path, stages
+
+    def test_unchanged_inputs_cost_a_hash_check(self):
+        path, stages = self.build(self.datasets)
+        self.assertEqual(stages['plot']['calls'], 3)
+        modified = os.path.getmtime(path)
+
+        _, stages = self.build(self.datasets)
+        self.assertListEqual(list(stages), ['manifest'])
+        self.assertEqual(stages['manifest']['cache_hits'], 1)
+        self.assertEqual(os.path.getmtime(path), modified)
+
+        _, stages = self.build(self.datasets, force=True)
+        self.assertEqual((stages['plot']['calls'], stages['plot']['cache_hits']), (3, 0))
+        self.assertIn('pdf', stages)
+
+    def test_only_changed_plots_are_redrawn(self):
+        self.build(self.datasets)
+
+        # A bar older than the plotted window: the inputs differ, every plot and the PDF do not.
+        weekly = self.datasets['TIME_SERIES_WEEKLY'].copy()
+        weekly.iloc[-1, 3] = '50.0000'
+        _, stages = self.build(dict(self.datasets, TIME_SERIES_WEEKLY=weekly))
+        self.assertEqual(stages['plot']['cache_hits'], 3)
+        self.assertNotIn('pdf', stages)
+
+        # The latest weekly bar: only the weekly plot and the PDF are rebuilt.
+        weekly.iloc[0, 3] = '150.0000'
+        _, stages = self.build(dict(self.datasets, TIME_SERIES_WEEKLY=weekly))
+        self.assertEqual(stages['plot']['cache_hits'], 2)
+        self.assertIn('pdf', stages)
+        self.assertEqual(len(os.listdir(os.path.join(self.tmp_dir.name, '.artifacts'))), 3)
+
+        # Overview fields the report does not show do not trigger a rebuild.
+        overview = dict(self.datasets['OVERVIEW'], LatestQuarter='2024-03-31')
+        _, stages = self.build(dict(self.datasets, TIME_SERIES_WEEKLY=weekly, OVERVIEW=overview))
+        self.assertListEqual(list(stages), ['manifest'])
+
+
+class TestFetchSymbol(unittest.TestCase):
+
+    def test_derive_timeframes(self):
+        api = FakeAPI()
+        datasets = fetch_symbol(api, 'IBM', derive_timeframes=True)
+
+        self.assertListEqual([(('TIME_SERIES_DAILY', 'OVERVIEW'), {'TIME_SERIES_DAILY': 'full'})], api.calls)
+        self.assertEqual(datasets['TIME_SERIES_WEEKLY']['volume'].sum(), datasets['TIME_SERIES_DAILY']['volume'].sum())
+        self.assertEqual(datasets['TIME_SERIES_MONTHLY'].index[-1], pd.Timestamp('2024-01-31'))
+
+    def test_overview_served_from_fundamentals_store(self):
+        api = FakeAPI()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            fundamentals = FundamentalsStore(tmp_dir)
+            first = fetch_symbol(api, 'IBM', derive_timeframes=True, fundamentals=fundamentals)
+            second = fetch_symbol(api, 'IBM', derive_timeframes=True, fundamentals=fundamentals)
+
+        self.assertListEqual([functions for functions, _ in api.calls],
+                             [('TIME_SERIES_DAILY', 'OVERVIEW'), ('TIME_SERIES_DAILY',)])
+        self.assertDictEqual(first['OVERVIEW'], second['OVERVIEW'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import io
+import unittest
+import numpy as np
+import pandas as pd
+
+from reportlab.graphics.shapes import Drawing
+
+from src.core.plot_renderer import PlotRenderer, default_renderer
+
+
+class TestPlotRenderer(unittest.TestCase):
+
+    def setUp(self):
+        self.dates = pd.date_range(start='2024-01-01', periods=11, freq='D')
+        self.close = np.linspace(100, 110, 11)
+        self.overlays = {'sma_3': pd.Series(self.close).rolling(3).mean().to_numpy()}
+        self.secondary = {'rsi_3': np.linspace(30, 70, 11)}
+        self.marks = (self.dates[[2, 5]], self.close[[2, 5]])
+
+    def test_figure_template_is_reused(self):
+        renderer = PlotRenderer(dpi=50)
+        first = renderer.draw('Test', self.dates, self.close, self.overlays, self.secondary, self.marks)
+        self.assertEqual(len(first.axes), 2)
+        second = renderer.draw('Test', self.dates, self.close)
+        self.assertIs(first, second)
+        self.assertEqual(len(second.axes), 1)
+        self.assertEqual(len(second.axes[0].lines), 1)
+
+    def test_save_to_buffer(self):
+        renderer = PlotRenderer(dpi=50)
+        renderer.draw('Test', self.dates, self.close, self.overlays)
+        buffer = io.BytesIO()
+        renderer.save(buffer)
+        self.assertTrue(buffer.getvalue().startswith(b'\x89PNG'))
+
+    def test_vector_drawing(self):
+        drawing = PlotRenderer.drawing('Test', self.dates, self.close, self.overlays, self.secondary, self.marks)
+        self.assertIsInstance(drawing, Drawing)
+        # NaN values of the moving average are left out of the drawing.
+        self.assertEqual(len(drawing.contents[1].data[1]), 9)
+
+    def test_default_renderer_per_thread(self):
+        self.assertIs(default_renderer(), default_renderer())
+        self.assertEqual(default_renderer(dpi=72).dpi, 72)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import asyncio
+import io
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.api.alpha_vantage import AlphaVantageAPI
+from src.service.report_service import AsyncMemo, ReportService
+from src.utils.stub_server import StubAlphaVantageServer
+
+
+class TestAsyncMemo(unittest.IsolatedAsyncioTestCase):
+
+    async def test_concurrent_calls_share_one_computation(self):
+        memo, calls = AsyncMemo(), []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 'value'
+
+        results = await asyncio.gather(*(memo.get('key', compute) for _ in range(5)))
+        self.assertListEqual(results, ['value'] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(await memo.get('key', compute), 'value')
+        self.assertDictEqual(memo.stats(), {'entries': 1, 'in_flight': 0, 'hits': 1, 'misses': 1, 'coalesced': 4})
+
+    async def test_bounded_and_expiring(self):
+        now = [0.0]
+        memo = AsyncMemo(max_entries=2, ttl=10, clock=lambda: now[0])
+
+        async def value(result):
+            return result
+
+        for key in ('a', 'b', 'c'):
+            await memo.get(key, lambda key=key: value(key))
+        self.assertListEqual(list(memo._entries), ['b', 'c'])
+
+        now[0] = 11
+        self.assertEqual(await memo.get('b', lambda: value('fresh')), 'fresh')
+
+    async def test_failures_are_not_memoized(self):
+        memo = AsyncMemo()
+
+        async def fail():
+            raise ValueError('boom')
+
+        with self.assertRaises(ValueError):
+            await memo.get('key', fail)
+        self.assertEqual(memo.stats()['entries'], 0)
+
+
+class TestReportService(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.stub = StubAlphaVantageServer(compact_bars=30).start()
+        self.api = AlphaVantageAPI('demo', base_url=self.stub.url)
+        self.service = ReportService(self.api, executor=ThreadPoolExecutor(max_workers=2))
+        self.client = TestClient(TestServer(self.service.app()))
+        await self.client.start_server()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        self.service.close()
+        self.api.close()
+        self.stub.stop()
+
+    async def test_concurrent_reports_coalesce(self):
+        responses = await asyncio.gather(*(self.client.get('/reports/ibm.pdf') for _ in range(5)))
+        for response in responses:
+            self.assertEqual(response.status, 200)
+            self.assertEqual(response.content_type, 'application/pdf')
+            self.assertTrue((await response.read()).startswith(b'%PDF'))
+        # One fetch of the four report datasets served all five requests.
+        self.assertEqual(len(self.stub.requests), 4)
+        self.assertEqual(self.service.renders_memo.stats()['misses'], 1)
+
+    async def test_series_and_plots(self):
+        response = await self.client.get('/series/IBM/weekly.json')
+        records = await response.json()
+        self.assertEqual(len(records), 30)
+        self.assertSetEqual(set(records[0]), {'date', 'stock_price', 'open', 'high', 'low', 'volume'})
+
+        response = await self.client.get('/series/IBM/daily.csv')
+        frame = pd.read_csv(io.StringIO(await response.text()))
+        self.assertTrue(pd.to_datetime(frame['date']).is_monotonic_increasing)
+
+        response = await self.client.get('/plots/IBM/monthly.png', params={'indicators': 'sma:3'})
+        self.assertTrue((await response.read()).startswith(b'\x89PNG'))
+        self.assertEqual(len(self.stub.requests), 4)
+
+    async def test_errors(self):
+        response = await self.client.get('/reports/BAD.pdf')
+        self.assertEqual(response.status, 404)
+        self.assertIn('Invalid symbol', (await response.json())['error'])
+
+        response = await self.client.get('/plots/IBM/yearly.png')
+        self.assertEqual(response.status, 404)
+
+        response = await self.client.get('/reports/IBM.pdf', params={'indicators': 'ichimoku'})
+        self.assertEqual(response.status, 400)
+
+    async def test_upstream_failures(self):
+        self.stub.inject(status=503)
+        response = await self.client.get('/reports/IBM.pdf')
+        self.assertEqual(response.status, 502)
+        self.assertIn('503', (await response.json())['error'])
+
+        self.stub.inject(payload={"Note": "Thank you for using Alpha Vantage! Our standard API call frequency is "
+                                          "5 calls per minute."})
+        response = await self.client.get('/reports/IBM.pdf')
+        self.assertEqual(response.status, 429)
+        self.assertIn('call frequency', (await response.json())['error'])
+
+        # Failures are not memoized: the next request is served.
+        response = await self.client.get('/reports/IBM.pdf')
+        self.assertEqual(response.status, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
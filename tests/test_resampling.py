@@ -0,0 +1,47 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from src.api.parser import parse_time_series
+from src.core.resampling import resample_ohlcv
+from src.utils.synthetic import make_time_series
+
+
+class TestResampleOHLCV(unittest.TestCase):
+
+    def setUp(self):
+        self.daily = parse_time_series(make_time_series(400, 'B', end='2024-01-31'))
+
+    def expected(self, rule: str) -> pd.DataFrame:
+        grouped = self.daily.groupby(self.daily.index.to_period(rule))
+        expected = grouped.agg({'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'})
+        expected.index = self.daily.index.to_series().groupby(self.daily.index.to_period(rule)).max().values
+        return expected
+
+    def test_weekly_matches_groupby(self):
+        pd.testing.assert_frame_equal(resample_ohlcv(self.daily, 'W'), self.expected('W-FRI'), check_names=False,
+                                      check_freq=False)
+
+    def test_monthly_matches_groupby(self):
+        monthly = resample_ohlcv(self.daily, 'M')
+        pd.testing.assert_frame_equal(monthly, self.expected('M'), check_names=False, check_freq=False)
+        # Bars are labelled with the last trading day of the month.
+        self.assertEqual(monthly.index[-1], pd.Timestamp('2024-01-31'))
+        self.assertEqual(monthly['volume'].dtype, np.int64)
+
+    def test_multiple_and_custom_boundaries(self):
+        quarterly = resample_ohlcv(self.daily, 'Q')
+        two_quarters = resample_ohlcv(self.daily, '2Q')
+        self.assertEqual(two_quarters['volume'].sum(), quarterly['volume'].sum())
+        self.assertLess(len(two_quarters), len(quarterly))
+
+        custom = resample_ohlcv(self.daily, ['2023-06-30', '2024-12-31'])
+        self.assertEqual(len(custom), 2)
+        self.assertEqual(custom['high'].iloc[-1], self.daily.loc['2023-07-01':, 'high'].max())
+
+    def test_empty_frame(self):
+        self.assertEqual(len(resample_ohlcv(self.daily.iloc[:0], 'W')), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
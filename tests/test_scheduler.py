@@ -0,0 +1,147 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from src.api.alpha_vantage import AlphaVantageAPI
+from src.api.exceptions import RateLimitError
+from src.api.scheduler import Priority, RequestScheduler, TokenBucket
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_refill(self):
+        now = [0.0]
+        bucket = TokenBucket(2, 60.0, clock=lambda: now[0])
+        bucket.consume()
+        bucket.consume()
+        self.assertAlmostEqual(bucket.time_until_available(), 30.0)
+
+        now[0] = 30.0
+        self.assertEqual(bucket.time_until_available(), 0.0)
+
+
+class TestRequestScheduler(unittest.TestCase):
+
+    def test_interactive_requests_go_first(self):
+        scheduler = RequestScheduler(calls_per_minute=600, calls_per_day=None)
+        scheduler.minute_bucket = TokenBucket(1, 0.2)
+        scheduler.submit(lambda: None)
+        order = []
+
+        batch = threading.Thread(target=scheduler.submit, args=(order.append, 'batch'), kwargs={'priority': Priority.BATCH})
+        batch.start()
+        time.sleep(0.05)
+        interactive = threading.Thread(target=scheduler.submit, args=(order.append, 'interactive'))
+        interactive.start()
+        batch.join()
+        interactive.join()
+
+        self.assertListEqual(['interactive', 'batch'], order)
+
+    def test_throttled_call_is_retried(self):
+        delays = []
+        scheduler = RequestScheduler(calls_per_minute=600, calls_per_day=None, sleep=delays.append)
+        scheduler.minute_bucket = TokenBucket(100, 0.01)
+        responses = [RateLimitError("Note"), RateLimitError("Note"), {"ok": True}]
+
+        def call():
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        self.assertEqual(scheduler.submit(call), {"ok": True})
+        self.assertEqual(scheduler.stats()['retries'], 2)
+        self.assertTrue(1.0 <= delays[0] <= 2.0)
+        self.assertTrue(2.0 <= delays[1] <= 4.0)
+
+    def test_daily_budget_exhausted(self):
+        scheduler = RequestScheduler(calls_per_minute=600, calls_per_day=1)
+        scheduler.submit(lambda: None)
+        with self.assertRaises(RateLimitError) as context:
+            scheduler.submit(lambda: None)
+        self.assertTrue(context.exception.daily)
+
+    def test_remaining(self):
+        self.assertIsNone(RequestScheduler(calls_per_day=None).remaining())
+        scheduler = RequestScheduler(calls_per_minute=600, calls_per_day=240)
+        scheduler.submit(lambda: None)
+        self.assertAlmostEqual(scheduler.remaining(), 239, places=2)
+        # The daily bucket refills 10 calls an hour.
+        self.assertAlmostEqual(scheduler.remaining(3600), 249, places=2)
+
+    def test_daily_budget_survives_restart(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'scheduler.json')
+            scheduler = RequestScheduler(calls_per_minute=600, calls_per_day=240, state_path=path)
+            for _ in range(3):
+                scheduler.submit(lambda: None)
+
+            restarted = RequestScheduler(calls_per_minute=600, calls_per_day=240, state_path=path)
+            self.assertAlmostEqual(restarted.remaining(), 237, places=2)
+
+            # Time passed while no process was running refills the bucket.
+            with patch('src.api.scheduler.time.time', return_value=time.time() + 3600):
+                later = RequestScheduler(calls_per_minute=600, calls_per_day=240, state_path=path)
+            self.assertAlmostEqual(later.remaining(), 240, places=2)
+
+            with open(path, 'w') as file:
+                file.write('not json')
+            self.assertAlmostEqual(RequestScheduler(calls_per_day=240, state_path=path).remaining(), 240, places=2)
+
+    def test_state_is_written_outside_the_lock(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            scheduler = RequestScheduler(calls_per_minute=600, calls_per_day=240,
+                                         state_path=os.path.join(tmp_dir, 'scheduler.json'))
+            free = []
+
+            def try_lock():
+                free.append(scheduler._condition.acquire(blocking=False))
+                if free[-1]:
+                    scheduler._condition.release()
+
+            def dump(state, file):
+                # Another thread can take the lock while the file is written.
+                thread = threading.Thread(target=try_lock)
+                thread.start()
+                thread.join()
+                file.write('{}')
+
+            with patch('src.api.scheduler.json.dump', side_effect=dump):
+                scheduler.submit(lambda: None)
+            self.assertListEqual(free, [True])
+
+
+class TestThrottleDetection(unittest.TestCase):
+
+    def setUp(self):
+        self.api = AlphaVantageAPI(api_key='demo')
+
+    def tearDown(self):
+        self.api.close()
+
+    @patch('requests.Session.get')
+    def test_throttle_is_not_reported_as_invalid_symbol(self, mock_get):
+        mock_get.return_value.json.return_value = {
+            "Information": "Our standard API rate limit is 25 requests per day."
+        }
+        with self.assertRaises(RateLimitError) as context:
+            self.api.get_daily_stock_data('IBM')
+        self.assertTrue(context.exception.daily)
+
+    @patch('requests.Session.get')
+    def test_throttled_call_retried_through_scheduler(self, mock_get):
+        self.api.scheduler = RequestScheduler(calls_per_minute=600, calls_per_day=None, sleep=lambda delay: None)
+        self.api.scheduler.minute_bucket = TokenBucket(100, 0.01)
+        mock_get.return_value.json.side_effect = [
+            {"Note": "Thank you for using Alpha Vantage! Our standard API call frequency is 5 calls per minute."},
+            {"Symbol": "IBM"},
+        ]
+        self.assertEqual(self.api.get_company_overview_data('IBM'), {"Symbol": "IBM"})
+
+
+if __name__ == '__main__':
+    unittest.main()
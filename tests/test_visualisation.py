@@ -1,8 +1,14 @@
+import io
+import os
+import re
+import tempfile
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch
 import pandas as pd
+from reportlab.graphics.shapes import Drawing
 
-from src.core.report_generator import ReportGenerator
+from src.core.report_generator import ConsolidatedReport, ReportGenerator
 
 class TestReportGenerator(unittest.TestCase):
 
@@ -66,14 +72,120 @@ class TestReportGenerator(unittest.TestCase):
         for data in [self.generator.monthly_data, self.generator.weekly_data, self.generator.daily_data]:
             self.assertTrue(data['date'].is_monotonic_increasing, "Data should be sorted by date")
     
-    @patch('matplotlib.pyplot')
-    def test_plot_line(self, mocked_plt):
-        # Test plot generation doesn't raise errors
+    def test_plot_line(self):
+        # The plot is kept in memory: PNG bytes, or a drawing with vector plots
+        self.generator.plot_line(symbol='TEST', time_period='W')
+        self.assertListEqual(list(self.generator.plots), ['Weekly'])
+        self.assertTrue(self.generator.plots['Weekly'].startswith(b'\x89PNG'))
+
+        generator = ReportGenerator(self.company_info, self.monthly_data, self.weekly_data, self.daily_data,
+                                    vector_plots=True)
+        generator.plot_line(symbol='TEST', time_period='W')
+        self.assertIsInstance(generator.plots['Weekly'], Drawing)
+    
+    def test_plot_line_with_indicators(self):
         try:
-            self.generator.plot_line(symbol='TEST', time_period='W')
+            self.generator.plot_line(symbol='TEST', time_period='M', indicators=['sma:3', 'bollinger:3,2', 'rsi:3'])
         except Exception as e:
             self.fail(f"plot_line raised an exception {e}")
-    
+
+    def test_indicators_use_full_history(self):
+        values = self.generator.indicator_values('M', ['sma:3'])
+        self.assertEqual(len(values), len(self.monthly_data))
+        self.assertEqual(values['sma_3'].iloc[-1], 10.0)
+
+    def test_anomaly_rows(self):
+        anomalies = pd.DataFrame({'date': self.daily_data['date'].iloc[[3, 8]], 'kind': ['return_zscore', 'volume_spike'],
+                                  'value': [0.05, 25000.0], 'score': [4.2, 5.0]})
+        generator = ReportGenerator(self.company_info, self.monthly_data, self.weekly_data, self.daily_data,
+                                    anomalies={'D': anomalies})
+        rows = generator.anomaly_rows()
+        self.assertListEqual(rows[1], ['2020-01-09 00:00', 'Daily (Hrs)', 'volume_spike', '25,000', '5.00'])
+        self.assertListEqual(rows[2], ['2020-01-04 00:00', 'Daily (Hrs)', 'return_zscore', '+5.00%', '4.20'])
+        generator.plot_line(symbol='TEST')
+
+    def test_vector_plots(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            generator = ReportGenerator(self.company_info, self.monthly_data, self.weekly_data, self.daily_data,
+                                        output_dir=tmp_dir, vector_plots=True)
+            for time_period in ('D', 'W', 'M'):
+                generator.plot_line(symbol='TEST', time_period=time_period, indicators=['sma:3', 'rsi:3'])
+            self.assertTrue(generator.generate_pdf_report().startswith(b'%PDF'))
+            self.assertListEqual(os.listdir(tmp_dir), [])
+        self.assertSetEqual(set(generator.plots), {'Daily (Hrs)', 'Weekly', 'Monthly'})
+
+    def test_report_in_memory(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            generator = ReportGenerator(self.company_info, self.monthly_data, self.weekly_data, self.daily_data,
+                                        output_dir=tmp_dir)
+            generator.plot_line(symbol='TEST')
+            self.assertTrue(generator.plots['Daily (Hrs)'].startswith(b'\x89PNG'))
+
+            pdf = generator.generate_pdf_report()
+            stream = io.BytesIO()
+            self.assertIsNone(generator.generate_pdf_report(stream))
+            self.assertListEqual(os.listdir(tmp_dir), [])
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        self.assertTrue(stream.getvalue().startswith(b'%PDF'))
+
+    def test_time_range(self):
+        daily = pd.DataFrame({'date': pd.date_range('2000-01-03', periods=20000, freq='h'),
+                              'stock_price': range(20000)}).iloc[::-1]
+        generator = ReportGenerator(self.company_info, self.monthly_data, self.weekly_data, daily,
+                                    time_range='2001-01-01:2001-03-31', max_points=200)
+        self.assertEqual(generator.daily_data['date'].iloc[0], pd.Timestamp('2001-01-01'))
+        self.assertEqual(generator.daily_data['date'].iloc[-1], pd.Timestamp('2001-03-31'))
+        self.assertEqual(len(generator.daily_data), 89 * 24 + 1)
+        self.assertEqual(len(generator.monthly_data), 0)
+
+        with patch.object(generator.renderer, 'draw', wraps=generator.renderer.draw) as draw:
+            generator.plot_line(symbol='TEST', indicators=['sma:24'])
+        dates, close, overlays = draw.call_args[0][1:4]
+        self.assertEqual(len(dates), 200)
+        self.assertEqual(len(overlays['sma_24']), 200)
+        self.assertEqual(dates.iloc[-1], pd.Timestamp('2001-03-31'))
+        # The overlay stays aligned with the close prices it was computed from.
+        self.assertEqual(overlays['sma_24'][-1], close[-1] - 11.5)
+
+    def test_concurrent_reports(self):
+        def render(symbol):
+            generator = ReportGenerator(self.company_info, self.monthly_data, self.weekly_data, self.daily_data)
+            for time_period in ('D', 'W', 'M'):
+                generator.plot_line(symbol=symbol, time_period=time_period)
+            return generator.generate_pdf_report()
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            reports = list(pool.map(render, ['A', 'B', 'C', 'D']))
+        self.assertTrue(all(report.startswith(b'%PDF') for report in reports))
+
+    def test_consolidated_report(self):
+        self.generator.plot_line(symbol='TEST')
+        section = self.generator.section()
+        stream = io.BytesIO()
+        report = ConsolidatedReport(stream, ['A', 'B', 'C'], title='Watchlist')
+        self.assertEqual(report.build(iter([('A', section), ('B', 'fetch: Invalid symbol'), ('C', section)])), 6)
+        self.assertDictEqual(report.pages, {'A': 2, 'C': 4, 'B': 6})
+
+        pdf = stream.getvalue()
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        self.assertEqual(pdf.count(b'/Type /Page\n'), 6)
+        # A bookmark per section and a contents link to each of them.
+        self.assertListEqual(re.findall(rb'/Title \(([^)]*)\)', pdf)[1:], [b'A', b'C', b'B \\(missing\\'])
+        self.assertEqual(pdf.count(b'/Subtype /Link'), 3)
+
+    def test_consolidated_report_failure_leaves_no_file(self):
+        self.generator.plot_line(symbol='TEST')
+
+        def sections():
+            yield 'A', self.generator.section()
+            raise RuntimeError("render worker died")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'report.pdf')
+            with self.assertRaises(RuntimeError):
+                ConsolidatedReport(path, ['A', 'B']).build(sections())
+            self.assertListEqual(os.listdir(tmp_dir), [])
+
     @patch('os.path.exists', return_value=True)
     def test_generate_pdf_report(self, mocked_exists):
         # Test PDF generation doesn't raise errors
@@ -0,0 +1,225 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.api.parser import parse_time_series
+from src.core.history_store import HistoryStore
+from src.core.indicators import IndicatorEngine
+from src.core.watch import MarketHours, Watcher, new_bars, poll_interval
+from src.utils import instrumentation
+from src.utils.synthetic import make_time_series
+
+
+def make_bars(periods: int, end: str) -> pd.DataFrame:
+    close = 100 + np.cumsum(np.random.default_rng(0).normal(0, 0.5, periods))
+    return pd.DataFrame({'open': close, 'high': close + 0.5, 'low': close - 0.5, 'close': close,
+                         'volume': np.full(periods, 1000, dtype=np.int64)},
+                        index=pd.date_range(end=end, periods=periods, freq='h'))
+
+
+# Bars of the fake intraday history, the last of which is at 2024-01-31 15:00.
+BARS = make_bars(300, '2024-01-31 15:00')
+
+
+class FakeAPI:
+
+    overview_keys = ['MarketCapitalization', 'EPS', 'PERatio', 'RevenueTTM', 'GrossProfitTTM', 'OperatingMarginTTM',
+                     'ReturnOnEquityTTM', 'RevenuePerShareTTM', 'ProfitMargin', 'BookValue', 'DividendYield']
+
+    REPORT_FUNCTIONS = ('TIME_SERIES_INTRADAY', 'TIME_SERIES_WEEKLY', 'TIME_SERIES_MONTHLY', 'OVERVIEW')
+
+    def __init__(self, visible: int = 250):
+        self.visible = visible
+        # Close of the still-forming last bar, if it has moved since it was first seen.
+        self.forming_close = None
+        self.fetches = []
+        self.polls = []
+
+    def fetch_many(self, symbol, functions=REPORT_FUNCTIONS, outputsizes=None):
+        self.fetches.append(symbol)
+        if symbol == 'BAD':
+            raise ValueError("Invalid symbol please use a correct ticker symbol.")
+        datasets = {
+            'TIME_SERIES_INTRADAY': BARS.iloc[:self.visible],
+            'TIME_SERIES_WEEKLY': parse_time_series(make_time_series(30, 'W-FRI', end='2024-01-26')),
+            'TIME_SERIES_MONTHLY': parse_time_series(make_time_series(30, 'M', end='2023-12-31')),
+            'OVERVIEW': {**dict.fromkeys(self.overview_keys, '1'), 'Symbol': symbol, 'Name': symbol,
+                         'Description': 'Test company'},
+        }
+        return {function: datasets[function] for function in functions}
+
+    def get_daily_stock_data(self, symbol, outputsize='compact'):
+        self.polls.append(symbol)
+        if symbol == 'OFFLINE':
+            raise ConnectionError("Connection refused")
+        bars = BARS.iloc[max(0, self.visible - 100):self.visible].copy()
+        if self.forming_close is not None:
+            bars.iloc[-1, bars.columns.get_loc('close')] = self.forming_close
+        return bars
+
+
+class TestMarketHours(unittest.TestCase):
+
+    def setUp(self):
+        self.hours = MarketHours()
+
+    def test_sessions(self):
+        # 2024-01-31 is a Wednesday; New York is UTC-5 in winter.
+        self.assertTrue(self.hours.is_open(pd.Timestamp('2024-01-31 14:30', tz='UTC')))
+        self.assertFalse(self.hours.is_open(pd.Timestamp('2024-01-31 14:29', tz='UTC')))
+        self.assertFalse(self.hours.is_open(pd.Timestamp('2024-01-31 21:00', tz='UTC')))
+        self.assertFalse(self.hours.is_open(pd.Timestamp('2024-02-03 15:00', tz='UTC')))
+        # Summer time, UTC-4.
+        self.assertTrue(self.hours.is_open(pd.Timestamp('2024-07-01 13:30', tz='UTC')))
+
+    def test_next_and_last(self):
+        saturday = pd.Timestamp('2024-02-03 12:00', tz='UTC')
+        self.assertEqual(self.hours.next_open(saturday), pd.Timestamp('2024-02-05 09:30', tz='America/New_York'))
+        self.assertEqual(self.hours.last_close(saturday), pd.Timestamp('2024-02-02 16:00', tz='America/New_York'))
+        self.assertEqual(self.hours.last_open(saturday), pd.Timestamp('2024-02-02 09:30', tz='America/New_York'))
+        midday = pd.Timestamp('2024-01-31 12:00', tz='America/New_York')
+        self.assertEqual(self.hours.next_close(midday), pd.Timestamp('2024-01-31 16:00', tz='America/New_York'))
+        self.assertEqual(self.hours.last_open(midday), pd.Timestamp('2024-01-31 09:30', tz='America/New_York'))
+
+
+class TestPolling(unittest.TestCase):
+
+    def test_poll_interval(self):
+        # Per-minute rate: 30 symbols at 5 calls a minute take 6 minutes a round.
+        self.assertEqual(poll_interval(30, 3600, 5), 360.0)
+        self.assertEqual(poll_interval(2, 3600, 75), 60.0)
+        # 25 calls left for 2 symbols is 12 rounds over the 6 hours to the close.
+        self.assertEqual(poll_interval(2, 6 * 3600, 75, calls_left=25), 1800.0)
+        self.assertEqual(poll_interval(2, 6 * 3600, 75, calls_left=1), 6 * 3600)
+
+    def test_new_bars(self):
+        self.assertEqual(len(new_bars(BARS.iloc[:250], BARS.iloc[200:260])), 10)
+        self.assertEqual(len(new_bars(BARS.iloc[:0], BARS.iloc[200:260])), 60)
+        self.assertTrue(new_bars(BARS, BARS.iloc[200:]).empty)
+
+        # The last bar is returned again once its values change.
+        revised = BARS.iloc[200:].copy()
+        revised.iloc[-1, revised.columns.get_loc('close')] += 1
+        self.assertEqual(list(new_bars(BARS, revised).index), [BARS.index[-1]])
+
+
+class TestWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.now = [pd.Timestamp('2024-01-31 11:00', tz='America/New_York')]
+        self.api = FakeAPI()
+        self.lines = []
+        self.watcher = Watcher(self.api, ['ibm', 'MSFT'], self.tmp_dir.name, indicators=['sma:5', 'rsi:14'],
+                               clock=lambda: self.now[0], sleep=lambda seconds: None, log=self.lines.append)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_only_new_bars_are_applied(self):
+        self.assertEqual(self.watcher.bootstrap(), {'IBM': 250, 'MSFT': 250})
+        report = os.path.join(self.tmp_dir.name, 'IBM', 'report.pdf')
+        built = os.path.getmtime(report)
+
+        self.assertEqual(self.watcher.poll(), {'IBM': 0, 'MSFT': 0})
+        self.assertEqual(os.path.getmtime(report), built)
+
+        self.api.visible = 253
+        recorder = instrumentation.enable()
+        try:
+            self.assertEqual(self.watcher.poll(), {'IBM': 3, 'MSFT': 3})
+        finally:
+            instrumentation.disable()
+        # The series keeps as many bars as the full fetch returned.
+        intraday = self.watcher.datasets['IBM']['TIME_SERIES_INTRADAY']
+        pd.testing.assert_frame_equal(intraday, BARS.iloc[3:253])
+
+        # The indicators advanced bar by bar match a batch computation.
+        expected = IndicatorEngine(['sma:5', 'rsi:14']).compute(BARS.iloc[:253]).iloc[-1]
+        self.assertIn(f"IBM: 3 new bars, close {BARS['close'].iloc[252]:.2f}, sma_5 {expected['sma_5']:.2f}, "
+                      f"rsi_14 {expected['rsi_14']:.2f}", self.lines[-2])
+
+        # Only the daily plot was redrawn; the weekly and monthly plots were reused.
+        plots = [row for row in recorder.summary() if row['stage'] == 'plot']
+        self.assertEqual(plots[0]['calls'], 6)
+        self.assertEqual(plots[0]['cache_hits'], 4)
+        self.assertListEqual(self.api.fetches, ['IBM', 'MSFT'])
+
+    def test_forming_bar_is_revised(self):
+        history = HistoryStore(os.path.join(self.tmp_dir.name, 'history'))
+        watcher = Watcher(self.api, ['IBM'], self.tmp_dir.name, history=history, indicators=['sma:5', 'rsi:14'],
+                          clock=lambda: self.now[0], log=self.lines.append)
+        watcher.bootstrap()
+
+        self.api.forming_close = BARS['close'].iloc[249] + 2.0
+        self.assertEqual(watcher.poll(), {'IBM': 1})
+        self.assertEqual(watcher.poll(), {'IBM': 0})
+
+        expected = BARS.iloc[:250].copy()
+        expected.iloc[-1, expected.columns.get_loc('close')] = self.api.forming_close
+        pd.testing.assert_frame_equal(watcher.datasets['IBM']['TIME_SERIES_INTRADAY'], expected, check_freq=False)
+        self.assertEqual(history.load('IBM', '60min')['close'].iloc[-1], self.api.forming_close)
+
+        # The indicators redid the last bar's step rather than appending it again.
+        values = IndicatorEngine(['sma:5', 'rsi:14']).compute(expected).iloc[-1]
+        self.assertIn(f"IBM: last bar revised, close {self.api.forming_close:.2f}, sma_5 {values['sma_5']:.2f}, "
+                      f"rsi_14 {values['rsi_14']:.2f}", self.lines[-1])
+
+    def test_failed_symbol_does_not_stop_the_others(self):
+        watcher = Watcher(self.api, ['IBM', 'BAD', 'OFFLINE'], self.tmp_dir.name, clock=lambda: self.now[0],
+                          log=self.lines.append)
+        self.assertIn('Invalid symbol', watcher.bootstrap()['BAD'])
+        self.assertIn('BAD: Invalid symbol please use a correct ticker symbol.', self.lines)
+
+        # A symbol whose full fetch failed is fetched again instead of polled.
+        self.api.fetches.clear()
+        results = watcher.poll()
+        self.assertEqual(results['IBM'], 0)
+        self.assertIn('Invalid symbol', results['BAD'])
+        self.assertEqual(results['OFFLINE'], 'error: Connection refused')
+        self.assertListEqual(self.api.fetches, ['BAD'])
+        self.assertListEqual(self.api.polls, ['IBM', 'OFFLINE'])
+
+    def test_schedule(self):
+        # Open: fetch everything, then poll every minute.
+        self.assertEqual(self.watcher.step(), 60.0)
+        self.assertListEqual(self.api.fetches, ['IBM', 'MSFT'])
+        self.assertEqual(self.watcher.step(), 60.0)
+        self.assertListEqual(self.api.polls, ['IBM', 'MSFT'])
+
+        # Just before the close the next round is just after it, to catch the last bars.
+        self.now[0] = pd.Timestamp('2024-01-31 15:59:30', tz='America/New_York')
+        self.assertEqual(self.watcher.step(), 31.0)
+        self.now[0] = pd.Timestamp('2024-01-31 16:00:01', tz='America/New_York')
+        self.watcher.step()
+        self.assertEqual(len(self.api.polls), 6)
+
+        # Closed and polled: idle until the next open, an hour at a time.
+        self.now[0] = pd.Timestamp('2024-01-31 16:30', tz='America/New_York')
+        self.assertEqual(self.watcher.step(), 3600.0)
+        self.now[0] = pd.Timestamp('2024-02-01 09:00', tz='America/New_York')
+        self.assertEqual(self.watcher.step(), 1800.0)
+        self.assertEqual(len(self.api.polls), 6)
+
+        # A new session starts with a full fetch.
+        self.now[0] = pd.Timestamp('2024-02-01 09:30', tz='America/New_York')
+        self.watcher.step()
+        self.assertListEqual(self.api.fetches, ['IBM', 'MSFT'] * 2)
+        self.assertEqual(len(self.api.polls), 6)
+
+    def test_daily_budget_spreads_polls(self):
+        class Scheduler:
+            def remaining(self, horizon):
+                return 14.0
+
+        watcher = Watcher(self.api, ['IBM', 'MSFT'], self.tmp_dir.name, scheduler=Scheduler(), calls_per_minute=75,
+                          clock=lambda: self.now[0])
+        # Five hours to the close, two calls kept for the final round: six rounds of two.
+        self.assertEqual(watcher.next_step(self.now[0]), 5 * 3600 / 6)
+
+
+if __name__ == '__main__':
+    unittest.main()